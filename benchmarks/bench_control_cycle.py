@@ -0,0 +1,274 @@
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" bench_control_cycle.py """
+
+"""Benchmark of one control cycle for every heating operating mode.
+
+Pre každý režim HEATING_OPERATING_MODE_* a dva scenáre zmeria čas a alokácie
+jednotlivých fáz cyklu (read, decide, apply, actuate, trace, publish) a celého
+heating_control_system proti náhradnému hass objektu z replay.py:
+- steady - vstupy sa nemenia, akčné členy sú v požadovanom stave (žiadny príkaz),
+- transitional - vstupy sa každý cyklus striedajú medzi studenými zásobníkmi
+  s požiadavkou termostatu a teplými bez nej, rozhodnutie sa preklápa
+  a odosielajú sa príkazy.
+
+Výsledky idú do JSON súboru (strojovo čitateľné, na porovnanie medzi verziami)
+a ako tabuľka na výstup. Súhrn uvádza, akú časť okna zlučovania
+(COALESCE_WINDOW_MIN) a intervalu záložného cyklu (DEFAULT_FALLBACK_CHECK_INTERVAL)
+cyklus zaberie.
+
+Spustenie z koreňa repozitára (vyžaduje nainštalovaný Home Assistant):
+    python benchmarks/bench_control_cycle.py --output bench_control_cycle.json
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from homeassistant.const import STATE_ON, STATE_OFF
+
+from custom_components.heating_controller.const import *
+from custom_components.heating_controller.control_logic import decide
+from custom_components.heating_controller.cycle_metrics import CYCLE_PHASES
+from custom_components.heating_controller.replay import Replay, replay_environment
+
+PHASES = CYCLE_PHASES  # read, decide, apply, actuate, trace, publish
+SCENARIOS = ("steady", "transitional")
+EPOCH = 1_767_225_600.0  # pevný virtuálny čas (2026-01-01 00:00 UTC)
+STEP = 30.0  # s virtuálneho času medzi meranými cyklami - dobehnú debounce a potvrdenia príkazov
+
+# Teploty (ACC1, ACC2, TUV) - studené a teplé zásobníky, striedajú sa v scenári transitional
+COLD = ("36.0", "34.0", "38.0")
+WARM = ("58.0", "56.0", "55.0")
+
+
+def prepare(replay: Replay, mode: int) -> None:
+    """
+    Inštancia v stave ready nad náhradným hass, akčné členy poslúchajú príkazy hneď.
+    Volá sa vnútri replay_environment - hass_started plánuje termíny cez virtuálne hodiny.
+    """
+    instance = replay.instance
+    settings = instance.settings
+    states = {
+        instance.SWITCH_ENTITY_AUTOMATIC_MODE: STATE_ON,
+        instance.SWITCH_ENTITY_ACC1_ENABLE: STATE_ON,
+        instance.SWITCH_ENTITY_ACC2_ENABLE: STATE_ON,
+        instance.SWITCH_ENTITY_HEAT_DHW_FROM_ACC: STATE_OFF,
+        instance.SWITCH_ENTITY_HP_ACC: STATE_ON,
+        instance.SWITCH_ENTITY_HP_DHW: STATE_OFF,
+        instance.SWITCH_ENTITY_HEATING_SOURCE_ON_OFF: STATE_ON,
+        instance.NUMBER_ENTITY_DHW_TARGET_TEMPERATURE: str(float(DEFAULT_DHW_TARGET_TEMPERATURE)),
+        instance.NUMBER_ENTITY_ACC_TARGET_TEMPERATURE: str(float(DEFAULT_ACC_TARGET_TEMPERATURE)),
+        instance.SELECT_ENTITY_HEATING_OPERATING_MODE: str(mode),
+        settings.entity_thermostat_state: STATE_ON,
+        settings.entity_heating_state: STATE_ON,
+        settings.entity_floor_heating_state: STATE_ON,
+    }
+    for entity_id in (
+        settings.entity_valve_from_hp_to_acc_or_dhw, settings.entity_valve_output_acc1, settings.entity_valve_output_acc2,
+        settings.entity_valve_input_acc1, settings.entity_valve_input_acc2, settings.entity_valve_from_acc_to_heat_or_dhw,
+        settings.entity_valve_output_heating,
+    ):
+        states[entity_id] = STATE_CLOSED
+    for entity_id in (
+        settings.entity_water_pump_acc_output, settings.entity_water_pump_dhw,
+        settings.entity_water_pump_floor_heating, settings.entity_water_pump_heating,
+    ):
+        states[entity_id] = STATE_OFF
+    for entity_id, state in states.items():
+        replay.hass.async_set(entity_id, state)
+    set_temperatures(replay, COLD)
+    instance.set_on_ready(lambda: None)
+    instance.hass_started()
+    assert instance.ready
+
+
+def set_temperatures(replay: Replay, temperatures: tuple[str, str, str]) -> None:
+    settings = replay.instance.settings
+    for entity_id, state in zip((settings.entity_temp_acc1, settings.entity_temp_acc2, settings.entity_temp_dhw), temperatures):
+        replay.hass.async_set(entity_id, state)
+
+
+def set_inputs(replay: Replay, warm: bool) -> None:
+    """Studené zásobníky a požiadavka termostatu, alebo teplé zásobníky bez požiadavky."""
+    set_temperatures(replay, WARM if warm else COLD)
+    replay.hass.async_set(replay.instance.settings.entity_thermostat_state, STATE_OFF if warm else STATE_ON)
+
+
+async def advance(replay: Replay, seconds: float) -> None:
+    """Posunie virtuálny čas - potvrdenia príkazov, debounce a termíny plánovača (mimo merania)."""
+    await replay._async_advance(replay.clock.now + seconds)
+
+
+async def run_phases(replay: Replay) -> tuple[dict[str, int], int]:
+    """Jeden cyklus rozdelený na fázy ako _control_cycle. Vráti (fáza -> ns, počet príkazov)."""
+    instance = replay.instance
+    clock = time.perf_counter_ns
+    t0 = clock()
+    snapshot = instance._read_inputs()
+    t1 = clock()
+    plan = decide(snapshot, instance.settings, instance.state)
+    t2 = clock()
+    instance._apply_plan(snapshot, plan)
+    t3 = clock()
+    commands_sent = await instance._actuate(snapshot, plan)
+    t4 = clock()
+    instance._record_trace(snapshot, plan, commands_sent)
+    t5 = clock()
+    instance._publish_feedback()
+    t6 = clock()
+    return dict(zip(PHASES, (t1 - t0, t2 - t1, t3 - t2, t4 - t3, t5 - t4, t6 - t5))), commands_sent
+
+
+async def bench(mode: int, scenario: str, iterations: int, allocation_iterations: int) -> dict:
+    replay = Replay(echo=True)
+    replay.clock.now = EPOCH
+    transitional = scenario == "transitional"
+    result = {"mode": mode, "scenario": scenario}
+
+    with replay_environment(replay.clock):
+        prepare(replay, mode)
+
+        # zahriatie - pri steady sa akčné členy ustália v požadovanom stave
+        for _ in range(5):
+            await replay.instance.heating_control_system()
+            await advance(replay, STEP)
+
+        def next_inputs(index: int) -> None:
+            if transitional:
+                set_inputs(replay, bool(index % 2))
+
+        # Čas fáz
+        samples = {phase: [] for phase in PHASES}
+        commands = 0
+        for index in range(iterations):
+            next_inputs(index)
+            durations, sent = await run_phases(replay)
+            commands += sent
+            for phase, duration in durations.items():
+                samples[phase].append(duration)
+            await advance(replay, STEP)
+        result["commands_per_cycle"] = round(commands / iterations, 2)
+
+        # Celý heating_control_system (bez rozdelenia na fázy)
+        samples["cycle"] = []
+        for index in range(iterations):
+            next_inputs(index)
+            started = time.perf_counter_ns()
+            await replay.instance.heating_control_system()
+            samples["cycle"].append(time.perf_counter_ns() - started)
+            await advance(replay, STEP)
+        result["time_us"] = {phase: statistics_us(values) for phase, values in samples.items()}
+
+        # Alokácie fáz (samostatný beh - tracemalloc spomaľuje meranie času)
+        peaks = {phase: [] for phase in (*PHASES, "cycle")}
+        tracemalloc.start()
+        try:
+            for index in range(allocation_iterations):
+                next_inputs(index)
+                for phase, peak in (await allocation_phases(replay)).items():
+                    peaks[phase].append(peak)
+                await advance(replay, STEP)
+        finally:
+            tracemalloc.stop()
+        result["alloc_peak_bytes"] = {phase: sorted(values)[len(values) // 2] for phase, values in peaks.items()}
+        await replay.instance.async_shutdown()
+    return result
+
+
+async def allocation_phases(replay: Replay) -> dict[str, int]:
+    """Špička alokovanej pamäte (B) počas každej fázy a celého cyklu."""
+    instance = replay.instance
+    peaks = {}
+
+    async def measured(phase, action):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        value = action()
+        if asyncio.iscoroutine(value):
+            value = await value
+        peaks[phase] = tracemalloc.get_traced_memory()[1] - before
+        return value
+
+    snapshot = await measured("read", instance._read_inputs)
+    plan = await measured("decide", lambda: decide(snapshot, instance.settings, instance.state))
+    await measured("apply", lambda: instance._apply_plan(snapshot, plan))
+    commands_sent = await measured("actuate", lambda: instance._actuate(snapshot, plan))
+    await measured("trace", lambda: instance._record_trace(snapshot, plan, commands_sent))
+    await measured("publish", instance._publish_feedback)
+    peaks["cycle"] = max(peaks.values())
+    return peaks
+
+
+def statistics_us(samples: list[int]) -> dict[str, float]:
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        "min": round(ordered[0] / 1000, 2),
+        "median": round(ordered[count // 2] / 1000, 2),
+        "p95": round(ordered[min(count - 1, int(count * 0.95))] / 1000, 2),
+        "max": round(ordered[-1] / 1000, 2),
+        "mean": round(sum(ordered) / count / 1000, 2),
+    }
+
+
+async def async_main(iterations: int, allocation_iterations: int) -> dict:
+    results = []
+    for mode in HEATING_OPERATING_MODE_OPTIONS:
+        for scenario in SCENARIOS:
+            results.append(await bench(mode, scenario, iterations, allocation_iterations))
+
+    worst = max(result["time_us"]["cycle"]["p95"] for result in results)
+    return {
+        "benchmark": "control_cycle",
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "iterations": iterations,
+        "allocation_iterations": allocation_iterations,
+        "results": results,
+        "summary": {
+            "worst_cycle_p95_us": worst,
+            # podiel okna zlučovania a intervalu záložného cyklu, ktorý zaberie najhorší cyklus (p95)
+            "coalesce_window_fraction": round(worst / 1e6 / COALESCE_WINDOW_MIN, 6),
+            "fallback_interval_fraction": round(worst / 1e6 / DEFAULT_FALLBACK_CHECK_INTERVAL, 9),
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Control-cycle cost per heating operating mode.")
+    parser.add_argument("--iterations", type=int, default=2000)
+    parser.add_argument("--allocation-iterations", type=int, default=200)
+    parser.add_argument("--output", default="bench_control_cycle.json", help="JSON file with the results")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    report = asyncio.run(async_main(args.iterations, args.allocation_iterations))
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+
+    print(f"{'mode':>4} {'scenario':<13} {'cmd/cycle':>9} " + " ".join(f"{phase:>8}" for phase in (*PHASES, "cycle")) + f" {'p95':>8} {'alloc B':>8}")
+    for result in report["results"]:
+        medians = " ".join(f"{result['time_us'][phase]['median']:8.1f}" for phase in (*PHASES, "cycle"))
+        print(f"{result['mode']:>4} {result['scenario']:<13} {result['commands_per_cycle']:>9} {medians} "
+              f"{result['time_us']['cycle']['p95']:8.1f} {result['alloc_peak_bytes']['cycle']:8}")
+    summary = report["summary"]
+    print(f"median times in us; worst p95 cycle {summary['worst_cycle_p95_us']} us = "
+          f"{summary['coalesce_window_fraction'] * 100:.3f} % of the {COALESCE_WINDOW_MIN} s coalescing window, "
+          f"{summary['fallback_interval_fraction'] * 100:.6f} % of the {DEFAULT_FALLBACK_CHECK_INTERVAL} s fallback interval")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
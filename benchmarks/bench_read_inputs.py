@@ -0,0 +1,103 @@
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" bench_read_inputs.py """
+
+"""Micro-benchmark of reading the inputs of one control cycle.
+
+Porovná jednorazové čítanie cez predkompilovanú tabuľku vstupov (inputs.read_snapshot,
+s kontrolou každej entity aj s bitovou mapou InputHealth) s pôvodným spôsobom - samostatné hass.states.get pre každú entitu, kontrola dostupnosti
+voči novo vytvorenému zoznamu a formátovanie debug správ pre každý blok.
+
+Spustenie z koreňa repozitára (vyžaduje nainštalovaný Home Assistant):
+    python benchmarks/bench_read_inputs.py
+"""
+
+import logging
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from homeassistant.const import STATE_ON, STATE_UNAVAILABLE, STATE_UNKNOWN
+
+from custom_components.heating_controller.const import STATE_NONE
+from custom_components.heating_controller.heating_controller import Heating_Controller_Instance
+from custom_components.heating_controller.inputs import INPUT_SWITCH, InputHealth, build_input_table, read_snapshot
+
+LOGGER = logging.getLogger("bench_read_inputs")
+
+
+class State:
+    __slots__ = ("state",)
+
+    def __init__(self, state):
+        self.state = state
+
+
+class States:
+    """Minimal stand-in of hass.states holding prebuilt State objects."""
+
+    def __init__(self, values):
+        self._states = {entity_id: State(value) for entity_id, value in values.items()}
+
+    def get(self, entity_id):
+        return self._states.get(entity_id)
+
+    def is_state(self, entity_id, value):
+        state = self._states.get(entity_id)
+        return state is not None and state.state == value
+
+
+def legacy_read(states, table):
+    """Per-entity reads in the style of the original _read_inputs."""
+    values = []
+    for descriptor in table:
+        if descriptor.kind == INPUT_SWITCH:
+            values.append(states.is_state(descriptor.entity_id, STATE_ON))
+            continue
+        state = states.get(descriptor.entity_id)
+        if state is None:
+            return None
+        if state.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
+            LOGGER.warning(f"{descriptor.label} {descriptor.entity_id} is not available (state: {state.state})")
+            return None
+        values.append(state.state)
+        LOGGER.debug(f"{descriptor.label} {descriptor.entity_id}: {state.state}")
+    return values
+
+
+def main(number: int = 50000) -> None:
+    instance = Heating_Controller_Instance()
+    table = build_input_table(instance)
+    values = {}
+    for descriptor in table:
+        if descriptor.kind == INPUT_SWITCH:
+            values[descriptor.entity_id] = STATE_ON
+        elif descriptor.field == "heating_operating_mode":
+            values[descriptor.entity_id] = "3"
+        elif descriptor.label in ("Temperature sensor", "Internal entity"):
+            values[descriptor.entity_id] = "45.5"
+        else:
+            values[descriptor.entity_id] = "on"
+    states = States(values)
+
+    health = InputHealth(table)
+    health.validate(states)
+
+    snapshot = read_snapshot(states, table)
+    assert not snapshot.invalid, snapshot.invalid
+    assert read_snapshot(states, table, health.bitmap) == snapshot
+
+    legacy = timeit.timeit(lambda: legacy_read(states, table), number=number) / number * 1e6
+    compiled = timeit.timeit(lambda: read_snapshot(states, table), number=number) / number * 1e6
+    trusted = timeit.timeit(lambda: read_snapshot(states, table, health.bitmap), number=number) / number * 1e6
+    print(f"legacy per-entity read : {legacy:8.2f} us/cycle")
+    print(f"read_snapshot          : {compiled:8.2f} us/cycle")
+    print(f"read_snapshot + health : {trusted:8.2f} us/cycle")
+
+
+if __name__ == "__main__":
+    main()
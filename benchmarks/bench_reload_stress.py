@@ -0,0 +1,176 @@
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" bench_reload_stress.py """
+
+"""Reload-stress test of the Heating Controller config entry.
+
+Spustí skutočný HomeAssistant objekt (registre, config entries, platformy switch / sensor /
+number / select), pridá dva config entry integrácie (menné priestory heating_controller a
+heating_controller_2, spoločný StateChangeRouter) a striedavo ich 1000-krát znovu načíta cez
+hass.config_entries.async_reload - teda skutočné async_unload_entry + async_setup_entry.
+Počas reloadov musí počet odberov smerovača zostať konštantný. Po uvoľnení oboch entry
+nesmie zostať žiadna živá inštancia, časovač, odber udalostí, úloha, odber smerovača ani
+smerovač v hass.data (DATA_STATE_ROUTER) a pamäť alokovaná kódom integrácie po zahriatí nesmie rásť o viac ako MEMORY_GROWTH_LIMIT.
+
+Celková pamäť procesu rastie aj pri čistom unloade: HA 2024.1 pri unloade config entry
+volá len EntityPlatform.async_reset (nie async_destroy), takže každý reload nechá v
+hass.data["entity_platform"] 4 prázdne EntityPlatform objekty aj s prekladmi (~8.6 KiB).
+Tento rast sa vypíše samostatne ("HA entity platforms retained") a nezapočíta sa do limitu.
+Časovače sa počítajú len tie, ktorých callback patrí integrácii (vlastné časovače HA,
+napr. debouncer registra, bežia nezávisle). Odbery udalostí sa porovnávajú až po zápise
+odložených uložení registrov (EVENT_HOMEASSISTANT_FINAL_WRITE).
+
+Spustenie z koreňa repozitára (vyžaduje nainštalovaný Home Assistant):
+    python benchmarks/bench_reload_stress.py
+"""
+
+import asyncio
+import gc
+import logging
+import os
+import sys
+import tempfile
+import tracemalloc
+import weakref
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from homeassistant import bootstrap, config_entries, loader
+from homeassistant.const import EVENT_HOMEASSISTANT_FINAL_WRITE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import DATA_ENTITY_PLATFORM
+
+from custom_components.heating_controller.const import CONF_ENTITY_NAMESPACE, DATA_STATE_ROUTER, DOMAIN
+
+# Povolený rast pamäte alokovanej kódom integrácie medzi koncom zahriatia a posledným reloadom (B)
+MEMORY_GROWTH_LIMIT = 16 * 1024
+# Alokácie, v ktorých zásobníku je kód integrácie
+INTEGRATION_FILTER = tracemalloc.Filter(
+    True, os.path.join("*", "custom_components", DOMAIN, "*"), all_frames=True
+)
+
+
+async def async_start_hass(config_dir: str) -> HomeAssistant:
+    """HomeAssistant s registrami a config entries, bez ostatných integrácií (http, recorder, ...)."""
+    hass = HomeAssistant(config_dir)
+    hass.config.skip_pip = True
+    loader.async_setup(hass)
+    hass.config_entries = config_entries.ConfigEntries(hass, {})
+    await hass.config_entries.async_initialize()
+    await bootstrap.load_registries(hass)
+    await hass.async_start()
+    return hass
+
+
+async def async_settle(hass: HomeAssistant) -> None:
+    """Zapíše odložené uloženia registrov (ich časovače a odbery nepatria integrácii)."""
+    await hass.async_block_till_done()
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_FINAL_WRITE)
+    await hass.async_block_till_done()
+
+
+def integration_memory() -> int:
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot().filter_traces([INTEGRATION_FILTER])
+    return sum(stat.size for stat in snapshot.statistics("filename"))
+
+
+def retained_platforms(hass: HomeAssistant) -> int:
+    return len(hass.data.get(DATA_ENTITY_PLATFORM, {}).get(DOMAIN, []))
+
+
+def _integration_callback(target) -> bool:
+    target = getattr(target, "target", target)  # HassJob
+    target = getattr(target, "__func__", target)  # viazaná metóda
+    return getattr(target, "__module__", "").startswith(f"custom_components.{DOMAIN}")
+
+
+def integration_timers(hass: HomeAssistant) -> int:
+    """Naplánované časovače, ktorých callback (alebo HassJob v argumentoch) patrí integrácii."""
+    return sum(
+        1 for handle in hass.loop._scheduled
+        if not handle.cancelled() and any(map(_integration_callback, (handle._callback, *handle._args)))
+    )
+
+
+def live_listeners(hass: HomeAssistant) -> int:
+    return sum(hass.bus.async_listeners().values())
+
+
+async def main(reloads: int = 1000, warmup: int = 100) -> None:
+    logging.disable(logging.CRITICAL)
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await async_start_hass(config_dir)
+        entries = [
+            config_entries.ConfigEntry(
+                version=1, minor_version=1, domain=DOMAIN, title=f"Reload stress {namespace}",
+                data={CONF_ENTITY_NAMESPACE: namespace}, source=config_entries.SOURCE_USER
+            )
+            for namespace in (DOMAIN, f"{DOMAIN}_2")
+        ]
+        instances = weakref.WeakSet()
+
+        # Prvý setup + unload mimo merania - načítanie modulov, registrácia entít v registri
+        for entry in entries:
+            await hass.config_entries.async_add(entry)
+        for entry in entries:
+            assert await hass.config_entries.async_unload(entry.entry_id)
+        await async_settle(hass)
+        assert DATA_STATE_ROUTER not in hass.data
+        listeners = live_listeners(hass)
+        tasks = len(asyncio.all_tasks())
+        platforms = retained_platforms(hass)
+
+        for entry in entries:
+            assert await hass.config_entries.async_setup(entry.entry_id)
+        router = hass.data[DATA_STATE_ROUTER]
+        subscriptions = len(router)
+        tracemalloc.start(32)
+        for number in range(reloads):
+            entry = entries[number % len(entries)]
+            instances.add(hass.data[DOMAIN][entry.entry_id]["instance"])
+            assert await hass.config_entries.async_reload(entry.entry_id)
+            # Druhá inštancia drží smerovač - ten istý objekt, rovnaký počet odberov
+            assert hass.data[DATA_STATE_ROUTER] is router
+            assert len(router) == subscriptions, f"router subscriptions: {len(router)} != {subscriptions}"
+            if number + 1 == warmup:
+                warm_memory = integration_memory()
+                warm_total = tracemalloc.get_traced_memory()[0]
+        end_memory = integration_memory()
+        end_total = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+
+        for entry in entries:
+            instances.add(hass.data[DOMAIN][entry.entry_id]["instance"])
+            assert await hass.config_entries.async_unload(entry.entry_id)
+        await async_settle(hass)
+        gc.collect()
+
+        results = {
+            "instances still alive": len(instances),
+            "orphaned timers": integration_timers(hass),
+            "orphaned listeners": live_listeners(hass) - listeners,
+            "orphaned tasks": len(asyncio.all_tasks()) - tasks,
+            "entries left in hass.data": len(hass.data.get(DOMAIN, {})),
+            "router subscriptions": len(router),
+            "router left in hass.data": int(DATA_STATE_ROUTER in hass.data),
+        }
+        print(f"{'reloads':<30}: {reloads}")
+        print(f"{'router subscriptions (loaded)':<30}: {subscriptions}")
+        for name, value in results.items():
+            print(f"{name:<30}: {value}")
+        print(f"integration memory after {warmup:<5}: {warm_memory / 1024:8.1f} KiB")
+        print(f"integration memory after {reloads:<5}: {end_memory / 1024:8.1f} KiB")
+        print(f"{'total memory growth':<30}: {(end_total - warm_total) / 1024:8.1f} KiB")
+        print(f"{'HA entity platforms retained':<30}: {retained_platforms(hass) - platforms}")
+        await hass.async_stop(force=True)
+
+        for name, value in results.items():
+            assert value == 0, f"{name}: {value}"
+        assert end_memory - warm_memory < MEMORY_GROWTH_LIMIT, f"memory grew by {(end_memory - warm_memory) / 1024:.1f} KiB after warm-up"
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
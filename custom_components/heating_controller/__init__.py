@@ -5,40 +5,53 @@ from __future__ import annotations
 
 """ __init__.py """
 
-import asyncio
 import logging
 import sys
+import time
 import importlib
+
+_import_started = time.perf_counter()
+
 import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry, Platform
 from homeassistant.core import HomeAssistant, ServiceCall, callback
 import homeassistant.helpers.config_validation as cv
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers.template import Template
-from homeassistant.helpers.event import async_call_later, async_track_time_interval, async_track_state_change_event
-from homeassistant.helpers.storage import Store
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.dispatcher import async_dispatcher_send
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity_registry import EVENT_ENTITY_REGISTRY_UPDATED
+from homeassistant.helpers.start import async_at_started
 from datetime import timedelta
 
-# Tieto importy sa načítajú dynamicky v async_setup_entry
-# from .heating_controller import Heating_Controller_Instance
-# from .const import *
-
-# Dočasný import DOMAIN pre použitie pred dynamickým loadom
-DOMAIN = "heating_controller"
+from .const import *
+from . import config_schema
+from .heating_controller import Heating_Controller_Instance
+from .state_router import StateChangeRouter
 
 LOGGER = logging.getLogger(__name__)
 PLATFORMS: list[Platform] = [Platform.SWITCH, Platform.SENSOR, Platform.NUMBER, Platform.SELECT]
 
+LOGGER.debug(f"Integration modules imported in {(time.perf_counter() - _import_started) * 1000:.1f} ms")
+
 
-def _reload_integration_modules():
-    """Vymaže a znovu načíta všetky moduly integrácie."""
-    modules_to_reload = [key for key in sys.modules if key.startswith(f"custom_components.{DOMAIN}")]
-    for module_name in modules_to_reload:
+def _hot_reload_integration_modules():
+    """
+    Vývojársky režim (CONF_DEV_HOT_RELOAD) - vymaže moduly integrácie z cache a načíta ich nanovo z disku.
+    __init__ a platformy (switch, sensor, number, select) drží HA vo vlastnej cache, zmeny v nich sa prejavia až po reštarte HA.
+    Volá sa v executore (import číta súbory z disku).
+    """
+    started = time.perf_counter()
+    keep = {__name__, *(f"{__name__}.{platform}" for platform in PLATFORMS)}
+    for module_name in [key for key in sys.modules if key.startswith(f"{__name__}.") and key not in keep]:
         del sys.modules[module_name]
         LOGGER.debug(f"Removed module from cache: {module_name}")
 
+    const_module = importlib.import_module(f"{__name__}.const")
+    schema_module = importlib.import_module(f"{__name__}.config_schema")
+    hc_module = importlib.import_module(f"{__name__}.heating_controller")
+    LOGGER.debug(f"Integration modules hot-reloaded in {(time.perf_counter() - started) * 1000:.1f} ms")
+    return const_module, schema_module, hc_module
+
 
 async def async_setup(hass: HomeAssistant, config: dict) -> bool:
     """Set up Heating Controller from configuration.yaml."""
@@ -57,237 +70,30 @@ async def async_setup(hass: HomeAssistant, config: dict) -> bool:
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Heating Controller from a config entry."""
     
-    # Reload modulov pre načítanie nového kódu bez reštartu HA
-    _reload_integration_modules()
-    
-    # Dynamický import po vymazaní cache
-#    const_module = importlib.import_module(f"custom_components.{DOMAIN}.const")
-#    hc_module = importlib.import_module(f"custom_components.{DOMAIN}.heating_controller")
-    
-    const_module = await hass.async_add_executor_job(
-        importlib.import_module, f"custom_components.{DOMAIN}.const"
-    )
-    hc_module = await hass.async_add_executor_job(
-        importlib.import_module, f"custom_components.{DOMAIN}.heating_controller"
-    )
-
-    # Import všetkých konstánt z const modulu do lokálneho namespace
-    globals().update({k: v for k, v in const_module.__dict__.items() if not k.startswith('_')})
-    
-    Heating_Controller_Instance = hc_module.Heating_Controller_Instance
+    # Vývojársky hot-reload - nový kód sa načíta pri reloade integrácie bez reštartu HA
+    if entry.options.get(CONF_DEV_HOT_RELOAD, DEFAULT_DEV_HOT_RELOAD):
+        const_module, schema_module, hc_module = await hass.async_add_executor_job(_hot_reload_integration_modules)
+        globals().update({k: v for k, v in const_module.__dict__.items() if not k.startswith('_')})
+        globals().update(config_schema=schema_module, Heating_Controller_Instance=hc_module.Heating_Controller_Instance)
 
-    # Načítanie základných konfiguračných parametrov
-    timeout_for_heat_dhw_from_acc = entry.options.get(
-        CONF_TIMEOUT_HEAT_DHW,
-        entry.data.get(CONF_TIMEOUT_HEAT_DHW, DEFAULT_TIMEOUT_HEAT_DHW)
-    )
-    temperature_delta_limit_acc_dhw = entry.options.get(
-        CONF_TEMPERATURE_DELTA_LIMIT_ACC_DHW,
-        entry.data.get(CONF_TEMPERATURE_DELTA_LIMIT_ACC_DHW, DEFAULT_TEMPERATURE_DELTA_LIMIT_ACC_DHW)
-    )
-    disabled_acc_temperature_limit = entry.options.get(
-        CONF_DISABLED_ACC_TEMPERATURE_LIMIT,
-        entry.data.get(CONF_DISABLED_ACC_TEMPERATURE_LIMIT, DEFAULT_DISABLED_ACC_TEMPERATURE_LIMIT)
-    )
-    min_temperature_for_heating = entry.options.get(
-        CONF_MIN_TEMPERATURE_FOR_HEATING,
-        entry.data.get(CONF_MIN_TEMPERATURE_FOR_HEATING, DEFAULT_MIN_TEMPERATURE_FOR_HEATING)
-    )
-    temperature_delta_limit_in_acc = entry.options.get(
-        CONF_TEMPERATURE_DELTA_LIMIT_IN_ACC,
-        entry.data.get(CONF_TEMPERATURE_DELTA_LIMIT_IN_ACC, DEFAULT_TEMPERATURE_DELTA_LIMIT_IN_ACC)
-    )
-    heating_source_temp_hysteresis = entry.options.get(
-        CONF_HEATING_SOURCE_TEMP_HYSTERESIS,
-        entry.data.get(CONF_HEATING_SOURCE_TEMP_HYSTERESIS, DEFAULT_HEATING_SOURCE_TEMP_HYSTERESIS)
-    )
-    heating_source_command_debounce_delay = entry.options.get(
-        CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY,
-        entry.data.get(CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY, DEFAULT_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY)
-    )
-    auxiliary_water_pump_for_heating = entry.options.get(
-        CONF_AUXILIARY_WATER_PUMP_FOR_HEATING,
-        entry.data.get(CONF_AUXILIARY_WATER_PUMP_FOR_HEATING, DEFAULT_AUXILIARY_WATER_PUMP_FOR_HEATING)
-    )
-    auxiliary_pump_booster_time = entry.options.get(
-        CONF_AUXILIARY_PUMP_BOOSTER_TIME,
-        entry.data.get(CONF_AUXILIARY_PUMP_BOOSTER_TIME, DEFAULT_AUXILIARY_PUMP_BOOSTER_TIME)
-    )
-
-    # Načítanie parametrov pre ovládanie ventilov
-    valve_output_acc_strict_mode = entry.options.get(
-        CONF_VALVE_OUTPUT_ACC_STRICT_MODE,
-        entry.data.get(CONF_VALVE_OUTPUT_ACC_STRICT_MODE, DEFAULT_VALVE_OUTPUT_ACC_STRICT_MODE)
-    )
-    valve_input_acc_strict_mode = entry.options.get(
-        CONF_VALVE_INPUT_ACC_STRICT_MODE,
-        entry.data.get(CONF_VALVE_INPUT_ACC_STRICT_MODE, DEFAULT_VALVE_INPUT_ACC_STRICT_MODE)
-    )
-    valve_input_acc_closing_delay_when_heating_source_stop = entry.options.get(
-        CONF_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP,
-        entry.data.get(CONF_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP, DEFAULT_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP)
-    )
-    valve_timeout = entry.options.get(
-        CONF_VALVE_TIMEOUT,
-        entry.data.get(CONF_VALVE_TIMEOUT, DEFAULT_VALVE_TIMEOUT)
-    )
-        
-    # Načítanie entít ventilov z konfigurácie
-    entity_valve_from_hp_to_acc_or_dhw = entry.options.get(
-        CONF_VALVE_FROM_TC_TO_ACC_OR_DHW,
-        entry.data.get(CONF_VALVE_FROM_TC_TO_ACC_OR_DHW, DEFAULT_ENTITY_VALVE_FROM_TC_TO_ACC_OR_DHW)
-    )
-    entity_valve_output_acc1 = entry.options.get(
-        CONF_VALVE_OUTPUT_ACC1,
-        entry.data.get(CONF_VALVE_OUTPUT_ACC1, DEFAULT_ENTITY_VALVE_OUTPUT_ACC1)
-    )
-    entity_valve_output_acc2 = entry.options.get(
-        CONF_VALVE_OUTPUT_ACC2,
-        entry.data.get(CONF_VALVE_OUTPUT_ACC2, DEFAULT_ENTITY_VALVE_OUTPUT_ACC2)
-    )
-    entity_valve_input_acc1 = entry.options.get(
-        CONF_VALVE_INPUT_ACC1,
-        entry.data.get(CONF_VALVE_INPUT_ACC1, DEFAULT_ENTITY_VALVE_INPUT_ACC1)
-    )
-    entity_valve_input_acc2 = entry.options.get(
-        CONF_VALVE_INPUT_ACC2,
-        entry.data.get(CONF_VALVE_INPUT_ACC2, DEFAULT_ENTITY_VALVE_INPUT_ACC2)
-    )
-    entity_valve_from_acc_to_heat_or_dhw = entry.options.get(
-        CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW,
-        entry.data.get(CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW, DEFAULT_ENTITY_VALVE_FROM_ACC_TO_HEAT_OR_DHW)
-    )
-    entity_valve_output_heating = entry.options.get(
-        CONF_VALVE_OUTPUT_HEATING,
-        entry.data.get(CONF_VALVE_OUTPUT_HEATING, DEFAULT_ENTITY_VALVE_OUTPUT_HEATING)
-    )
-
-    # Načítanie entít teplotných senzorov z konfigurácie
-    entity_temp_acc1 = entry.options.get(
-        CONF_SENSOR_TEMP_ACC1,
-        entry.data.get(CONF_SENSOR_TEMP_ACC1, DEFAULT_ENTITY_TEMP_ACC1)
-    )
-    entity_temp_acc2 = entry.options.get(
-        CONF_SENSOR_TEMP_ACC2,
-        entry.data.get(CONF_SENSOR_TEMP_ACC2, DEFAULT_ENTITY_TEMP_ACC2)
-    )
-    entity_temp_dhw = entry.options.get(
-        CONF_SENSOR_TEMP_DHW,
-        entry.data.get(CONF_SENSOR_TEMP_DHW, DEFAULT_ENTITY_TEMP_DHW)
-    )
-    
-    # Načítanie entít obehových čerpadiel z konfigurácie
-    entity_water_pump_acc_output = entry.options.get(
-        CONF_WATER_PUMP_ACC_OUTPUT,
-        entry.data.get(CONF_WATER_PUMP_ACC_OUTPUT, DEFAULT_ENTITY_WATER_PUMP_ACC_OUTPUT)
-    )
-    entity_water_pump_dhw = entry.options.get(
-        CONF_WATER_PUMP_DHW,
-        entry.data.get(CONF_WATER_PUMP_DHW, DEFAULT_ENTITY_WATER_PUMP_DHW)
-    )
-    entity_water_pump_floor_heating = entry.options.get(
-        CONF_WATER_PUMP_FLOOR_HEATING,
-        entry.data.get(CONF_WATER_PUMP_FLOOR_HEATING, DEFAULT_ENTITY_WATER_PUMP_FLOOR_HEATING)
-    )
-    entity_water_pump_heating = entry.options.get(
-        CONF_WATER_PUMP_HEATING,
-        entry.data.get(CONF_WATER_PUMP_HEATING, DEFAULT_ENTITY_WATER_PUMP_HEATING)
-    )
-    
-    # Načítanie entít stavov termostatov a tepelného čerpadla z konfigurácie
-    entity_thermostat_state = entry.options.get(
-        CONF_THERMOSTAT_STATE,
-        entry.data.get(CONF_THERMOSTAT_STATE, DEFAULT_ENTITY_THERMOSTAT_STATE)
-    )
-    entity_heating_state = entry.options.get(
-        CONF_HEATING_STATE,
-        entry.data.get(CONF_HEATING_STATE, DEFAULT_ENTITY_HEATING_STATE)
-    )
-    entity_floor_heating_state = entry.options.get(
-        CONF_FLOOR_HEATING_STATE,
-        entry.data.get(CONF_FLOOR_HEATING_STATE, DEFAULT_ENTITY_FLOOR_HEATING_STATE)
-    )
+    # Načítanie, prevod a overenie všetkých konfiguračných parametrov podľa schémy
+    config = config_schema.load_config(entry)
 
 # ******************************************************************************************
 # **** Uloženie všetkých nastavení do inštancie a do "core.config_entries"******************
 # ******************************************************************************************    
-    instance = Heating_Controller_Instance()
+    # Prefix interných entít - každá config entry (kotolňa) má vlastný, staršie entry bez neho používajú DOMAIN
+    instance = Heating_Controller_Instance(entry.data.get(CONF_ENTITY_NAMESPACE, DOMAIN))
     # Nastavenie hass objektu a entry_id do inštancie
     instance.hass = hass
+    instance.scheduler.hass = hass
     instance._entry_id = entry.entry_id
     
-    # Nastavenia základných parametrov
-    instance.settings.timeout_for_heat_dhw_from_acc = timeout_for_heat_dhw_from_acc
-    instance.settings.temperature_delta_limit_acc_dhw = temperature_delta_limit_acc_dhw
-    instance.settings.disabled_acc_temperature_limit = disabled_acc_temperature_limit
-    instance.settings.min_temperature_for_heating = min_temperature_for_heating
-    instance.settings.temperature_delta_limit_in_acc = temperature_delta_limit_in_acc
-    instance.settings.heating_source_temp_hysteresis = heating_source_temp_hysteresis
-    instance.settings.heating_source_command_debounce_delay = heating_source_command_debounce_delay
-    instance.settings.auxiliary_water_pump_for_heating = int(auxiliary_water_pump_for_heating)
-    instance.settings.auxiliary_pump_booster_time = auxiliary_pump_booster_time
-    # Nastavenie parametrov pre ovládanie ventilov
-    instance.settings.valve_output_acc_strict_mode = int(valve_output_acc_strict_mode)
-    instance.settings.valve_input_acc_strict_mode = int(valve_input_acc_strict_mode)
-    instance.settings.valve_input_acc_closing_delay_when_heating_source_stop = valve_input_acc_closing_delay_when_heating_source_stop
-    instance.settings.valve_timeout = valve_timeout
-    # Entity ventilov
-    instance.settings.entity_valve_from_hp_to_acc_or_dhw = entity_valve_from_hp_to_acc_or_dhw
-    instance.settings.entity_valve_output_acc1 = entity_valve_output_acc1
-    instance.settings.entity_valve_output_acc2 = entity_valve_output_acc2
-    instance.settings.entity_valve_input_acc1 = entity_valve_input_acc1
-    instance.settings.entity_valve_input_acc2 = entity_valve_input_acc2
-    instance.settings.entity_valve_from_acc_to_heat_or_dhw = entity_valve_from_acc_to_heat_or_dhw
-    instance.settings.entity_valve_output_heating = entity_valve_output_heating
-    # Entity teplotných senzorov
-    instance.settings.entity_temp_acc1 = entity_temp_acc1
-    instance.settings.entity_temp_acc2 = entity_temp_acc2
-    instance.settings.entity_temp_dhw = entity_temp_dhw
-    # Entity obehových čerpadiel
-    instance.settings.entity_water_pump_acc_output = entity_water_pump_acc_output
-    instance.settings.entity_water_pump_dhw = entity_water_pump_dhw
-    instance.settings.entity_water_pump_floor_heating = entity_water_pump_floor_heating
-    instance.settings.entity_water_pump_heating = entity_water_pump_heating
-    # Entity stavov termostatov a tepelného čerpadla
-    instance.settings.entity_thermostat_state = entity_thermostat_state
-    instance.settings.entity_heating_state = entity_heating_state
-    instance.settings.entity_floor_heating_state = entity_floor_heating_state
+    config_schema.apply_config(instance.settings, config)
 
     try:
         hass.data.setdefault(DOMAIN, {})
-        hass.data[DOMAIN][entry.entry_id] = {
-            "instance": instance,
-            CONF_TIMEOUT_HEAT_DHW: timeout_for_heat_dhw_from_acc,
-            CONF_TEMPERATURE_DELTA_LIMIT_ACC_DHW: temperature_delta_limit_acc_dhw,
-            CONF_DISABLED_ACC_TEMPERATURE_LIMIT: disabled_acc_temperature_limit,
-            CONF_MIN_TEMPERATURE_FOR_HEATING: min_temperature_for_heating,
-            CONF_TEMPERATURE_DELTA_LIMIT_IN_ACC: temperature_delta_limit_in_acc,
-            CONF_HEATING_SOURCE_TEMP_HYSTERESIS: heating_source_temp_hysteresis,
-            CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY: heating_source_command_debounce_delay,
-            CONF_AUXILIARY_WATER_PUMP_FOR_HEATING: auxiliary_water_pump_for_heating,
-            CONF_AUXILIARY_PUMP_BOOSTER_TIME: auxiliary_pump_booster_time,
-            CONF_VALVE_OUTPUT_ACC_STRICT_MODE: valve_output_acc_strict_mode,
-            CONF_VALVE_INPUT_ACC_STRICT_MODE: valve_input_acc_strict_mode,
-            CONF_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP: valve_input_acc_closing_delay_when_heating_source_stop,
-            CONF_VALVE_TIMEOUT: valve_timeout,
-            CONF_VALVE_FROM_TC_TO_ACC_OR_DHW: entity_valve_from_hp_to_acc_or_dhw,
-            CONF_VALVE_OUTPUT_ACC1: entity_valve_output_acc1,
-            CONF_VALVE_OUTPUT_ACC2: entity_valve_output_acc2,
-            CONF_VALVE_INPUT_ACC1: entity_valve_input_acc1,
-            CONF_VALVE_INPUT_ACC2: entity_valve_input_acc2,
-            CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW: entity_valve_from_acc_to_heat_or_dhw,
-            CONF_VALVE_OUTPUT_HEATING: entity_valve_output_heating,
-            CONF_SENSOR_TEMP_ACC1: entity_temp_acc1,
-            CONF_SENSOR_TEMP_ACC2: entity_temp_acc2,
-            CONF_SENSOR_TEMP_DHW: entity_temp_dhw,
-            CONF_WATER_PUMP_ACC_OUTPUT: entity_water_pump_acc_output,
-            CONF_WATER_PUMP_DHW: entity_water_pump_dhw,
-            CONF_WATER_PUMP_FLOOR_HEATING: entity_water_pump_floor_heating,
-            CONF_WATER_PUMP_HEATING: entity_water_pump_heating,
-            CONF_THERMOSTAT_STATE: entity_thermostat_state,
-            CONF_HEATING_STATE: entity_heating_state,
-            CONF_FLOOR_HEATING_STATE: entity_floor_heating_state,
-        }
+        hass.data[DOMAIN][entry.entry_id] = {"instance": instance, **config}
 
         await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
         
@@ -297,116 +103,49 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
                 DOMAIN,
                 SERVICE_SYSTEM_STARTED,
                 system_started_service,
+                schema=SYSTEM_STARTED_SCHEMA,
             )
         
         # Register update listener for options changes
         entry.async_on_unload(entry.add_update_listener(update_listener))
             
-        async def async_update_settings_sensors(_now=None):
-            """Asynchrónna aktualizácia settings senzorov."""
-            async_dispatcher_send(hass, f"{DOMAIN}_settings_update_{entry.entry_id}")
-        
         async def async_run_heating_control(_now=None):
             """Periodické spúšťanie heating control system."""
             await instance.heating_control_system()
 
-        # Debounce premenné pre state_changed
-        state_change_debounce = {
-            "pending": False,
-            "cancel_callback": None,
-        }
-        
-        async def async_state_changed(event):
-            """Reakcia na zmenu stavu sledovaných entít s debounce."""
-            entity_id = event.data.get("entity_id")
-            old_state = event.data.get("old_state")
-            new_state = event.data.get("new_state")
-            
-            # Ignoruj ak sa stav nezmenil
-            if old_state and new_state and old_state.state == new_state.state:
+        @callback
+        def async_ready():
+            """Jediný prechod do stavu ready - aktualizácia settings senzorov a prvý kontrolný cyklus."""
+            async_dispatcher_send(hass, f"{DOMAIN}_settings_update_{entry.entry_id}")
+            instance.create_task(instance.heating_control_system())
+
+        instance.set_on_ready(async_ready)
+
+        @callback
+        def async_registry_updated(event):
+            """Entita zo vstupov bola pridaná / odstránená / premenovaná - vstupy sa overia znovu."""
+            # pred prechodom do stavu ready overí vstupy brána pripravenosti
+            if not instance.ready:
                 return
-            
-            LOGGER.debug(f"State change detected: {entity_id} changed from {old_state.state if old_state else 'None'} to {new_state.state if new_state else 'None'}")
-            
-            # Ak už je naplánované spustenie, netreba robiť nič
-            if state_change_debounce["pending"]:
-                LOGGER.debug("Debounce active, state change queued")
+            if (event.data.get("entity_id") not in instance.tracked_entities and
+                event.data.get("old_entity_id") not in instance.tracked_entities):
                 return
-            
-            # Označiť že máme pending zmenu
-            state_change_debounce["pending"] = True
-            
-            @callback
-            def _debounce_callback(_now=None):
-                """Callback po uplynutí debounce času."""
-                state_change_debounce["pending"] = False
-                state_change_debounce["cancel_callback"] = None
-                LOGGER.debug("Debounce finished, running heating control system")
-                hass.async_create_task(instance.heating_control_system())
-            
-            # Naplánovať spustenie po debounce delay
-            state_change_debounce["cancel_callback"] = async_call_later(
-                hass, DEBOUNCE_DELAY, _debounce_callback
-            )
+            LOGGER.debug(f"Entity registry {event.data.get('action')}: {event.data.get('entity_id')}")
+            instance.validate_inputs()
+            instance.coalescer.notify()
 
-        # Definovanie všetkých entít ktorých stavy sú sledované
-        tracked_entities = [
-            # Interné entity ovládacích prvkov
-            instance.SWITCH_ENTITY_AUTOMATIC_MODE,
-            instance.SWITCH_ENTITY_ACC1_ENABLE,
-            instance.SWITCH_ENTITY_ACC2_ENABLE,
-            instance.SWITCH_ENTITY_HEAT_DHW_FROM_ACC,
-            instance.SWITCH_ENTITY_HP_ACC,
-            instance.SWITCH_ENTITY_HP_DHW,
-            instance.SWITCH_ENTITY_HEATING_SOURCE_ON_OFF,
-            instance.NUMBER_ENTITY_DHW_TARGET_TEMPERATURE,
-            instance.NUMBER_ENTITY_ACC_TARGET_TEMPERATURE,
-            instance.SELECT_ENTITY_HEATING_OPERATING_MODE,
-            # Teplotné senzory
-            entity_temp_acc1,
-            entity_temp_acc2,
-            entity_temp_dhw,
-            # Ventily
-            entity_valve_from_hp_to_acc_or_dhw,
-            entity_valve_output_acc1,
-            entity_valve_output_acc2,
-            entity_valve_input_acc1,
-            entity_valve_input_acc2,
-            entity_valve_from_acc_to_heat_or_dhw,
-            entity_valve_output_heating,
-            # Čerpadlá
-            entity_water_pump_acc_output,
-            entity_water_pump_dhw,
-            entity_water_pump_floor_heating,
-            entity_water_pump_heating,
-            # Stavy
-            entity_thermostat_state,
-            entity_heating_state,
-            entity_floor_heating_state,
-        ]
-
-        # Odstránenie duplicít a None hodnôt
-        tracked_entities = list(set(filter(None, tracked_entities)))
-
-        # Plán jednorazových volaní
-        async_call_later(hass, 2, async_update_settings_sensors)
-        
-        # Periodické spúšťanie heating control system každé UPDATE_INTERVAL sekúnd
-        async_call_later(hass, 3, async_run_heating_control)  # Prvé spustenie po 30 sekundách
+        # Brána pripravenosti - po štarte HA overí vstupné entity a čaká na ich dostupnosť (najviac STARTUP_READY_TIMEOUT)
+        entry.async_on_unload(async_at_started(hass, instance.hass_started))
         entry.async_on_unload(
-
-            async_track_state_change_event(
-                hass,
-                tracked_entities,
-                async_state_changed
-            )
-
-            # async_track_time_interval(
-            #     hass,
-            #     async_run_heating_control,
-            #     timedelta(seconds=UPDATE_INTERVAL)
-            # )
+            hass.bus.async_listen(EVENT_ENTITY_REGISTRY_UPDATED, async_registry_updated)
         )
+        # Sledovanie zmien stavov vstupných entít - jeden odber pre každú entitu, pri zmene nastavení sa zosúladí
+        # Jeden spoločný smerovač pre všetky inštancie - každá entita má jeden odber bez ohľadu na počet kotolní
+        router = hass.data.get(DATA_STATE_ROUTER)
+        if router is None:
+            router = hass.data[DATA_STATE_ROUTER] = StateChangeRouter(hass)
+        instance.track_state_changes(instance.async_state_changed, router)
+        entry.async_on_unload(instance.untrack_state_changes)
 
 
         # Voliteľný fallback - periodická kontrola každých 60 sekúnd pre bezpečnosť
@@ -434,6 +173,9 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+SYSTEM_STARTED_SCHEMA = vol.Schema({vol.Optional(ATTR_ENTRY_ID): cv.string})
+
+
 async def system_started_service(call: ServiceCall) -> None:
     """Handle system started service call."""
     try:
@@ -441,11 +183,17 @@ async def system_started_service(call: ServiceCall) -> None:
             LOGGER.error("No integrations configured")
             return
 
-        entry_id = next(iter(call.hass.data[DOMAIN].keys()))
-        instance = call.hass.data[DOMAIN][entry_id].get("instance")
+        # Cieľom je jedna config entry (entry_id), bez neho všetky inštancie
+        entry_id = call.data.get(ATTR_ENTRY_ID)
+        if entry_id is not None and entry_id not in call.hass.data[DOMAIN]:
+            LOGGER.error(f"Heating Controller entry {entry_id} not found")
+            return
+        entry_ids = [entry_id] if entry_id is not None else list(call.hass.data[DOMAIN])
 
-        if instance:
-            await call.hass.async_add_executor_job(instance.system_started)
+        for entry_id in entry_ids:
+            instance = call.hass.data[DOMAIN][entry_id].get("instance")
+            if instance:
+                await call.hass.async_add_executor_job(instance.system_started)
 
     except Exception as ex:
         LOGGER.error("Error in system_started: %s", ex)        
@@ -454,137 +202,7 @@ async def system_started_service(call: ServiceCall) -> None:
 async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Handle options update."""
 
-    # Načítanie základných konfiguračných parametrov
-    timeout_for_heat_dhw_from_acc = entry.options.get(
-        CONF_TIMEOUT_HEAT_DHW,
-        entry.data.get(CONF_TIMEOUT_HEAT_DHW, DEFAULT_TIMEOUT_HEAT_DHW)
-    )
-    temperature_delta_limit_acc_dhw = entry.options.get(
-        CONF_TEMPERATURE_DELTA_LIMIT_ACC_DHW,
-        entry.data.get(CONF_TEMPERATURE_DELTA_LIMIT_ACC_DHW, DEFAULT_TEMPERATURE_DELTA_LIMIT_ACC_DHW)
-    )
-    disabled_acc_temperature_limit = entry.options.get(
-        CONF_DISABLED_ACC_TEMPERATURE_LIMIT,
-        entry.data.get(CONF_DISABLED_ACC_TEMPERATURE_LIMIT, DEFAULT_DISABLED_ACC_TEMPERATURE_LIMIT)
-    )
-    min_temperature_for_heating = entry.options.get(
-        CONF_MIN_TEMPERATURE_FOR_HEATING,
-        entry.data.get(CONF_MIN_TEMPERATURE_FOR_HEATING, DEFAULT_MIN_TEMPERATURE_FOR_HEATING)
-    )
-    temperature_delta_limit_in_acc = entry.options.get(
-        CONF_TEMPERATURE_DELTA_LIMIT_IN_ACC,
-        entry.data.get(CONF_TEMPERATURE_DELTA_LIMIT_IN_ACC, DEFAULT_TEMPERATURE_DELTA_LIMIT_IN_ACC)
-    )
-    heating_source_temp_hysteresis = entry.options.get(
-        CONF_HEATING_SOURCE_TEMP_HYSTERESIS,
-        entry.data.get(CONF_HEATING_SOURCE_TEMP_HYSTERESIS, DEFAULT_HEATING_SOURCE_TEMP_HYSTERESIS)
-    )
-    heating_source_command_debounce_delay = entry.options.get(
-        CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY,
-        entry.data.get(CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY, DEFAULT_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY)
-    )
-    auxiliary_water_pump_for_heating = entry.options.get(
-        CONF_AUXILIARY_WATER_PUMP_FOR_HEATING,
-        entry.data.get(CONF_AUXILIARY_WATER_PUMP_FOR_HEATING, DEFAULT_AUXILIARY_WATER_PUMP_FOR_HEATING)
-    )
-    auxiliary_pump_booster_time = entry.options.get(
-        CONF_AUXILIARY_PUMP_BOOSTER_TIME,
-        entry.data.get(CONF_AUXILIARY_PUMP_BOOSTER_TIME, DEFAULT_AUXILIARY_PUMP_BOOSTER_TIME)
-    )
-
-    # Načítanie parametrov pre ovládanie ventilov
-    valve_output_acc_strict_mode = entry.options.get(
-        CONF_VALVE_OUTPUT_ACC_STRICT_MODE,
-        entry.data.get(CONF_VALVE_OUTPUT_ACC_STRICT_MODE, DEFAULT_VALVE_OUTPUT_ACC_STRICT_MODE)
-    )
-    valve_input_acc_strict_mode = entry.options.get(
-        CONF_VALVE_INPUT_ACC_STRICT_MODE,
-        entry.data.get(CONF_VALVE_INPUT_ACC_STRICT_MODE, DEFAULT_VALVE_INPUT_ACC_STRICT_MODE)
-    )
-    valve_input_acc_closing_delay_when_heating_source_stop = entry.options.get(
-        CONF_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP,
-        entry.data.get(CONF_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP, DEFAULT_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP)
-    )
-    valve_timeout = entry.options.get(
-        CONF_VALVE_TIMEOUT,
-        entry.data.get(CONF_VALVE_TIMEOUT, DEFAULT_VALVE_TIMEOUT)
-    )
-        
-    # Načítanie entít ventilov z konfigurácie
-    entity_valve_from_hp_to_acc_or_dhw = entry.options.get(
-        CONF_VALVE_FROM_TC_TO_ACC_OR_DHW,
-        entry.data.get(CONF_VALVE_FROM_TC_TO_ACC_OR_DHW, DEFAULT_ENTITY_VALVE_FROM_TC_TO_ACC_OR_DHW)
-    )
-    entity_valve_output_acc1 = entry.options.get(
-        CONF_VALVE_OUTPUT_ACC1,
-        entry.data.get(CONF_VALVE_OUTPUT_ACC1, DEFAULT_ENTITY_VALVE_OUTPUT_ACC1)
-    )
-    entity_valve_output_acc2 = entry.options.get(
-        CONF_VALVE_OUTPUT_ACC2,
-        entry.data.get(CONF_VALVE_OUTPUT_ACC2, DEFAULT_ENTITY_VALVE_OUTPUT_ACC2)
-    )
-    entity_valve_input_acc1 = entry.options.get(
-        CONF_VALVE_INPUT_ACC1,
-        entry.data.get(CONF_VALVE_INPUT_ACC1, DEFAULT_ENTITY_VALVE_INPUT_ACC1)
-    )
-    entity_valve_input_acc2 = entry.options.get(
-        CONF_VALVE_INPUT_ACC2,
-        entry.data.get(CONF_VALVE_INPUT_ACC2, DEFAULT_ENTITY_VALVE_INPUT_ACC2)
-    )
-    entity_valve_from_acc_to_heat_or_dhw = entry.options.get(
-        CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW,
-        entry.data.get(CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW, DEFAULT_ENTITY_VALVE_FROM_ACC_TO_HEAT_OR_DHW)
-    )
-    entity_valve_output_heating = entry.options.get(
-        CONF_VALVE_OUTPUT_HEATING,
-        entry.data.get(CONF_VALVE_OUTPUT_HEATING, DEFAULT_ENTITY_VALVE_OUTPUT_HEATING)
-    )
-    
-    # Načítanie entít teplotných senzorov z konfigurácie
-    entity_temp_acc1 = entry.options.get(
-        CONF_SENSOR_TEMP_ACC1,
-        entry.data.get(CONF_SENSOR_TEMP_ACC1, DEFAULT_ENTITY_TEMP_ACC1)
-    )
-    entity_temp_acc2 = entry.options.get(
-        CONF_SENSOR_TEMP_ACC2,
-        entry.data.get(CONF_SENSOR_TEMP_ACC2, DEFAULT_ENTITY_TEMP_ACC2)
-    )
-    entity_temp_dhw = entry.options.get(
-        CONF_SENSOR_TEMP_DHW,
-        entry.data.get(CONF_SENSOR_TEMP_DHW, DEFAULT_ENTITY_TEMP_DHW)
-    )
-    
-    # Načítanie entít obehových čerpadiel z konfigurácie
-    entity_water_pump_acc_output = entry.options.get(
-        CONF_WATER_PUMP_ACC_OUTPUT,
-        entry.data.get(CONF_WATER_PUMP_ACC_OUTPUT, DEFAULT_ENTITY_WATER_PUMP_ACC_OUTPUT)
-    )
-    entity_water_pump_dhw = entry.options.get(
-        CONF_WATER_PUMP_DHW,
-        entry.data.get(CONF_WATER_PUMP_DHW, DEFAULT_ENTITY_WATER_PUMP_DHW)
-    )
-    entity_water_pump_floor_heating = entry.options.get(
-        CONF_WATER_PUMP_FLOOR_HEATING,
-        entry.data.get(CONF_WATER_PUMP_FLOOR_HEATING, DEFAULT_ENTITY_WATER_PUMP_FLOOR_HEATING)
-    )
-    entity_water_pump_heating = entry.options.get(
-        CONF_WATER_PUMP_HEATING,
-        entry.data.get(CONF_WATER_PUMP_HEATING, DEFAULT_ENTITY_WATER_PUMP_HEATING)
-    )
-    
-    # Načítanie entít stavov termostatov a tepelného čerpadla z konfigurácie
-    entity_thermostat_state = entry.options.get(
-        CONF_THERMOSTAT_STATE,
-        entry.data.get(CONF_THERMOSTAT_STATE, DEFAULT_ENTITY_THERMOSTAT_STATE)
-    )
-    entity_heating_state = entry.options.get(
-        CONF_HEATING_STATE,
-        entry.data.get(CONF_HEATING_STATE, DEFAULT_ENTITY_HEATING_STATE)
-    )
-    entity_floor_heating_state = entry.options.get(
-        CONF_FLOOR_HEATING_STATE,
-        entry.data.get(CONF_FLOOR_HEATING_STATE, DEFAULT_ENTITY_FLOOR_HEATING_STATE)
-    )
+    config = config_schema.load_config(entry)
 
 # ******************************************************************************************
 # **** Aktualizácia všetkých nastavení v inštancii a v  v "core.config_entries" ************
@@ -594,78 +212,23 @@ async def update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
         if DOMAIN in hass.data and entry.entry_id in hass.data[DOMAIN]:
             instance = hass.data[DOMAIN][entry.entry_id].get("instance")   
             if instance:
-                # Nastavenia základných parametrov
-                instance.settings.timeout_for_heat_dhw_from_acc = timeout_for_heat_dhw_from_acc
-                instance.settings.temperature_delta_limit_acc_dhw = temperature_delta_limit_acc_dhw
-                instance.settings.disabled_acc_temperature_limit = disabled_acc_temperature_limit
-                instance.settings.min_temperature_for_heating = min_temperature_for_heating
-                instance.settings.temperature_delta_limit_in_acc = temperature_delta_limit_in_acc
-                instance.settings.heating_source_temp_hysteresis = heating_source_temp_hysteresis
-                instance.settings.heating_source_command_debounce_delay = heating_source_command_debounce_delay
-                instance.settings.auxiliary_water_pump_for_heating = int(auxiliary_water_pump_for_heating)
-                instance.settings.auxiliary_pump_booster_time = auxiliary_pump_booster_time
-                # Nastavenie parametrov pre ovládanie ventilov
-                instance.settings.valve_output_acc_strict_mode = int(valve_output_acc_strict_mode)
-                instance.settings.valve_input_acc_strict_mode = int(valve_input_acc_strict_mode)
-                instance.settings.valve_input_acc_closing_delay_when_heating_source_stop = valve_input_acc_closing_delay_when_heating_source_stop
-                instance.settings.valve_timeout = valve_timeout
-                # Entity ventilov
-                instance.settings.entity_valve_from_hp_to_acc_or_dhw = entity_valve_from_hp_to_acc_or_dhw
-                instance.settings.entity_valve_output_acc1 = entity_valve_output_acc1
-                instance.settings.entity_valve_output_acc2 = entity_valve_output_acc2
-                instance.settings.entity_valve_input_acc1 = entity_valve_input_acc1
-                instance.settings.entity_valve_input_acc2 = entity_valve_input_acc2
-                instance.settings.entity_valve_from_acc_to_heat_or_dhw = entity_valve_from_acc_to_heat_or_dhw
-                instance.settings.entity_valve_output_heating = entity_valve_output_heating
-                # Entity teplotných senzorov
-                instance.settings.entity_temp_acc1 = entity_temp_acc1
-                instance.settings.entity_temp_acc2 = entity_temp_acc2
-                instance.settings.entity_temp_dhw = entity_temp_dhw
-                # Entity obehových čerpadiel
-                instance.settings.entity_water_pump_acc_output = entity_water_pump_acc_output
-                instance.settings.entity_water_pump_dhw = entity_water_pump_dhw
-                instance.settings.entity_water_pump_floor_heating = entity_water_pump_floor_heating
-                instance.settings.entity_water_pump_heating = entity_water_pump_heating
-                # Entity stavov termostatov a tepelného čerpadla
-                instance.settings.entity_thermostat_state = entity_thermostat_state
-                instance.settings.entity_heating_state = entity_heating_state
-                instance.settings.entity_floor_heating_state = entity_floor_heating_state
-                
-                # Aktualizácia všetkých údaje nastavení v "core.config_entries"
-                hass.data[DOMAIN][entry.entry_id].update({
-                    CONF_TIMEOUT_HEAT_DHW: timeout_for_heat_dhw_from_acc,
-                    CONF_TEMPERATURE_DELTA_LIMIT_ACC_DHW: temperature_delta_limit_acc_dhw,
-                    CONF_DISABLED_ACC_TEMPERATURE_LIMIT: disabled_acc_temperature_limit,
-                    CONF_MIN_TEMPERATURE_FOR_HEATING: min_temperature_for_heating,
-                    CONF_TEMPERATURE_DELTA_LIMIT_IN_ACC: temperature_delta_limit_in_acc,
-                    CONF_HEATING_SOURCE_TEMP_HYSTERESIS: heating_source_temp_hysteresis,
-                    CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY: heating_source_command_debounce_delay,
-                    CONF_AUXILIARY_WATER_PUMP_FOR_HEATING: auxiliary_water_pump_for_heating,
-                    CONF_AUXILIARY_PUMP_BOOSTER_TIME: auxiliary_pump_booster_time,
-                    CONF_VALVE_OUTPUT_ACC_STRICT_MODE: valve_output_acc_strict_mode,
-                    CONF_VALVE_INPUT_ACC_STRICT_MODE: valve_input_acc_strict_mode,
-                    CONF_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP: valve_input_acc_closing_delay_when_heating_source_stop,
-                    CONF_VALVE_TIMEOUT: valve_timeout,
-                    CONF_VALVE_FROM_TC_TO_ACC_OR_DHW: entity_valve_from_hp_to_acc_or_dhw,
-                    CONF_VALVE_OUTPUT_ACC1: entity_valve_output_acc1,
-                    CONF_VALVE_OUTPUT_ACC2: entity_valve_output_acc2,
-                    CONF_VALVE_INPUT_ACC1: entity_valve_input_acc1,
-                    CONF_VALVE_INPUT_ACC2: entity_valve_input_acc2,
-                    CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW: entity_valve_from_acc_to_heat_or_dhw,
-                    CONF_VALVE_OUTPUT_HEATING: entity_valve_output_heating,
-                    CONF_SENSOR_TEMP_ACC1: entity_temp_acc1,
-                    CONF_SENSOR_TEMP_ACC2: entity_temp_acc2,
-                    CONF_SENSOR_TEMP_DHW: entity_temp_dhw,
-                    CONF_WATER_PUMP_ACC_OUTPUT: entity_water_pump_acc_output,
-                    CONF_WATER_PUMP_DHW: entity_water_pump_dhw,
-                    CONF_WATER_PUMP_FLOOR_HEATING: entity_water_pump_floor_heating,
-                    CONF_WATER_PUMP_HEATING: entity_water_pump_heating,
-                    CONF_THERMOSTAT_STATE: entity_thermostat_state,
-                    CONF_HEATING_STATE: entity_heating_state,
-                    CONF_FLOOR_HEATING_STATE: entity_floor_heating_state,
-                })
-                
-                LOGGER.info("Heating Controller configuration updated successfully")
+                changed = config_schema.apply_config(instance.settings, config)
+                # Tabuľka vstupov a zdravie vstupov sa prestavia len pri zmene entít
+                if config_schema.entity_options_changed(changed):
+                    instance.invalidate_input_table()
+                    # Sledované entity sa prihlásia / odhlásia za behu, bez reloadu integrácie
+                    instance.retrack_state_changes()
+
+                # Aktualizácia všetkých údajov nastavení v "core.config_entries"
+                hass.data[DOMAIN][entry.entry_id].update(config)
+
+                if not changed:
+                    LOGGER.debug("Heating Controller options saved without changes")
+                    return
+                LOGGER.info(f"Heating Controller configuration updated successfully, changed: {', '.join(changed)}")
+                # Nové nastavenia sa uplatnia hneď, nie až pri najbližšej zmene stavu
+                if instance.ready:
+                    instance.coalescer.notify()
     except Exception as ex:
         LOGGER.error("Error while configuration update: %s", ex)
         raise ConfigEntryNotReady from ex
@@ -676,7 +239,13 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
         
         if unload_ok:
-            hass.data[DOMAIN].pop(entry.entry_id, None)
+            entry_data = hass.data[DOMAIN].pop(entry.entry_id, None)
+            if entry_data and entry_data.get("instance"):
+                # Zrušiť termíny, odbery a bežiace úlohy inštancie a počkať na ich ukončenie
+                await entry_data["instance"].async_shutdown()
+            # Posledná inštancia - spoločný smerovač už nemá žiadne odbery
+            if not hass.data[DOMAIN]:
+                hass.data.pop(DATA_STATE_ROUTER, None)
 
         return unload_ok
 
@@ -684,7 +253,11 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         LOGGER.error("Error unloading entry: %s", ex)
         # Ensure we cleanup even on error
         if DOMAIN in hass.data and entry.entry_id in hass.data.get(DOMAIN, {}):
-            hass.data[DOMAIN].pop(entry.entry_id, None)
+            entry_data = hass.data[DOMAIN].pop(entry.entry_id, None)
+            if entry_data and entry_data.get("instance"):
+                await entry_data["instance"].async_shutdown()
+            if not hass.data[DOMAIN]:
+                hass.data.pop(DATA_STATE_ROUTER, None)
         return False
 
 
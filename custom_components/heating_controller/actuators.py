@@ -0,0 +1,199 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" actuators.py """
+
+"""Actuator command dispatch for Heating Controller integration.
+
+Plán riadenia sa prevedie na tabuľku požadovaných stavov všetkých akčných
+členov. Tabuľka sa porovná s pozorovaným stavom a s príkazmi, ktoré ešte
+čakajú na potvrdenie - príkazy sa vytvoria len pre skutočné rozdiely.
+
+Príkazy jedného cyklu sa rozdelia do etáp. Etapy sa vykonávajú postupne
+(zachováva sa poradie medzi súvisiacimi akčnými členmi), príkazy v rámci
+jednej etapy sa odošlú súbežne cez asyncio.gather. Každý príkaz má vlastný
+timeout, takže jeden zaseknutý ventil nezablokuje ostatné. Služby sa volajú
+s blocking=True - timeout tak ohraničí skutočné vykonanie, nielen zaradenie
+volania do fronty.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Mapping, NamedTuple
+
+from homeassistant.const import STATE_ON
+from .const import STATE_OPEN, STATE_CLOSED, SWITCH_to_OPEN, SWITCH_to_CLOSE, TURN_ON, TURN_OFF
+
+LOGGER = logging.getLogger(__name__)
+
+# Etapy odosielania príkazov (vykonávajú sa vzostupne)
+# 1. interné prepínače a vypnutie čerpadiel (čerpadlo nesmie tlačiť proti zatváranému ventilu)
+STAGE_PREPARE = 0
+# 2. ventily
+STAGE_VALVES = 1
+# 3. zapnutie čerpadiel (až po príkazoch pre ventily)
+STAGE_PUMPS_ON = 2
+
+# Druhy akčných členov v tabuľke požadovaných stavov
+ACTUATOR_INTERNAL = "internal"  # interné prepínače integrácie (HP_ACC / HP_DHW / HEAT_DHW_FROM_ACC)
+ACTUATOR_VALVE = "valve"
+ACTUATOR_PUMP = "pump"
+
+
+class DesiredState(NamedTuple):
+    """Desired and observed state of one actuator."""
+
+    kind: str
+    key: str  # CONF_* kľúč akčného člena alebo názov internej entity
+    entity_id: str
+    target: str  # STATE_ON / STATE_OFF / STATE_OPEN / STATE_CLOSED
+    observed: str | None
+
+
+class ActuatorCommand(NamedTuple):
+    """One service call for one actuator."""
+
+    stage: int
+    domain: str
+    service: str
+    entity_id: str
+    key: str  # CONF_* kľúč akčného člena alebo názov internej entity
+    target: str  # očakávaný stav entity po vykonaní príkazu
+
+
+class InFlightRegistry:
+    """Commands sent to actuators that are not yet confirmed in hass.states.
+
+    Každá položka drží očakávaný cieľový stav entity a deadline. Položka
+    zaniká potvrdením (entita dosiahla cieľový stav) alebo vypršaním deadline.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, tuple[str, float]] = {}  # entity_id -> (cieľový stav, deadline)
+        self.confirmations = 0
+        self.timeouts = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def register(self, entity_id: str, target: str, timeout: float, now: float | None = None) -> None:
+        """Record a sent command expected to bring entity_id to target within timeout."""
+        if now is None:
+            now = time.monotonic()
+        self._pending[entity_id] = (target, now + timeout)
+
+    def observe(self, entity_id: str, state: str | None) -> None:
+        """Confirm the pending command of entity_id if its observed state reached the target."""
+        pending = self._pending.get(entity_id)
+        if pending is not None and pending[0] == state:
+            del self._pending[entity_id]
+            self.confirmations += 1
+            LOGGER.debug(f"{entity_id}: command confirmed ({state})")
+
+    def observe_states(self, states) -> None:
+        """Confirm every pending command whose entity reached its target in states (hass.states).
+
+        Kontrolujú sa všetky čakajúce príkazy, nielen akčné členy v aktuálnej tabuľke
+        požadovaných stavov - ak plán medzi cyklami vypadne z tabuľky (hp_dhw / hp_acc),
+        jeho príkaz sa aj tak potvrdí a nevyprší ako falošný timeout.
+        """
+        for entity_id in list(self._pending):
+            state = states.get(entity_id)
+            self.observe(entity_id, None if state is None else state.state)
+
+    def expire(self, now: float | None = None) -> None:
+        """Drop pending commands whose deadline has passed."""
+        if now is None:
+            now = time.monotonic()
+        for entity_id, (target, deadline) in list(self._pending.items()):
+            if now >= deadline:
+                del self._pending[entity_id]
+                self.timeouts += 1
+                LOGGER.warning(f"{entity_id}: command was not confirmed in time (expected {target})")
+
+    def remaining(self, entity_id: str, now: float | None = None) -> float:
+        """Seconds until the pending command of entity_id expires (0 if nothing is pending)."""
+        pending = self._pending.get(entity_id)
+        if pending is None:
+            return 0
+        if now is None:
+            now = time.monotonic()
+        return max(0, pending[1] - now)
+
+    def targets(self) -> dict[str, str]:
+        """Return entity_id -> expected target of all pending commands."""
+        return {entity_id: target for entity_id, (target, _deadline) in self._pending.items()}
+
+    def clear(self) -> None:
+        self._pending.clear()
+
+
+def diff_desired_states(
+    table: list[DesiredState],
+    in_flight: Mapping[str, str],
+) -> list[ActuatorCommand]:
+    """Return commands for actuators whose desired state differs from reality.
+
+    in_flight maps entity_id -> target of a command that was already sent
+    but is not yet reflected in hass.states; such actuators are skipped.
+    """
+    commands = []
+    for entry in table:
+        if entry.observed == entry.target:
+            continue
+        if in_flight.get(entry.entity_id) == entry.target:
+            # príkaz už bol odoslaný, čaká sa na potvrdenie
+            continue
+
+        if entry.kind == ACTUATOR_VALVE:
+            if entry.observed not in (STATE_OPEN, STATE_CLOSED):
+                # ventil je práve v pohybe alebo nie je dostupný
+                continue
+            service = SWITCH_to_OPEN if entry.target == STATE_OPEN else SWITCH_to_CLOSE
+            commands.append(ActuatorCommand(STAGE_VALVES, "cover", service, entry.entity_id, entry.key, entry.target))
+            continue
+
+        service = TURN_ON if entry.target == STATE_ON else TURN_OFF
+        # čerpadlo sa zapína až po ventiloch, vypína sa pred nimi
+        stage = STAGE_PUMPS_ON if entry.kind == ACTUATOR_PUMP and entry.target == STATE_ON else STAGE_PREPARE
+        commands.append(ActuatorCommand(stage, "switch", service, entry.entity_id, entry.key, entry.target))
+
+    return commands
+
+
+async def async_dispatch_commands(
+    commands: list[ActuatorCommand],
+    send: Callable[[ActuatorCommand], Awaitable[bool]],
+    timeout: float,
+) -> list[tuple[ActuatorCommand, bool]]:
+    """Dispatch commands stage by stage, concurrently within a stage.
+
+    Returns (command, sent) pairs; a command that timed out or raised is
+    reported as not sent.
+    """
+    results = []
+    for stage in sorted({command.stage for command in commands}):
+        batch = [command for command in commands if command.stage == stage]
+        outcomes = await asyncio.gather(
+            *(_async_send_with_timeout(send, command, timeout) for command in batch)
+        )
+        results.extend(zip(batch, outcomes))
+    return results
+
+
+async def _async_send_with_timeout(
+    send: Callable[[ActuatorCommand], Awaitable[bool]],
+    command: ActuatorCommand,
+    timeout: float,
+) -> bool:
+    """Send one command, guarded by its own timeout."""
+    try:
+        return await asyncio.wait_for(send(command), timeout)
+    except asyncio.TimeoutError:
+        LOGGER.warning(f"Command {command.domain}.{command.service} for {command.entity_id} timed out after {timeout}s")
+    except Exception as e:
+        LOGGER.error(f"Command {command.domain}.{command.service} for {command.entity_id} failed: {e}")
+    return False
@@ -0,0 +1,107 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" coalescer.py """
+
+"""Adaptive coalescing of state change events for Heating Controller integration.
+
+Zmeny stavov sledovaných entít sa zlučujú do jedného kontrolného cyklu.
+Okno zlučovania sa pri nárazoch udalostí rozširuje (ventil opening -> open,
+niekoľko senzorov naraz) a v pokoji sa zužuje. Od prvej udalosti nárazu
+sa cyklus spustí najneskôr po COALESCE_MAX_LATENCY. Prioritné vstupy
+(dopyt termostatov) skrátia okno na minimum, bezpečnostné vstupy okno
+úplne obídu a cyklus sa spustí okamžite.
+"""
+
+import logging
+import time
+from typing import Callable
+
+from .const import COALESCE_WINDOW_MIN, COALESCE_WINDOW_MAX, COALESCE_MAX_LATENCY
+from .scheduler import DeadlineScheduler
+
+LOGGER = logging.getLogger(__name__)
+
+# Názov termínu v plánovači inštancie
+TIMER_COALESCE = "coalesce"
+
+# Triedy vstupov pre zlučovanie
+INPUT_NORMAL = "normal"
+INPUT_PRIORITY = "priority"  # nesmie čakať dlhšie ako COALESCE_WINDOW_MIN
+INPUT_SAFETY = "safety"  # obchádza zlučovanie
+
+_WINDOW_GROWTH = 1.5  # násobok okna pri udalosti počas otvoreného okna
+_WINDOW_SHRINK = 0.5  # násobok okna po období pokoja
+
+
+class EventCoalescer:
+    """Merge bursts of relevant state changes into one control cycle."""
+
+    def __init__(self, scheduler: DeadlineScheduler, run_cycle: Callable[[], None]) -> None:
+        self._scheduler = scheduler
+        self._run_cycle = run_cycle
+        self.window = COALESCE_WINDOW_MIN  # aktuálna šírka okna (s)
+        self._last_event = None
+        self._close_by = None  # najneskorší čas spustenia cyklu pre otvorené okno (monotonic)
+
+        # Počítadlá pre ladenie
+        self.events = 0  # všetky relevantné udalosti
+        self.merged_events = 0  # udalosti zlúčené do už otvoreného okna
+        self.bypassed_events = 0  # bezpečnostné udalosti mimo zlučovania
+        self.cycles = 0  # cykly spustené zlučovačom (vrátane obídených)
+
+    @property
+    def pending(self) -> bool:
+        return TIMER_COALESCE in self._scheduler
+
+    def notify(self, input_class: str = INPUT_NORMAL, now: float | None = None) -> None:
+        """Register one relevant state change."""
+        if now is None:
+            now = time.monotonic()
+        self.events += 1
+
+        if input_class == INPUT_SAFETY:
+            # bezpečnostný vstup - žiadne čakanie, otvorené okno sa zruší
+            self._scheduler.cancel(TIMER_COALESCE)
+            self._close_by = None
+            self.bypassed_events += 1
+            self.cycles += 1
+            self._last_event = now
+            self._run_cycle()
+            return
+
+        if self.pending:
+            # náraz udalostí - okno sa rozširuje
+            self.merged_events += 1
+            self.window = min(self.window * _WINDOW_GROWTH, COALESCE_WINDOW_MAX)
+        else:
+            if self._last_event is not None and now - self._last_event > COALESCE_WINDOW_MAX:
+                # pokoj - okno sa zužuje
+                self.window = max(self.window * _WINDOW_SHRINK, COALESCE_WINDOW_MIN)
+            self._close_by = now + COALESCE_MAX_LATENCY
+        self._last_event = now
+
+        if input_class == INPUT_PRIORITY:
+            self._close_by = min(self._close_by, now + COALESCE_WINDOW_MIN)
+
+        # okno sa posúva za poslednou udalosťou, ale nikdy nie za _close_by
+        delay = min(self.window, self._close_by - now)
+        self._scheduler.schedule(TIMER_COALESCE, delay, self._window_closed)
+
+    def _window_closed(self) -> None:
+        """Deadline action - the scheduler wakes the control cycle afterwards."""
+        self._close_by = None
+        self.cycles += 1
+        LOGGER.debug(f"Coalescing window closed: {self.stats()}")
+
+    def stats(self) -> dict[str, float | int]:
+        """Counters and the current window for tuning."""
+        return {
+            "window": round(self.window, 3),
+            "events": self.events,
+            "merged_events": self.merged_events,
+            "bypassed_events": self.bypassed_events,
+            "cycles": self.cycles,
+        }
@@ -21,6 +21,7 @@ from homeassistant.helpers.selector import (
     NumberSelectorMode,
     EntitySelector,
     EntitySelectorConfig,
+    BooleanSelector,
 )
 import homeassistant.helpers.config_validation as cv
 
@@ -34,6 +35,16 @@ class HeatingControllerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         """Initialize the config flow."""
         self._data = {}
 
+    def _next_namespace(self) -> str:
+        """Prvý voľný prefix interných entít: heating_controller, heating_controller_2, heating_controller_3, ..."""
+        used = {entry.data.get(CONF_ENTITY_NAMESPACE, DOMAIN) for entry in self._async_current_entries()}
+        if DOMAIN not in used:
+            return DOMAIN
+        number = 2
+        while f"{DOMAIN}_{number}" in used:
+            number += 1
+        return f"{DOMAIN}_{number}"
+
     # Inicializačná metóda, ktorá presmeruje config flow na prvý krok konfigurácie 
     # Táto metóda tu musí byť, nesmie sa vymazať !!!
     async def async_step_user(self, user_input=None):
@@ -78,6 +89,14 @@ class HeatingControllerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                     CONF_HEATING_SOURCE_TEMP_HYSTERESIS,
                     default=DEFAULT_HEATING_SOURCE_TEMP_HYSTERESIS,
                 ): NumberSelector(NumberSelectorConfig(min=1, max=10, step=1, mode=NumberSelectorMode.BOX)),
+                vol.Required(
+                    CONF_TEMPERATURE_DEADBAND,
+                    default=DEFAULT_TEMPERATURE_DEADBAND,
+                ): NumberSelector(NumberSelectorConfig(min=0, max=5, step=0.1, mode=NumberSelectorMode.BOX)),
+                vol.Required(
+                    CONF_INPUT_LAST_KNOWN_GOOD_TTL,
+                    default=DEFAULT_INPUT_LAST_KNOWN_GOOD_TTL,
+                ): NumberSelector(NumberSelectorConfig(min=0, max=3600, step=10, mode=NumberSelectorMode.BOX)),
                 vol.Required(
                     CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY,
                     default=DEFAULT_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY,
@@ -271,11 +290,14 @@ class HeatingControllerConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             # Skombinuj dáta zo všetkých krokov
             self._data.update(user_input)
             
-            await self.async_set_unique_id("heating_controller_unique_id")
+            # Každá inštancia (kotolňa) má vlastný prefix interných entít, prvá ponecháva pôvodný
+            namespace = self._next_namespace()
+            self._data[CONF_ENTITY_NAMESPACE] = namespace
+            await self.async_set_unique_id(f"{namespace}_unique_id")
             self._abort_if_unique_id_configured()
             
             return self.async_create_entry(
-                title="Heating Controller",
+                title="Heating Controller" if namespace == DOMAIN else f"Heating Controller {namespace.rsplit('_', 1)[1]}",
                 data=self._data,
             )
 
@@ -388,6 +410,24 @@ class HeatingControllerOptionsFlowHandler(config_entries.OptionsFlow):
                         ),
                     ),
                 ): NumberSelector(NumberSelectorConfig(min=1, max=10, step=1, mode=NumberSelectorMode.BOX)),
+                vol.Required(
+                    CONF_TEMPERATURE_DEADBAND,
+                    default=self.config_entry.options.get(
+                        CONF_TEMPERATURE_DEADBAND,
+                        self.config_entry.data.get(
+                            CONF_TEMPERATURE_DEADBAND, DEFAULT_TEMPERATURE_DEADBAND
+                        ),
+                    ),
+                ): NumberSelector(NumberSelectorConfig(min=0, max=5, step=0.1, mode=NumberSelectorMode.BOX)),
+                vol.Required(
+                    CONF_INPUT_LAST_KNOWN_GOOD_TTL,
+                    default=self.config_entry.options.get(
+                        CONF_INPUT_LAST_KNOWN_GOOD_TTL,
+                        self.config_entry.data.get(
+                            CONF_INPUT_LAST_KNOWN_GOOD_TTL, DEFAULT_INPUT_LAST_KNOWN_GOOD_TTL
+                        ),
+                    ),
+                ): NumberSelector(NumberSelectorConfig(min=0, max=3600, step=10, mode=NumberSelectorMode.BOX)),
                 vol.Required(
                     CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY,
                     default=self.config_entry.options.get(
@@ -691,6 +731,12 @@ class HeatingControllerOptionsFlowHandler(config_entries.OptionsFlow):
                         ),
                     ),
                 ): EntitySelector(EntitySelectorConfig(domain="binary_sensor")),
+                vol.Required(
+                    CONF_DEV_HOT_RELOAD,
+                    default=self.config_entry.options.get(
+                        CONF_DEV_HOT_RELOAD, DEFAULT_DEV_HOT_RELOAD
+                    ),
+                ): BooleanSelector(),
             }
         )
 
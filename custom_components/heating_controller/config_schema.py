@@ -0,0 +1,124 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" config_schema.py """
+
+"""Declarative schema of the configuration options for Heating Controller integration.
+
+Každý konfiguračný parameter je jeden riadok v CONFIG_SCHEMA (kľúč, prevod,
+predvolená hodnota, pole v Heating_Controller_Instance.Settings, či ide o
+entitu). Podľa schémy sa parametre načítajú z entry.options / entry.data,
+prevedú a overia, porovnajú s aktuálnymi nastaveniami a zapíšu do Settings.
+Nový parameter tak stačí pridať do schémy (a do config_flow).
+"""
+
+import logging
+from typing import Any, Callable, NamedTuple
+
+from .const import *
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _to_int(value) -> int:
+    """Celé číslo aj z hodnoty NumberSelector (float) alebo SelectSelector (str)."""
+    return int(float(value))
+
+
+def _to_entity_id(value) -> str:
+    """Entity ID v tvare domain.object_id."""
+    if not isinstance(value, str) or value.count(".") != 1 or value.startswith(".") or value.endswith("."):
+        raise ValueError(f"invalid entity_id {value!r}")
+    return value
+
+
+class ConfigOption(NamedTuple):
+    """One configuration option of the integration."""
+
+    key: str  # CONF_* kľúč v entry.data / entry.options
+    convert: Callable[[Any], Any]  # prevod a overenie hodnoty (ValueError / TypeError = neplatná hodnota)
+    default: Any
+    field: str  # pole v Heating_Controller_Instance.Settings
+    is_entity: bool = False
+
+
+CONFIG_SCHEMA: tuple[ConfigOption, ...] = (
+    # Základné konfiguračné parametre
+    ConfigOption(CONF_TIMEOUT_HEAT_DHW, _to_int, DEFAULT_TIMEOUT_HEAT_DHW, "timeout_for_heat_dhw_from_acc"),
+    ConfigOption(CONF_TEMPERATURE_DELTA_LIMIT_ACC_DHW, float, DEFAULT_TEMPERATURE_DELTA_LIMIT_ACC_DHW, "temperature_delta_limit_acc_dhw"),
+    ConfigOption(CONF_DISABLED_ACC_TEMPERATURE_LIMIT, float, DEFAULT_DISABLED_ACC_TEMPERATURE_LIMIT, "disabled_acc_temperature_limit"),
+    ConfigOption(CONF_MIN_TEMPERATURE_FOR_HEATING, float, DEFAULT_MIN_TEMPERATURE_FOR_HEATING, "min_temperature_for_heating"),
+    ConfigOption(CONF_TEMPERATURE_DELTA_LIMIT_IN_ACC, float, DEFAULT_TEMPERATURE_DELTA_LIMIT_IN_ACC, "temperature_delta_limit_in_acc"),
+    ConfigOption(CONF_HEATING_SOURCE_TEMP_HYSTERESIS, float, DEFAULT_HEATING_SOURCE_TEMP_HYSTERESIS, "heating_source_temp_hysteresis"),
+    ConfigOption(CONF_TEMPERATURE_DEADBAND, float, DEFAULT_TEMPERATURE_DEADBAND, "temperature_deadband"),
+    ConfigOption(CONF_INPUT_LAST_KNOWN_GOOD_TTL, float, DEFAULT_INPUT_LAST_KNOWN_GOOD_TTL, "input_last_known_good_ttl"),
+    ConfigOption(CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY, float, DEFAULT_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY, "heating_source_command_debounce_delay"),
+    ConfigOption(CONF_AUXILIARY_WATER_PUMP_FOR_HEATING, _to_int, DEFAULT_AUXILIARY_WATER_PUMP_FOR_HEATING, "auxiliary_water_pump_for_heating"),
+    ConfigOption(CONF_AUXILIARY_PUMP_BOOSTER_TIME, float, DEFAULT_AUXILIARY_PUMP_BOOSTER_TIME, "auxiliary_pump_booster_time"),
+    # Parametre pre ovládanie ventilov
+    ConfigOption(CONF_VALVE_OUTPUT_ACC_STRICT_MODE, _to_int, DEFAULT_VALVE_OUTPUT_ACC_STRICT_MODE, "valve_output_acc_strict_mode"),
+    ConfigOption(CONF_VALVE_INPUT_ACC_STRICT_MODE, _to_int, DEFAULT_VALVE_INPUT_ACC_STRICT_MODE, "valve_input_acc_strict_mode"),
+    ConfigOption(CONF_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP, float, DEFAULT_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP, "valve_input_acc_closing_delay_when_heating_source_stop"),
+    ConfigOption(CONF_VALVE_TIMEOUT, float, DEFAULT_VALVE_TIMEOUT, "valve_timeout"),
+    # Entity ventilov
+    ConfigOption(CONF_VALVE_FROM_TC_TO_ACC_OR_DHW, _to_entity_id, DEFAULT_ENTITY_VALVE_FROM_TC_TO_ACC_OR_DHW, "entity_valve_from_hp_to_acc_or_dhw", True),
+    ConfigOption(CONF_VALVE_OUTPUT_ACC1, _to_entity_id, DEFAULT_ENTITY_VALVE_OUTPUT_ACC1, "entity_valve_output_acc1", True),
+    ConfigOption(CONF_VALVE_OUTPUT_ACC2, _to_entity_id, DEFAULT_ENTITY_VALVE_OUTPUT_ACC2, "entity_valve_output_acc2", True),
+    ConfigOption(CONF_VALVE_INPUT_ACC1, _to_entity_id, DEFAULT_ENTITY_VALVE_INPUT_ACC1, "entity_valve_input_acc1", True),
+    ConfigOption(CONF_VALVE_INPUT_ACC2, _to_entity_id, DEFAULT_ENTITY_VALVE_INPUT_ACC2, "entity_valve_input_acc2", True),
+    ConfigOption(CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW, _to_entity_id, DEFAULT_ENTITY_VALVE_FROM_ACC_TO_HEAT_OR_DHW, "entity_valve_from_acc_to_heat_or_dhw", True),
+    ConfigOption(CONF_VALVE_OUTPUT_HEATING, _to_entity_id, DEFAULT_ENTITY_VALVE_OUTPUT_HEATING, "entity_valve_output_heating", True),
+    # Entity teplotných senzorov
+    ConfigOption(CONF_SENSOR_TEMP_ACC1, _to_entity_id, DEFAULT_ENTITY_TEMP_ACC1, "entity_temp_acc1", True),
+    ConfigOption(CONF_SENSOR_TEMP_ACC2, _to_entity_id, DEFAULT_ENTITY_TEMP_ACC2, "entity_temp_acc2", True),
+    ConfigOption(CONF_SENSOR_TEMP_DHW, _to_entity_id, DEFAULT_ENTITY_TEMP_DHW, "entity_temp_dhw", True),
+    # Entity obehových čerpadiel
+    ConfigOption(CONF_WATER_PUMP_ACC_OUTPUT, _to_entity_id, DEFAULT_ENTITY_WATER_PUMP_ACC_OUTPUT, "entity_water_pump_acc_output", True),
+    ConfigOption(CONF_WATER_PUMP_DHW, _to_entity_id, DEFAULT_ENTITY_WATER_PUMP_DHW, "entity_water_pump_dhw", True),
+    ConfigOption(CONF_WATER_PUMP_FLOOR_HEATING, _to_entity_id, DEFAULT_ENTITY_WATER_PUMP_FLOOR_HEATING, "entity_water_pump_floor_heating", True),
+    ConfigOption(CONF_WATER_PUMP_HEATING, _to_entity_id, DEFAULT_ENTITY_WATER_PUMP_HEATING, "entity_water_pump_heating", True),
+    # Entity stavov termostatov a tepelného čerpadla
+    ConfigOption(CONF_THERMOSTAT_STATE, _to_entity_id, DEFAULT_ENTITY_THERMOSTAT_STATE, "entity_thermostat_state", True),
+    ConfigOption(CONF_HEATING_STATE, _to_entity_id, DEFAULT_ENTITY_HEATING_STATE, "entity_heating_state", True),
+    ConfigOption(CONF_FLOOR_HEATING_STATE, _to_entity_id, DEFAULT_ENTITY_FLOOR_HEATING_STATE, "entity_floor_heating_state", True),
+)
+
+# Kľúče parametrov, ktoré určujú sledované entity
+ENTITY_OPTION_KEYS = tuple(option.key for option in CONFIG_SCHEMA if option.is_entity)
+
+
+def load_config(entry) -> dict[str, Any]:
+    """Read every option (entry.options over entry.data over default), converted and validated."""
+    config = {}
+    for option in CONFIG_SCHEMA:
+        value = entry.options.get(option.key, entry.data.get(option.key, option.default))
+        try:
+            config[option.key] = option.convert(value)
+        except (TypeError, ValueError):
+            LOGGER.warning(f"Invalid value {value!r} of option {option.key}, default {option.default!r} is used")
+            config[option.key] = option.default
+    return config
+
+
+def diff_config(settings, config: dict[str, Any]) -> tuple[str, ...]:
+    """Keys of the options whose value differs from the current Settings."""
+    return tuple(
+        option.key for option in CONFIG_SCHEMA
+        if getattr(settings, option.field) != config[option.key]
+    )
+
+
+def apply_config(settings, config: dict[str, Any]) -> tuple[str, ...]:
+    """Write the options into Settings. Returns the keys of the changed options."""
+    changed = diff_config(settings, config)
+    for option in CONFIG_SCHEMA:
+        if option.key in changed:
+            setattr(settings, option.field, config[option.key])
+    return changed
+
+
+def entity_options_changed(changed: tuple[str, ...]) -> bool:
+    """True if some of the changed options is an entity."""
+    return any(key in ENTITY_OPTION_KEYS for key in changed)
@@ -11,6 +11,14 @@ DOMAIN = "heating_controller"
 
 # Services
 SERVICE_SYSTEM_STARTED = "system_started"
+ATTR_ENTRY_ID = "entry_id"  # Voliteľný cieľ služby - config entry jednej inštancie (bez neho všetky inštancie)
+
+# Viac inštancií (kotolní) - každá config entry má vlastný prefix interných entít
+CONF_ENTITY_NAMESPACE = "entity_namespace"  # prvá inštancia: heating_controller, ďalšie: heating_controller_2, ...
+DATA_STATE_ROUTER = f"{DOMAIN}_state_router"  # hass.data - spoločný smerovač zmien stavov všetkých inštancií
+
+# Dispatcher signál pre jeden senzor jednej inštancie (sensor_states, diagnostika) - SIGNAL_FEEDBACK_UPDATE.format(entry_id, entity)
+SIGNAL_FEEDBACK_UPDATE = DOMAIN + "_feedback_update_{}_{}"
 
 # States and commands
 STATE_NONE = "none"
@@ -48,6 +56,8 @@ CONF_DISABLED_ACC_TEMPERATURE_LIMIT = "disabled_acc_temperature_limit"
 CONF_MIN_TEMPERATURE_FOR_HEATING = "min_temperature_for_heating"
 CONF_TEMPERATURE_DELTA_LIMIT_IN_ACC = "temperature_delta_limit_in_acc"
 CONF_HEATING_SOURCE_TEMP_HYSTERESIS = "heating_source_temp_hysteresis"
+CONF_TEMPERATURE_DEADBAND = "temperature_deadband"
+CONF_INPUT_LAST_KNOWN_GOOD_TTL = "input_last_known_good_ttl"
 CONF_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY = "heating_source_command_debounce_delay"
 CONF_AUXILIARY_WATER_PUMP_FOR_HEATING = "auxiliary_water_pump_for_heating"
 CONF_AUXILIARY_PUMP_BOOSTER_TIME = "auxiliary_pump_booster_time"
@@ -83,6 +93,9 @@ CONF_THERMOSTAT_STATE = "thermostat_state"
 CONF_HEATING_STATE = "heating_state"
 CONF_FLOOR_HEATING_STATE = "floor_heating_state"
 
+# Vývojárske nastavenia (len v options flow)
+CONF_DEV_HOT_RELOAD = "dev_hot_reload"
+
 # Internal entity names (will be prefixed with DOMAIN in code)
 # These entities are created by this integration
 ENTITY_ACC1_ENABLE = "acc1_enable"
@@ -99,6 +112,8 @@ ENTITY_CONTROL_COMMAND_ON_OFF = "controll_command_on_off"
 ENTITY_CONTROL_COMMAND_TEMPERATURE = "controll_command_temperature"
 ENTITY_CONTROL_COMMAND_HP_ON_OFF = "controll_command_hp_on_off"
 ENTITY_CONTROL_COMMAND_HP_TEMPERATURE = "controll_command_hp_temperature"
+ENTITY_CONTROL_STATISTICS = "control_statistics"
+ENTITY_CONTROL_CYCLE_TIME = "control_cycle_time"
 
 # Default Values of External entities (Binary Sensors)
 DEFAULT_ENTITY_THERMOSTAT_STATE = "binary_sensor.termostaty_stav"
@@ -207,7 +222,12 @@ DEFAULT_ACC_TARGET_TEMPERATURE = 50
 
 # Default values of static parameters
 DEFAULT_FALLBACK_CHECK_INTERVAL = 60
-DEBOUNCE_DELAY = 0.2  # seconds - it groups all changes within this time period (due to better performance)
+COALESCE_WINDOW_MIN = 0.2  # seconds - shortest window for grouping state changes into one control cycle
+COALESCE_WINDOW_MAX = 2.0  # seconds - the window widens up to this value under bursts of state changes
+COALESCE_MAX_LATENCY = 3.0  # seconds - max. time from the first state change of a burst to the control cycle
+ACTUATOR_COMMAND_TIMEOUT = 10  # seconds - max. time to wait for one valve/pump service call in the control cycle
+STATISTICS_PUBLISH_INTERVAL = 300  # seconds - min. period of refreshing the control_statistics diagnostic sensor
+STARTUP_READY_TIMEOUT = 300  # seconds - after HA has started, max. time to wait for all inputs to become available
 
 # Načítanie predvolených hodnôt základných konfiguračných parametrov
 DEFAULT_TIMEOUT_HEAT_DHW = 120
@@ -216,6 +236,8 @@ DEFAULT_DISABLED_ACC_TEMPERATURE_LIMIT = 40
 DEFAULT_MIN_TEMPERATURE_FOR_HEATING = 35
 DEFAULT_TEMPERATURE_DELTA_LIMIT_IN_ACC = 2.0
 DEFAULT_HEATING_SOURCE_TEMP_HYSTERESIS = 5
+DEFAULT_TEMPERATURE_DEADBAND = 0.5  # °C - temperature change which flips no threshold starts the control cycle only when it gets this close to a threshold
+DEFAULT_INPUT_LAST_KNOWN_GOOD_TTL = 300  # in seconds - how long the last valid value of an unavailable input is still used
 DEFAULT_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY = 20  # in seconds - it groups all changes within this time period
 DEFAULT_AUXILIARY_WATER_PUMP_FOR_HEATING = AUXILIARY_PUMP_DISABLE
 DEFAULT_AUXILIARY_PUMP_BOOSTER_TIME = 5 # in minutes
@@ -225,6 +247,20 @@ DEFAULT_VALVE_INPUT_ACC_STRICT_MODE = VALVE_MODE_STRICT
 DEFAULT_VALVE_INPUT_ACC_CLOSING_DELAY_WHEN_HEATING_SOURCE_STOP = 3  # in minutes
 DEFAULT_VALVE_TIMEOUT = 15
 
+DEFAULT_DEV_HOT_RELOAD = False  # reload of the integration re-imports its modules from disk (development only)
+
+# Binárny záznam kontrolných cyklov (trace.py)
+TRACE_CAPACITY = 4096  # záznamov v kruhovom bufferi v pamäti (~54 B na záznam)
+TRACE_FLUSH_RECORDS = 512  # zápis do súboru po nazbieraní tohto počtu záznamov
+TRACE_FLUSH_INTERVAL = 900  # in seconds - najneskôr po tomto čase sa záznamy zapíšu do súboru
+TRACE_FILE = "{}_trace.bin"  # v konfiguračnom adresári HA, {} = prefix inštancie (namespace)
+TRACE_FILE_MAX_BYTES = 4 * 1024 * 1024  # plný súbor sa presunie do .1 (spolu najviac 2x)
+
+# Časovanie kontrolných cyklov (cycle_metrics.py)
+CYCLE_METRICS_WINDOW = 300  # in seconds - dĺžka jedného okna histogramov
+CYCLE_METRICS_WINDOWS = 12  # počet okien - súhrn pokrýva poslednú hodinu
+CYCLE_METRICS_PUBLISH_INTERVAL = 300  # in seconds - pevná perióda aktualizácie diagnostickej entity
+
 MIN_TEMPERATURE_LIMIT = 20      # Minimum temperature limit for water tanks)
 MAX_TEMPERATURE_LIMIT = 90      # Maximum temperature limit in General (for heating source and for water tanks)
 MAX_TEMPERATURE_LIMIT_HP = 65   # Maximum temperature limit for heating pump
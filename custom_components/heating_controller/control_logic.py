@@ -0,0 +1,1111 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" control_logic.py """
+
+"""Side-effect-free decision core of the Heating Controller.
+
+Funkcia decide() dostane nemenný snímok vstupov (InputSnapshot), nastavenia a
+vnútorný stav riadenia z predchádzajúceho cyklu (ControllerState) a vráti plán
+požadovaných stavov akčných členov (ControlPlan). Nečíta hass.states, nevolá
+služby, nespúšťa časovače a nepíše do logu - všetko to robí obal v
+Heating_Controller_Instance.heating_control_system podľa vráteného plánu.
+"""
+
+import dataclasses
+
+from .const import *
+
+# Názvy časovačov, ktoré si logika vyžiada od obalu (štart / zrušenie)
+TIMER_VALVE_INPUT_ACC_CLOSING_DELAY = "valve_input_acc_closing_delay"
+TIMER_HP_DHW_TO_ACC_DELAY = "hp_dhw_to_acc_delay"
+TIMER_AUXILIARY_PUMP_BOOSTER = "auxiliary_pump_booster"
+
+# Poradie ventilov tak, ako ich ovládal pôvodný cyklus
+VALVE_KEYS = (
+    CONF_VALVE_FROM_TC_TO_ACC_OR_DHW,
+    CONF_VALVE_OUTPUT_ACC1,
+    CONF_VALVE_OUTPUT_ACC2,
+    CONF_VALVE_INPUT_ACC1,
+    CONF_VALVE_INPUT_ACC2,
+    CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW,
+    CONF_VALVE_OUTPUT_HEATING,
+)
+
+# Poradie obehových čerpadiel tak, ako ich ovládal pôvodný cyklus
+PUMP_KEYS = (
+    CONF_WATER_PUMP_ACC_OUTPUT,
+    CONF_WATER_PUMP_FLOOR_HEATING,
+    CONF_WATER_PUMP_HEATING,
+)
+
+# Vstupy, bez ktorých sa nedá rozhodnúť nič (režim, žiadané teploty, teploty v ACC a TUV).
+# Ak niektorý z nich chýba (ani posledná platná hodnota nie je k dispozícii), cyklus sa nevykoná.
+CORE_INPUTS = frozenset((
+    "dhw_target_temperature",
+    "acc_target_temperature",
+    "heating_operating_mode",
+    "temperature_acc1",
+    "temperature_acc2",
+    "temperature_dhw",
+))
+
+# Čiastkové regulátory - pri chýbajúcom vstupe sa pozastaví len regulátor, ktorý ho potrebuje
+SUBCONTROLLER_HP_ROUTING = "hp_routing"  # ventil z TČ do ACC / TUV, ventily na vstupe do ACC, príkaz pre TČ v manuálnom režime
+SUBCONTROLLER_ACC_OUTPUTS = "acc_outputs"  # ventily na výstupe z ACC a výstup do kúrenia
+SUBCONTROLLER_PUMPS = "pumps"  # obehové čerpadlá (výstup ACC, podlahové kúrenie, kúrenie)
+SUBCONTROLLER_DHW_TRANSFER = "dhw_transfer"  # ventil z ACC do kúrenia / TUV pre prečerpávanie ACC -> TUV
+
+# Vstupy potrebné pre jednotlivé čiastkové regulátory (okrem CORE_INPUTS)
+SUBCONTROLLER_INPUTS = {
+    SUBCONTROLLER_HP_ROUTING: frozenset((
+        CONF_VALVE_FROM_TC_TO_ACC_OR_DHW,
+        CONF_VALVE_INPUT_ACC1,
+        CONF_VALVE_INPUT_ACC2,
+    )),
+    SUBCONTROLLER_ACC_OUTPUTS: frozenset((
+        CONF_VALVE_OUTPUT_ACC1,
+        CONF_VALVE_OUTPUT_ACC2,
+        CONF_VALVE_OUTPUT_HEATING,
+        "thermostat_state",
+        "heating_state",
+    )),
+    SUBCONTROLLER_PUMPS: frozenset((
+        CONF_VALVE_OUTPUT_ACC1,
+        CONF_VALVE_OUTPUT_ACC2,
+        CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW,
+        CONF_VALVE_OUTPUT_HEATING,
+        CONF_WATER_PUMP_ACC_OUTPUT,
+        CONF_WATER_PUMP_FLOOR_HEATING,
+        CONF_WATER_PUMP_HEATING,
+        "heating_state",
+        "floor_heating_state",
+    )),
+    SUBCONTROLLER_DHW_TRANSFER: frozenset((
+        CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW,
+    )),
+}
+
+# Ventily ovládané jednotlivými čiastkovými regulátormi
+SUBCONTROLLER_VALVES = {
+    SUBCONTROLLER_HP_ROUTING: (CONF_VALVE_FROM_TC_TO_ACC_OR_DHW, CONF_VALVE_INPUT_ACC1, CONF_VALVE_INPUT_ACC2),
+    SUBCONTROLLER_ACC_OUTPUTS: (CONF_VALVE_OUTPUT_ACC1, CONF_VALVE_OUTPUT_ACC2, CONF_VALVE_OUTPUT_HEATING),
+    SUBCONTROLLER_DHW_TRANSFER: (CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW,),
+}
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class InputSnapshot:
+    """Immutable snapshot of all inputs of one control cycle."""
+
+    # Interné entity integrácie
+    automatic_mode: bool
+    acc1_enable: bool
+    acc2_enable: bool
+    heat_dhw_from_acc: bool
+    hp_acc: bool
+    hp_dhw: bool
+    heating_source_input_on_off: bool
+    dhw_target_temperature: float
+    acc_target_temperature: float
+    heating_operating_mode: int
+    # Teplotné senzory
+    temperature_acc1: float
+    temperature_acc2: float
+    temperature_dhw: float
+    # Stavy ventilov
+    valve_from_hp_to_acc_or_dhw: str
+    valve_output_acc1: str
+    valve_output_acc2: str
+    valve_input_acc1: str
+    valve_input_acc2: str
+    valve_from_acc_to_heat_or_dhw: str
+    valve_output_heating: str
+    # Stavy obehových čerpadiel
+    water_pump_acc_output: str
+    water_pump_dhw: str
+    water_pump_floor_heating: str
+    water_pump_heating: str
+    # Stavy termostatov
+    thermostat_state: str
+    heating_state: str
+    floor_heating_state: str
+    # Polia vstupov, ktoré sa nepodarilo načítať (entita chýba / nie je dostupná / neplatná hodnota)
+    # a nie je pre ne ani posledná platná hodnota - ich hodnota je None
+    invalid: tuple[str, ...] = ()
+
+    def valve_state(self, valve_key: str) -> str:
+        """Return the observed state of a valve by its CONF_VALVE_* key."""
+        return getattr(self, valve_key)
+
+    def pump_state(self, pump_key: str) -> str:
+        """Return the observed state of a water pump by its CONF_WATER_PUMP_* key."""
+        return getattr(self, pump_key)
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ControllerState:
+    """Runtime memory of the controller carried from one cycle to the next."""
+
+    heating_operating_mode_previous: int = HEATING_OPERATING_MODE_MANUAL
+    heating_operating_mode_pdhw_dhw_acc_init_flag2: int = 0
+    heat_dhw_from_acc_onetime_start_flag0: int = 0
+    heating_source_auto_on_off: bool = False
+    previous_controll_command_on_off: int = 0
+    previous_controll_command_hp_on_off: int = 0
+    # Oneskorené zatvorenie ventilov na vstupoch do ACC
+    valve_input_acc_closing_allowed: bool = True
+    valve_input_acc_closing_timer_active: bool = False
+    # Oneskorené pretočenie ventilu hp_dhw z TUV na ACC
+    hp_dhw_to_acc_switch_allowed: bool = True
+    hp_dhw_to_acc_timer_active: bool = False
+    # Booster režim auxiliary pump
+    auxiliary_pump_booster_active: bool = False
+    auxiliary_pump_booster_finished: bool = False
+    # Žiadané teploty (v niektorých vetvách sa neprepisujú, platí hodnota z minulého cyklu)
+    temperature_setpoint: float = 0
+    temperature_setpoint_hp: float = 0
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class ControlPlan:
+    """Desired actuator states and bookkeeping produced by decide()."""
+
+    state: ControllerState
+    # Požadované stavy interných prepínačov (None = bez zmeny)
+    hp_dhw: bool | None
+    heat_dhw_from_acc: bool | None
+    # Požadované polohy ventilov (STATE_OPEN / STATE_CLOSED, None = neovládať)
+    valves: dict
+    # Požadované stavy čerpadiel (True / False, None = neovládať)
+    pumps: dict
+    # Riadiace signály pre zdroj tepla
+    controll_command_on_off: int
+    controll_command_hp_on_off: int
+    control_command_temperature: float
+    control_command_hp_temperature: float
+    # Odvodené hodnoty (pre diagnostiku)
+    preferred_output_ACC: int
+    preferred_input_ACC: int
+    higher_temperature_acc_value: float
+    lower_temperature_acc_value: float
+    min_acc_temperature_for_heating_limit_broken: bool
+    temperature_setpoint: float
+    temperature_setpoint_hp: float
+    # Požiadavky na časovače: ((názov, sekundy), ...) a (názov, ...)
+    timers_start: tuple = ()
+    timers_cancel: tuple = ()
+    # Správy pre log: ((level, text), ...)
+    messages: tuple = ()
+
+    @property
+    def hp_on_off(self) -> str:
+        """Requested HP ON/OFF command value."""
+        return STATE_ON if self.controll_command_hp_on_off else STATE_OFF
+
+
+def decide(snapshot: InputSnapshot, settings, state: ControllerState) -> ControlPlan:
+    """Compute the desired actuator plan for one control cycle.
+
+    The function is pure: the result depends only on the arguments and none of
+    them is modified. All CORE_INPUTS must be valid; the sub-controllers whose
+    inputs are listed in snapshot.invalid are suspended - their actuators get
+    no request (None) and their part of the state is carried over unchanged.
+    """
+    suspended = suspended_subcontrollers(snapshot.invalid)
+    temperature_acc1_value = snapshot.temperature_acc1
+    temperature_acc2_value = snapshot.temperature_acc2
+    temperature_dhw_value = snapshot.temperature_dhw
+    dhw_target_temperature = snapshot.dhw_target_temperature
+    acc_target_temperature = snapshot.acc_target_temperature
+    acc1_enable = snapshot.acc1_enable
+    acc2_enable = snapshot.acc2_enable
+    heating_operating_mode = snapshot.heating_operating_mode
+    heating_source_input_on_off = snapshot.heating_source_input_on_off
+    hysteresis_half = settings.heating_source_temp_hysteresis / 2
+
+    heating_operating_mode_previous = state.heating_operating_mode_previous
+    init_flag2 = state.heating_operating_mode_pdhw_dhw_acc_init_flag2
+    onetime_start_flag0 = state.heat_dhw_from_acc_onetime_start_flag0
+    heating_source_auto_on_off = state.heating_source_auto_on_off
+
+    hp_dhw = snapshot.hp_dhw
+    heat_dhw_from_acc = snapshot.heat_dhw_from_acc
+    hp_dhw_request = None
+    heat_dhw_from_acc_request = None
+    temperature_setpoint = state.temperature_setpoint
+    temperature_setpoint_hp = state.temperature_setpoint_hp
+
+    timers_start = []
+    timers_cancel = []
+    messages = []
+
+    # prepne sa na ohrev TUV / ACC, resp. zapne / stopne precerpavanie z ACC do TUV
+    def switch_to_dhw():
+        nonlocal hp_dhw, hp_dhw_request
+        hp_dhw = hp_dhw_request = True
+
+    def switch_to_acc():
+        nonlocal hp_dhw, hp_dhw_request
+        hp_dhw = hp_dhw_request = False
+
+    def start_heat_dhw_from_acc():
+        nonlocal heat_dhw_from_acc, heat_dhw_from_acc_request
+        heat_dhw_from_acc = heat_dhw_from_acc_request = True
+
+    def stop_heat_dhw_from_acc():
+        nonlocal heat_dhw_from_acc, heat_dhw_from_acc_request
+        heat_dhw_from_acc = heat_dhw_from_acc_request = False
+
+    # ******************************************************************************************************
+    # *** VYPOCET PREFEROVANEHO ZASOBNIKA ACC PRE ODCERPAVANIE TEPLEJ VODY *********************************
+    # ******************************************************************************************************
+
+    # zistenie ci teplota v DHW dosiahla teplotu v ((ACC1 alebo ACC2) - offset)
+    # Podla toho bude odcerpacat (primarne z toho v ktorom ACC je teplota vyssia),
+    # ale ak sa zasobnik vypne, ale jeho teplota bude este stale vyssia, nez teplotny limit
+    # u vypnuteho zasobnika, tak sa docasne povoli odcerpanie teplej vody,
+    # dokial sa teplota neznizi, ale vstup do zasobnika bude uz uzatvoreny
+    # Toto plati aj pre kurenie a aj pre DHW
+    preferred_input_ACC, preferred_output_ACC, higher_temperature_acc_value, lower_temperature_acc_value = _acc_preference(
+        temperature_acc1_value, temperature_acc2_value, acc1_enable, acc2_enable, settings
+    )
+
+    temperature_acc_with_offset = higher_temperature_acc_value - settings.temperature_delta_limit_acc_dhw
+
+    # ak je v ACC nizsia teplota nez pouzitelna na kurenie (zadefinovana v nastaveniach), tak anuluje hodnoty v premenych z termostatov kurenia
+    min_acc_temperature_for_heating_limit_broken = higher_temperature_acc_value < settings.min_temperature_for_heating
+
+    # Porovnania voči hysteréznym pásmam (používajú sa vo viacerých režimoch)
+    dhw_above_upper_level = dhw_target_temperature < (temperature_dhw_value - hysteresis_half)
+    dhw_below_lower_level = dhw_target_temperature > (temperature_dhw_value + hysteresis_half)
+    dhw_not_above_lower_level = not (dhw_target_temperature < (temperature_dhw_value + hysteresis_half))
+    acc_above_upper_level = acc_target_temperature < (lower_temperature_acc_value - hysteresis_half)
+    acc_below_lower_level = acc_target_temperature > (lower_temperature_acc_value + hysteresis_half)
+    acc_above_lower_level = acc_target_temperature < (lower_temperature_acc_value + hysteresis_half)
+    strict_input = settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT
+
+    # ******************************************************************************************************
+    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - MANUÁLNY MÓD ******************************************************
+    # ******************************************************************************************************
+    if (heating_operating_mode == HEATING_OPERATING_MODE_MANUAL):
+        init_flag2 = 0
+
+        # INICIALIZÁCIA MÓDU
+        if (heating_operating_mode_previous != heating_operating_mode):
+            heating_operating_mode_previous = heating_operating_mode
+
+        # HLAVNÁ LOGIKA
+        heating_source_auto_on_off = True
+        temperature_setpoint = acc_target_temperature + hysteresis_half
+        temperature_setpoint_hp = acc_target_temperature + hysteresis_half
+
+    # ******************************************************************************************************
+    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Len Ohrev DHW ***********************************
+    # ******************************************************************************************************
+    elif (heating_operating_mode == HEATING_OPERATING_MODE_DHW):
+        init_flag2 = 0
+
+        # INICIALIZÁCIA MÓDU
+        if (heating_operating_mode_previous != heating_operating_mode):
+            heating_operating_mode_previous = heating_operating_mode
+            # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
+            stop_heat_dhw_from_acc()
+
+        # HLAVNÁ LOGIKA
+
+        # a ak nie je striktny mod, pretoci ventil do TUV natrvalo pocas celeho rezimu
+        if not strict_input:
+            switch_to_dhw()
+
+        # Ak je v TUV teplota vyssia nez 2. uroven ziadanej teploty
+        if (dhw_above_upper_level or (not heating_source_input_on_off)):
+            # vypne ohrev
+            heating_source_auto_on_off = False
+            # a ak je striktny mod, pretoci ventil do ACC
+            if strict_input:
+                switch_to_acc()
+
+        # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
+        elif dhw_below_lower_level:
+            # zapne ohrev TUV
+            heating_source_auto_on_off = True
+            # a v striktnom mode pretoci ventil do TUV
+            if strict_input:
+                switch_to_dhw()
+
+        temperature_setpoint = dhw_target_temperature + hysteresis_half
+        temperature_setpoint_hp = dhw_target_temperature + hysteresis_half
+
+    # **************************************************************************************************************
+    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Cyklus s prioritou: 1.Prečerpanie z ACC, 2. Ohrev DHW ***
+    # **************************************************************************************************************
+    elif (heating_operating_mode == HEATING_OPERATING_MODE_PDHW_DHW):
+        init_flag2 = 0
+
+        # INICIALIZÁCIA MÓDU
+        if (heating_operating_mode_previous != heating_operating_mode):
+            heating_operating_mode_previous = heating_operating_mode
+            # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
+            stop_heat_dhw_from_acc()
+
+            # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
+            if dhw_not_above_lower_level:
+                # prepne sa na ventil z TC na ACC a vypne sa zdroj kurenia
+                switch_to_acc()
+                heating_source_auto_on_off = False
+
+        # HLAVNÁ LOGIKA
+
+        # a ak nie je striktny mod, pretoci ventil do TUV natrvalo pocas celeho rezimu
+        if not strict_input:
+            switch_to_dhw()
+
+        # Ak je v ACC vyssia teplota nez v TUV
+        if (temperature_acc_with_offset > temperature_dhw_value):
+            # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
+            if dhw_not_above_lower_level:
+                if (not onetime_start_flag0):
+                    onetime_start_flag0 = 1
+                    # zapne sa precerpavanie z ACC do TUV, vypne sa zdroj kurenia a pretoci sa ventil z TC do ACC
+                    start_heat_dhw_from_acc()
+
+                heating_source_auto_on_off = False
+                if strict_input:
+                    switch_to_acc()
+
+        # Ak je v ACC teplota nizsia, alebo rovna nez v TUV (precerpavanie sa vypne automaticky v inej casti programu)
+        else:
+            # Ak je v TUV teplota vyssia nez 2. uroven ziadanej teploty
+            if (dhw_above_upper_level or (not heating_source_input_on_off)):
+                # resetuje jenorazove spustenie precerpavania (kvoli casovacu)
+                onetime_start_flag0 = 0
+                # vypne ohrev
+                heating_source_auto_on_off = False
+                # a ak je striktny mod, pretoci ventil do ACC
+                if strict_input:
+                    switch_to_acc()
+
+            # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
+            elif dhw_below_lower_level:
+                # zapne ohrev TUV
+                heating_source_auto_on_off = True
+                # a v striktnom mode pretoci ventil do TUV
+                if strict_input:
+                    switch_to_dhw()
+
+        temperature_setpoint = dhw_target_temperature + hysteresis_half
+        temperature_setpoint_hp = dhw_target_temperature + hysteresis_half
+
+    # ******************************************************************************************************
+    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Len Ohrev ACC ***********************************
+    # ******************************************************************************************************
+    elif (heating_operating_mode == HEATING_OPERATING_MODE_ACC):
+        init_flag2 = 0
+
+        # INICIALIZÁCIA MÓDU
+        if (heating_operating_mode_previous != heating_operating_mode):
+            heating_operating_mode_previous = heating_operating_mode
+            # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
+            stop_heat_dhw_from_acc()
+
+        # HLAVNÁ LOGIKA
+
+        switch_to_acc()
+
+        if acc_above_upper_level:
+            heating_source_auto_on_off = False
+        elif acc_below_lower_level:
+            heating_source_auto_on_off = True
+
+        temperature_setpoint = acc_target_temperature + hysteresis_half
+        temperature_setpoint_hp = acc_target_temperature + hysteresis_half
+
+    # **************************************************************************************************************
+    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - 1.Prečerpanie z ACC + 2. Ohrev ACC ***
+    # **************************************************************************************************************
+    elif (heating_operating_mode == HEATING_OPERATING_MODE_PDHW_ACC):
+        init_flag2 = 0
+
+        # INICIALIZÁCIA MÓDU
+        if (heating_operating_mode_previous != heating_operating_mode):
+            heating_operating_mode_previous = heating_operating_mode
+            # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
+            stop_heat_dhw_from_acc()
+
+        # HLAVNÁ LOGIKA
+
+        switch_to_acc()
+
+        if acc_above_upper_level:
+            heating_source_auto_on_off = False
+        elif acc_below_lower_level:
+            heating_source_auto_on_off = True
+
+        temperature_setpoint = acc_target_temperature + hysteresis_half
+        temperature_setpoint_hp = acc_target_temperature + hysteresis_half
+
+        # Ak je v ACC vyssia teplota nez v TUV
+        # ***** (Ak je v ACC teplota rovna, alebo nizsia nez v TUV, alebo teplota dosiahne cielovu hodnotu, precerpavanie sa vypne automaticky (nie tu, ale v inej casti programu)
+        if (temperature_acc_with_offset > temperature_dhw_value):
+            # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
+            if dhw_not_above_lower_level:
+                # zapne sa precerpavanie z ACC do TUV
+                start_heat_dhw_from_acc()
+
+    # ******************************************************************************************************
+    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Cyklus s prioritou: 1.Ohrev DHW, 2.Ohrev ACC ****
+    # ******************************************************************************************************
+    elif (heating_operating_mode == HEATING_OPERATING_MODE_DHW_ACC):
+        init_flag2 = 0
+
+        # INICIALIZÁCIA MÓDU
+        if (heating_operating_mode_previous != heating_operating_mode):
+            heating_operating_mode_previous = heating_operating_mode
+            # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
+            stop_heat_dhw_from_acc()
+
+            # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
+            if dhw_not_above_lower_level:
+                # prepne sa na ohrev TUV a zapne sa zdroj kurenia
+                switch_to_dhw()
+                heating_source_auto_on_off = True
+
+        # HLAVNÁ LOGIKA
+
+        temperature_setpoint_hp = MAX_TEMPERATURE_LIMIT_HP
+
+        # ak je prepnute na ohrev TUV
+        if hp_dhw:
+            # Pre všeobecný zdroj kurenia sa nastavi 2. uroven teploty pre TUV
+            temperature_setpoint = dhw_target_temperature + hysteresis_half
+            heating_source_auto_on_off = _dhw_phase(
+                strict_input, heating_source_input_on_off, dhw_above_upper_level,
+                acc_above_upper_level, heating_source_auto_on_off, switch_to_acc,
+            )
+
+        # ak je uz prepnuty ohrev na ACC
+        else:
+            # Pre všeobecný zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre ACC
+            temperature_setpoint = acc_target_temperature + hysteresis_half
+            heating_source_auto_on_off = _acc_phase(
+                heating_source_input_on_off, acc_above_lower_level, acc_above_upper_level,
+                dhw_above_upper_level, dhw_not_above_lower_level, heating_source_auto_on_off,
+                switch_to_dhw, switch_to_acc,
+            )
+
+    # ***********************************************************************************************************************************
+    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Cyklus s prioritou: 1.Prečerpanie z ACC do DHW, 2.Ohrev DHW, 3.ohrev ACC *****
+    # ***********************************************************************************************************************************
+    elif (heating_operating_mode == HEATING_OPERATING_MODE_PDHW_DHW_ACC):
+
+        # INICIALIZÁCIA MÓDU
+        if (heating_operating_mode_previous != heating_operating_mode):
+            heating_operating_mode_previous = heating_operating_mode
+            # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
+            stop_heat_dhw_from_acc()
+
+            # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
+            if dhw_not_above_lower_level:
+                # prepne sa na ohrev ACC a vypne sa zdroj kurenia
+                switch_to_acc()
+                heating_source_auto_on_off = False
+
+        # HLAVNÁ LOGIKA
+
+        temperature_setpoint_hp = MAX_TEMPERATURE_LIMIT_HP
+
+        # Ak je v ACC vyssia teplota nez v TUV
+        if (temperature_acc_with_offset > temperature_dhw_value):
+
+            # Ak je v TUV teplota vyssia nez 1. uroven ziadanej teploty
+            if dhw_not_above_lower_level:
+
+                # Pre všeobecný zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre ACC
+                temperature_setpoint = acc_target_temperature + hysteresis_half
+
+                if (init_flag2 == 0):
+                    init_flag2 = 1
+
+                    # zapne sa precerpavanie z ACC do TUV, prepne sa ventil na ACC a vypne sa zdroj kurenia
+                    start_heat_dhw_from_acc()
+                    switch_to_acc()
+
+                # Ak je v ACC vyssia teplota nez 1. uroven ziadanej teploty -> vypne sa zdroj kurenia, inak sa zapne
+                heating_source_auto_on_off = not acc_above_lower_level
+
+            # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
+            else:
+                # a ak je strict mode, ventil z TC sa prepne do ACC
+                if strict_input:
+                    switch_to_acc()
+
+        # Ak je v ACC teplota rovna, alebo dokonca nizsia nez v TUV, alebo teplota dosiahne cielovu hodnotu
+        # vypne sa precerpavanie automaticky (nie tu, ale v inej casti programu)
+        # zapne sa zdroj kurenia a ventil sa prepne zo zdoja kurenia na TUV
+        else:
+            if (init_flag2 == 1):
+                init_flag2 = 0
+
+                # prepne sa na ohrev TUV a zapne sa zdroj kurenia
+                switch_to_dhw()
+                heating_source_auto_on_off = True
+
+        # ak bezi precerpavanie, cela dalsia cast programu sa nevykona, az ked precerpavanie skonci
+        if (not heat_dhw_from_acc):
+
+            # ak je prepnute na ohrev TUV
+            if hp_dhw:
+                # Pre všeobecný zdroj kurenia sa nastavi 2. uroven teploty pre TUV
+                temperature_setpoint = dhw_target_temperature + hysteresis_half
+                heating_source_auto_on_off = _dhw_phase(
+                    strict_input, heating_source_input_on_off, dhw_above_upper_level,
+                    acc_above_upper_level, heating_source_auto_on_off, switch_to_acc,
+                )
+
+            # ak je uz prepnuty ohrev na ACC
+            else:
+                # Pre všeobecný zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre ACC
+                temperature_setpoint = acc_target_temperature + hysteresis_half
+                heating_source_auto_on_off = _acc_phase(
+                    heating_source_input_on_off, acc_above_lower_level, acc_above_upper_level,
+                    dhw_above_upper_level, dhw_not_above_lower_level, heating_source_auto_on_off,
+                    switch_to_dhw, switch_to_acc,
+                )
+
+    # ***********************************************************************************************************************************
+    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - NEPLATNÝ REŽIM *********************************************************************************
+    # ***********************************************************************************************************************************
+    else:
+        if (heating_operating_mode_previous != heating_operating_mode):
+            heating_operating_mode_previous = heating_operating_mode
+            # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
+            stop_heat_dhw_from_acc()
+
+        init_flag2 = 0
+        messages.append(("error", f"Heating operating mode {heating_operating_mode} is not valid."))
+
+    # ***********************************************************************************************************************************
+    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - RIADIACE SIGNÁLY PRE TC ************************************************************************
+    # ***********************************************************************************************************************************
+
+    if (temperature_setpoint > MAX_TEMPERATURE_LIMIT):
+        control_command_temperature = MAX_TEMPERATURE_LIMIT
+    elif (temperature_setpoint < 25):
+        control_command_temperature = 25
+    else:
+        control_command_temperature = temperature_setpoint
+
+    if (temperature_setpoint_hp > MAX_TEMPERATURE_LIMIT_HP):
+        control_command_hp_temperature = MAX_TEMPERATURE_LIMIT_HP
+    elif (temperature_setpoint_hp < 25):
+        control_command_hp_temperature = 25
+    else:
+        control_command_hp_temperature = temperature_setpoint_hp
+
+    valve_from_hp_to_acc_or_dhw_state = snapshot.valve_from_hp_to_acc_or_dhw
+    valve_input_acc1_state = snapshot.valve_input_acc1
+    valve_input_acc2_state = snapshot.valve_input_acc2
+
+    # Príkaz pre všeobecný zdroj kurenia aj pre TČ sa vyhodnocuje rovnako
+    controll_command_hp_on_off = 0
+    if (heating_source_input_on_off):
+        if (heating_source_auto_on_off):
+            if (
+                (temperature_acc1_value <= MAX_TEMPERATURE_LIMIT) and
+                (temperature_acc2_value <= MAX_TEMPERATURE_LIMIT) and
+                (temperature_dhw_value <= MAX_TEMPERATURE_LIMIT)
+                ):
+                if (heating_operating_mode == HEATING_OPERATING_MODE_MANUAL):
+                    if SUBCONTROLLER_HP_ROUTING in suspended:
+                        # poloha ventilov nie je známa - drží sa posledný príkaz
+                        controll_command_hp_on_off = state.previous_controll_command_hp_on_off
+                    elif (valve_from_hp_to_acc_or_dhw_state == STATE_HP_ACC):
+                        if ((valve_input_acc1_state == STATE_OPEN) or (valve_input_acc2_state == STATE_OPEN)):
+                            controll_command_hp_on_off = 1
+                    elif (valve_from_hp_to_acc_or_dhw_state == STATE_HP_DHW):
+                        controll_command_hp_on_off = 1
+                else:
+                    controll_command_hp_on_off = 1
+    controll_command_on_off = controll_command_hp_on_off
+
+    valve_input_acc_closing_allowed = state.valve_input_acc_closing_allowed
+    valve_input_acc_closing_timer_active = state.valve_input_acc_closing_timer_active
+    hp_dhw_to_acc_switch_allowed = state.hp_dhw_to_acc_switch_allowed
+    hp_dhw_to_acc_timer_active = state.hp_dhw_to_acc_timer_active
+
+    # ZATIAL NEDOKONCENE, OVLADA TO LEN TEPELNE CERPADLO
+    # Detekcia zmeny stavu TČ pre časovač zatvorenia ventilov na vstupoch do ACC
+    if (state.previous_controll_command_hp_on_off == 1 and controll_command_hp_on_off == 0):
+        delay_minutes = settings.valve_input_acc_closing_delay_when_heating_source_stop
+        # TČ sa práve vyplo - spustiť časovač ak ešte nebeží
+        if not valve_input_acc_closing_timer_active:
+            if delay_minutes > 0:
+                valve_input_acc_closing_allowed = False
+                valve_input_acc_closing_timer_active = True
+                timers_start.append((TIMER_VALVE_INPUT_ACC_CLOSING_DELAY, delay_minutes * 60))
+                messages.append(("info", f"Valve input ACC closing delay timer started for {delay_minutes} minutes"))
+            else:
+                # Ak je delay 0, povoliť zatvorenie okamžite
+                valve_input_acc_closing_allowed = True
+
+        # Časovač pre oneskorenie pretočenia ventilu hp_dhw z TUV na ACC
+        # Spúšťa sa len ak: ventil je v TUV a vstupné ventily do ACC sú zatvorené
+        if SUBCONTROLLER_HP_ROUTING in suspended:
+            # poloha ventilov nie je známa - príznak sa nemení
+            pass
+        elif (valve_from_hp_to_acc_or_dhw_state == STATE_HP_DHW and
+            valve_input_acc1_state == STATE_CLOSED and
+            valve_input_acc2_state == STATE_CLOSED):
+            if not hp_dhw_to_acc_timer_active:
+                if delay_minutes > 0:
+                    hp_dhw_to_acc_switch_allowed = False
+                    hp_dhw_to_acc_timer_active = True
+                    timers_start.append((TIMER_HP_DHW_TO_ACC_DELAY, delay_minutes * 60))
+                    messages.append(("info", f"HP DHW to ACC switch delay timer started for {delay_minutes} minutes (HP off, DHW active, ACC inputs closed)"))
+                else:
+                    # Ak je delay 0, povoliť pretočenie okamžite
+                    hp_dhw_to_acc_switch_allowed = True
+        else:
+            # Ak podmienky nie sú splnené, resetovať príznak (môže sa pretočiť ihneď)
+            hp_dhw_to_acc_switch_allowed = True
+
+    # ZATIAL NEDOKONCENE, OVLADA TO LEN TEPELNE CERPADLO
+    elif (state.previous_controll_command_hp_on_off == 0 and controll_command_hp_on_off == 1):
+        # TČ sa práve zaplo - zrušiť časovač a resetovať stav
+        if valve_input_acc_closing_timer_active:
+            valve_input_acc_closing_timer_active = False
+            timers_cancel.append(TIMER_VALVE_INPUT_ACC_CLOSING_DELAY)
+            messages.append(("debug", "Valve input ACC closing delay timer cancelled - HP turned on"))
+        valve_input_acc_closing_allowed = True
+
+        # Zrušiť aj časovač pre pretočenie hp_dhw ventilu
+        if hp_dhw_to_acc_timer_active:
+            hp_dhw_to_acc_timer_active = False
+            timers_cancel.append(TIMER_HP_DHW_TO_ACC_DELAY)
+            messages.append(("debug", "HP DHW to ACC switch delay timer cancelled - HP turned on"))
+        hp_dhw_to_acc_switch_allowed = True
+
+    # ******************************************************************************************************
+    # *** AUTOMATICKE VYPNUTIE PRECERPAVANIA Z ACC DO DHW, KED SA DOSIAHNE V DHW TEPLOTA, KTORA JE V ACC ***
+    # ******************************************************************************************************
+
+    # Ak teplota v DHW dosiahne teplotu v ((ACC1 alebo ACC2) - offset), alebo
+    # ak teplota v TUV prekroci 2. uroven teploty voči žiadanej teplote
+    # tak sa vypne switch.heat_dhw_from_acc
+    if ((temperature_acc_with_offset <= temperature_dhw_value) or dhw_above_upper_level):
+        stop_heat_dhw_from_acc()
+
+    valves = dict.fromkeys(VALVE_KEYS)
+    thermostat_on = (snapshot.thermostat_state == STATE_ON) and (not min_acc_temperature_for_heating_limit_broken)
+    heating_on = (snapshot.heating_state == STATE_ON) and (not min_acc_temperature_for_heating_limit_broken)
+    output_mode = settings.valve_output_acc_strict_mode
+    input_mode = settings.valve_input_acc_strict_mode
+
+    # ******************************************************************************************************
+    # *** OVLÁDANIE VENTILU Z TEPELNÉHO ČERPADLA KTORÝ PREPÍNA BUĎ DO ACC, ALEBO DO DHW ********************
+    # ******************************************************************************************************
+
+    if hp_dhw:
+        valves[CONF_VALVE_FROM_TC_TO_ACC_OR_DHW] = STATE_HP_DHW
+    elif hp_dhw_to_acc_switch_allowed or valve_from_hp_to_acc_or_dhw_state != STATE_HP_DHW:
+        valves[CONF_VALVE_FROM_TC_TO_ACC_OR_DHW] = STATE_HP_ACC
+    else:
+        # Kontrola oneskorenia - len ak prepíname z DHW na ACC
+        messages.append(("debug", "Valve HP to ACC switch delayed - waiting for timer"))
+
+    # ******************************************************************************************************
+    # *** OVLÁDANIE VENTILOV NA VÝSTUPE Z ACC 1 A ACC 2 ****************************************************
+    # ******************************************************************************************************
+
+    for valve_key, acc_enable, temperature_acc_value, acc_number in (
+        (CONF_VALVE_OUTPUT_ACC1, acc1_enable, temperature_acc1_value, 1),
+        (CONF_VALVE_OUTPUT_ACC2, acc2_enable, temperature_acc2_value, 2),
+    ):
+        flag = 0
+        # ak je ACC zapnuté, alebo ak je teplota v ACC vyššia než minimálna povolená teplota pre kúrenie
+        if ((acc_enable) or (temperature_acc_value > settings.disabled_acc_temperature_limit)):
+            # ak nie je preferencia ACC, alebo je preferované toto ACC
+            if (preferred_output_ACC == 0) or (preferred_output_ACC == acc_number):
+                # ak je zapnuté prečerpávanie z ACC do DHW
+                if (heat_dhw_from_acc):
+                    flag = 1
+                # ak je mód ventilu GENERIC
+                elif (output_mode == VALVE_MODE_GENERIC):
+                    flag = 1
+                # ak je mód ventilu MODERATE a je zapnutý aspoň jeden z termostatov ON
+                elif (output_mode == VALVE_MODE_MODERATE):
+                    if thermostat_on:
+                        flag = 1
+                # ak je mód ventilu STRICT
+                elif (output_mode == VALVE_MODE_STRICT):
+                    # ak je ventil z TC prepnutý do ACC a je zapnutý aspoň jeden z termostatov ON,
+                    # inak ak je aspoň jeden z termostatov v stave kúrenia
+                    if ((not hp_dhw) and thermostat_on) or (hp_dhw and heating_on):
+                        flag = 1
+                else:
+                    messages.append(("error", f"Value in 'self.settings.valve_output_acc_strict_mode' = '{output_mode}' is invalid."))
+        valves[valve_key] = STATE_OPEN if flag else STATE_CLOSED
+
+    # ******************************************************************************************************
+    # *** OVLÁDANIE VENTILOV NA VSTUPE DO ACC 1 A ACC 2 ****************************************************
+    # ******************************************************************************************************
+
+    for valve_key, acc_enable, other_acc_enable, acc_number in (
+        (CONF_VALVE_INPUT_ACC1, acc1_enable, acc2_enable, 1),
+        (CONF_VALVE_INPUT_ACC2, acc2_enable, acc1_enable, 2),
+    ):
+        flag = 0
+        if (acc_enable):
+            # Otvara len ten ventil ktoreho ACC je chladnejsi, ak su teploty v oboch ACC rovnake, otvori obidva ventily
+            # Tento ventil sa otvori aj vtedy ak by ACC druheho ventilu bol vypnuty
+            if ((preferred_input_ACC == 0) or (preferred_input_ACC == acc_number) or (not other_acc_enable)):
+                if (input_mode == VALVE_MODE_GENERIC):
+                    flag = 1
+                elif (input_mode == VALVE_MODE_MODERATE):
+                    if (not hp_dhw):
+                        flag = 1
+                elif (input_mode == VALVE_MODE_STRICT):
+                    if (not hp_dhw):
+                        if (heating_operating_mode == HEATING_OPERATING_MODE_MANUAL):
+                            if (heating_source_input_on_off):
+                                flag = 1
+                        elif (heating_operating_mode in (HEATING_OPERATING_MODE_DHW, HEATING_OPERATING_MODE_PDHW_DHW)):
+                            flag = 0
+                        elif (controll_command_hp_on_off):
+                            flag = 1
+                else:
+                    messages.append(("error", f"Value in 'self.settings.valve_input_acc_strict_mode' = '{input_mode}' is invalid."))
+
+        if flag:
+            valves[valve_key] = STATE_OPEN
+        # Zatvorenie ventilu len ak je povolené (časovač vypršal alebo TČ je zapnuté)
+        elif valve_input_acc_closing_allowed or snapshot.valve_state(valve_key) != STATE_OPEN:
+            valves[valve_key] = STATE_CLOSED
+        else:
+            messages.append(("debug", f"Valve input to ACC {acc_number} closing delayed - waiting for timer"))
+
+    # ******************************************************************************************************
+    # *** OVLÁDANIE VENTILU Z ACC KTORÝ PREPÍNA BUĎ DO KÚRENIA, ALEBO DO DHW *****
+    # ******************************************************************************************************
+
+    valves[CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW] = STATE_ACC_DHW if heat_dhw_from_acc else STATE_ACC_HEATING
+
+    # ******************************************************************************************************
+    # *** OVLÁDANIE VENTILU NA VÝSTUPE DO KÚRENIA DO DOMU **************************************************
+    # ******************************************************************************************************
+
+    # ak nebezi precerpavanie
+    if (not heat_dhw_from_acc):
+        if (output_mode == VALVE_MODE_STRICT):
+            valve_output_heating_flag = thermostat_on if not hp_dhw else heating_on
+        else:
+            valve_output_heating_flag = thermostat_on
+        valves[CONF_VALVE_OUTPUT_HEATING] = STATE_OPEN if valve_output_heating_flag else STATE_CLOSED
+
+    # Pozastavené čiastkové regulátory neovládajú svoje ventily
+    for subcontroller in suspended:
+        for valve_key in SUBCONTROLLER_VALVES.get(subcontroller, ()):
+            valves[valve_key] = None
+
+    # ******************************************************************************************************
+    # *** OVLÁDANIE OBEHOVÝCH ČERPADIEL ********************************************************************
+    # ******************************************************************************************************
+
+    if SUBCONTROLLER_PUMPS in suspended:
+        pumps = dict.fromkeys(PUMP_KEYS)
+        booster_active = state.auxiliary_pump_booster_active
+        booster_finished = state.auxiliary_pump_booster_finished
+    else:
+        pumps, booster_active, booster_finished = _water_pumps(
+            snapshot, settings, state, heat_dhw_from_acc, heating_on,
+            min_acc_temperature_for_heating_limit_broken, timers_start, timers_cancel, messages,
+        )
+
+    new_state = ControllerState(
+        heating_operating_mode_previous=heating_operating_mode_previous,
+        heating_operating_mode_pdhw_dhw_acc_init_flag2=init_flag2,
+        heat_dhw_from_acc_onetime_start_flag0=onetime_start_flag0,
+        heating_source_auto_on_off=heating_source_auto_on_off,
+        previous_controll_command_on_off=controll_command_on_off,
+        previous_controll_command_hp_on_off=controll_command_hp_on_off,
+        valve_input_acc_closing_allowed=valve_input_acc_closing_allowed,
+        valve_input_acc_closing_timer_active=valve_input_acc_closing_timer_active,
+        hp_dhw_to_acc_switch_allowed=hp_dhw_to_acc_switch_allowed,
+        hp_dhw_to_acc_timer_active=hp_dhw_to_acc_timer_active,
+        auxiliary_pump_booster_active=booster_active,
+        auxiliary_pump_booster_finished=booster_finished,
+        temperature_setpoint=temperature_setpoint,
+        temperature_setpoint_hp=temperature_setpoint_hp,
+    )
+
+    return ControlPlan(
+        state=new_state,
+        hp_dhw=hp_dhw_request,
+        heat_dhw_from_acc=heat_dhw_from_acc_request,
+        valves=valves,
+        pumps=pumps,
+        controll_command_on_off=controll_command_on_off,
+        controll_command_hp_on_off=controll_command_hp_on_off,
+        control_command_temperature=control_command_temperature,
+        control_command_hp_temperature=control_command_hp_temperature,
+        preferred_output_ACC=preferred_output_ACC,
+        preferred_input_ACC=preferred_input_ACC,
+        higher_temperature_acc_value=higher_temperature_acc_value,
+        lower_temperature_acc_value=lower_temperature_acc_value,
+        min_acc_temperature_for_heating_limit_broken=min_acc_temperature_for_heating_limit_broken,
+        temperature_setpoint=temperature_setpoint,
+        temperature_setpoint_hp=temperature_setpoint_hp,
+        timers_start=tuple(timers_start),
+        timers_cancel=tuple(timers_cancel),
+        messages=tuple(messages),
+    )
+
+
+def temperature_margins(
+    temperature_acc1_value: float,
+    temperature_acc2_value: float,
+    temperature_dhw_value: float,
+    acc1_enable: bool,
+    acc2_enable: bool,
+    dhw_target_temperature: float,
+    acc_target_temperature: float,
+    settings,
+) -> tuple[float, ...]:
+    """Vzdialenosti teplôt od všetkých prahov, voči ktorým decide() porovnáva.
+
+    Znamienko každej hodnoty určuje výsledok jedného porovnania v decide().
+    Zmena teploty, pri ktorej sa nezmení žiadne znamienko, nemôže zmeniť
+    rozhodnutie (pozri temperature_change_relevant).
+    """
+    hysteresis_half = settings.heating_source_temp_hysteresis / 2
+    _input, _output, higher_temperature_acc_value, lower_temperature_acc_value = _acc_preference(
+        temperature_acc1_value, temperature_acc2_value, acc1_enable, acc2_enable, settings
+    )
+    temperature_acc_with_offset = higher_temperature_acc_value - settings.temperature_delta_limit_acc_dhw
+    return (
+        # výber preferovaného ACC
+        abs(temperature_acc1_value - temperature_acc2_value) - settings.temperature_delta_limit_in_acc,
+        temperature_acc1_value - temperature_acc2_value,
+        temperature_acc1_value - settings.disabled_acc_temperature_limit,
+        temperature_acc2_value - settings.disabled_acc_temperature_limit,
+        # prečerpávanie ACC -> TUV a minimálna teplota pre kúrenie
+        temperature_acc_with_offset - temperature_dhw_value,
+        higher_temperature_acc_value - settings.min_temperature_for_heating,
+        # hysterézne pásma TUV a ACC
+        temperature_dhw_value - hysteresis_half - dhw_target_temperature,
+        temperature_dhw_value + hysteresis_half - dhw_target_temperature,
+        lower_temperature_acc_value - hysteresis_half - acc_target_temperature,
+        lower_temperature_acc_value + hysteresis_half - acc_target_temperature,
+        # bezpečnostné limity
+        temperature_acc1_value - MAX_TEMPERATURE_LIMIT,
+        temperature_acc2_value - MAX_TEMPERATURE_LIMIT,
+        temperature_dhw_value - MAX_TEMPERATURE_LIMIT,
+    )
+
+
+def temperature_change_relevant(old_margins: tuple[float, ...], new_margins: tuple[float, ...], deadband: float) -> bool:
+    """True ak zmena preklopí niektoré porovnanie, alebo sa teplota priblíži k prahu na menej ako deadband."""
+    for old, new in zip(old_margins, new_margins):
+        if (old > 0) != (new > 0) or (old < 0) != (new < 0):
+            return True
+        if abs(new) <= deadband < abs(old):
+            return True
+    return False
+
+
+def suspended_subcontrollers(invalid: tuple[str, ...]) -> frozenset[str]:
+    """Čiastkové regulátory, ktorým chýba niektorý z potrebných vstupov."""
+    if not invalid:
+        return frozenset()
+    missing = frozenset(invalid)
+    return frozenset(name for name, inputs in SUBCONTROLLER_INPUTS.items() if inputs & missing)
+
+
+def _acc_preference(
+    temperature_acc1_value: float,
+    temperature_acc2_value: float,
+    acc1_enable: bool,
+    acc2_enable: bool,
+    settings,
+) -> tuple[int, int, float, float]:
+    """Preferované ACC pre vstup / výstup a vyššia / nižšia teplota v ACC."""
+    preferred_output_ACC = 0
+    preferred_input_ACC = 0
+    higher_temperature_acc_value = float((temperature_acc1_value + temperature_acc2_value) / 2.00)
+    lower_temperature_acc_value = float(min(temperature_acc1_value, temperature_acc2_value))
+
+    if (abs(temperature_acc1_value - temperature_acc2_value) > settings.temperature_delta_limit_in_acc):
+        if (acc1_enable and acc2_enable):
+            if (temperature_acc1_value > temperature_acc2_value):
+                higher_temperature_acc_value = temperature_acc1_value
+                lower_temperature_acc_value = temperature_acc2_value
+                preferred_input_ACC = 2
+                preferred_output_ACC = 1
+            else:
+                higher_temperature_acc_value = temperature_acc2_value
+                lower_temperature_acc_value = temperature_acc1_value
+                preferred_input_ACC = 1
+                preferred_output_ACC = 2
+        elif (acc1_enable and (not acc2_enable)):
+            preferred_input_ACC = 1
+            if (temperature_acc2_value > settings.disabled_acc_temperature_limit):
+                if (temperature_acc2_value > temperature_acc1_value):
+                    preferred_output_ACC = 2
+                    higher_temperature_acc_value = temperature_acc2_value
+                    lower_temperature_acc_value = temperature_acc1_value
+                else:
+                    preferred_output_ACC = 1
+                    higher_temperature_acc_value = temperature_acc1_value
+                    lower_temperature_acc_value = temperature_acc2_value
+            else:
+                preferred_output_ACC = 1
+                higher_temperature_acc_value = temperature_acc1_value
+                lower_temperature_acc_value = temperature_acc1_value
+        elif ((not acc1_enable) and acc2_enable):
+            preferred_input_ACC = 2
+            if (temperature_acc1_value > settings.disabled_acc_temperature_limit):
+                if (temperature_acc1_value > temperature_acc2_value):
+                    preferred_output_ACC = 1
+                    higher_temperature_acc_value = temperature_acc1_value
+                    lower_temperature_acc_value = temperature_acc2_value
+                else:
+                    preferred_output_ACC = 2
+                    higher_temperature_acc_value = temperature_acc2_value
+                    lower_temperature_acc_value = temperature_acc1_value
+            else:
+                preferred_output_ACC = 2
+                higher_temperature_acc_value = temperature_acc2_value
+                lower_temperature_acc_value = temperature_acc2_value
+
+    return preferred_input_ACC, preferred_output_ACC, higher_temperature_acc_value, lower_temperature_acc_value
+
+
+def _dhw_phase(strict_input, heating_source_input_on_off, dhw_above_upper_level,
+               acc_above_upper_level, heating_source_auto_on_off, switch_to_acc):
+    """Fáza ohrevu TUV v režimoch DHW_ACC a PDHW_DHW_ACC. Vráti nový heating_source_auto_on_off."""
+    # Ak je striktny mod pre vstupne ventily a zdroj kurenia je vypnuty, prepne sa ventil z TC do ACC
+    if strict_input and (not heating_source_input_on_off):
+        switch_to_acc()
+        return heating_source_auto_on_off
+
+    # Ak teplota v TUV prekroci 2. uroven ziadanej teploty
+    if dhw_above_upper_level:
+        # Tak sa prepne na ohrev ACC
+        switch_to_acc()
+        # Ak je v ACC teplota vyssia, nez 2. uroven ziadanej teploty, vypne sa zdroj kurenia
+        if acc_above_upper_level:
+            return False
+
+    return heating_source_auto_on_off
+
+
+def _acc_phase(heating_source_input_on_off, acc_above_lower_level, acc_above_upper_level,
+               dhw_above_upper_level, dhw_not_above_lower_level, heating_source_auto_on_off,
+               switch_to_dhw, switch_to_acc):
+    """Fáza ohrevu ACC v režimoch DHW_ACC a PDHW_DHW_ACC. Vráti nový heating_source_auto_on_off."""
+    # Ak je zdroj kurenia vypnuty, nerobi sa nic
+    if (heating_source_input_on_off != True):
+        return heating_source_auto_on_off
+
+    # Ak je v ACC teplota vyssia nez 1. uroven ziadanej teploty
+    if acc_above_lower_level:
+
+        # Ak je v ACC teplota vyssia, nez 2. uroven ziadanej teploty
+        if acc_above_upper_level:
+
+            # ak bol zdroj teploty uz zapnuty (z predchadzajucej sekvencie) tak bude pokracovat v kureni az do dosiahnutia 2. urovne ziadanej teploty
+            if heating_source_auto_on_off:
+                # Ak je v TUV teplota vyssia, nez 2. uroven ziadanej teploty, vypne sa zdroj kurenia
+                if dhw_above_upper_level:
+                    return False
+                # Ak je v TUV teplota nizsia nez 2. uroven ziadanej teploty, prepne sa na ohrev TUV
+                switch_to_dhw()
+                return heating_source_auto_on_off
+
+            # ak bol zdroj teploty uz vypnuty (z predchadzajucej sekvencie) tak sa zapne az po znizeni teploty TUV pod 1. uroven ziadanej teploty
+            if dhw_not_above_lower_level:
+                # prepne sa na ohrev TUV a zapne sa zdroj kurenia
+                switch_to_dhw()
+                return True
+            return heating_source_auto_on_off
+
+        # Ak je v ACC teplota nizsia, nez 2. uroven ziadanej teploty
+        if dhw_not_above_lower_level:
+            # prepne sa na ohrev TUV a zapne sa zdroj kurenia
+            switch_to_dhw()
+            return True
+        return heating_source_auto_on_off
+
+    # Ak je v ACC teplota nizsia nez 1. uroven ziadanej teploty, zapne sa zdroj kurenia
+    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty, prepne sa na ohrev TUV
+    if dhw_not_above_lower_level:
+        switch_to_dhw()
+    # Ak je v TUV teplota vyssia, nez 2. uroven ziadanej teploty, prepne sa na ohrev ACC
+    if dhw_above_upper_level:
+        switch_to_acc()
+    return True
+
+
+def _water_pumps(snapshot, settings, state, heat_dhw_from_acc, heating_on,
+                 min_acc_temperature_for_heating_limit_broken, timers_start, timers_cancel, messages):
+    """Požadované stavy obehových čerpadiel. Vráti (pumps, booster_active, booster_finished)."""
+    pumps = dict.fromkeys(PUMP_KEYS)
+    auxiliary_mode = settings.auxiliary_water_pump_for_heating
+    booster_active = state.auxiliary_pump_booster_active
+    booster_finished = state.auxiliary_pump_booster_finished
+    acc_output_open = (snapshot.valve_output_acc1 == STATE_OPEN) or (snapshot.valve_output_acc2 == STATE_OPEN)
+    heating_path_open = (
+        acc_output_open and
+        (snapshot.valve_from_acc_to_heat_or_dhw == STATE_ACC_HEATING) and
+        (snapshot.valve_output_heating == STATE_OPEN)
+    )
+
+    # *** ČERPADLO NA VÝSTUPE ACC ***
+    water_pump_acc_output_flag = 0
+    # ak je zapnute precerpacanie z ACC do DHW a ventil z ACC je pretoceny do DHW
+    if (heat_dhw_from_acc):
+        if acc_output_open and (snapshot.valve_from_acc_to_heat_or_dhw == STATE_ACC_DHW):
+            water_pump_acc_output_flag = 1
+    # ak je vypnute precerpacanie z ACC do DHW a v nastaveniach je povolene pomocne cerpadlo
+    elif (auxiliary_mode == AUXILIARY_PUMP_ENABLE):
+        if heating_on and heating_path_open:
+            water_pump_acc_output_flag = 1
+
+    # V BOOSTER režime sa pumpa neovláda tu, ale v sekcii heating
+    if (auxiliary_mode != AUXILIARY_PUMP_BOOSTER) or (heat_dhw_from_acc):
+        pumps[CONF_WATER_PUMP_ACC_OUTPUT] = bool(water_pump_acc_output_flag)
+
+    # *** ČERPADLO PRE PODLAHOVÉ KÚRENIE ***
+    floor_heating_on = (snapshot.floor_heating_state == STATE_ON) and (not min_acc_temperature_for_heating_limit_broken)
+    pumps[CONF_WATER_PUMP_FLOOR_HEATING] = bool(floor_heating_on and (not heat_dhw_from_acc) and heating_path_open)
+
+    # *** ČERPADLO NA VÝSTUPE DO KÚRENIA ***
+    water_pump_heating_flag = heating_on and (not heat_dhw_from_acc) and heating_path_open
+    pumps[CONF_WATER_PUMP_HEATING] = bool(water_pump_heating_flag)
+
+    if water_pump_heating_flag:
+        if (auxiliary_mode == AUXILIARY_PUMP_ENABLE):
+            pumps[CONF_WATER_PUMP_ACC_OUTPUT] = True
+        elif (auxiliary_mode == AUXILIARY_PUMP_BOOSTER):
+            # V BOOSTER režime: zapnúť pumpu len ak booster ešte neprebehol
+            # Ak je booster aktívny (timer beží) alebo už prebehol, nič nerobíme
+            if not booster_finished and not booster_active:
+                pumps[CONF_WATER_PUMP_ACC_OUTPUT] = True
+                booster_active = True
+                timers_start.append((TIMER_AUXILIARY_PUMP_BOOSTER, settings.auxiliary_pump_booster_time * 60))
+                messages.append(("debug", f"Auxiliary water pump for heating was turned on (BOOSTER mode) - timer started for {settings.auxiliary_pump_booster_time} minutes"))
+    else:
+        if (auxiliary_mode in (AUXILIARY_PUMP_ENABLE, AUXILIARY_PUMP_BOOSTER)) and (not heat_dhw_from_acc):
+            pumps[CONF_WATER_PUMP_ACC_OUTPUT] = False
+        if (auxiliary_mode == AUXILIARY_PUMP_BOOSTER):
+            # Zrušiť booster časovač a resetovať všetky stavy (aby sa mohol znovu spustiť pri ďalšom zapnutí)
+            if booster_active:
+                timers_cancel.append(TIMER_AUXILIARY_PUMP_BOOSTER)
+                messages.append(("debug", "Booster timer cancelled - heating turned off"))
+            booster_active = False
+            booster_finished = False
+
+    return pumps, booster_active, booster_finished
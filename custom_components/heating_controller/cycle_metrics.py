@@ -0,0 +1,147 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" cycle_metrics.py """
+
+"""Rolling timing histograms of control cycles for Heating Controller integration.
+
+Trvanie každej fázy kontrolného cyklu (time.perf_counter_ns) sa zapíše do
+histogramu s pevnými logaritmickými košmi (4 koše na oktávu, 1 µs .. ~16 s),
+takže záznam je len zvýšenie počítadla bez alokácií. Histogramy sú rozdelené
+do okien (CYCLE_METRICS_WINDOW); najstaršie okno sa pri posune času vynuluje,
+súhrn (p50 / p95 / max, cykly za hodinu, požiadavky počas bežiaceho cyklu)
+teda pokrýva posledných CYCLE_METRICS_WINDOWS okien. Percentily sú horné
+hranice košov (presnosť ~19 %), maximum je presné.
+"""
+
+import logging
+import math
+import time
+
+from .const import *
+
+LOGGER = logging.getLogger(__name__)
+
+# Fázy kontrolného cyklu v poradí vykonania (viď Heating_Controller_Instance._control_cycle)
+CYCLE_PHASES = ("read", "decide", "apply", "actuate", "trace", "publish")
+
+_BUCKETS_PER_OCTAVE = 4
+_BUCKETS = 24 * _BUCKETS_PER_OCTAVE + 1  # kôš 0 = do 1 µs, kôš i = (2^((i-1)/4), 2^(i/4)] µs
+_SERIES = len(CYCLE_PHASES) + 1  # fázy + celý cyklus (posledný)
+_CYCLE = len(CYCLE_PHASES)
+
+
+def _bucket(duration_ns: int) -> int:
+    """Index koša pre trvanie v ns."""
+    if duration_ns <= 1000:
+        return 0
+    return min(_BUCKETS - 1, math.ceil(math.log2(duration_ns / 1000) * _BUCKETS_PER_OCTAVE))
+
+
+def _bucket_upper_ms(index: int) -> float:
+    return 2 ** (index / _BUCKETS_PER_OCTAVE) / 1000
+
+
+class _Window:
+    """Histogramy všetkých sérií za jedno okno."""
+
+    __slots__ = ("counts", "maximum", "skipped")
+
+    def __init__(self) -> None:
+        self.counts = [[0] * _BUCKETS for _ in range(_SERIES)]
+        self.maximum = [0] * _SERIES
+        self.skipped = 0
+
+    def clear(self) -> None:
+        for counts in self.counts:
+            counts[:] = [0] * _BUCKETS
+        self.maximum[:] = [0] * _SERIES
+        self.skipped = 0
+
+
+class CycleMetrics:
+    """Rolling histograms of control cycle phase durations."""
+
+    def __init__(self, window: float = CYCLE_METRICS_WINDOW, windows: int = CYCLE_METRICS_WINDOWS) -> None:
+        self._window = window
+        self._windows = [_Window() for _ in range(windows)]
+        self.cycles = 0  # počet všetkých zaznamenaných cyklov (od vytvorenia)
+        self.skipped = 0  # počet všetkých požiadaviek, ktoré prišli počas bežiaceho cyklu
+        self.start()
+
+    def start(self) -> None:
+        """Začiatok merania (prechod inštancie do stavu ready) - vynuluje okná."""
+        for window in self._windows:
+            window.clear()
+        self._index = 0
+        self._window_start = time.monotonic()
+        self._started = self._window_start
+
+    def _rotate(self) -> _Window:
+        """Aktuálne okno - pri posune času sa prejdené okná vynulujú."""
+        now = time.monotonic()
+        elapsed = int((now - self._window_start) // self._window)
+        if elapsed > 0:
+            for _ in range(min(elapsed, len(self._windows))):
+                self._index = (self._index + 1) % len(self._windows)
+                self._windows[self._index].clear()
+            self._window_start += elapsed * self._window
+        return self._windows[self._index]
+
+    def record(self, phases: list[int], total: int) -> None:
+        """Zaznamená jeden cyklus - trvania fáz v ns v poradí CYCLE_PHASES (0 = fáza neprebehla) a celého cyklu."""
+        window = self._rotate()
+        for series, duration in enumerate(phases):
+            if duration:
+                window.counts[series][_bucket(duration)] += 1
+                if duration > window.maximum[series]:
+                    window.maximum[series] = duration
+        window.counts[_CYCLE][_bucket(total)] += 1
+        if total > window.maximum[_CYCLE]:
+            window.maximum[_CYCLE] = total
+        self.cycles += 1
+
+    def record_skipped(self) -> None:
+        """Požiadavka na cyklus prišla počas bežiaceho cyklu (zlúčila sa do ďalšieho)."""
+        self._rotate().skipped += 1
+        self.skipped += 1
+
+    def _percentiles(self, series: int) -> tuple[int, float | None, float | None, float | None]:
+        """(počet, p50, p95, max) v ms za všetky okná."""
+        counts = [sum(window.counts[series][index] for window in self._windows) for index in range(_BUCKETS)]
+        total = sum(counts)
+        if not total:
+            return 0, None, None, None
+        maximum = max(window.maximum[series] for window in self._windows) / 1e6
+        result = []
+        for quantile in (0.5, 0.95):
+            rank = quantile * total
+            cumulative = 0
+            for index, count in enumerate(counts):
+                cumulative += count
+                if cumulative >= rank:
+                    # horná hranica koša, nie viac ako presné maximum
+                    result.append(round(min(_bucket_upper_ms(index), maximum), 3))
+                    break
+        return total, result[0], result[1], round(maximum, 3)
+
+    def summary(self) -> dict:
+        """Súhrn za pokryté obdobie (najviac CYCLE_METRICS_WINDOWS okien)."""
+        self._rotate()
+        covered = min(max(time.monotonic() - self._started, 0.0), self._window * len(self._windows))
+        count, p50, p95, maximum = self._percentiles(_CYCLE)
+        result = {
+            "cycle_time_p50_ms": p50,
+            "cycle_time_p95_ms": p95,
+            "cycle_time_max_ms": maximum,
+            "cycles_per_hour": round(count * 3600 / max(covered, 1.0), 1),
+            "skipped_because_running": sum(window.skipped for window in self._windows),
+            "window_minutes": round(covered / 60, 1),
+        }
+        for series, phase in enumerate(CYCLE_PHASES):
+            _count, _p50, phase_p95, phase_max = self._percentiles(series)
+            result[f"{phase}_p95_ms"] = phase_p95
+            result[f"{phase}_max_ms"] = phase_max
+        return result
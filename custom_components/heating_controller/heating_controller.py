@@ -7,29 +7,83 @@ from __future__ import annotations
 
 """Coordinator for Heating Controller integration."""
 
-from datetime import timedelta
 import logging
-import struct
 import dataclasses
-import json
 import asyncio
 import time
 
-from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.event import async_call_later
+from homeassistant.core import callback
 from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.util import dt as dt_util
 #from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
-from homeassistant.const import STATE_ON, STATE_OFF, STATE_UNKNOWN, STATE_UNAVAILABLE, STATE_OK, STATE_PROBLEM
+from homeassistant.const import STATE_ON, STATE_OFF
 from .const import *
+from .actuators import (
+    ACTUATOR_INTERNAL,
+    ACTUATOR_PUMP,
+    ACTUATOR_VALVE,
+    ActuatorCommand,
+    DesiredState,
+    InFlightRegistry,
+    STAGE_PREPARE,
+    async_dispatch_commands,
+    diff_desired_states,
+)
+from .state_router import StateChangeRouter
+from .trace import TraceRecorder, append_trace_file
+from .cycle_metrics import CYCLE_PHASES, CycleMetrics
+from .inputs import HEALTH_MISSING, HEALTH_OK, InputHealth, LastKnownGood, build_input_table, read_snapshot
+from .coalescer import EventCoalescer, INPUT_NORMAL, INPUT_PRIORITY, INPUT_SAFETY
+from .scheduler import (
+    DeadlineScheduler,
+    TIMER_CYCLE_METRICS,
+    TIMER_HP_ON_OFF_DEBOUNCE,
+    TIMER_LAST_KNOWN_GOOD_EXPIRY,
+    TIMER_RERUN,
+    TIMER_STARTUP_READY_TIMEOUT,
+    TIMER_TRACE_FLUSH,
+)
+from .control_logic import (
+    CORE_INPUTS,
+    ControllerState,
+    ControlPlan,
+    InputSnapshot,
+    PUMP_KEYS,
+    TIMER_AUXILIARY_PUMP_BOOSTER,
+    TIMER_HP_DHW_TO_ACC_DELAY,
+    TIMER_VALVE_INPUT_ACC_CLOSING_DELAY,
+    VALVE_KEYS,
+    decide,
+    suspended_subcontrollers,
+    temperature_change_relevant,
+    temperature_margins,
+)
 
 LOGGER = logging.getLogger(__name__)
 
 class Heating_Controller_Instance:
 
-    def __init__(self) -> None:
+    def __init__(self, namespace: str = DOMAIN) -> None:
 #        self._Data = self.Data()
+        self.namespace = namespace  # Prefix interných entít (heating_controller, heating_controller_2, ...) - jeden na config entry
         self.settings = self.Settings()
+        self.ready = False  # Brána pripravenosti - cykly bežia až po štarte HA a dostupnosti vstupov
+        self._hass_started = False
+        self._on_ready = None  # Volá sa raz, pri prechode do stavu ready
         self._is_running = False
+        self._cycle_queued = False  # Počas behu cyklu prišla ďalšia požiadavka - cyklus sa zopakuje
+        self._input_table = None  # Predkompilovaná tabuľka vstupov (inputs.build_input_table)
+        self._input_health = None  # Zdravie vstupných entít (inputs.InputHealth), udržiava ho obsluha zmien stavov
+        self._last_known_good = LastKnownGood()  # Posledné platné hodnoty vstupov
+        self._reported_inputs = ((), ())  # Naposledy zalogované (neplatné, nahradené) vstupy
+        self._state_router = None  # Spoločný smerovač zmien stavov domény (state_router.StateChangeRouter)
+        self._on_state_changed = None  # Obsluha zmien stavov vstupných entít
+        self.filtered_state_changes = 0  # Počet zmien stavov zahodených filtrom relevantnosti
+        self._published_states = {}  # Hodnoty sensor_states naposledy odoslané entitám cez feedback_update
+        self._published_statistics = None  # statistics naposledy odoslané senzoru control_statistics
+        self.safety_trips = 0  # Počet okamžitých vypnutí zdroja kúrenia bezpečnostnou cestou
+        self.safety_latency_last = None  # Oneskorenie od zmeny stavu senzora po vypnutie príkazu (s)
+        self.safety_latency_max = 0.0
 
         self.hass = None
         self._entry_id = None # Budete potrebovat ulozit entry_id aj sem
@@ -41,20 +95,20 @@ class Heating_Controller_Instance:
             ENTITY_CONTROL_COMMAND_HP_TEMPERATURE: None,
         }
 
-        self.SWITCH_ENTITY_AUTOMATIC_MODE = f"switch.{DOMAIN}_{ENTITY_AUTOMATIC_MODE}"
-        self.SWITCH_ENTITY_ACC1_ENABLE = f"switch.{DOMAIN}_{ENTITY_ACC1_ENABLE}"
-        self.SWITCH_ENTITY_ACC2_ENABLE = f"switch.{DOMAIN}_{ENTITY_ACC2_ENABLE}"
-        self.SWITCH_ENTITY_HEAT_DHW_FROM_ACC = f"switch.{DOMAIN}_{ENTITY_HEAT_DHW_FROM_ACC}"
-        self.SWITCH_ENTITY_HP_ACC = f"switch.{DOMAIN}_{ENTITY_HP_ACC}"
-        self.SWITCH_ENTITY_HP_DHW = f"switch.{DOMAIN}_{ENTITY_HP_DHW}"
-        self.SWITCH_ENTITY_HEATING_SOURCE_ON_OFF = f"switch.{DOMAIN}_{ENTITY_HEATING_SOURCE_ON_OFF}"
-        self.SENSOR_ENTITY_CONTROL_COMMAND_ON_OFF = f"sensor.{DOMAIN}_{ENTITY_CONTROL_COMMAND_ON_OFF}"
-        self.SENSOR_ENTITY_CONTROL_COMMAND_TEMPERATURE = f"sensor.{DOMAIN}_{ENTITY_CONTROL_COMMAND_TEMPERATURE}"
-        self.SENSOR_ENTITY_CONTROL_COMMAND_HP_ON_OFF = f"sensor.{DOMAIN}_{ENTITY_CONTROL_COMMAND_HP_ON_OFF}"
-        self.SENSOR_ENTITY_CONTROL_COMMAND_HP_TEMPERATURE = f"sensor.{DOMAIN}_{ENTITY_CONTROL_COMMAND_HP_TEMPERATURE}"
-        self.NUMBER_ENTITY_DHW_TARGET_TEMPERATURE = f"number.{DOMAIN}_{ENTITY_DHW_TARGET_TEMPERATURE}"
-        self.NUMBER_ENTITY_ACC_TARGET_TEMPERATURE = f"number.{DOMAIN}_{ENTITY_ACC_TARGET_TEMPERATURE}"
-        self.SELECT_ENTITY_HEATING_OPERATING_MODE = f"select.{DOMAIN}_{ENTITY_HEATING_OPERATING_MODE}"
+        self.SWITCH_ENTITY_AUTOMATIC_MODE = f"switch.{namespace}_{ENTITY_AUTOMATIC_MODE}"
+        self.SWITCH_ENTITY_ACC1_ENABLE = f"switch.{namespace}_{ENTITY_ACC1_ENABLE}"
+        self.SWITCH_ENTITY_ACC2_ENABLE = f"switch.{namespace}_{ENTITY_ACC2_ENABLE}"
+        self.SWITCH_ENTITY_HEAT_DHW_FROM_ACC = f"switch.{namespace}_{ENTITY_HEAT_DHW_FROM_ACC}"
+        self.SWITCH_ENTITY_HP_ACC = f"switch.{namespace}_{ENTITY_HP_ACC}"
+        self.SWITCH_ENTITY_HP_DHW = f"switch.{namespace}_{ENTITY_HP_DHW}"
+        self.SWITCH_ENTITY_HEATING_SOURCE_ON_OFF = f"switch.{namespace}_{ENTITY_HEATING_SOURCE_ON_OFF}"
+        self.SENSOR_ENTITY_CONTROL_COMMAND_ON_OFF = f"sensor.{namespace}_{ENTITY_CONTROL_COMMAND_ON_OFF}"
+        self.SENSOR_ENTITY_CONTROL_COMMAND_TEMPERATURE = f"sensor.{namespace}_{ENTITY_CONTROL_COMMAND_TEMPERATURE}"
+        self.SENSOR_ENTITY_CONTROL_COMMAND_HP_ON_OFF = f"sensor.{namespace}_{ENTITY_CONTROL_COMMAND_HP_ON_OFF}"
+        self.SENSOR_ENTITY_CONTROL_COMMAND_HP_TEMPERATURE = f"sensor.{namespace}_{ENTITY_CONTROL_COMMAND_HP_TEMPERATURE}"
+        self.NUMBER_ENTITY_DHW_TARGET_TEMPERATURE = f"number.{namespace}_{ENTITY_DHW_TARGET_TEMPERATURE}"
+        self.NUMBER_ENTITY_ACC_TARGET_TEMPERATURE = f"number.{namespace}_{ENTITY_ACC_TARGET_TEMPERATURE}"
+        self.SELECT_ENTITY_HEATING_OPERATING_MODE = f"select.{namespace}_{ENTITY_HEATING_OPERATING_MODE}"
         
         self.SWITCH_ENTITY_WATER_PUMP_ACC_OUTPUT = ""
         self.SWITCH_ENTITY_WATER_PUMP_DHW = ""
@@ -65,57 +119,31 @@ class Heating_Controller_Instance:
         self.hp_dhw = False
         self.heating_source_input_on_off = False
 
-        self.preferred_output_ACC = 0
-        self.preferred_input_ACC = 0
+        self.heat_dhw_from_acc = False
+        self.heating_operating_mode = HEATING_OPERATING_MODE_MANUAL
         self.controll_command_on_off = 0
         self.controll_command_hp_on_off = 0
 
-        self.valve_from_hp_to_acc_or_dhw_flag = 1
-        self.valve_output_acc1_flag = 0
-        self.valve_output_acc2_flag = 0
-        self.valve_input_acc1_flag = 0
-        self.valve_input_acc2_flag = 0
-        self.valve_from_acc_to_heat_or_dhw_flag = 1
-        self.valve_output_heating_flag = 1
-        
-        self.water_pump_acc_output_flag = 0
-        self.water_pump_dhw_flag = 0
-        self.water_pump_floor_heating_flag = 0
-        self.water_pump_heating_flag = 0
-        self.heat_dhw_from_acc_onetime_start_flag0 = 0
-
-        # Debounce timestamps pre ventily (čas posledného príkazu)
-        self._valve_last_command_time = {
-            CONF_VALVE_FROM_TC_TO_ACC_OR_DHW: 0,
-            CONF_VALVE_OUTPUT_ACC1: 0,
-            CONF_VALVE_OUTPUT_ACC2: 0,
-            CONF_VALVE_INPUT_ACC1: 0,
-            CONF_VALVE_INPUT_ACC2: 0,
-            CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW: 0,
-            CONF_VALVE_OUTPUT_HEATING: 0,
-        }
-        self._scheduled_rerun = None  # Naplánovaný rerun kontrolného cyklu
-        self._auxiliary_pump_booster_timer = None  # Časovač pre booster režim auxiliary pump
-        self._auxiliary_pump_booster_active = False  # Príznak či je booster aktívny (timer beží)
-        self._auxiliary_pump_booster_finished = False  # Príznak či booster už prebehol (timer vypršal)
-        self._hp_on_off_debounce_timer = None  # Časovač pre debounce HP ON/OFF príkazu
+        # Vnútorný stav riadenia prenášaný medzi cyklami (viď control_logic.ControllerState)
+        self.state = ControllerState()
+
+        self._in_flight = InFlightRegistry()  # Odoslané a zatiaľ nepotvrdené príkazy pre akčné členy
+        self.control_cycles = 0  # Počet dokončených riadiacich cyklov
+        self.statistics = {}  # Počítadlá pre diagnostický senzor control_statistics
+        self._statistics_time = None  # Čas (monotonic) poslednej obnovy statistics
+        self.scheduler = DeadlineScheduler(on_wake=self._wake_cycle)  # Všetky časovače inštancie (rerun, oneskorenia, debounce, booster)
+        self.coalescer = EventCoalescer(self.scheduler, self._wake_cycle)  # Zlučovanie zmien stavov do jedného cyklu
+        self._tasks = set()  # Bežiace úlohy inštancie (kontrolné cykly, vypnutie booster pumpy) - zrušia sa pri uvoľnení
+        self._shut_down = False
         self._hp_on_off_pending_value = None  # Očakávaná hodnota po uplynutí debounce
-        self._valve_input_acc_closing_delay_timer = None  # Časovač pre oneskorené zatvorenie ventilov na vstupoch do ACC
-        self._valve_input_acc_closing_allowed = True  # Príznak či je povolené zatvorenie ventilov (po vypršaní časovača)
-        self._previous_controll_command_on_off = 0  # Predchádzajúci stav príkazu pre TČ
-        self._previous_controll_command_hp_on_off = 0  # Predchádzajúci stav príkazu pre TČ
-        self._hp_dhw_to_acc_delay_timer = None  # Časovač pre oneskorené pretočenie ventilu hp_dhw z TUV na ACC
-        self._hp_dhw_to_acc_switch_allowed = True  # Príznak či je povolené pretočenie ventilu (po vypršaní časovača)
-        
+        self.trace = TraceRecorder()  # Binárny záznam kontrolných cyklov (trace.py)
+        self.cycle_metrics = CycleMetrics()  # Časovanie fáz kontrolných cyklov (cycle_metrics.py)
+        self.cycle_metrics_summary = {}  # Naposledy publikovaný súhrn časovania (diagnostická entita)
+
         self.preferred_output_ACC = 0
         self.preferred_input_ACC = 0
         self.higher_temperature_acc_value = 0
         self.lower_temperature_acc_value = 0
-
-        self.heating_source_auto_on_off = False
-        self.heating_operating_mode = HEATING_OPERATING_MODE_MANUAL
-        self.heating_operating_mode_previous = HEATING_OPERATING_MODE_MANUAL
-        self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 0
         self.min_acc_temperature_for_heating_limit_broken = False
 
         self.temperature_setpoint = 0       # Temperature Setpoint General (e.g. for heating spirals_)
@@ -135,6 +163,8 @@ class Heating_Controller_Instance:
         min_temperature_for_heating: int = DEFAULT_MIN_TEMPERATURE_FOR_HEATING
         temperature_delta_limit_in_acc: float = DEFAULT_TEMPERATURE_DELTA_LIMIT_IN_ACC
         heating_source_temp_hysteresis: float = DEFAULT_HEATING_SOURCE_TEMP_HYSTERESIS
+        temperature_deadband: float = DEFAULT_TEMPERATURE_DEADBAND
+        input_last_known_good_ttl: float = DEFAULT_INPUT_LAST_KNOWN_GOOD_TTL
         heating_source_command_debounce_delay: int = DEFAULT_HEATING_SOURCE_COMMAND_DEBOUNCE_DELAY
         auxiliary_water_pump_for_heating: int = DEFAULT_AUXILIARY_WATER_PUMP_FOR_HEATING
         auxiliary_pump_booster_time: int = DEFAULT_AUXILIARY_PUMP_BOOSTER_TIME
@@ -175,1506 +205,688 @@ class Heating_Controller_Instance:
         except Exception as e:
             LOGGER.error(f"Error during System Started")
 
+# ******************************************************************************************
+# ************************ Brána pripravenosti pri štarte **********************************
+# ******************************************************************************************
+
+    def set_on_ready(self, on_ready) -> None:
+        """Nastaví callback, ktorý sa zavolá raz, keď je inštancia pripravená."""
+        self._on_ready = on_ready
+
+    @callback
+    def hass_started(self, _hass=None) -> None:
+        """
+        Home Assistant dokončil štart (EVENT_HOMEASSISTANT_STARTED, alebo už bežal).
+        Inštancia bude pripravená, keď sú dostupné všetky vstupy, najneskôr po STARTUP_READY_TIMEOUT.
+        """
+        if self.ready:
+            return
+        self._hass_started = True
+        self.validate_inputs()
+        self.scheduler.schedule(
+            TIMER_STARTUP_READY_TIMEOUT, STARTUP_READY_TIMEOUT,
+            lambda: self._set_ready("timeout"), wake=False,
+        )
+        self._check_ready()
+
+    def _check_ready(self) -> None:
+        """Prechod do stavu ready, keď HA beží a žiadny vstup nie je neplatný."""
+        if not self.ready and self._hass_started and self._input_health is not None and not self._input_health.bitmap:
+            self._set_ready("all inputs available")
+
+    def _set_ready(self, reason: str) -> None:
+        if self.ready:
+            return
+        self.ready = True
+        self.scheduler.cancel(TIMER_STARTUP_READY_TIMEOUT)
+        if reason == "timeout":
+            missing = [entity_id for entity_id, health in self._input_health.health.items() if health != HEALTH_OK]
+            LOGGER.warning(f"Heating Controller ready after {STARTUP_READY_TIMEOUT} s timeout, inputs still not available: {', '.join(missing)}")
+        else:
+            LOGGER.info(f"Heating Controller ready ({reason})")
+        self.cycle_metrics.start()
+        self.scheduler.schedule(TIMER_CYCLE_METRICS, CYCLE_METRICS_PUBLISH_INTERVAL, self._publish_cycle_metrics, wake=False)
+        if self._on_ready is not None:
+            self._on_ready()
+
+# ******************************************************************************************
+# ************************ Úlohy inštancie a uvoľnenie *************************************
+# ******************************************************************************************
+
+    def create_task(self, target) -> asyncio.Task | None:
+        """Spustí úlohu, ktorú vlastní inštancia - pri uvoľnení sa zruší a počká sa na jej koniec."""
+        if self._shut_down:
+            target.close()
+            return None
+        task = self.hass.async_create_task(target)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def async_shutdown(self) -> None:
+        """
+        Uvoľnenie inštancie (unload / reload integrácie) - zruší všetky termíny v plánovači,
+        odbery zmien stavov a bežiace úlohy a počká na ich ukončenie. Po návrate inštancia
+        nedrží žiadny callback v HA a nespustí žiadnu ďalšiu úlohu.
+        """
+        self._shut_down = True
+        self.ready = False
+        self._on_ready = None
+        self.scheduler.cancel_all()
+        self.untrack_state_changes()
+        self._on_state_changed = None
+        self._in_flight.clear()
+
+        tasks = [task for task in self._tasks if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+            LOGGER.debug(f"Cancelled {len(tasks)} running task(s)")
+        self._tasks.clear()
+
+        # Zvyšok záznamu cyklov sa zapíše do súboru
+        await self.async_flush_trace()
+
 # ******************************************************************************************
 # ********************** Heating Controller ************************************************
 # ******************************************************************************************
 
     async def heating_control_system(self):
-        """Main heating control system logic."""
-        LOGGER.debug("=== HEATING CONTROL SYSTEM START ===")
-        
-        # Mode: single - prevent concurrent runs
+        """Main heating control system logic.
+
+        Coalescing runner - naraz beží najviac jeden cyklus a najviac jeden čaká vo fronte.
+        Požiadavky, ktoré prídu počas behu cyklu, sa zlúčia do jedného ďalšieho cyklu,
+        ktorý si načíta čerstvé vstupy až po dokončení aktuálneho.
+        """
+        if not self.ready:
+            LOGGER.debug("Not ready yet, control cycle skipped")
+            return
+
+        # Mode: single + queued - a trigger during a running cycle is not lost
         if self._is_running:
-            LOGGER.debug("Already running, skipping this cycle")
+            self.cycle_metrics.record_skipped()
+            if not self._cycle_queued:
+                LOGGER.debug("Already running, next cycle queued")
+            self._cycle_queued = True
             return
-        
+
         self._is_running = True
+        try:
+            while True:
+                self._cycle_queued = False
+                await self._control_cycle()
+                if not self._cycle_queued:
+                    break
+                LOGGER.debug("Running queued cycle")
+        finally:
+            self._is_running = False
 
-# ******************************************************************************************
-# ********************** LOAD CONFIGURATION ************************************************
-# ******************************************************************************************
+    async def _control_cycle(self):
+        """Jeden kontrolný cyklus: načítanie vstupov, rozhodnutie, vykonanie. Trvanie fáz sa zapíše do cycle_metrics."""
+        LOGGER.debug("=== HEATING CONTROL SYSTEM START ===")
 
+        clock = time.perf_counter_ns
+        phases = [0] * len(CYCLE_PHASES)  # ns v poradí CYCLE_PHASES (read, decide, apply, actuate, trace, publish)
+        started = clock()
         try:
             LOGGER.debug("Cycle started")
 
-        # Get INTERNAL ENTITIES states (Internal Entities created by this integration, Entity IDs are generated from entity names, not unique_ids)
-            try:
-                automatic_mode = self.hass.states.is_state(self.SWITCH_ENTITY_AUTOMATIC_MODE, STATE_ON)
-                acc1_enable = self.hass.states.is_state(self.SWITCH_ENTITY_ACC1_ENABLE, STATE_ON)
-                acc2_enable = self.hass.states.is_state(self.SWITCH_ENTITY_ACC2_ENABLE, STATE_ON)
-                self.heat_dhw_from_acc = self.hass.states.is_state(self.SWITCH_ENTITY_HEAT_DHW_FROM_ACC, STATE_ON)
-                self.hp_acc = self.hass.states.is_state(self.SWITCH_ENTITY_HP_ACC, STATE_ON)
-                self.hp_dhw = self.hass.states.is_state(self.SWITCH_ENTITY_HP_DHW, STATE_ON)
-                self.heating_source_input_on_off = self.hass.states.is_state(self.SWITCH_ENTITY_HEATING_SOURCE_ON_OFF, STATE_ON)
-                dhw_target_temperature = float(self.hass.states.get(self.NUMBER_ENTITY_DHW_TARGET_TEMPERATURE).state)
-                acc_target_temperature = float(self.hass.states.get(self.NUMBER_ENTITY_ACC_TARGET_TEMPERATURE).state)
-                self.heating_operating_mode = int(self.hass.states.get(self.SELECT_ENTITY_HEATING_OPERATING_MODE).state)
-                
-                LOGGER.debug("ENTITY %s, %s, %s, %s, %s, %s, %s", self.SWITCH_ENTITY_AUTOMATIC_MODE, self.SWITCH_ENTITY_ACC1_ENABLE, self.SWITCH_ENTITY_ACC2_ENABLE, self.SWITCH_ENTITY_HEAT_DHW_FROM_ACC, self.SWITCH_ENTITY_HP_ACC, self.SWITCH_ENTITY_HP_DHW, self.SWITCH_ENTITY_HEATING_SOURCE_ON_OFF)
-
-                LOGGER.debug("Internal Entity States: automatic_mode=%s, acc1_enable=%s, acc2_enable=%s, self.hp_acc=%s, self.hp_dhw=%s, self.heat_dhw_from_acc=%s, self.heating_source_input_on_off=%s, dhw_target_temperature=%s, acc_target_temperature=%s, self.heating_operating_mode=%s",
-                            automatic_mode, acc1_enable, acc2_enable, self.hp_acc, self.hp_dhw, self.heat_dhw_from_acc, self.heating_source_input_on_off, dhw_target_temperature, acc_target_temperature, self.heating_operating_mode)
-
-            except Exception as e:
-                LOGGER.error(f"Failed to load entities created by this integration. Error details: {e}")
+            # 1. Načítanie vstupov z hass.states do nemenného snímku
+            snapshot = self._read_inputs()
+            phases[0] = clock() - started
+            if snapshot is None:
                 return
 
-        # Get EXTERNAL ENTITIES states (External Entities defined by user in the configuration of this integration)
-
-        # **** Get temperature sensor entities **************************************************************
-            try:
-                temperature_acc1 = self.hass.states.get(self.settings.entity_temp_acc1)
-                temperature_acc2 = self.hass.states.get(self.settings.entity_temp_acc2)
-                temperature_dhw = self.hass.states.get(self.settings.entity_temp_dhw)
-                
-                # Check if Temperature sensor entities exist
-                if temperature_acc1 is None:
-                    LOGGER.error(f"Temperature sensor {self.settings.entity_temp_acc1} does not exist!")
-                    return
-
-                if temperature_acc2 is None:
-                    LOGGER.error(f"Temperature sensor {self.settings.entity_temp_acc2} does not exist!")
-                    return
-
-                if temperature_dhw is None:
-                    LOGGER.error(f"Temperature sensor {self.settings.entity_temp_dhw} does not exist!")
-                    return
-                
-                # Check if Temperature sensor entities are available
-                if temperature_acc1.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Temperature sensor {self.settings.entity_temp_acc1} is not available (state: {temperature_acc1.state})")
-                    return
-
-                if temperature_acc2.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Temperature sensor {self.settings.entity_temp_acc2} is not available (state: {temperature_acc2.state})")
-                    return
-
-                if temperature_dhw.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Temperature sensor {self.settings.entity_temp_dhw} is not available (state: {temperature_dhw.state})")
-                    return
-                
-                # Convert to float
-                temperature_acc1_value = float(temperature_acc1.state)
-                temperature_acc2_value = float(temperature_acc2.state)
-                temperature_dhw_value = float(temperature_dhw.state)
-                self.higher_temperature_acc_value = float((temperature_acc1_value + temperature_acc2_value) / 2.00)
-                self.lower_temperature_acc_value = float(min(temperature_acc1_value, temperature_acc2_value))
-                
-                LOGGER.debug("Temperature sensor values: temperature_acc1_value=%f, temperature_acc2_value=%f, temperature_dhw_value=%f",
-                            temperature_acc1_value, temperature_acc2_value, temperature_dhw_value)
-
-            except (ValueError, TypeError) as e:
-                LOGGER.error(f"Could not convert temperature sensors to float: {e}")
-                LOGGER.error(f"ACC1: {temperature_acc1.state if temperature_acc1 else 'None'}")
-                LOGGER.error(f"ACC2: {temperature_acc2.state if temperature_acc2 else 'None'}")
-                LOGGER.error(f"DHW: {temperature_dhw.state if temperature_dhw else 'None'}")
+            if not snapshot.automatic_mode:
+                mark = clock()
+                self._record_trace(snapshot)
+                phases[4] = clock() - mark
                 return
 
-        # **** Get Valve Objects ****************************************************************************
-            try:
-                valve_from_hp_to_acc_or_dhw = self.hass.states.get(self.settings.entity_valve_from_hp_to_acc_or_dhw)
-                valve_output_acc1 = self.hass.states.get(self.settings.entity_valve_output_acc1)
-                valve_output_acc2 = self.hass.states.get(self.settings.entity_valve_output_acc2)
-                valve_input_acc1 = self.hass.states.get(self.settings.entity_valve_input_acc1)
-                valve_input_acc2 = self.hass.states.get(self.settings.entity_valve_input_acc2)
-                valve_from_acc_to_heat_or_dhw = self.hass.states.get(self.settings.entity_valve_from_acc_to_heat_or_dhw)
-                valve_output_heating = self.hass.states.get(self.settings.entity_valve_output_heating)
-                
-                # Check if valve entities exist
-                if valve_from_hp_to_acc_or_dhw is None:
-                    LOGGER.error(f"Valve {self.settings.entity_valve_from_hp_to_acc_or_dhw} does not exist!")
-                    return
-
-                if valve_output_acc1 is None:
-                    LOGGER.error(f"Valve {self.settings.entity_valve_output_acc1} does not exist!")
-                    return
-
-                if valve_output_acc2 is None:
-                    LOGGER.error(f"Valve {self.settings.entity_valve_output_acc2} does not exist!")
-                    return
-
-                if valve_input_acc1 is None:
-                    LOGGER.error(f"Valve {self.settings.entity_valve_input_acc1} does not exist!")
-                    return
-
-                if valve_input_acc2 is None:
-                    LOGGER.error(f"Valve {self.settings.entity_valve_input_acc2} does not exist!")
-                    return
-
-                if valve_from_acc_to_heat_or_dhw is None:
-                    LOGGER.error(f"Valve {self.settings.entity_valve_from_acc_to_heat_or_dhw} does not exist!")
-                    return
-
-                if valve_output_heating is None:
-                    LOGGER.error(f"Valve {self.settings.entity_valve_output_heating} does not exist!")
-                    return
-
-                # Check if valve entities are available
-                if valve_from_hp_to_acc_or_dhw.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_valve_from_hp_to_acc_or_dhw} is not available (state: {valve_from_hp_to_acc_or_dhw.state})")
-                    return
-
-                if valve_output_acc1.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_valve_output_acc1} is not available (state: {valve_output_acc1.state})")
-                    return
-
-                if valve_output_acc2.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_valve_output_acc2} is not available (state: {valve_output_acc2.state})")
-                    return
-
-                if valve_input_acc1.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_valve_input_acc1} is not available (state: {valve_input_acc1.state})")
-                    return
-
-                if valve_input_acc2.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_valve_input_acc2} is not available (state: {valve_input_acc2.state})")
-                    return
-
-                if valve_from_acc_to_heat_or_dhw.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_valve_from_acc_to_heat_or_dhw} is not available (state: {valve_from_acc_to_heat_or_dhw.state})")
-                    return
-
-                if valve_output_heating.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_valve_output_heating} is not available (state: {valve_output_heating.state})")
-                    return
-
-            except Exception as e:
-                LOGGER.error(f"Failed to load valve entities: {e}")
-                return
+            # 2. Rozhodnutie - čistá funkcia bez vedľajších účinkov
+            mark = clock()
+            plan = decide(snapshot, self.settings, self.state)
+            phases[1] = clock() - mark
+            mark = clock()
+            self._apply_plan(snapshot, plan)
+            phases[2] = clock() - mark
+
+            # 3. Vykonanie plánu - volania služieb
+            mark = clock()
+            commands_sent = await self._actuate(snapshot, plan)
+            phases[3] = clock() - mark
+            mark = clock()
+            self._record_trace(snapshot, plan, commands_sent)
+            phases[4] = clock() - mark
+
+            self.control_cycles += 1
+            self._update_statistics()
+            mark = clock()
+            self._publish_feedback()
+            phases[5] = clock() - mark
+            LOGGER.debug("Control cycle completed with sucess")
+            
+        except Exception as e:
+            LOGGER.error(f"Error !!! {e}")
+        finally:
+            self.cycle_metrics.record(phases, clock() - started)
 
-        # **** Get Water Pump Objects ***********************************************************************
-            try:
-                water_pump_acc_output = self.hass.states.get(self.settings.entity_water_pump_acc_output)
-                water_pump_dhw = self.hass.states.get(self.settings.entity_water_pump_dhw)
-                water_pump_floor_heating = self.hass.states.get(self.settings.entity_water_pump_floor_heating)
-                water_pump_heating = self.hass.states.get(self.settings.entity_water_pump_heating)
-
-                # Check if water pump entities exist
-                if water_pump_acc_output is None:
-                    LOGGER.error(f"Water pump entity {self.settings.entity_water_pump_acc_output} does not exist!")
-                    return
-
-                if water_pump_dhw is None:
-                    LOGGER.error(f"Water pump entity {self.settings.entity_water_pump_dhw} does not exist!")
-                    return
-
-                if water_pump_floor_heating is None:
-                    LOGGER.error(f"Water pump entity {self.settings.water_pump_floor_heating} does not exist!")
-                    return
-
-                if water_pump_heating is None:
-                    LOGGER.error(f"Water pump entity {self.settings.water_pump_heating} does not exist!")
-                    return
-
-                # Check if water pump entities are available
-                if water_pump_acc_output.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_water_pump_acc_output} is not available (state: {water_pump_acc_output.state})")
-                    return
-
-                if water_pump_dhw.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_water_pump_dhw} is not available (state: {water_pump_dhw.state})")
-                    return
-
-                if water_pump_floor_heating.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_water_pump_floor_heating} is not available (state: {water_pump_floor_heating.state})")
-                    return
-
-                if water_pump_heating.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Valve {self.settings.entity_water_pump_heating} is not available (state: {water_pump_heating.state})")
-                    return
-
-            except Exception as e:
-                LOGGER.error(f"Failed to load water pump entities: {e}")
-                return
+# ******************************************************************************************
+# ********************** Obsluha zmien stavov vstupných entít ******************************
+# ******************************************************************************************
 
-        # **** Get states of Heating System entities (thermostat and heating pump entities) *****************
-            try:
-                thermostat_state = self.hass.states.get(self.settings.entity_thermostat_state)
-                heating_state = self.hass.states.get(self.settings.entity_heating_state)
-                podlahove_stav = self.hass.states.get(self.settings.entity_floor_heating_state)
-                
-                # Check if Heating System entities exist
-                if thermostat_state is None:
-                    LOGGER.error(f"Temperature sensor {self.settings.entity_thermostat_state} does not exist!")
-                    return
-
-                if heating_state is None:
-                    LOGGER.error(f"Temperature sensor {self.settings.entity_heating_state} does not exist!")
-                    return
-
-                if podlahove_stav is None:
-                    LOGGER.error(f"Temperature sensor {self.settings.entity_floor_heating_state} does not exist!")
-                    return
-
-                # Check if Heating System entities are available
-                if thermostat_state.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Heating system entity {self.settings.entity_thermostat_state} is not available (state: {thermostat_state.state})")
-                    return
-
-                if heating_state.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Heating system entity {self.settings.entity_heating_state} is not available (state: {heating_state.state})")
-                    return
-
-                if podlahove_stav.state in [STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE, None]:
-                    LOGGER.warning(f"Heating system entity {self.settings.entity_floor_heating_state} is not available (state: {podlahove_stav.state})")
-                    return
-
-                LOGGER.debug("External Entity States: thermostat_state=%s, heating_state=%s, podlahove_stav=%s",
-                            thermostat_state.state, heating_state.state, podlahove_stav.state)
-
-            except Exception as e:
-                LOGGER.error(f"Failed to load External Entity States. Error details: {e}")
-                return
+    @callback
+    def async_state_changed(self, event) -> None:
+        """Reakcia na zmenu stavu sledovaných entít - relevantné zmeny sa zlúčia do jedného cyklu."""
+        entity_id = event.data.get("entity_id")
+        old_state = event.data.get("old_state")
+        new_state = event.data.get("new_state")
+
+        # Zdravie vstupu (existencia / dostupnosť) sa udržiava tu, kontrolný cyklus ho len prečíta
+        self.update_input_health(entity_id, new_state)
+
+        # Bezpečnostná rýchla cesta - prehriatie vypne zdroj kúrenia okamžite, bez filtra a zlučovania
+        self.safety_fast_path(entity_id, new_state, event.time_fired)
+
+        # Pred prechodom do stavu ready sa cykly nespúšťajú (entity sa ešte obnovujú)
+        if not self.ready:
+            return
+
+        # Ignoruj ak sa stav nezmenil, alebo zmena nemôže ovplyvniť žiadne rozhodnutie
+        if not self.is_relevant_change(entity_id, old_state, new_state):
+            return
+
+        LOGGER.debug(f"State change detected: {entity_id} changed from {old_state.state if old_state else 'None'} to {new_state.state if new_state else 'None'}")
+
+        # Adaptívne okno zlučovania (bezpečnostné vstupy ho obídu)
+        self.coalescer.notify(self.input_class(entity_id, old_state, new_state))
 
 # ******************************************************************************************
-# ********************** LOGIKA CONTROLLERA ************************************************
+# ********************** Bezpečnostná rýchla cesta *****************************************
 # ******************************************************************************************
 
-            if not automatic_mode:
-                return
+    @callback
+    def safety_fast_path(self, entity_id: str, new_state, time_fired=None) -> bool:
+        """
+        Okamžité vypnutie príkazu pre zdroj kúrenia pri prekročení MAX_TEMPERATURE_LIMIT.
 
-    # ******************************************************************************************************
-    # *** VYPOCET PREFEROVANEHO ZASOBNIKA ACC PRE ODCERPAVANIE TEPLEJ VODY *********************************
-    # ******************************************************************************************************
-
-            # zistenie ci teplota v DHW dosiahla teplotu v ((ACC1 alebo ACC2) - offset)
-            # Podla toho bude odcerpacat (primarne z toho v ktorom ACC je teplota vyssia),
-            # ale ak sa zasobnik vypne, ale jeho teplota bude este stale vyssia, nez teplotny limit
-            # u vypnuteho zasobnika, tak sa docasne povoli odcerpanie teplej vody,
-            # dokial sa teplota neznizi, ale vstup do zasobnika bude uz uzatvoreny
-            # Toto plati aj pre kurenie a aj pre DHW
-            self.preferred_output_ACC = 0
-            self.preferred_input_ACC = 0
-            self.higher_temperature_acc_value = float((temperature_acc1_value + temperature_acc2_value) / 2.00)
-            self.lower_temperature_acc_value = float(min(temperature_acc1_value, temperature_acc2_value))
-
-            if (abs(temperature_acc1_value - temperature_acc2_value) > self.settings.temperature_delta_limit_in_acc):
-                if (acc1_enable and acc2_enable):
-                    if (temperature_acc1_value > temperature_acc2_value):
-                        self.higher_temperature_acc_value = temperature_acc1_value
-                        self.lower_temperature_acc_value = temperature_acc2_value
-                        self.preferred_input_ACC = 2
-                        self.preferred_output_ACC = 1
-                    else:
-                        self.higher_temperature_acc_value = temperature_acc2_value
-                        self.lower_temperature_acc_value = temperature_acc1_value
-                        self.preferred_input_ACC = 1
-                        self.preferred_output_ACC = 2
-                elif (acc1_enable and (not acc2_enable)):
-                    self.preferred_input_ACC = 1
-                    if (temperature_acc2_value > self.settings.disabled_acc_temperature_limit):
-                        if (temperature_acc2_value > temperature_acc1_value):
-                            self.preferred_output_ACC = 2
-                            self.higher_temperature_acc_value = temperature_acc2_value
-                            self.lower_temperature_acc_value = temperature_acc1_value
-                        else:
-                            self.preferred_output_ACC = 1
-                            self.higher_temperature_acc_value = temperature_acc1_value
-                            self.lower_temperature_acc_value = temperature_acc2_value
-                    else:
-                        self.preferred_output_ACC = 1
-                        self.higher_temperature_acc_value = temperature_acc1_value
-                        self.lower_temperature_acc_value = temperature_acc1_value
-                elif ((not acc1_enable) and acc2_enable):
-                    self.preferred_input_ACC = 2
-                    if (temperature_acc1_value > self.settings.disabled_acc_temperature_limit):
-                        if (temperature_acc1_value > temperature_acc2_value):
-                            self.preferred_output_ACC = 1
-                            self.higher_temperature_acc_value = temperature_acc1_value
-                            self.lower_temperature_acc_value = temperature_acc2_value
-                        else:
-                            self.preferred_output_ACC = 2
-                            self.higher_temperature_acc_value = temperature_acc2_value
-                            self.lower_temperature_acc_value = temperature_acc1_value
-                    else:
-                        self.preferred_output_ACC = 2
-                        self.higher_temperature_acc_value = temperature_acc2_value
-                        self.lower_temperature_acc_value = temperature_acc2_value
-
-            temperature_acc_with_offset = self.higher_temperature_acc_value - self.settings.temperature_delta_limit_acc_dhw
-
-            # ak je v ACC nizsia teplota nez pouzitelna na kurenie (zadefinovana v nastaveniach), tak anuluje hodnoty v premenych z termostatov kurenia
-            self.min_acc_temperature_for_heating_limit_broken = False
-            if(self.higher_temperature_acc_value < self.settings.min_temperature_for_heating):
-                self.min_acc_temperature_for_heating_limit_broken = True
-
-    # ******************************************************************************************************
-    # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA (sekvenčné módy, priority, atď. *************************************
-    # ******************************************************************************************************
-                
-        # ******************************************************************************************************
-        # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - MANUÁLNY MÓD ******************************************************
-        # ******************************************************************************************************
-            if(self.heating_operating_mode==HEATING_OPERATING_MODE_MANUAL):
-                self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 0
-
-                # INICIALIZÁCIA MÓDU
-                if(self.heating_operating_mode_previous != self.heating_operating_mode):
-                    self.heating_operating_mode_previous = self.heating_operating_mode
-                    # Jednorazove vykonanie akcie pri zmene heating modu
-
-                # HLAVNÁ LOGIKA
-
-                self.heating_source_auto_on_off = True
-#                self.temperature_setpoint = MAX_TEMPERATURE_LIMIT - (self.settings.heating_source_temp_hysteresis / 2)
-#                self.temperature_setpoint = MAX_TEMPERATURE_LIMIT
-                self.temperature_setpoint = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                self.temperature_setpoint_hp = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-        # ******************************************************************************************************
-        # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Len Ohrev DHW ***********************************
-        # ******************************************************************************************************
-            elif(self.heating_operating_mode==HEATING_OPERATING_MODE_DHW):
-                self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 0
-
-                # INICIALIZÁCIA MÓDU
-                if(self.heating_operating_mode_previous != self.heating_operating_mode):
-                    self.heating_operating_mode_previous = self.heating_operating_mode
-                    # Jednorazove vykonanie akcie pri zmene heating modu
-                    # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
-                    await self.stop_heat_dhw_from_acc()
-
-                # HLAVNÁ LOGIKA
-
-                # a ak nie je striktny mod, pretoci ventil do TUV natrvalo pocas celeho rezimu
-                if (self.settings.valve_input_acc_strict_mode != VALVE_MODE_STRICT):
-                    await self.switch_to_dhw()
-
-                # Ak je v TUV teplota vyssia nez 2. uroven ziadanej teploty
-                if ((dhw_target_temperature < (temperature_dhw_value - (self.settings.heating_source_temp_hysteresis / 2))) or (not self.heating_source_input_on_off)):
-                    # vypne ohrev
-                    self.heating_source_auto_on_off = False
-                    # a ak je striktny mod, pretoci ventil do ACC
-                    if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                        await self.switch_to_acc()
-
-                # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                elif(dhw_target_temperature > (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                    # zapne ohrev TUV
-                    self.heating_source_auto_on_off = True
-                    # a v striktnom mode pretoci ventil do TUV
-                    if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                        await self.switch_to_dhw()
-
-                self.temperature_setpoint = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                self.temperature_setpoint_hp = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-        # **************************************************************************************************************
-        # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Cyklus s prioritou: 1.Prečerpanie z ACC, 2. Ohrev DHW ***
-        # **************************************************************************************************************
-            elif(self.heating_operating_mode==HEATING_OPERATING_MODE_PDHW_DHW):
-                self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 0
-
-                # INICIALIZÁCIA MÓDU
-                if(self.heating_operating_mode_previous != self.heating_operating_mode):
-                    self.heating_operating_mode_previous = self.heating_operating_mode
-                    # Jednorazove vykonanie akcie pri zmene heating modu
-                    # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
-                    await self.stop_heat_dhw_from_acc()
-
-                    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                    if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-
-                        # prepne sa na ventil z TC na ACC a vypne sa zdroj kurenia
-                        await self.switch_to_acc()
-                        self.heating_source_auto_on_off = False
-
-                # HLAVNÁ LOGIKA
-
-                # a ak nie je striktny mod, pretoci ventil do TUV natrvalo pocas celeho rezimu
-                if (self.settings.valve_input_acc_strict_mode != VALVE_MODE_STRICT):
-                    await self.switch_to_dhw()
-
-                # Ak je v ACC vyssia teplota nez v TUV
-                if (temperature_acc_with_offset > temperature_dhw_value):
-                    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                    if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                        if (not self.heat_dhw_from_acc_onetime_start_flag0):
-                            self.heat_dhw_from_acc_onetime_start_flag0 = 1
-                            # zapne sa precerpavanie z ACC do TUV, vypne sa zdroj kurenia a pretoci sa ventil z TC do ACC
-                            await self.start_heat_dhw_from_acc()
-
-                        self.heating_source_auto_on_off = False
-                        if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                            await self.switch_to_acc()
-
-                # Ak je v ACC teplota nizsia, alebo rovna nez v TUV (precerpavanie sa vypne automaticky v inej casti programu)
-                else:
-                    # Ak je v TUV teplota vyssia nez 2. uroven ziadanej teploty
-                    if ((dhw_target_temperature < (temperature_dhw_value - (self.settings.heating_source_temp_hysteresis / 2))) or (not self.heating_source_input_on_off)):
-                        # resetuje jenorazove spustenie precerpavania (kvoli casovacu)
-                        self.heat_dhw_from_acc_onetime_start_flag0 = 0
-                        # vypne ohrev
-                        self.heating_source_auto_on_off = False
-                        # a ak je striktny mod, pretoci ventil do ACC
-                        if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                            await self.switch_to_acc()
-
-                    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                    elif(dhw_target_temperature > (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                        # zapne ohrev TUV
-                        self.heating_source_auto_on_off = True
-                        # a v striktnom mode pretoci ventil do TUV
-                        if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                            await self.switch_to_dhw()
-
-                self.temperature_setpoint = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                self.temperature_setpoint_hp = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-        # ******************************************************************************************************
-        # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Len Ohrev ACC ***********************************
-        # ******************************************************************************************************
-            elif(self.heating_operating_mode==HEATING_OPERATING_MODE_ACC):
-                self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 0
-
-                # INICIALIZÁCIA MÓDU
-                if(self.heating_operating_mode_previous != self.heating_operating_mode):
-                    self.heating_operating_mode_previous = self.heating_operating_mode
-                    # Jednorazove vykonanie akcie pri zmene heating modu
-                    # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
-                    await self.stop_heat_dhw_from_acc()
-
-                # HLAVNÁ LOGIKA
-
-                await self.switch_to_acc()
-
-                if(acc_target_temperature < (self.lower_temperature_acc_value - (self.settings.heating_source_temp_hysteresis / 2))):
-                    self.heating_source_auto_on_off = False
-                elif(acc_target_temperature > (self.lower_temperature_acc_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                    self.heating_source_auto_on_off = True
-
-                self.temperature_setpoint = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                self.temperature_setpoint_hp = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-        # **************************************************************************************************************
-        # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - 1.Prečerpanie z ACC + 2. Ohrev ACC ***
-        # **************************************************************************************************************
-            elif(self.heating_operating_mode==HEATING_OPERATING_MODE_PDHW_ACC):
-                self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 0
-
-                # INICIALIZÁCIA MÓDU
-                if(self.heating_operating_mode_previous != self.heating_operating_mode):
-                    self.heating_operating_mode_previous = self.heating_operating_mode
-                    # Jednorazove vykonanie akcie pri zmene heating modu
-                    # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
-                    await self.stop_heat_dhw_from_acc()
-
-                # HLAVNÁ LOGIKA
-
-                await self.switch_to_acc()
-
-                if(acc_target_temperature < (self.lower_temperature_acc_value - (self.settings.heating_source_temp_hysteresis / 2))):
-                    self.heating_source_auto_on_off = False
-                elif(acc_target_temperature > (self.lower_temperature_acc_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                    self.heating_source_auto_on_off = True
-
-                self.temperature_setpoint = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                self.temperature_setpoint_hp = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-                # Ak je v ACC vyssia teplota nez v TUV
-                # ***** (Ak je v ACC teplota rovna, alebo nizsia nez v TUV, alebo teplota dosiahne cielovu hodnotu, precerpavanie sa vypne automaticky (nie tu, ale v inej casti programu)
-                if (temperature_acc_with_offset > temperature_dhw_value):
-                    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                    if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                        # zapne sa precerpavanie z ACC do TUV
-                        await self.start_heat_dhw_from_acc()
-
-        # ******************************************************************************************************
-        # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Cyklus s prioritou: 1.Ohrev DHW, 2.Ohrev ACC ****
-        # ******************************************************************************************************
-            elif(self.heating_operating_mode==HEATING_OPERATING_MODE_DHW_ACC):
-                self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 0
-
-                # INICIALIZÁCIA MÓDU
-                if(self.heating_operating_mode_previous != self.heating_operating_mode):
-                    self.heating_operating_mode_previous = self.heating_operating_mode
-                    # Jednorazove vykonanie akcie pri zmene heating modu
-                    # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
-                    await self.stop_heat_dhw_from_acc()
-
-                    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                    if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-
-                        # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                        await self.switch_to_dhw()
-                        self.heating_source_auto_on_off = True
-
-                # HLAVNÁ LOGIKA
-
-                self.temperature_setpoint_hp = MAX_TEMPERATURE_LIMIT_HP
-
-                # ak je prepnute na ohrev TUV
-                if(self.hp_dhw):
-
-                    # Pre všeobecný zdroj kurenia sa nastavi 2. uroven teploty pre TUV
-                    self.temperature_setpoint = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                    # # Pre tepelné čerpadlo sa prednastavi cieľová teplota teplota pre TUV + hysterézia
-                    # self.temperature_setpoint_hp = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                    # # Ak je v DHW nižšia teplota než v ACC
-                    # if(temperature_dhw_value < self.lower_temperature_acc_value):
-                    #     # Ak je v ACC teplota nižšia nez 1. uroven ziadanej teploty
-                    #     if(acc_target_temperature > (self.lower_temperature_acc_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                    #         # Pre zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre ACC
-                    #         self.temperature_setpoint_hp = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-                    # Ak je striktny mod pre vstupne ventily
-                    flag_0 = True
-                    if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                        # Ak je zdroj kurenia vypnuty
-                        if (self.heating_source_input_on_off == False):
-                            # Tak sa prepne ventil z TC do ACC
-                            await self.switch_to_acc()
-                            flag_0 = False
-
-                    if(flag_0):
-
-                        # Ak teplota v TUV prekroci 2. uroven ziadanej teploty
-                        if(dhw_target_temperature < (temperature_dhw_value - (self.settings.heating_source_temp_hysteresis / 2))):
-
-                            # Tak sa prepne na ohrev ACC
-                            await self.switch_to_acc()
-
-                            # Ak je v ACC teplota vyssia, nez 2. uroven ziadanej teploty
-                            if(acc_target_temperature < (self.lower_temperature_acc_value - (self.settings.heating_source_temp_hysteresis / 2))):
-
-                                # vypne sa zdroj kurenia
-                                self.heating_source_auto_on_off = False
-
-                # ak je uz prepnuty ohrev na ACC
-                else:
-
-                    # Pre všeobecný zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre ACC
-                    self.temperature_setpoint = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                    # # Pre tepelné čerpadlo sa prednastavi 2. uroven ziadanej teploty pre ACC
-                    # self.temperature_setpoint_hp = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                    # # Ak je v DHW vyššia teplota než v ACC
-                    # if(temperature_dhw_value > self.lower_temperature_acc_value):
-                    #     # Ak je v TUV teplota nižšia, nez 1. uroven ziadanej teploty
-                    #     if(dhw_target_temperature > (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                    #         # Pre zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre DHW
-                    #         self.temperature_setpoint_hp = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-                    # Ak je zdroj kurenia zapnuty
-                    if (self.heating_source_input_on_off == True):
-                        
-                        # Ak je v ACC teplota vyssia nez 1. uroven ziadanej teploty
-                        if(acc_target_temperature < (self.lower_temperature_acc_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                            
-                            # Ak je v ACC teplota vyssia, nez 2. uroven ziadanej teploty
-                            if(acc_target_temperature < (self.lower_temperature_acc_value - (self.settings.heating_source_temp_hysteresis / 2))):
-                                
-                                # ak bol zdroj teploty uz zapnuty (z predchadzajucej sekvencie) tak bude pokracovat v kureni az do dosiahnutia 2. urovne ziadanej teploty
-                                if(self.heating_source_auto_on_off):
-
-                                    # Ak je v TUV teplota vyssia, nez 2. uroven ziadanej teploty
-                                    if(dhw_target_temperature < (temperature_dhw_value - (self.settings.heating_source_temp_hysteresis / 2))):
-                                        
-                                        # vypne sa zdroj kurenia
-                                        self.heating_source_auto_on_off = False
-                                        
-                                    # Ak je v TUV teplota nizsia nez 2. uroven ziadanej teploty
-                                    else:
-                                        
-                                        # prepne sa na ohrev TUV
-                                        await self.switch_to_dhw()
-
-                                # ak bol zdroj teploty uz vypnuty (z predchadzajucej sekvencie) tak sa zapne az po znizeni teploty TUV pod 1. uroven ziadanej teploty
-                                else:
-
-                                    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                                    if not (dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-
-                                        # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                                        await self.switch_to_dhw()
-                                        self.heating_source_auto_on_off = True
-
-                            # Ak je v ACC teplota nizsia, nez 2. uroven ziadanej teploty
-                            else:
-
-                                # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                                if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                                    
-                                    # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                                    await self.switch_to_dhw()
-                                    self.heating_source_auto_on_off = True
-
-                        # Ak je v ACC teplota nizsia nez 1. uroven ziadanej teploty
-                        else:
-
-                            # zapne sa zdroj kurenia
-                            self.heating_source_auto_on_off = True
-
-                            # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                            if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                                # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                                await self.switch_to_dhw()
-
-                            # Ak je v TUV teplota vyssia, nez 2. uroven ziadanej teploty
-                            if(dhw_target_temperature < (temperature_dhw_value - (self.settings.heating_source_temp_hysteresis / 2))):
-                                # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                                await self.switch_to_acc()
-
-        # ***********************************************************************************************************************************
-        # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - AUTOMATICKÝ MÓD - Cyklus s prioritou: 1.Prečerpanie z ACC do DHW, 2.Ohrev DHW, 3.ohrev ACC *****
-        # ***********************************************************************************************************************************
-            elif(self.heating_operating_mode==HEATING_OPERATING_MODE_PDHW_DHW_ACC):
-
-                # INICIALIZÁCIA MÓDU
-                if(self.heating_operating_mode_previous != self.heating_operating_mode):
-                    self.heating_operating_mode_previous = self.heating_operating_mode
-                    # Jednorazove vykonanie akcie pri zmene heating modu
-                    # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
-                    await self.stop_heat_dhw_from_acc()
-
-                    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                    if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-
-                        # prepne sa na ohrev ACC a vypne sa zdroj kurenia
-                        await self.switch_to_acc()
-                        self.heating_source_auto_on_off = False
-
-                # HLAVNÁ LOGIKA
-
-                self.temperature_setpoint_hp = MAX_TEMPERATURE_LIMIT_HP
-
-                # Ak je v ACC vyssia teplota nez v TUV
-                if (temperature_acc_with_offset > temperature_dhw_value):
-
-                    # Ak je v TUV teplota vyssia nez 1. uroven ziadanej teploty
-                    if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-
-                        # zapne sa precerpavanie z ACC do TUV
-                        # ventil sa presmeruje zo zdroja kurenia do ACC
-
-                        # Pre všeobecný zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre ACC
-                        self.temperature_setpoint = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                        # # Pre tepelné čerpadlo sa prednastavi 2. uroven ziadanej teploty pre ACC
-                        # self.temperature_setpoint_hp = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                        # # Ak je v DHW vyššia teplota než v ACC
-                        # if(temperature_dhw_value > self.lower_temperature_acc_value):
-                        #     # Ak je v TUV teplota vyssia, nez 1. uroven ziadanej teploty
-                        #     if(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                        #         # Pre zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre DHW
-                        #         self.temperature_setpoint_hp = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-                        if (self.heating_operating_mode_pdhw_dhw_acc_init_flag2 == 0):
-                            self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 1
-
-                            # zapne sa precerpavanie z ACC do TUV, prepne sa ventil na ACC a vypne sa zdroj kurenia
-                            await self.start_heat_dhw_from_acc()
-                            await self.switch_to_acc()
-
-                        # Ak je v ACC vyssia teplota nez 1. uroven ziadanej teploty
-                        if(acc_target_temperature < (self.lower_temperature_acc_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                            # vypne sa zdroj kurenia
-                            self.heating_source_auto_on_off = False
-
-                        # Ak je v ACC teplota nizsia nez 1. uroven ziadanej teploty
-                        else:
-                            # zapne sa zdroj kurenia
-                            self.heating_source_auto_on_off = True
-
-                    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                    else:
-                        # a ak je strict mode, ventil z TC sa prepne do ACC
-                        if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                            await self.switch_to_acc()
-
-
-                # Ak je v ACC teplota rovna, alebo dokonca nizsia nez v TUV, alebo teplota dosiahne cielovu hodnotu
-                # vypne sa precerpavanie automaticky (nie tu, ale v inej casti programu)
-                # zapne sa zdroj kurenia a ventil sa prepne zo zdoja kurenia na TUV
-                else:
-                    # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                    if (self.heating_operating_mode_pdhw_dhw_acc_init_flag2 == 1):
-                        self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 0
-
-                        # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                        await self.switch_to_dhw()
-                        self.heating_source_auto_on_off = True
-
-                # ak bezi precerpavanie, cela dalsia cast programu sa nevykona, az ked precerpavanie skonci
-                if (not self.heat_dhw_from_acc):
-
-                    # ak je prepnute na ohrev TUV
-                    if(self.hp_dhw):
-
-                        # Pre všeobecný zdroj kurenia sa nastavi 2. uroven teploty pre TUV
-                        self.temperature_setpoint = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                        # # Pre tepelné čerpadlo sa prednastavi cieľová teplota teplota pre TUV + hysterézia
-                        # self.temperature_setpoint_hp = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                        # # Ak je v DHW nižšia teplota než v ACC
-                        # if(temperature_dhw_value < self.lower_temperature_acc_value):
-                        #     # Ak je v ACC teplota nižšia nez 1. uroven ziadanej teploty
-                        #     if(acc_target_temperature > (self.lower_temperature_acc_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                        #         # Pre zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre ACC
-                        #         self.temperature_setpoint_hp = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-                        # Ak je striktny mod pre vstupne ventily
-                        flag_0 = True
-                        if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                            # Ak je zdroj kurenia vypnuty
-                            if (self.heating_source_input_on_off == False):
-                                # Tak sa prepne ventil z TC do ACC
-                                await self.switch_to_acc()
-                                flag_0 = False
-                        
-                        if(flag_0):
-                    
-                            # Ak teplota v TUV prekroci 2. uroven ziadanej teploty
-                            if(dhw_target_temperature < (temperature_dhw_value - (self.settings.heating_source_temp_hysteresis / 2))):
-
-                                # Tak sa prepne na ohrev ACC
-                                await self.switch_to_acc()
-
-                                # Ak je v ACC teplota vyssia, nez 2. uroven ziadanej teploty
-                                if(acc_target_temperature < (self.lower_temperature_acc_value - (self.settings.heating_source_temp_hysteresis / 2))):
-
-                                    # vypne sa zdroj kurenia
-                                    self.heating_source_auto_on_off = False
-
-                    # ak je uz prepnuty ohrev na ACC
-                    else:
-
-                        # Pre všeobecný zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre ACC
-                        self.temperature_setpoint = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                        # Pre tepelné čerpadlo sa prednastavi 2. uroven ziadanej teploty pre ACC
-                        # self.temperature_setpoint_hp = acc_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-                        # # Ak je v DHW vyššia teplota než v ACC
-                        # if(temperature_dhw_value > self.lower_temperature_acc_value):
-                        #     # Ak je v TUV teplota nižšia, nez 1. uroven ziadanej teploty
-                        #     if(dhw_target_temperature > (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                        #         # Pre zdroj kurenia sa nastavi 2. uroven ziadanej teploty pre DHW
-                        #         self.temperature_setpoint_hp = dhw_target_temperature + (self.settings.heating_source_temp_hysteresis / 2)
-
-                        # Ak je zdroj kurenia zapnuty
-                        if (self.heating_source_input_on_off == True):
-                            
-                            # Ak je v ACC teplota vyssia nez 1. uroven ziadanej teploty
-                            if(acc_target_temperature < (self.lower_temperature_acc_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                                
-                                # Ak je v ACC teplota vyssia, nez 2. uroven ziadanej teploty
-                                if(acc_target_temperature < (self.lower_temperature_acc_value - (self.settings.heating_source_temp_hysteresis / 2))):
-                                    
-                                    # ak bol zdroj teploty uz zapnuty (z predchadzajucej sekvencie) tak bude pokracovat v kureni az do dosiahnutia 2. urovne ziadanej teploty
-                                    if(self.heating_source_auto_on_off):
-
-                                        # Ak je v TUV teplota vyssia, nez 2. uroven ziadanej teploty
-                                        if(dhw_target_temperature < (temperature_dhw_value - (self.settings.heating_source_temp_hysteresis / 2))):
-                                            
-                                            # vypne sa zdroj kurenia
-                                            self.heating_source_auto_on_off = False
-                                            
-                                        # Ak je v TUV teplota nizsia nez 2. uroven ziadanej teploty
-                                        else:
-                                            
-                                            # prepne sa na ohrev TUV
-                                            await self.switch_to_dhw()
-
-                                    # ak bol zdroj teploty uz vypnuty (z predchadzajucej sekvencie) tak sa zapne az po znizeni teploty TUV pod 1. uroven ziadanej teploty
-                                    else:
-
-                                        # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                                        if not (dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-
-                                            # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                                            await self.switch_to_dhw()
-                                            self.heating_source_auto_on_off = True
-                                            
-                                # Ak je v ACC teplota nizsia, nez 2. uroven ziadanej teploty
-                                else:
-                                    
-                                    # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                                    if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                                        
-                                        # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                                        await self.switch_to_dhw()
-                                        self.heating_source_auto_on_off = True
-
-                            # Ak je v ACC teplota nizsia nez 1. uroven ziadanej teploty
-                            else:
-                                
-                                # zapne sa zdroj kurenia
-                                self.heating_source_auto_on_off = True
-
-                                # Ak je v TUV teplota nizsia nez 1. uroven ziadanej teploty
-                                if not(dhw_target_temperature < (temperature_dhw_value + (self.settings.heating_source_temp_hysteresis / 2))):
-                                    # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                                    await self.switch_to_dhw()
-
-                                # Ak je v TUV teplota vyssia, nez 2. uroven ziadanej teploty
-                                if(dhw_target_temperature < (temperature_dhw_value - (self.settings.heating_source_temp_hysteresis / 2))):
-                                    # prepne sa na ohrev TUV a zapne sa zdroj kurenia
-                                    await self.switch_to_acc()
-
-        # ***********************************************************************************************************************************
-        # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - NEPLATNÝ REŽIM *********************************************************************************
-        # ***********************************************************************************************************************************
-        
-            else:
-                if(self.heating_operating_mode_previous != self.heating_operating_mode):
-                    self.heating_operating_mode_previous = self.heating_operating_mode
-                    # Jednorazove vykonanie akcie pri zmene heating modu
-                    # pri vstupe do tohot rezimu sa stopne precerpavanie z ACC do TUV
-                    await self.stop_heat_dhw_from_acc()
-
-                self.heating_operating_mode_pdhw_dhw_acc_init_flag2 = 0
-                LOGGER.error(f"Heating operating mode {self.heating_operating_mode} is not valid.")
-
-        # ***********************************************************************************************************************************
-        # *** 1. ÚROVEŇ AUTOMATIKY KÚRENIA - RIADIACE SIGNÁLY PRE TC ************************************************************************
-        # ***********************************************************************************************************************************
-
-            if(self.temperature_setpoint > MAX_TEMPERATURE_LIMIT):
-                self.sensor_states[ENTITY_CONTROL_COMMAND_TEMPERATURE] = MAX_TEMPERATURE_LIMIT
-            elif(self.temperature_setpoint < 25):
-                self.sensor_states[ENTITY_CONTROL_COMMAND_TEMPERATURE] = 25
-            else:
-                self.sensor_states[ENTITY_CONTROL_COMMAND_TEMPERATURE] = self.temperature_setpoint
-
-            if(self.temperature_setpoint_hp > MAX_TEMPERATURE_LIMIT_HP):
-                self.sensor_states[ENTITY_CONTROL_COMMAND_HP_TEMPERATURE] = MAX_TEMPERATURE_LIMIT_HP
-            elif(self.temperature_setpoint_hp < 25):
-                self.sensor_states[ENTITY_CONTROL_COMMAND_HP_TEMPERATURE] = 25
-            else:
-                self.sensor_states[ENTITY_CONTROL_COMMAND_HP_TEMPERATURE] = self.temperature_setpoint_hp
-
-            self.controll_command_on_off = 0
-            if(self.heating_source_input_on_off):
-                if(self.heating_source_auto_on_off):
-                    if(
-                        (temperature_acc1_value <= MAX_TEMPERATURE_LIMIT) and
-                        (temperature_acc2_value <= MAX_TEMPERATURE_LIMIT) and
-                        (temperature_dhw_value <= MAX_TEMPERATURE_LIMIT)
-                        ):
-                        if(self.heating_operating_mode==HEATING_OPERATING_MODE_MANUAL):
-                            if (valve_from_hp_to_acc_or_dhw.state == STATE_HP_ACC):
-                                if ((valve_input_acc1.state == STATE_OPEN) or (valve_input_acc2.state == STATE_OPEN)):
-                                    self.controll_command_on_off = 1
-                            elif (valve_from_hp_to_acc_or_dhw.state == STATE_HP_DHW):
-                                self.controll_command_on_off = 1
-                        else:
-                            self.controll_command_on_off = 1
-
-
-            self.controll_command_hp_on_off = 0
-            if(self.heating_source_input_on_off):
-                if(self.heating_source_auto_on_off):
-                    if(
-                        (temperature_acc1_value <= MAX_TEMPERATURE_LIMIT) and
-                        (temperature_acc2_value <= MAX_TEMPERATURE_LIMIT) and
-                        (temperature_dhw_value <= MAX_TEMPERATURE_LIMIT)
-                        ):
-                        if(self.heating_operating_mode==HEATING_OPERATING_MODE_MANUAL):
-                            if (valve_from_hp_to_acc_or_dhw.state == STATE_HP_ACC):
-                                if ((valve_input_acc1.state == STATE_OPEN) or (valve_input_acc2.state == STATE_OPEN)):
-                                    self.controll_command_hp_on_off = 1
-                            elif (valve_from_hp_to_acc_or_dhw.state == STATE_HP_DHW):
-                                self.controll_command_hp_on_off = 1
-                        else:
-                            self.controll_command_hp_on_off = 1
-
-
-            # ZATIAL NEDOKONCENE, OVLADA TO LEN TEPELNE CERPADLO
-            # Detekcia zmeny stavu TČ pre časovač zatvorenia ventilov na vstupoch do ACC
-            if (self._previous_controll_command_hp_on_off == 1 and self.controll_command_hp_on_off == 0):
-                # TČ sa práve vyplo - spustiť časovač ak ešte nebeží
-                if self._valve_input_acc_closing_delay_timer is None:
-                    delay_minutes = self.settings.valve_input_acc_closing_delay_when_heating_source_stop
-                    if delay_minutes > 0:
-                        self._valve_input_acc_closing_allowed = False
-                        self._valve_input_acc_closing_delay_timer = async_call_later(
-                            self.hass,
-                            delay_minutes * 60,  # konverzia minút na sekundy
-                            self._valve_input_acc_closing_delay_finished
-                        )
-                        LOGGER.info(f"Valve input ACC closing delay timer started for {delay_minutes} minutes")
-                    else:
-                        # Ak je delay 0, povoliť zatvorenie okamžite
-                        self._valve_input_acc_closing_allowed = True
-                
-                # Časovač pre oneskorenie pretočenia ventilu hp_dhw z TUV na ACC
-                # Spúšťa sa len ak: ventil je v TUV a vstupné ventily do ACC sú zatvorené
-                if (valve_from_hp_to_acc_or_dhw.state == STATE_HP_DHW and 
-                    valve_input_acc1.state == STATE_CLOSED and 
-                    valve_input_acc2.state == STATE_CLOSED):
-                    if self._hp_dhw_to_acc_delay_timer is None:
-                        delay_minutes = self.settings.valve_input_acc_closing_delay_when_heating_source_stop
-                        if delay_minutes > 0:
-                            self._hp_dhw_to_acc_switch_allowed = False
-                            self._hp_dhw_to_acc_delay_timer = async_call_later(
-                                self.hass,
-                                delay_minutes * 60,  # konverzia minút na sekundy
-                                self._hp_dhw_to_acc_delay_finished
-                            )
-                            LOGGER.info(f"HP DHW to ACC switch delay timer started for {delay_minutes} minutes (HP off, DHW active, ACC inputs closed)")
-                        else:
-                            # Ak je delay 0, povoliť pretočenie okamžite
-                            self._hp_dhw_to_acc_switch_allowed = True
-                else:
-                    # Ak podmienky nie sú splnené, resetovať príznak (môže sa pretočiť ihneď)
-                    self._hp_dhw_to_acc_switch_allowed = True
-
-            # ZATIAL NEDOKONCENE, OVLADA TO LEN TEPELNE CERPADLO
-            elif (self._previous_controll_command_hp_on_off == 0 and self.controll_command_hp_on_off == 1):
-                # TČ sa práve zaplo - zrušiť časovač a resetovať stav
-                if self._valve_input_acc_closing_delay_timer is not None:
-                    self._valve_input_acc_closing_delay_timer()
-                    self._valve_input_acc_closing_delay_timer = None
-                    LOGGER.debug("Valve input ACC closing delay timer cancelled - HP turned on")
-                self._valve_input_acc_closing_allowed = True
-                
-                # Zrušiť aj časovač pre pretočenie hp_dhw ventilu
-                if self._hp_dhw_to_acc_delay_timer is not None:
-                    self._hp_dhw_to_acc_delay_timer()
-                    self._hp_dhw_to_acc_delay_timer = None
-                    LOGGER.debug("HP DHW to ACC switch delay timer cancelled - HP turned on")
-                self._hp_dhw_to_acc_switch_allowed = True
-            
-            # Uložiť aktuálny stav pre porovnanie v ďalšom cykle
-            self._previous_controll_command_on_off = self.controll_command_on_off
-            self._previous_controll_command_hp_on_off = self.controll_command_hp_on_off
-
-            # ZATIAL NEDOKONCENE, OVLADA TO LEN TEPELNE CERPADLO
-            if (self.controll_command_hp_on_off):
-                await self._set_hp_on_off_with_debounce(STATE_ON)
-            else:
-                await self._set_hp_on_off_with_debounce(STATE_OFF)
-
-    # ******************************************************************************************************
-    # *** AUTOMATICKE VYPNUTIE PRECERPAVANIA Z ACC DO DHW, KED SA DOSIAHNE V DHW TEPLOTA, KTORA JE V ACC ***
-    # ******************************************************************************************************
-
-            # Ak teplota v DHW dosiahne teplotu v ((ACC1 alebo ACC2) - offset), alebo
-            # ak teplota v TUV prekroci 2. uroven teploty voči žiadanej teplote
-            # tak sa vypne switch.heat_dhw_from_acc
-            if (
-                (temperature_acc_with_offset <= temperature_dhw_value) or
-                (dhw_target_temperature < (temperature_dhw_value - (self.settings.heating_source_temp_hysteresis / 2)))
-                ):
-                    await self.stop_heat_dhw_from_acc()
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE VENTILU Z TEPELNÉHO ČERPADLA KTORÝ PREPÍNA BUĎ DO ACC, ALEBO DO DHW ********************
-    # ******************************************************************************************************
-
-            if (self.hp_dhw):
-                self.valve_from_hp_to_acc_or_dhw_flag = 0
-            else:
-                self.valve_from_hp_to_acc_or_dhw_flag = 1
-
-            # **** Ovládanie ventilu *******************************************************************
-            if (self.valve_from_hp_to_acc_or_dhw_flag):
-                if (valve_from_hp_to_acc_or_dhw.state == STATE_HP_DHW):
-                    # Kontrola oneskorenia - len ak prepíname z DHW na ACC
-                    if not self._hp_dhw_to_acc_switch_allowed:
-                        LOGGER.debug("Valve HP to ACC switch delayed - waiting for timer")
-                    else:
-                        if await self._call_valve_service(CONF_VALVE_FROM_TC_TO_ACC_OR_DHW, SWITCH_HP_to_ACC, self.settings.entity_valve_from_hp_to_acc_or_dhw):
-                            LOGGER.debug("Valve from Heating pump is switched to ACC")
-            else:
-                if (valve_from_hp_to_acc_or_dhw.state == STATE_HP_ACC):
-                    if await self._call_valve_service(CONF_VALVE_FROM_TC_TO_ACC_OR_DHW, SWITCH_HP_to_DHW, self.settings.entity_valve_from_hp_to_acc_or_dhw):
-                        LOGGER.debug("Valve from Heating pump is switched to DHW")
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE VENTILU NA VÝSTUPE Z ACC 1 *************************************************************
-    # ******************************************************************************************************
-
-            self.valve_output_acc1_flag = 0
-            # ak je ACC1 zapnuté, alebo ak je teplota v ACC1 vyššia než minimálna povolená teplota pre kúrenie
-            if ((acc1_enable) or (temperature_acc1_value > self.settings.disabled_acc_temperature_limit)):
-                # ak nie je preferencia ACC, alebo je preferované ACC1
-                if (self.preferred_output_ACC==0) or (self.preferred_output_ACC==1):
-                    # ak je zapnuté prečerpávanie z ACC do DHW
-                    if (self.heat_dhw_from_acc):
-                        # otvorí sa výstupný ventil 1
-                        self.valve_output_acc1_flag = 1
-                    # ak nie je zapnuté prečerpávanie z ACC do DHW
-                    else:
-                        # ak je mód ventilu GENERIC
-                        if (self.settings.valve_output_acc_strict_mode == VALVE_MODE_GENERIC):
-                            # otvorí sa výstupný ventil 1
-                            self.valve_output_acc1_flag = 1
-                        # ak je mód ventilu MODERATE
-                        elif (self.settings.valve_output_acc_strict_mode == VALVE_MODE_MODERATE):
-                            # ak je zapnutý aspoň jeden z termostatov ON
-                            if ((thermostat_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                                # otvorí sa výstupný ventil 1
-                                self.valve_output_acc1_flag = 1
-                        # ak je mód ventilu STRICT
-                        elif (self.settings.valve_output_acc_strict_mode == VALVE_MODE_STRICT):
-                            # ak je ventil z TC prepnutý do ACC
-                            if (not self.hp_dhw):
-                                # ak je zapnutý aspoň jeden z termostatov ON
-                                if ((thermostat_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                                    # otvorí sa výstupný ventil 1
-                                    self.valve_output_acc1_flag = 1
-                            else:
-                                # ak je aspoň jeden z termostatov v stave kúrenia
-                                if ((heating_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                                    self.valve_output_acc1_flag = 1
-                        else:
-                            LOGGER.error("Value in 'self.settings.valve_output_acc_strict_mode' = '%s' is invalid.", 
-                                    self.settings.valve_output_acc_strict_mode)
-
-            # **** Ovládanie ventilu *******************************************************************
-            if (self.valve_output_acc1_flag):
-                if (valve_output_acc1.state == STATE_CLOSED):
-                    if await self._call_valve_service(CONF_VALVE_OUTPUT_ACC1, SWITCH_to_OPEN, self.settings.entity_valve_output_acc1):
-                        LOGGER.debug("Valve output from ACC 1 was opened")
-            else:
-                if (valve_output_acc1.state == STATE_OPEN):
-                    if await self._call_valve_service(CONF_VALVE_OUTPUT_ACC1, SWITCH_to_CLOSE, self.settings.entity_valve_output_acc1):
-                        LOGGER.debug("Valve output from ACC 1 was closed")
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE VENTILU NA VÝSTUPE Z ACC 2 *************************************************************
-    # ******************************************************************************************************
-
-            self.valve_output_acc2_flag = 0
-            if ((acc2_enable) or (temperature_acc2_value > self.settings.disabled_acc_temperature_limit)):
-                if (self.preferred_output_ACC==0) or (self.preferred_output_ACC==2):
-                    if (self.heat_dhw_from_acc):
-                        self.valve_output_acc2_flag = 1
-                    else:
-                        if (self.settings.valve_output_acc_strict_mode == VALVE_MODE_GENERIC):
-                            self.valve_output_acc2_flag = 1
-                        elif (self.settings.valve_output_acc_strict_mode == VALVE_MODE_MODERATE):
-                            if ((thermostat_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                                self.valve_output_acc2_flag = 1
-                        elif (self.settings.valve_output_acc_strict_mode == VALVE_MODE_STRICT):
-                            if (not self.hp_dhw):
-                                if ((thermostat_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                                    self.valve_output_acc2_flag = 1
-                            elif (self.hp_dhw):
-                                if ((heating_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                                    self.valve_output_acc2_flag = 1
-                        else:
-                            LOGGER.error("Value in 'self.settings.valve_output_acc_strict_mode' = '%s' is invalid.",
-                                    self.settings.valve_output_acc_strict_mode)
-
-            # **** Ovládanie ventilu *******************************************************************
-            if (self.valve_output_acc2_flag):
-                if (valve_output_acc2.state == STATE_CLOSED):
-                    if await self._call_valve_service(CONF_VALVE_OUTPUT_ACC2, SWITCH_to_OPEN, self.settings.entity_valve_output_acc2):
-                        LOGGER.debug("Valve output from ACC 2 was opened")
-            else:
-                if (valve_output_acc2.state == STATE_OPEN):
-                    if await self._call_valve_service(CONF_VALVE_OUTPUT_ACC2, SWITCH_to_CLOSE, self.settings.entity_valve_output_acc2):
-                        LOGGER.debug("Valve output from ACC 2 was closed")
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE VENTILU NA VSTUPE DO ACC 1 *************************************************************
-    # ******************************************************************************************************
-            self.valve_input_acc1_flag = 0
-            if (acc1_enable):
-                # Otvara len ten ventil ktoreho ACC je chladnejsi, ak su teploty v oboch ACC rovnake, otvori obidva ventily
-                # Tento ventil sa otvori aj vtedy ak by ACC druheho ventilu bol vypnuty
-                if ((self.preferred_input_ACC==0) or (self.preferred_input_ACC==1) or (not acc2_enable)):
-                    if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_GENERIC):
-                        self.valve_input_acc1_flag = 1
-                    elif (self.settings.valve_input_acc_strict_mode == VALVE_MODE_MODERATE):
-                        if(not self.hp_dhw):
-                            self.valve_input_acc1_flag = 1
-                    elif (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                        if(not self.hp_dhw):
-                            if(self.heating_operating_mode==HEATING_OPERATING_MODE_MANUAL):
-                                if (self.heating_source_input_on_off):
-                                    self.valve_input_acc1_flag = 1
-                            elif (self.heating_operating_mode==HEATING_OPERATING_MODE_DHW):
-                                self.valve_input_acc1_flag = 0
-                            elif (self.heating_operating_mode==HEATING_OPERATING_MODE_PDHW_DHW):
-                                self.valve_input_acc1_flag = 0
-                            else:
-                                if (self.controll_command_hp_on_off):
-                                    self.valve_input_acc1_flag = 1
-                        else:
-                            if(self.heating_operating_mode==HEATING_OPERATING_MODE_DHW_ACC):
-                                self.valve_input_acc1_flag = 0
-                    else:
-                        LOGGER.error("Value in 'self.settings.valve_input_acc_strict_mode' = '%s' is invalid.",
-                                self.settings.valve_input_acc_strict_mode)
-
-            # **** Ovládanie ventilu *******************************************************************
-            if (self.valve_input_acc1_flag):
-                if (valve_input_acc1.state == STATE_CLOSED):
-                    if await self._call_valve_service(CONF_VALVE_INPUT_ACC1, SWITCH_to_OPEN, self.settings.entity_valve_input_acc1):
-                        LOGGER.debug("Valve input to ACC 1 was opened")
-            else:
-                if (valve_input_acc1.state == STATE_OPEN):
-                    # Zatvorenie ventilu len ak je povolené (časovač vypršal alebo TČ je zapnuté)
-                    if self._valve_input_acc_closing_allowed:
-                        if await self._call_valve_service(CONF_VALVE_INPUT_ACC1, SWITCH_to_CLOSE, self.settings.entity_valve_input_acc1):
-                            LOGGER.debug("Valve input to ACC 1 was closed")
-                    else:
-                        LOGGER.debug("Valve input to ACC 1 closing delayed - waiting for timer")
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE VENTILU NA VSTUPE DO ACC 2 *************************************************************
-    # ******************************************************************************************************
-            self.valve_input_acc2_flag = 0
-            if (acc2_enable):
-                # Otvara len ten ventil ktoreho ACC je chladnejsi, ak su teploty v oboch ACC rovnake, otvori obidva ventily
-                # Tento ventil sa otvori aj vtedy ak by ACC druheho ventilu bol vypnuty
-                if ((self.preferred_input_ACC==0) or (self.preferred_input_ACC==2) or (not acc1_enable)):
-                    if (self.settings.valve_input_acc_strict_mode == VALVE_MODE_GENERIC):
-                        self.valve_input_acc2_flag = 1
-                    elif (self.settings.valve_input_acc_strict_mode == VALVE_MODE_MODERATE):
-                        if(not self.hp_dhw):
-                            self.valve_input_acc2_flag = 1
-                    elif (self.settings.valve_input_acc_strict_mode == VALVE_MODE_STRICT):
-                        if(not self.hp_dhw):
-                            if(self.heating_operating_mode==HEATING_OPERATING_MODE_MANUAL):
-                                if (self.heating_source_input_on_off):
-                                    self.valve_input_acc2_flag = 1
-                            elif (self.heating_operating_mode==HEATING_OPERATING_MODE_DHW):
-                                self.valve_input_acc2_flag = 0
-                            elif (self.heating_operating_mode==HEATING_OPERATING_MODE_PDHW_DHW):
-                                self.valve_input_acc2_flag = 0
-                            else:
-                                if (self.controll_command_hp_on_off):
-                                    self.valve_input_acc2_flag = 1
-                        else:
-                            if(self.heating_operating_mode==HEATING_OPERATING_MODE_DHW_ACC):
-                                self.valve_input_acc2_flag = 0
-                    else:
-                        LOGGER.error("Value in 'self.settings.valve_input_acc_strict_mode' = '%s' is invalid.",
-                                self.settings.valve_input_acc_strict_mode)
-
-            # **** Ovládanie ventilu *******************************************************************
-            if (self.valve_input_acc2_flag):
-                if (valve_input_acc2.state == STATE_CLOSED):
-                    if await self._call_valve_service(CONF_VALVE_INPUT_ACC2, SWITCH_to_OPEN, self.settings.entity_valve_input_acc2):
-                        LOGGER.debug("Valve input to ACC 2 was opened")
-            else:
-                if (valve_input_acc2.state == STATE_OPEN):
-                    # Zatvorenie ventilu len ak je povolené (časovač vypršal alebo TČ je zapnuté)
-                    if self._valve_input_acc_closing_allowed:
-                        if await self._call_valve_service(CONF_VALVE_INPUT_ACC2, SWITCH_to_CLOSE, self.settings.entity_valve_input_acc2):
-                            LOGGER.debug("Valve input to ACC 2 was closed")
-                    else:
-                        LOGGER.debug("Valve input to ACC 2 closing delayed - waiting for timer")
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE VENTILU Z ACC KTORÝ PREPÍNA BUĎ DO KÚRENIA, ALEBO DO DHW *****
-    # ******************************************************************************************************
-
-            self.valve_from_acc_to_heat_or_dhw_flag = 0
-            if (not self.heat_dhw_from_acc):
-                self.valve_from_acc_to_heat_or_dhw_flag = 1
-
-            # **** Ovládanie ventilu *******************************************************************
-            if (self.valve_from_acc_to_heat_or_dhw_flag):
-                if (valve_from_acc_to_heat_or_dhw.state == STATE_ACC_DHW):
-                    if await self._call_valve_service(CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW, SWITCH_ACC_to_HEATING, self.settings.entity_valve_from_acc_to_heat_or_dhw):
-                        LOGGER.debug("Valve from ACC was switched to Heating")
-            else:
-                if (valve_from_acc_to_heat_or_dhw.state == STATE_ACC_HEATING):
-                    if await self._call_valve_service(CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW, SWITCH_ACC_to_DHW, self.settings.entity_valve_from_acc_to_heat_or_dhw):
-                        LOGGER.debug("Valve from ACC was switched to DHW")
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE VENTILU NA VÝSTUPE DO KÚRENIA DO DOMU **************************************************
-    # ******************************************************************************************************
-            
-            # ak nebezi precerpavanie
-            if (not self.heat_dhw_from_acc):
-
-                self.valve_output_heating_flag = 0
-                if (self.settings.valve_output_acc_strict_mode == VALVE_MODE_STRICT):
-
-                    if (not self.hp_dhw):
-                        if ((thermostat_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                            self.valve_output_heating_flag = 1
-                        else:
-                            self.valve_output_heating_flag = 0
-                    elif (self.hp_dhw):
-                        if ((heating_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                            self.valve_output_heating_flag = 1
-
-                else:
-                    if ((thermostat_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                        self.valve_output_heating_flag = 1
-                    else:
-                        self.valve_output_heating_flag = 0
-                            
-                # **** Ovládanie ventilu *******************************************************************
-
-                if (self.valve_output_heating_flag):
-                    if (valve_output_heating.state == STATE_CLOSED):
-                        if await self._call_valve_service(CONF_VALVE_OUTPUT_HEATING, SWITCH_to_OPEN, self.settings.entity_valve_output_heating):
-                            LOGGER.debug("Valve for heating output was open")
-                else:
-                    if (valve_output_heating.state == STATE_OPEN):
-                        if await self._call_valve_service(CONF_VALVE_OUTPUT_HEATING, SWITCH_to_CLOSE, self.settings.entity_valve_output_heating):
-                            LOGGER.debug("Valve for heating output was closed") 
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE OBEHOVÉHO ČERPADLA NA VÝSTUPE ACC ******************************************************
-    # ******************************************************************************************************
-
-            self.water_pump_acc_output_flag = 0
-            # ak je zapnute precerpacanie z ACC do DHW
-            if (self.heat_dhw_from_acc):
-                # ak su ventily na vstupoch ACC otvorene a ak je ventil na z ACC pretoceny do DHW
-                if (
-                    ((valve_output_acc1.state == STATE_OPEN) or (valve_output_acc2.state == STATE_OPEN)) and
-                    (valve_from_acc_to_heat_or_dhw.state == STATE_ACC_DHW)
-                    ):
-                        self.water_pump_acc_output_flag = 1
-
-            # ak je vypnute precerpacanie z ACC do DHW
-            else:
-                # ak je v nastaveniach povolene pomocne cerpadlo
-                if (self.settings.auxiliary_water_pump_for_heating == AUXILIARY_PUMP_ENABLE):
-                    # ak je kurenia stav = ON
-                    if ((heating_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                        # ak su ostatne ventily spravne pretocene
-                        if (
-                            ((valve_output_acc1.state == STATE_OPEN) or (valve_output_acc2.state == STATE_OPEN)) and
-                            (valve_from_acc_to_heat_or_dhw.state == STATE_ACC_HEATING) and
-                            (valve_output_heating.state == STATE_OPEN)
-                            ):
-                                self.water_pump_acc_output_flag = 1
-                # V BOOSTER režime sa pumpa ovláda v sekcii "OVLÁDANIE OBEHOVÉHO ČERPADLA NA VÝSTUPE DO KÚRENIA"
-
-                # **** Ovládanie obehového čerpadla *******************************************************************
-
-            # V BOOSTER režime sa pumpa neovláda tu, ale v sekcii heating
-            # ak je iny rezim nez BOOST, alebo je precerpavanie zapnute
-            if (self.settings.auxiliary_water_pump_for_heating != AUXILIARY_PUMP_BOOSTER) or (self.heat_dhw_from_acc):
-
-                if (self.water_pump_acc_output_flag):
-                    if (water_pump_acc_output.state != STATE_ON):
-                        await self.hass.services.async_call(
-                            "switch", TURN_ON, {"entity_id": self.settings.entity_water_pump_acc_output}
-                        )
-                        LOGGER.debug("The water pump at the ACC output was turned on")
-                else:
-                    if (water_pump_acc_output.state != STATE_OFF):
-                        await self.hass.services.async_call(
-                            "switch", TURN_OFF, {"entity_id": self.settings.entity_water_pump_acc_output}
-                        )
-                        LOGGER.debug("The water pump at the ACC output was turned off")
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE OBEHOVÉHO ČERPADLA PRE PODLAHOVÉ KÚRENIE ***********************************************
-    # ******************************************************************************************************
-
-            self.water_pump_floor_heating_flag = 0
-            if ((podlahove_stav.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                if (not self.heat_dhw_from_acc):
-                    if (
-                        ((valve_output_acc1.state == STATE_OPEN) or (valve_output_acc2.state == STATE_OPEN)) and
-                        (valve_from_acc_to_heat_or_dhw.state == STATE_OPEN) and
-                        (valve_output_heating.state == STATE_OPEN)
-                        ):
-                            self.water_pump_floor_heating_flag = 1
-
-            if (self.water_pump_floor_heating_flag):
-                if (water_pump_floor_heating.state != STATE_ON):
-                    await self.hass.services.async_call(
-                        "switch", TURN_ON, {"entity_id": self.settings.entity_water_pump_floor_heating}
-                    )
-                    LOGGER.debug("The water pump for floor heating was turned on")
-            else:
-                if (water_pump_floor_heating.state != STATE_OFF):
-                    await self.hass.services.async_call(
-                        "switch", TURN_OFF, {"entity_id": self.settings.entity_water_pump_floor_heating}
-                    )
-                    LOGGER.debug("The water pump for floor heating was turned off")
-
-    # ******************************************************************************************************
-    # *** OVLÁDANIE OBEHOVÉHO ČERPADLA NA VÝSTUPE DO KÚRENIA ***********************************************
-    # ******************************************************************************************************
-
-            self.water_pump_heating_flag = 0
-            if ((heating_state.state == STATE_ON) and (not self.min_acc_temperature_for_heating_limit_broken)):
-                if (not self.heat_dhw_from_acc):
-                    if (
-                        ((valve_output_acc1.state == STATE_OPEN) or (valve_output_acc2.state == STATE_OPEN)) and
-                        (valve_from_acc_to_heat_or_dhw.state == STATE_OPEN) and
-                        (valve_output_heating.state == STATE_OPEN)
-                        ):
-                            self.water_pump_heating_flag = 1
-
-            if (self.water_pump_heating_flag):
-                if (water_pump_heating.state != STATE_ON):
-                    await self.hass.services.async_call(
-                        "switch", TURN_ON, {"entity_id": self.settings.entity_water_pump_heating}
-                    )
-                    LOGGER.debug("Water Pump for heating was turned on")
-                    
-                if (self.settings.auxiliary_water_pump_for_heating == AUXILIARY_PUMP_ENABLE):
-                    if (water_pump_acc_output.state != STATE_ON):
-                        await self.hass.services.async_call(
-                            "switch", TURN_ON, {"entity_id": self.settings.entity_water_pump_acc_output}
-                        )
-                        LOGGER.debug("Auxiliary water pump for heating was turned on (ENABLE mode)")
-                elif (self.settings.auxiliary_water_pump_for_heating == AUXILIARY_PUMP_BOOSTER):
-                    # V BOOSTER režime: zapnúť pumpu len ak booster ešte neprebehol
-                    # Stavy: 
-                    #   - _booster_finished == False, _booster_active == False: môže sa spustiť
-                    #   - _booster_active == True: timer beží, pumpa zostáva zapnutá
-                    #   - _booster_finished == True: booster už prebehol, pumpa sa nezapne
-                    if not self._auxiliary_pump_booster_finished and not self._auxiliary_pump_booster_active:
-                        # Prvé spustenie boostera - zapnúť pumpu a spustiť časovač
-                        if (water_pump_acc_output.state != STATE_ON):
-                            await self.hass.services.async_call(
-                                "switch", TURN_ON, {"entity_id": self.settings.entity_water_pump_acc_output}
-                            )
-                        self._auxiliary_pump_booster_active = True
-                        # Spustiť nový časovač
-                        self._auxiliary_pump_booster_timer = async_call_later(
-                            self.hass,
-                            self.settings.auxiliary_pump_booster_time * 60,  # konverzia minút na sekundy
-                            self._booster_timer_finished
-                        )
-                        LOGGER.debug("Auxiliary water pump for heating was turned on (BOOSTER mode) - timer started for %d minutes", self.settings.auxiliary_pump_booster_time)
-                    # Ak je booster aktívny (timer beží) alebo už prebehol, nič nerobíme
-            else:
-                if (water_pump_heating.state != STATE_OFF):
-                    await self.hass.services.async_call(
-                        "switch", TURN_OFF, {"entity_id": self.settings.entity_water_pump_heating}
-                    )
-                    LOGGER.debug("Water pump for heating was turned off")
-                    
-                if (self.settings.auxiliary_water_pump_for_heating == AUXILIARY_PUMP_ENABLE):
-                    if (not self.heat_dhw_from_acc):
-                        if (water_pump_acc_output.state != STATE_OFF):
-                            await self.hass.services.async_call(
-                                "switch", TURN_OFF, {"entity_id": self.settings.entity_water_pump_acc_output}
-                            )
-                            LOGGER.debug("Auxiliary water pump for heating was turned off (ENABLE mode)")
-                elif (self.settings.auxiliary_water_pump_for_heating == AUXILIARY_PUMP_BOOSTER):
-                    if (not self.heat_dhw_from_acc):
-                        if (water_pump_acc_output.state != STATE_OFF):
-                            await self.hass.services.async_call(
-                                "switch", TURN_OFF, {"entity_id": self.settings.entity_water_pump_acc_output}
-                            )
-                            LOGGER.debug("Auxiliary water pump for heating was turned off (BOOSTER mode)")
-                    # Zrušiť booster časovač a resetovať všetky stavy (aby sa mohol znovu spustiť pri ďalšom zapnutí)
-                    if self._auxiliary_pump_booster_timer:
-                        self._auxiliary_pump_booster_timer()
-                        self._auxiliary_pump_booster_timer = None
-                        LOGGER.debug("Booster timer cancelled - heating turned off")
-                    self._auxiliary_pump_booster_active = False
-                    self._auxiliary_pump_booster_finished = False  # Reset - pri ďalšom zapnutí heating sa booster spustí znova
+        Beží priamo v obsluhe zmeny stavu - neobmedzuje ju filter relevantnosti, zlučovanie udalostí,
+        debounce príkazu pre TČ, ani práve bežiaci kontrolný cyklus. Vráti True ak je teplota nad limitom.
+        """
+        if entity_id not in (self.settings.entity_temp_acc1, self.settings.entity_temp_acc2, self.settings.entity_temp_dhw):
+            return False
+        try:
+            temperature = float(new_state.state)
+        except (AttributeError, TypeError, ValueError):
+            return False
+        if temperature <= MAX_TEMPERATURE_LIMIT:
+            return False
+
+        already_off = (
+            self._hp_on_off_pending_value == STATE_OFF
+            and self.sensor_states[ENTITY_CONTROL_COMMAND_HP_ON_OFF] == STATE_OFF
+            and TIMER_HP_ON_OFF_DEBOUNCE not in self.scheduler
+        )
+        if already_off:
+            return True
+
+        # Vypnúť bez debounce - prebieha aj počas bežiaceho cyklu
+        self.scheduler.cancel(TIMER_HP_ON_OFF_DEBOUNCE)
+        self._hp_on_off_pending_value = STATE_OFF
+        self.sensor_states[ENTITY_CONTROL_COMMAND_ON_OFF] = STATE_OFF
+        self.sensor_states[ENTITY_CONTROL_COMMAND_HP_ON_OFF] = STATE_OFF
+        self._publish_feedback()
+
+        self.safety_trips += 1
+        if time_fired is not None:
+            latency = (dt_util.utcnow() - time_fired).total_seconds()
+            self.safety_latency_last = latency
+            self.safety_latency_max = max(self.safety_latency_max, latency)
+            LOGGER.warning(f"Safety: {entity_id} = {temperature} > {MAX_TEMPERATURE_LIMIT}, heating source command cut off after {latency * 1000:.1f} ms")
+        else:
+            LOGGER.warning(f"Safety: {entity_id} = {temperature} > {MAX_TEMPERATURE_LIMIT}, heating source command cut off")
+        # Bezpečnostné vypnutie sa v štatistike prejaví v najbližšom cykle, nečaká na STATISTICS_PUBLISH_INTERVAL
+        self._statistics_time = None
+        return True
 
 # ******************************************************************************************
-# ********************** KONIEC LOGIKY CONTROLLERA *****************************************
+# ********************** Filter relevantnosti zmien vstupov ********************************
 # ******************************************************************************************
 
-            async_dispatcher_send(self.hass, f"{DOMAIN}_feedback_update_{self._entry_id}")
-            LOGGER.debug("Control cycle completed with sucess")
-            
-        except Exception as e:
-            LOGGER.error(f"Error !!! {e}")
-            return
+    def is_relevant_change(self, entity_id: str, old_state, new_state) -> bool:
+        """
+        Rozhodne, či zmena stavu sledovanej entity môže zmeniť niektoré rozhodnutie.
 
-        finally:
-            self._is_running = False
+        Diskrétne vstupy (prepínače, režim, ventily, čerpadlá, termostaty) sú relevantné pri každej
+        zmene stavu. Zmena teploty je relevantná len ak preklopí niektoré porovnanie v decide(),
+        alebo sa priblíži k prahu na menej ako settings.temperature_deadband.
+        """
+        if old_state is None or new_state is None:
+            return True
+        if old_state.state == new_state.state:
+            return False
+
+        temperature_entities = (
+            self.settings.entity_temp_acc1,
+            self.settings.entity_temp_acc2,
+            self.settings.entity_temp_dhw,
+        )
+        if entity_id not in temperature_entities:
+            return True
+
+        try:
+            old_value = float(old_state.state)
+            new_value = float(new_state.state)
+            old_values = [float(self.hass.states.get(entity).state) for entity in temperature_entities]
+            dhw_target_temperature = float(self.hass.states.get(self.NUMBER_ENTITY_DHW_TARGET_TEMPERATURE).state)
+            acc_target_temperature = float(self.hass.states.get(self.NUMBER_ENTITY_ACC_TARGET_TEMPERATURE).state)
+        except (AttributeError, TypeError, ValueError):
+            # nedostupná / nečíselná hodnota - rozhodne kontrolný cyklus
+            return True
+
+        acc1_enable = self.hass.states.is_state(self.SWITCH_ENTITY_ACC1_ENABLE, STATE_ON)
+        acc2_enable = self.hass.states.is_state(self.SWITCH_ENTITY_ACC2_ENABLE, STATE_ON)
+        new_values = list(old_values)
+        for index, entity in enumerate(temperature_entities):
+            if entity == entity_id:
+                old_values[index] = old_value
+                new_values[index] = new_value
+
+        old_margins = temperature_margins(*old_values, acc1_enable, acc2_enable, dhw_target_temperature, acc_target_temperature, self.settings)
+        new_margins = temperature_margins(*new_values, acc1_enable, acc2_enable, dhw_target_temperature, acc_target_temperature, self.settings)
+        if temperature_change_relevant(old_margins, new_margins, self.settings.temperature_deadband):
+            return True
+
+        self.filtered_state_changes += 1
+        LOGGER.debug(f"State change of {entity_id} ({old_value} -> {new_value}) cannot change any decision, ignored")
+        return False
+
+    def input_class(self, entity_id: str, old_state, new_state) -> str:
+        """
+        Trieda vstupu pre zlučovanie udalostí.
+        Teplota nad MAX_TEMPERATURE_LIMIT (alebo návrat pod neho) je bezpečnostný vstup,
+        dopyt termostatov je prioritný vstup, ostatné sa zlučujú bežne.
+        """
+        if entity_id in (self.settings.entity_temp_acc1, self.settings.entity_temp_acc2, self.settings.entity_temp_dhw):
+            for state in (old_state, new_state):
+                try:
+                    if state is not None and float(state.state) > MAX_TEMPERATURE_LIMIT:
+                        return INPUT_SAFETY
+                except ValueError:
+                    pass
+            return INPUT_NORMAL
+
+        if entity_id in (
+            self.settings.entity_thermostat_state,
+            self.settings.entity_heating_state,
+            self.settings.entity_floor_heating_state,
+        ):
+            return INPUT_PRIORITY
+
+        return INPUT_NORMAL
 
 # ******************************************************************************************
-# ************************ Pomocné metódy **************************************************
+# ********************** LOAD CONFIGURATION ************************************************
 # ******************************************************************************************
 
-    # prepne sa na ohrev TUV
-    async def switch_to_dhw(self):
-        self.hp_dhw = True
-        self.hp_acc = False
-        if(self.hass.states.is_state(self.SWITCH_ENTITY_HP_ACC, STATE_ON)):
-            await self.hass.services.async_call("switch", TURN_ON, {"entity_id": self.SWITCH_ENTITY_HP_DHW})
+    def _read_inputs(self) -> InputSnapshot | None:
+        """
+        Načíta stavy všetkých vstupných entít jedným prechodom.
 
-    # prepne sa na ohrev ACC
-    async def switch_to_acc(self):
-        self.hp_dhw = False
-        self.hp_acc = True
-        if(self.hass.states.is_state(self.SWITCH_ENTITY_HP_DHW, STATE_ON)):
-            await self.hass.services.async_call("switch", TURN_ON, {"entity_id": self.SWITCH_ENTITY_HP_ACC})
+        Neplatný vstup sa nahradí poslednou platnou hodnotou, kým od jeho výpadku neuplynie
+        settings.input_last_known_good_ttl. Vstupy, pre ktoré náhrada nie je, ostanú v snapshot.invalid
+        a decide() pozastaví len čiastkové regulátory, ktoré ich potrebujú. Vráti None ak chýba
+        niektorý z CORE_INPUTS.
+        """
+        if self._input_table is None:
+            self.validate_inputs()
+
+        snapshot = read_snapshot(self.hass.states, self._input_table, self._input_health.bitmap)
+        snapshot, substituted, expires = self._last_known_good.apply(
+            snapshot, self._input_table.fallible, self.settings.input_last_known_good_ttl, time.monotonic()
+        )
+        if substituted:
+            # po vypršaní náhradnej hodnoty sa cyklus zopakuje a pozastaví dotknuté regulátory
+            self.scheduler.schedule(TIMER_LAST_KNOWN_GOOD_EXPIRY, expires)
+        elif TIMER_LAST_KNOWN_GOOD_EXPIRY in self.scheduler:
+            self.scheduler.cancel(TIMER_LAST_KNOWN_GOOD_EXPIRY)
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("Input snapshot: %s", snapshot)
+
+        if snapshot.invalid or substituted or self._reported_inputs != ((), ()):
+            self._report_inputs(snapshot, substituted)
+        if not CORE_INPUTS.isdisjoint(snapshot.invalid):
+            return None
+        return snapshot
+
+    def invalidate_input_table(self) -> None:
+        """Tabuľka vstupov sa znovu zostaví pri najbližšom cykle (po zmene nastavení entít)."""
+        self._input_table = None
+        self._input_health = None
+        self._last_known_good.clear()
+        if self._hass_started:
+            self.validate_inputs()
+            self._check_ready()
+
+    def validate_inputs(self) -> None:
+        """Overí existenciu a dostupnosť všetkých vstupných entít (pri štarte a po zmene v registri entít)."""
+        if self._input_table is None:
+            self._input_table = build_input_table(self)
+        if self._input_health is None:
+            self._input_health = InputHealth(self._input_table)
+        for change in self._input_health.validate(self.hass.states):
+            self._log_health_change(*change)
+
+    @callback
+    def update_input_health(self, entity_id: str, new_state) -> None:
+        """Aktualizuje zdravie vstupnej entity pri zmene jej stavu."""
+        if self._input_health is None:
+            return
+        change = self._input_health.update(entity_id, new_state)
+        if change is not None:
+            self._log_health_change(*change)
+            if not self.ready:
+                self._check_ready()
+
+    def track_state_changes(self, action, router: StateChangeRouter | None = None) -> None:
+        """Prihlási obsluhu zmien stavov všetkých vstupných entít (cez spoločný smerovač domény)."""
+        self._on_state_changed = action
+        self._state_router = router if router is not None else StateChangeRouter(self.hass)
+        self.retrack_state_changes()
 
-    # Zapne precerpavanie z ACC do TUV
-    async def start_heat_dhw_from_acc(self):
-        self.heat_dhw_from_acc = True
-        if(self.hass.states.get(self.SWITCH_ENTITY_HEAT_DHW_FROM_ACC).state != STATE_ON):
-            await self.hass.services.async_call("switch", TURN_ON, {"entity_id": self.SWITCH_ENTITY_HEAT_DHW_FROM_ACC})
+    @callback
+    def retrack_state_changes(self) -> None:
+        """
+        Zosúladí odbery zmien stavov s aktuálnymi vstupnými entitami (po zmene nastavení entít).
+        Nové entity sa prihlásia skôr, ako sa odhlásia odobrané - všetko v jednom callbacku, bez medzery,
+        časovače a stav riadenia zostávajú nedotknuté.
+        """
+        if self._on_state_changed is None:
+            return
+        if self._input_table is None:
+            self._input_table = build_input_table(self)
+        wanted = {descriptor.entity_id for descriptor in self._input_table if descriptor.entity_id}
+        added, removed = self._state_router.update(self, wanted, self._on_state_changed)
+        if self._hass_started and (added or removed):
+            LOGGER.info(f"Tracked entities updated, added: {', '.join(sorted(added)) or 'none'}, removed: {', '.join(sorted(removed)) or 'none'}")
 
-    # Stopne precerpavanie z ACC do TUV
-    async def stop_heat_dhw_from_acc(self):
-        self.heat_dhw_from_acc = False
-        if(self.hass.states.get(self.SWITCH_ENTITY_HEAT_DHW_FROM_ACC).state != STATE_OFF):
-            await self.hass.services.async_call("switch", TURN_OFF, {"entity_id": self.SWITCH_ENTITY_HEAT_DHW_FROM_ACC})
+    @callback
+    def untrack_state_changes(self) -> None:
+        """Odhlási všetky odbery zmien stavov (pri uvoľnení integrácie)."""
+        if self._state_router is not None:
+            self._state_router.remove(self)
+
+    @property
+    def tracked_entities(self) -> frozenset[str]:
+        """Entity, ktorých zmeny stavov sú sledované."""
+        if self._state_router is None:
+            return frozenset()
+        return self._state_router.entities(self)
+
+    def _log_health_change(self, descriptor, old: int, new: int) -> None:
+        """Zaloguje zmenu zdravia vstupnej entity - jedna správa pri každom prechode."""
+        if new == HEALTH_MISSING:
+            LOGGER.error(f"{descriptor.label} {descriptor.entity_id} does not exist!")
+        elif new != HEALTH_OK:
+            state = self.hass.states.get(descriptor.entity_id)
+            LOGGER.warning(f"{descriptor.label} {descriptor.entity_id} is not available (state: {state.state if state else None})")
+        else:
+            LOGGER.info(f"{descriptor.label} {descriptor.entity_id} is available again")
+
+    def _report_inputs(self, snapshot: InputSnapshot, substituted: tuple[str, ...]) -> None:
+        """Zaloguje nahradené vstupy a pozastavené regulátory - warning len pri zmene, inak debug (jednotlivé entity loguje _log_health_change)."""
+        reported = (snapshot.invalid, substituted)
+        if reported == self._reported_inputs:
+            LOGGER.debug(f"Inputs still not available: {', '.join(snapshot.invalid + substituted)}")
+            return
+        self._reported_inputs = reported
+        if reported == ((), ()):
+            LOGGER.info("All inputs are available again")
+            return
+
+        for field in substituted:
+            LOGGER.warning(f"Using last known value of {field}: {self._last_known_good.value(field)} (for up to {self.settings.input_last_known_good_ttl} s)")
+
+        if not CORE_INPUTS.isdisjoint(snapshot.invalid):
+            LOGGER.warning("Control cycle suspended - required inputs are not available")
+        elif snapshot.invalid:
+            LOGGER.warning(f"Suspended sub-controllers: {', '.join(sorted(suspended_subcontrollers(snapshot.invalid))) or 'none'}")
+
+# ******************************************************************************************
+# ********************** APPLY / ACTUATE PLAN **********************************************
+# ******************************************************************************************
+
+    def _apply_plan(self, snapshot: InputSnapshot, plan: ControlPlan) -> None:
+        """Prevezme nový stav riadenia a odvodené hodnoty z plánu a obslúži požiadavky na časovače."""
+        self.state = plan.state
+
+        self.heating_operating_mode = snapshot.heating_operating_mode
+        self.heat_dhw_from_acc = snapshot.heat_dhw_from_acc if plan.heat_dhw_from_acc is None else plan.heat_dhw_from_acc
+        self.hp_dhw = snapshot.hp_dhw if plan.hp_dhw is None else plan.hp_dhw
+        self.hp_acc = not self.hp_dhw
+        self.heating_source_input_on_off = snapshot.heating_source_input_on_off
+        self.preferred_output_ACC = plan.preferred_output_ACC
+        self.preferred_input_ACC = plan.preferred_input_ACC
+        self.higher_temperature_acc_value = plan.higher_temperature_acc_value
+        self.lower_temperature_acc_value = plan.lower_temperature_acc_value
+        self.min_acc_temperature_for_heating_limit_broken = plan.min_acc_temperature_for_heating_limit_broken
+        self.temperature_setpoint = plan.temperature_setpoint
+        self.temperature_setpoint_hp = plan.temperature_setpoint_hp
+        self.controll_command_on_off = plan.controll_command_on_off
+        self.controll_command_hp_on_off = plan.controll_command_hp_on_off
+
+        self.sensor_states[ENTITY_CONTROL_COMMAND_TEMPERATURE] = plan.control_command_temperature
+        self.sensor_states[ENTITY_CONTROL_COMMAND_HP_TEMPERATURE] = plan.control_command_hp_temperature
+
+        for level, message in plan.messages:
+            getattr(LOGGER, level)(message)
+
+        for name in plan.timers_cancel:
+            self.scheduler.cancel(name)
+
+        timer_callbacks = {
+            TIMER_VALVE_INPUT_ACC_CLOSING_DELAY: self._valve_input_acc_closing_delay_finished,
+            TIMER_HP_DHW_TO_ACC_DELAY: self._hp_dhw_to_acc_delay_finished,
+            TIMER_AUXILIARY_PUMP_BOOSTER: self._booster_timer_finished,
+        }
+        for name, delay in plan.timers_start:
+            # booster len vypína čerpadlo, ostatné termíny zobudia kontrolný cyklus
+            self.scheduler.schedule(name, delay, timer_callbacks[name], wake=name != TIMER_AUXILIARY_PUMP_BOOSTER)
+
+    async def _actuate(self, snapshot: InputSnapshot, plan: ControlPlan) -> int:
+        """Porovná plán s pozorovaným stavom a odošle príkazy len pre skutočné zmeny. Vráti počet odoslaných príkazov."""
+
+        # ZATIAL NEDOKONCENE, OVLADA TO LEN TEPELNE CERPADLO
+        await self._set_hp_on_off_with_debounce(plan.hp_on_off)
+
+        table = self._build_desired_states(snapshot, plan)
+        # Potvrdenie / vypršanie predtým odoslaných príkazov (všetkých, aj mimo aktuálnej tabuľky)
+        self._in_flight.observe_states(self.hass.states)
+        self._in_flight.expire()
+
+        commands = diff_desired_states(table, self._in_flight.targets())
+        if not commands:
+            return 0
+
+        results = await async_dispatch_commands(commands, self._send_command, ACTUATOR_COMMAND_TIMEOUT)
+        commands_sent = 0
+        for command, sent in results:
+            if sent:
+                commands_sent += 1
+                LOGGER.debug(f"{command.key}: {command.domain}.{command.service} was sent to {command.entity_id}")
+        return commands_sent
+
+    def _build_desired_states(self, snapshot: InputSnapshot, plan: ControlPlan) -> list[DesiredState]:
+        """Zostaví tabuľku požadovaných stavov všetkých akčných členov (None v pláne = bez požiadavky)."""
+        table = []
+
+        # **** Interné prepínače ********************************************************************
+        if plan.hp_dhw is True:
+            # ohrev TUV
+            table.append(DesiredState(ACTUATOR_INTERNAL, ENTITY_HP_DHW, self.SWITCH_ENTITY_HP_DHW, STATE_ON, STATE_ON if snapshot.hp_dhw else STATE_OFF))
+        elif plan.hp_dhw is False:
+            # ohrev ACC
+            table.append(DesiredState(ACTUATOR_INTERNAL, ENTITY_HP_ACC, self.SWITCH_ENTITY_HP_ACC, STATE_ON, STATE_ON if snapshot.hp_acc else STATE_OFF))
+
+        if plan.heat_dhw_from_acc is not None:
+            # precerpavanie z ACC do TUV
+            table.append(DesiredState(
+                ACTUATOR_INTERNAL, ENTITY_HEAT_DHW_FROM_ACC, self.SWITCH_ENTITY_HEAT_DHW_FROM_ACC,
+                STATE_ON if plan.heat_dhw_from_acc else STATE_OFF,
+                STATE_ON if snapshot.heat_dhw_from_acc else STATE_OFF,
+            ))
+
+        # **** Ventily ******************************************************************************
+        for valve_key in VALVE_KEYS:
+            desired = plan.valves[valve_key]
+            if desired is not None:
+                table.append(DesiredState(ACTUATOR_VALVE, valve_key, getattr(self.settings, f"entity_{valve_key}"), desired, snapshot.valve_state(valve_key)))
+
+        # **** Obehové čerpadlá *********************************************************************
+        for pump_key in PUMP_KEYS:
+            desired = plan.pumps[pump_key]
+            if desired is not None:
+                table.append(DesiredState(ACTUATOR_PUMP, pump_key, getattr(self.settings, f"entity_{pump_key}"), STATE_ON if desired else STATE_OFF, snapshot.pump_state(pump_key)))
+
+        return table
+
+    async def _send_command(self, command: ActuatorCommand) -> bool:
+        """Odošle jeden príkaz a zaregistruje ho ako čakajúci na potvrdenie."""
+        if command.domain == "cover":
+            if not await self._call_valve_service(command.key, command.service, command.entity_id):
+                return False
+            self._in_flight.register(command.entity_id, command.target, self.settings.valve_timeout)
+            return True
+        # blocking - čaká sa na vykonanie služby, timeout príkazu v async_dispatch_commands tak ohraničí pomalý akčný člen
+        await self.hass.services.async_call(command.domain, command.service, {"entity_id": command.entity_id}, blocking=True)
+        self._in_flight.register(command.entity_id, command.target, ACTUATOR_COMMAND_TIMEOUT)
+        return True
+
+# ******************************************************************************************
+# ************************ Pomocné metódy **************************************************
+# ******************************************************************************************
 
     async def _call_valve_service(self, valve_key: str, service: str, entity_id: str) -> bool:
         """
-        Zavolá službu pre ventil s debounce kontrolou.
-        Ak je príkaz zablokovaný, naplánuje rerun kontrolného cyklu.
+        Zavolá službu pre ventil, ak ventil nemá nepotvrdený príkaz.
+        Ak ventil ešte prestavuje (príkaz čaká na potvrdenie), naplánuje rerun kontrolného cyklu
+        na čas vypršania čakajúceho príkazu.
         
         Args:
-            valve_key: Kľúč ventilu v _valve_last_command_time
+            valve_key: CONF_* kľúč ventilu
             service: SWITCH_to_OPEN alebo SWITCH_to_CLOSE
             entity_id: Entity ID ventilu
             
         Returns:
-            True ak bol príkaz odoslaný, False ak bol zablokovaný debounce
+            True ak bol príkaz odoslaný, False ak bol zablokovaný
         """
-        current_time = time.time()
-        last_time = self._valve_last_command_time.get(valve_key, 0)
-        time_since_last = current_time - last_time
-        
-        if time_since_last < self.settings.valve_timeout:
+        remaining_time = self._in_flight.remaining(entity_id)
+        if remaining_time > 0:
             # Príkaz zablokovaný - naplánovať rerun
-            remaining_time = self.settings.valve_timeout - time_since_last
-            LOGGER.debug(f"Valve {valve_key} debounce active, skipping {service}, scheduling rerun in {remaining_time:.2f}s")
+            LOGGER.debug(f"Valve {valve_key} command in flight, skipping {service}, scheduling rerun in {remaining_time:.2f}s")
             self._schedule_rerun(remaining_time)
             return False
         
-        await self.hass.services.async_call("cover", service, {"entity_id": entity_id})
-        self._valve_last_command_time[valve_key] = current_time
+        await self.hass.services.async_call("cover", service, {"entity_id": entity_id}, blocking=True)
         return True
 
+    def _update_statistics(self) -> None:
+        """Obnoví počítadlá pre diagnostický senzor control_statistics, najviac raz za STATISTICS_PUBLISH_INTERVAL."""
+        now = time.monotonic()
+        if self._statistics_time is not None and now - self._statistics_time < STATISTICS_PUBLISH_INTERVAL:
+            return
+        self._statistics_time = now
+        # Nový slovník - _publish_feedback rozpozná obnovu podľa zmeny objektu
+        self.statistics = {
+            "control_cycles": self.control_cycles,
+            "inflight_confirmations": self._in_flight.confirmations,
+            "inflight_timeouts": self._in_flight.timeouts,
+            "inflight_pending": len(self._in_flight),
+            "filtered_state_changes": self.filtered_state_changes,
+        }
+        self.statistics.update({f"coalesce_{key}": value for key, value in self.coalescer.stats().items()})
+        self.statistics["safety_trips"] = self.safety_trips
+        self.statistics["safety_latency_last_ms"] = None if self.safety_latency_last is None else round(self.safety_latency_last * 1000, 1)
+        self.statistics["safety_latency_max_ms"] = round(self.safety_latency_max * 1000, 1)
+
     def _schedule_rerun(self, delay: float) -> None:
         """
         Naplánuje rerun kontrolného cyklu po uplynutí delay.
-        Ak už je naplánovaný skorší rerun, ponechá ho.
+        Ak už je naplánovaný skorší rerun, ponechá ho, neskorší sa posunie dopredu.
         """
-        # Zrušiť existujúci scheduled rerun ak je neskôr ako nový
-        if self._scheduled_rerun is not None:
-            # Už máme naplánovaný rerun, netreba plánovať ďalší
+        self.scheduler.schedule(TIMER_RERUN, delay, keep_earlier=True)
+        LOGGER.debug(f"Rerun scheduled in {self.scheduler.remaining(TIMER_RERUN):.2f}s")
+
+    def _wake_cycle(self) -> None:
+        """Zobudí kontrolný cyklus po uplynutí termínu v plánovači."""
+        self.create_task(self.heating_control_system())
+
+    def _record_trace(self, snapshot: InputSnapshot, plan: ControlPlan | None = None, commands_sent: int = 0) -> None:
+        """Zapíše cyklus do kruhového buffera; do súboru sa záznamy zapíšu po TRACE_FLUSH_RECORDS záznamoch, najneskôr po TRACE_FLUSH_INTERVAL."""
+        self.trace.record(time.time(), snapshot, plan, commands_sent)
+        if self.trace.pending >= TRACE_FLUSH_RECORDS:
+            self.create_task(self.async_flush_trace())
+        elif TIMER_TRACE_FLUSH not in self.scheduler:
+            self.scheduler.schedule(
+                TIMER_TRACE_FLUSH, TRACE_FLUSH_INTERVAL,
+                lambda: self.create_task(self.async_flush_trace()), wake=False,
+            )
+
+    async def async_flush_trace(self) -> None:
+        """Zapíše nezapísané záznamy cyklov do súboru (v executore)."""
+        self.scheduler.cancel(TIMER_TRACE_FLUSH)
+        data = self.trace.take_pending()
+        if not data or self.hass is None:
             return
-        
-        @callback
-        def _rerun_callback(_now=None):
-            """Callback pre naplánovaný rerun."""
-            self._scheduled_rerun = None
-            LOGGER.debug("Scheduled rerun triggered")
-            self.hass.async_create_task(self.heating_control_system())
-        
-        self._scheduled_rerun = async_call_later(self.hass, delay, _rerun_callback)
-        LOGGER.debug(f"Scheduled rerun in {delay:.2f}s")
+        if self.trace.dropped:
+            LOGGER.warning(f"Trace buffer overflow, {self.trace.dropped} record(s) were not written to the file")
+            self.trace.dropped = 0
+        path = self.hass.config.path(TRACE_FILE.format(self.namespace))
+        try:
+            await self.hass.async_add_executor_job(append_trace_file, path, data)
+        except OSError as e:
+            LOGGER.warning(f"Error while writing trace file {path}: {e}")
+
+    def _publish_feedback(self) -> None:
+        """Odošle feedback_update len entitám, ktorých hodnota v sensor_states alebo statistics sa zmenila - každá má vlastný signál."""
+        for key, value in self.sensor_states.items():
+            if key in self._published_states and self._published_states[key] == value:
+                continue
+            self._published_states[key] = value
+            async_dispatcher_send(self.hass, SIGNAL_FEEDBACK_UPDATE.format(self._entry_id, key))
+        if self.statistics is not self._published_statistics:
+            self._published_statistics = self.statistics
+            async_dispatcher_send(self.hass, SIGNAL_FEEDBACK_UPDATE.format(self._entry_id, ENTITY_CONTROL_STATISTICS))
 
     @callback
-    def _booster_timer_finished(self, _now=None):
+    def _publish_cycle_metrics(self) -> None:
+        """Pevná perióda - súhrn časovania cyklov pre diagnostickú entitu, nezávisle od počtu cyklov."""
+        self.cycle_metrics_summary = self.cycle_metrics.summary()
+        async_dispatcher_send(self.hass, SIGNAL_FEEDBACK_UPDATE.format(self._entry_id, ENTITY_CONTROL_CYCLE_TIME))
+        self.scheduler.schedule(TIMER_CYCLE_METRICS, CYCLE_METRICS_PUBLISH_INTERVAL, self._publish_cycle_metrics, wake=False)
+
+    @callback
+    def _booster_timer_finished(self):
         """Callback volaný keď uplynie booster časovač."""
         LOGGER.info("Auxiliary pump booster timer finished - turning off pump")
-        self._auxiliary_pump_booster_timer = None
-        self._auxiliary_pump_booster_active = False
-        self._auxiliary_pump_booster_finished = True  # Označiť že booster prebehol - pumpa sa už nezapne
+        # Označiť že booster prebehol - pumpa sa už nezapne
+        self.state = dataclasses.replace(
+            self.state, auxiliary_pump_booster_active=False, auxiliary_pump_booster_finished=True
+        )
         # Vypnúť auxiliary pump
-        self.hass.async_create_task(self._turn_off_auxiliary_pump())
+        self.create_task(self._turn_off_auxiliary_pump())
 
     async def _turn_off_auxiliary_pump(self):
         """Vypne auxiliary pump po uplynutí booster časovača."""
-        try:
-            water_pump_acc_output = self.hass.states.get(self.settings.entity_water_pump_acc_output)
-            if water_pump_acc_output and water_pump_acc_output.state != STATE_OFF:
-                await self.hass.services.async_call(
-                    "switch", TURN_OFF, {"entity_id": self.settings.entity_water_pump_acc_output}
-                )
+        water_pump_acc_output = self.hass.states.get(self.settings.entity_water_pump_acc_output)
+        if water_pump_acc_output is None or water_pump_acc_output.state == STATE_OFF:
+            return
+        # Rovnaká cesta ako príkazy cyklu - blocking volanie s vlastným timeoutom, chyby loguje async_dispatch_commands
+        command = ActuatorCommand(STAGE_PREPARE, "switch", TURN_OFF, self.settings.entity_water_pump_acc_output, CONF_WATER_PUMP_ACC_OUTPUT, STATE_OFF)
+        for _command, sent in await async_dispatch_commands([command], self._send_command, ACTUATOR_COMMAND_TIMEOUT):
+            if sent:
                 LOGGER.debug("Auxiliary water pump turned off by booster timer")
-        except Exception as e:
-            LOGGER.error(f"Error turning off auxiliary pump: {e}")
 
     # ZATIAL NEDOKONCENE, OVLADA TEPELNE CERPADLO SPOLU S GENERAL SOURCE
     async def _set_hp_on_off_with_debounce(self, new_value: str) -> None:
@@ -1688,50 +900,45 @@ class Heating_Controller_Instance:
         # Ak sa hodnota zmenila, uložíme si ju a resetujeme časovač
         if self._hp_on_off_pending_value != new_value:
             self._hp_on_off_pending_value = new_value
-            
-            # Zrušiť existujúci časovač ak beží
-            if self._hp_on_off_debounce_timer is not None:
-                self._hp_on_off_debounce_timer()
-                self._hp_on_off_debounce_timer = None
+
+            # Preplánovanie termínu zároveň zruší predchádzajúci
+            if TIMER_HP_ON_OFF_DEBOUNCE in self.scheduler:
                 LOGGER.debug(f"HP ON/OFF debounce timer reset due to value change to {new_value}")
-            
-            # Spustiť nový časovač
-            @callback
-            def _debounce_timer_finished(_now=None):
-                """Callback volaný keď uplynie debounce časovač."""
-                self._hp_on_off_debounce_timer = None
-
-                # Nastaviť hodnotu
-                self.sensor_states[ENTITY_CONTROL_COMMAND_ON_OFF] = self._hp_on_off_pending_value
-                self.sensor_states[ENTITY_CONTROL_COMMAND_HP_ON_OFF] = self._hp_on_off_pending_value
-
-                LOGGER.debug(f"HP ON/OFF debounce timer finished - value set to {self._hp_on_off_pending_value}")
-                # Odoslať update
-                async_dispatcher_send(self.hass, f"{DOMAIN}_feedback_update_{self._entry_id}")
-            
-            self._hp_on_off_debounce_timer = async_call_later(
-                self.hass,
+            self.scheduler.schedule(
+                TIMER_HP_ON_OFF_DEBOUNCE,
                 self.settings.heating_source_command_debounce_delay,
-                _debounce_timer_finished
+                self._hp_on_off_debounce_finished,
+                wake=False,
             )
             LOGGER.debug(f"HP ON/OFF debounce timer started for {self.settings.heating_source_command_debounce_delay}s, pending value: {new_value}")
         else:
             LOGGER.debug(f"HP ON/OFF value unchanged ({new_value}), timer continues")
 
     @callback
-    def _valve_input_acc_closing_delay_finished(self, _now=None):
+    def _hp_on_off_debounce_finished(self):
+        """Callback volaný keď uplynie debounce časovač."""
+        # Nastaviť hodnotu
+        self.sensor_states[ENTITY_CONTROL_COMMAND_ON_OFF] = self._hp_on_off_pending_value
+        self.sensor_states[ENTITY_CONTROL_COMMAND_HP_ON_OFF] = self._hp_on_off_pending_value
+
+        LOGGER.debug(f"HP ON/OFF debounce timer finished - value set to {self._hp_on_off_pending_value}")
+        # Odoslať update
+        self._publish_feedback()
+
+    @callback
+    def _valve_input_acc_closing_delay_finished(self):
         """Callback volaný keď uplynie časovač oneskorenia zatvorenia ventilov na vstupoch do ACC."""
         LOGGER.info("Valve input ACC closing delay timer finished - closing now allowed")
-        self._valve_input_acc_closing_delay_timer = None
-        self._valve_input_acc_closing_allowed = True
-        # Spustiť kontrolný cyklus aby sa ventily zatvorili
-        self.hass.async_create_task(self.heating_control_system())
+        self.state = dataclasses.replace(
+            self.state, valve_input_acc_closing_allowed=True, valve_input_acc_closing_timer_active=False
+        )
+        # Kontrolný cyklus zobudí plánovač, aby sa ventily zatvorili
 
     @callback
-    def _hp_dhw_to_acc_delay_finished(self, _now=None):
+    def _hp_dhw_to_acc_delay_finished(self):
         """Callback volaný keď uplynie časovač oneskorenia pretočenia ventilu hp_dhw z TUV na ACC."""
         LOGGER.info("HP DHW to ACC switch delay timer finished - switch now allowed")
-        self._hp_dhw_to_acc_delay_timer = None
-        self._hp_dhw_to_acc_switch_allowed = True
-        # Spustiť kontrolný cyklus aby sa ventil pretočil
-        self.hass.async_create_task(self.heating_control_system())
\ No newline at end of file
+        self.state = dataclasses.replace(
+            self.state, hp_dhw_to_acc_switch_allowed=True, hp_dhw_to_acc_timer_active=False
+        )
+        # Kontrolný cyklus zobudí plánovač, aby sa ventil pretočil
\ No newline at end of file
@@ -0,0 +1,302 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" inputs.py """
+
+"""Input descriptor table and single-pass snapshot reader for Heating Controller integration.
+
+Tabuľka vstupov (entita, typ prevodu, pole v InputSnapshot) sa zostaví raz
+z nastavení inštancie. Kontrolný cyklus potom prejde tabuľku jedným
+prechodom a vytvorí InputSnapshot, v ktorom sú neplatné vstupy (entita
+neexistuje, nie je dostupná, alebo sa nedá previesť na číslo) uvedené
+v snapshot.invalid. LastKnownGood potom neplatné vstupy nahradí poslednou
+platnou hodnotou, kým od výpadku vstupu neuplynie nastavený čas (TTL).
+
+Existenciu a dostupnosť entít nekontroluje každý cyklus - InputHealth ich
+overí raz (pri štarte a po zmene v registri entít) a potom ich udržiava
+obsluha zmien stavov. Cyklus len prečíta bitovú mapu neplatných vstupov.
+"""
+
+import dataclasses
+from typing import NamedTuple
+
+from homeassistant.const import STATE_ON, STATE_UNKNOWN, STATE_UNAVAILABLE
+from .const import *
+from .control_logic import InputSnapshot
+
+# Typy prevodu stavu entity na hodnotu v snímku
+INPUT_SWITCH = 0  # interný prepínač -> bool (stav "on")
+INPUT_FLOAT = 1  # číselná hodnota (teploty, žiadané teploty)
+INPUT_INT = 2  # celé číslo (prevádzkový režim)
+INPUT_STATE = 3  # surový stav (ventily, čerpadlá, termostaty)
+
+# Stavy, pri ktorých sa vstup považuje za nedostupný
+UNAVAILABLE_STATES = frozenset((STATE_UNAVAILABLE, STATE_UNKNOWN, STATE_NONE))
+
+# Zdravie vstupnej entity
+HEALTH_OK = 0
+HEALTH_UNAVAILABLE = 1  # entita existuje, ale je unavailable / unknown, alebo jej stav nie je číslo
+HEALTH_MISSING = 2  # entita neexistuje
+
+# Poradie polí InputSnapshot (okrem príznakov platnosti)
+SNAPSHOT_FIELDS = tuple(field.name for field in dataclasses.fields(InputSnapshot) if field.name != "invalid")
+
+
+_CONVERT = {INPUT_FLOAT: float, INPUT_INT: int}
+
+
+class InputDescriptor(NamedTuple):
+    """How to read one input of the control cycle."""
+
+    field: str  # pole v InputSnapshot
+    entity_id: str
+    kind: int
+    label: str  # popis do logu
+
+
+class InputTable:
+    """Input descriptors of an instance, precompiled into per-kind index lists."""
+
+    __slots__ = ("descriptors", "switches", "numbers", "states", "fallible")
+
+    def __init__(self, descriptors: tuple[InputDescriptor, ...]) -> None:
+        self.descriptors = descriptors
+        # (index v snímku, bit v mape InputHealth, entity_id[, prevod]) - rozdelené podľa typu, aby čítanie nemuselo vetviť
+        self.switches = tuple((index, d.entity_id) for index, d in enumerate(descriptors) if d.kind == INPUT_SWITCH)
+        self.numbers = tuple(
+            (index, 1 << index, d.entity_id, _CONVERT[d.kind])
+            for index, d in enumerate(descriptors) if d.kind in (INPUT_FLOAT, INPUT_INT)
+        )
+        self.states = tuple((index, 1 << index, d.entity_id) for index, d in enumerate(descriptors) if d.kind == INPUT_STATE)
+        # polia, ktoré môžu byť neplatné (interné prepínače sú vždy True / False)
+        self.fallible = tuple(d.field for d in descriptors if d.kind != INPUT_SWITCH)
+
+    def __iter__(self):
+        return iter(self.descriptors)
+
+
+def build_input_table(instance) -> InputTable:
+    """Build the input table of an instance, ordered like the InputSnapshot fields."""
+    settings = instance.settings
+    descriptors = (
+        # Interné entity integrácie
+        InputDescriptor("automatic_mode", instance.SWITCH_ENTITY_AUTOMATIC_MODE, INPUT_SWITCH, "Internal entity"),
+        InputDescriptor("acc1_enable", instance.SWITCH_ENTITY_ACC1_ENABLE, INPUT_SWITCH, "Internal entity"),
+        InputDescriptor("acc2_enable", instance.SWITCH_ENTITY_ACC2_ENABLE, INPUT_SWITCH, "Internal entity"),
+        InputDescriptor("heat_dhw_from_acc", instance.SWITCH_ENTITY_HEAT_DHW_FROM_ACC, INPUT_SWITCH, "Internal entity"),
+        InputDescriptor("hp_acc", instance.SWITCH_ENTITY_HP_ACC, INPUT_SWITCH, "Internal entity"),
+        InputDescriptor("hp_dhw", instance.SWITCH_ENTITY_HP_DHW, INPUT_SWITCH, "Internal entity"),
+        InputDescriptor("heating_source_input_on_off", instance.SWITCH_ENTITY_HEATING_SOURCE_ON_OFF, INPUT_SWITCH, "Internal entity"),
+        InputDescriptor("dhw_target_temperature", instance.NUMBER_ENTITY_DHW_TARGET_TEMPERATURE, INPUT_FLOAT, "Internal entity"),
+        InputDescriptor("acc_target_temperature", instance.NUMBER_ENTITY_ACC_TARGET_TEMPERATURE, INPUT_FLOAT, "Internal entity"),
+        InputDescriptor("heating_operating_mode", instance.SELECT_ENTITY_HEATING_OPERATING_MODE, INPUT_INT, "Internal entity"),
+        # Teplotné senzory
+        InputDescriptor("temperature_acc1", settings.entity_temp_acc1, INPUT_FLOAT, "Temperature sensor"),
+        InputDescriptor("temperature_acc2", settings.entity_temp_acc2, INPUT_FLOAT, "Temperature sensor"),
+        InputDescriptor("temperature_dhw", settings.entity_temp_dhw, INPUT_FLOAT, "Temperature sensor"),
+        # Ventily
+        InputDescriptor(CONF_VALVE_FROM_TC_TO_ACC_OR_DHW, settings.entity_valve_from_hp_to_acc_or_dhw, INPUT_STATE, "Valve"),
+        InputDescriptor(CONF_VALVE_OUTPUT_ACC1, settings.entity_valve_output_acc1, INPUT_STATE, "Valve"),
+        InputDescriptor(CONF_VALVE_OUTPUT_ACC2, settings.entity_valve_output_acc2, INPUT_STATE, "Valve"),
+        InputDescriptor(CONF_VALVE_INPUT_ACC1, settings.entity_valve_input_acc1, INPUT_STATE, "Valve"),
+        InputDescriptor(CONF_VALVE_INPUT_ACC2, settings.entity_valve_input_acc2, INPUT_STATE, "Valve"),
+        InputDescriptor(CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW, settings.entity_valve_from_acc_to_heat_or_dhw, INPUT_STATE, "Valve"),
+        InputDescriptor(CONF_VALVE_OUTPUT_HEATING, settings.entity_valve_output_heating, INPUT_STATE, "Valve"),
+        # Obehové čerpadlá
+        InputDescriptor(CONF_WATER_PUMP_ACC_OUTPUT, settings.entity_water_pump_acc_output, INPUT_STATE, "Water pump"),
+        InputDescriptor(CONF_WATER_PUMP_DHW, settings.entity_water_pump_dhw, INPUT_STATE, "Water pump"),
+        InputDescriptor(CONF_WATER_PUMP_FLOOR_HEATING, settings.entity_water_pump_floor_heating, INPUT_STATE, "Water pump"),
+        InputDescriptor(CONF_WATER_PUMP_HEATING, settings.entity_water_pump_heating, INPUT_STATE, "Water pump"),
+        # Stavy termostatov a vykurovania
+        InputDescriptor("thermostat_state", settings.entity_thermostat_state, INPUT_STATE, "Heating system entity"),
+        InputDescriptor("heating_state", settings.entity_heating_state, INPUT_STATE, "Heating system entity"),
+        InputDescriptor("floor_heating_state", settings.entity_floor_heating_state, INPUT_STATE, "Heating system entity"),
+    )
+    by_field = {descriptor.field: descriptor for descriptor in descriptors}
+    return InputTable(tuple(by_field[field] for field in SNAPSHOT_FIELDS))
+
+
+def read_snapshot(states, table: InputTable, unhealthy: int | None = None) -> InputSnapshot:
+    """Read all inputs in one pass; invalid inputs are None and listed in snapshot.invalid.
+
+    unhealthy is the bitmap of InputHealth. With it the entities are not checked again,
+    the inputs with their bit set are invalid. Without it every entity is checked.
+    """
+    if unhealthy is not None:
+        try:
+            return _read_trusted(states, table, unhealthy)
+        except (AttributeError, ValueError):
+            # mapa zdravia ešte nezachytila poslednú zmenu - čítanie s kontrolou
+            pass
+    return _read_checked(states, table)
+
+
+def _read_trusted(states, table: InputTable, unhealthy: int) -> InputSnapshot:
+    get = states.get
+    values = [None] * len(SNAPSHOT_FIELDS)
+
+    for index, entity_id in table.switches:
+        state = get(entity_id)
+        values[index] = state is not None and state.state == STATE_ON
+
+    if not unhealthy:
+        for index, _bit, entity_id in table.states:
+            values[index] = get(entity_id).state
+        for index, _bit, entity_id, convert in table.numbers:
+            values[index] = convert(get(entity_id).state)
+        return InputSnapshot(*values)
+
+    for index, bit, entity_id in table.states:
+        if not unhealthy & bit:
+            values[index] = get(entity_id).state
+    for index, bit, entity_id, convert in table.numbers:
+        if not unhealthy & bit:
+            values[index] = convert(get(entity_id).state)
+    invalid = tuple(field for index, field in enumerate(SNAPSHOT_FIELDS) if unhealthy >> index & 1)
+    return InputSnapshot(*values, invalid=invalid)
+
+
+def _read_checked(states, table: InputTable) -> InputSnapshot:
+    get = states.get
+    values = [None] * len(SNAPSHOT_FIELDS)
+    invalid = []
+
+    for index, entity_id in table.switches:
+        state = get(entity_id)
+        values[index] = state is not None and state.state == STATE_ON
+
+    for index, _bit, entity_id in table.states:
+        state = get(entity_id)
+        if state is None or state.state in UNAVAILABLE_STATES:
+            invalid.append(index)
+        else:
+            values[index] = state.state
+
+    for index, _bit, entity_id, convert in table.numbers:
+        state = get(entity_id)
+        try:
+            values[index] = convert(state.state)
+        except (AttributeError, ValueError):
+            # entita neexistuje (None), alebo stav nie je číslo (aj unavailable / unknown)
+            invalid.append(index)
+
+    if not invalid:
+        return InputSnapshot(*values)
+    return InputSnapshot(*values, invalid=tuple(SNAPSHOT_FIELDS[index] for index in sorted(invalid)))
+
+
+def entity_health(kind: int, state) -> int:
+    """Health of one input entity from its current state."""
+    if state is None:
+        return HEALTH_MISSING
+    if kind == INPUT_STATE:
+        return HEALTH_UNAVAILABLE if state.state in UNAVAILABLE_STATES else HEALTH_OK
+    try:
+        _CONVERT[kind](state.state)
+    except ValueError:
+        return HEALTH_UNAVAILABLE
+    return HEALTH_OK
+
+
+class InputHealth:
+    """Health of the input entities of one input table, kept up to date by the state change listener."""
+
+    __slots__ = ("_inputs", "health", "bitmap")
+
+    def __init__(self, table: InputTable) -> None:
+        # entity_id -> ((bit, druh, descriptor), ...) - jedna entita môže byť vstupom viackrát
+        self._inputs = {}
+        for index, descriptor in enumerate(table.descriptors):
+            if descriptor.kind != INPUT_SWITCH:
+                self._inputs.setdefault(descriptor.entity_id, []).append((1 << index, descriptor.kind, descriptor))
+        self.health = dict.fromkeys(self._inputs, HEALTH_OK)  # entity_id -> HEALTH_*
+        self.bitmap = 0  # nastavený bit = neplatný vstup s týmto indexom v snímku
+
+    def __contains__(self, entity_id: str) -> bool:
+        return entity_id in self._inputs
+
+    def validate(self, states) -> list[tuple[InputDescriptor, int, int]]:
+        """Check every input entity. Returns the health changes as (descriptor, old, new)."""
+        changes = []
+        for entity_id in self._inputs:
+            change = self.update(entity_id, states.get(entity_id))
+            if change is not None:
+                changes.append(change)
+        return changes
+
+    def update(self, entity_id: str, state) -> tuple[InputDescriptor, int, int] | None:
+        """Update the health of one entity from its new state. Returns (descriptor, old, new) if it changed."""
+        inputs = self._inputs.get(entity_id)
+        if inputs is None:
+            return None
+        worst = HEALTH_OK
+        for bit, kind, _descriptor in inputs:
+            health = entity_health(kind, state)
+            if health == HEALTH_OK:
+                self.bitmap &= ~bit
+            else:
+                self.bitmap |= bit
+            worst = max(worst, health)
+        old = self.health[entity_id]
+        if worst == old:
+            return None
+        self.health[entity_id] = worst
+        return inputs[0][2], old, worst
+
+
+class LastKnownGood:
+    """Last valid value of every input, used for up to ttl seconds after the input became invalid."""
+
+    __slots__ = ("_values", "_invalid_since")
+
+    def __init__(self) -> None:
+        self._values = {}  # pole -> posledná platná hodnota
+        self._invalid_since = {}  # pole -> čas prvého neplatného čítania (monotonic)
+
+    def apply(
+        self, snapshot: InputSnapshot, fields: tuple[str, ...], ttl: float, now: float
+    ) -> tuple[InputSnapshot, tuple[str, ...], float | None]:
+        """Remember the valid values of fields and fill the invalid ones from the cache.
+
+        Returns the (possibly) completed snapshot, the substituted fields and the number
+        of seconds until the first substituted value expires (None if nothing was substituted).
+        """
+        invalid = snapshot.invalid
+        values = self._values
+        for field in fields:
+            if field not in invalid:
+                values[field] = getattr(snapshot, field)
+
+        if not invalid:
+            if self._invalid_since:
+                self._invalid_since.clear()
+            return snapshot, (), None
+
+        invalid_since = self._invalid_since
+        for field in [field for field in invalid_since if field not in invalid]:
+            del invalid_since[field]
+
+        substitutes = {}
+        remaining = []
+        expires = None
+        for field in invalid:
+            left = invalid_since.setdefault(field, now) + ttl - now
+            if left > 0 and field in values:
+                substitutes[field] = values[field]
+                expires = left if expires is None else min(expires, left)
+            else:
+                remaining.append(field)
+
+        if not substitutes:
+            return snapshot, (), None
+        return dataclasses.replace(snapshot, invalid=tuple(remaining), **substitutes), tuple(substitutes), expires
+
+    def value(self, field: str):
+        """Last valid value of the field (None if it was never valid)."""
+        return self._values.get(field)
+
+    def clear(self) -> None:
+        self._values.clear()
+        self._invalid_since.clear()
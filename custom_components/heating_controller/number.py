@@ -8,13 +8,11 @@ from __future__ import annotations
 """Number platform for Heating Controller integration."""
 
 import logging
-from typing import Any
 
 from homeassistant.components.number import NumberEntity, NumberMode
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.restore_state import RestoreEntity
 
 from .const import (
@@ -23,6 +21,8 @@ from .const import (
     ENTITY_ACC_TARGET_TEMPERATURE,
     DEFAULT_DHW_TARGET_TEMPERATURE,
     DEFAULT_ACC_TARGET_TEMPERATURE,
+    MIN_TEMPERATURE_LIMIT,
+    MAX_TEMPERATURE_LIMIT,
 )
 
 LOGGER = logging.getLogger(__name__)
@@ -85,10 +85,10 @@ class HeatingControllerNumber(NumberEntity, RestoreEntity):
         """Initialize the number entity."""
         self._instance = instance
         self._entry_id = entry_id
-        self._attr_unique_id = f"{DOMAIN}_{entity_id}"
+        self._attr_unique_id = f"{instance.namespace}_{entity_id}"
         self._attr_has_entity_name = True
         self._attr_translation_key = entity_id
-        self.entity_id = f"number.{DOMAIN}_{entity_id}"
+        self.entity_id = f"number.{instance.namespace}_{entity_id}"
         self._attr_icon = icon
         self._entity_id = entity_id
         self._attr_native_min_value = min_value
@@ -116,20 +116,6 @@ class HeatingControllerNumber(NumberEntity, RestoreEntity):
             self._attr_native_value = self._default_value
             LOGGER.debug(f"No saved state for {self.entity_id}, using default: {self._default_value}")
 
-        # Subscribe to updates
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                f"{DOMAIN}_feedback_update_{self._entry_id}",
-                self._handle_feedback_update,
-            )
-        )
-
-    @callback
-    def _handle_feedback_update(self) -> None:
-        """Handle feedback update."""
-        self.async_write_ha_state()
-
     async def async_set_native_value(self, value: float) -> None:
         """Set the value of the number entity."""
         self._attr_native_value = value
@@ -0,0 +1,576 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" replay.py """
+
+"""Offline replay of recorded state changes for Heating Controller integration.
+
+Zaznamenaný prúd zmien stavov (trace súbor integrácie, alebo export histórie HA
+v CSV / JSONL / JSON) sa prehrá do Heating_Controller_Instance cez náhradný
+hass objekt s virtuálnymi hodinami. Termíny plánovača, okno zlučovania,
+debounce a potvrdzovanie príkazov bežia vo virtuálnom čase - mesiac histórie
+sa prehrá za sekundy. Výsledkom je zoznam všetkých akčných zásahov, ktoré by
+inštancia vydala: volania služieb pre ventily, čerpadlá a interné prepínače
+a zmeny riadiacich príkazov pre zdroj kúrenia.
+
+Odoslaný príkaz sa (predvolene) hneď potvrdí zmenou stavu entity, ako keby
+akčný člen poslúchol. Zaznamenané stavy akčných členov sa prehrajú tiež.
+
+Spustenie z koreňa repozitára (vyžaduje nainštalovaný Home Assistant):
+    python -m custom_components.heating_controller.replay history.csv --options options.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import csv
+import dataclasses
+import heapq
+import itertools
+import json
+import logging
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, NamedTuple
+
+from homeassistant.const import STATE_ON, STATE_OFF, STATE_UNAVAILABLE
+from .const import *
+from . import actuators, coalescer, config_schema, cycle_metrics, heating_controller, scheduler, state_router
+from .heating_controller import Heating_Controller_Instance
+from .inputs import INPUT_FLOAT, INPUT_INT, INPUT_SWITCH, build_input_table
+from .trace import TRACE_MAGIC, read_trace_file
+
+LOGGER = logging.getLogger(__name__)
+
+# Stav entity po vykonaní služby (potvrdenie príkazu) a stav počas prestavovania ventilu
+_SERVICE_STATES = {TURN_ON: STATE_ON, TURN_OFF: STATE_OFF, SWITCH_to_OPEN: STATE_OPEN, SWITCH_to_CLOSE: STATE_CLOSED}
+_MOVING_STATES = {SWITCH_to_OPEN: STATE_OPENING, SWITCH_to_CLOSE: STATE_CLOSING}
+
+# Stĺpce / kľúče s časom zmeny v exportoch histórie HA (prvý vyplnený sa použije)
+_TIME_KEYS = ("last_changed", "last_updated", "time", "when")
+
+
+class RecordedChange(NamedTuple):
+    """One recorded state change."""
+
+    time: float  # epoch s
+    entity_id: str
+    state: str
+
+
+class Actuation(NamedTuple):
+    """One actuation the instance issued during the replay."""
+
+    time: float  # epoch s (virtuálny čas)
+    entity_id: str
+    service: str | None  # domain.service, None = zmena riadiaceho príkazu pre zdroj kúrenia
+    value: Any  # cieľový stav entity / hodnota príkazu
+
+
+@dataclasses.dataclass
+class ReplayResult:
+    """Actuations and timing of one replay."""
+
+    actuations: list[Actuation]
+    changes: int  # počet prehraných zmien stavov
+    start: float  # epoch s
+    end: float  # epoch s
+    wall_time: float  # s
+
+    @property
+    def simulated_time(self) -> float:
+        return self.end - self.start
+
+    @property
+    def speed(self) -> float:
+        """Simulated seconds per wall-clock second."""
+        return self.simulated_time / self.wall_time if self.wall_time > 0 else math.inf
+
+
+# ******************************************************************************************
+# ********************** Virtuálne hodiny a náhradný hass **********************************
+# ******************************************************************************************
+
+class VirtualClock:
+    """Virtual time of a replay - stands in for the time module and for HA timers."""
+
+    def __init__(self, start: float) -> None:
+        self.now = start  # epoch s - slúži aj ako monotonic()
+        self._timers: list[list] = []  # min-heap [termín, poradie, akcia], zrušené majú akciu None
+        self._sequence = itertools.count()
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def time(self) -> float:
+        return self.now
+
+    def __getattr__(self, name: str):
+        # perf_counter a ostatné funkcie modulu time zostávajú skutočné
+        return getattr(time, name)
+
+    def call_later(self, delay: float, action: Callable) -> Callable[[], None]:
+        """Run action(now) delay seconds of virtual time from now. Returns the cancel callable."""
+        timer = [self.now + max(0, delay), next(self._sequence), action]
+        heapq.heappush(self._timers, timer)
+
+        def cancel() -> None:
+            timer[2] = None
+
+        return cancel
+
+    def next_due(self) -> float | None:
+        """Deadline of the earliest live timer."""
+        while self._timers and self._timers[0][2] is None:
+            heapq.heappop(self._timers)
+        return self._timers[0][0] if self._timers else None
+
+    def run_next(self) -> None:
+        """Move the time to the earliest timer and run it."""
+        due, _sequence, action = heapq.heappop(self._timers)
+        self.now = max(self.now, due)
+        action(datetime.fromtimestamp(self.now, timezone.utc))
+
+
+class ReplayState(NamedTuple):
+    """State object of the stand-in hass (the attributes HA State has and the instance reads)."""
+
+    entity_id: str
+    state: str
+    attributes: dict = {}
+
+
+class ReplayEvent(NamedTuple):
+    """state_changed event of the stand-in hass."""
+
+    data: dict
+    time_fired: datetime | None = None  # None - oneskorenie bezpečnostnej cesty sa vo virtuálnom čase nemeria
+
+
+class ReplayStates:
+    """hass.states of the stand-in hass."""
+
+    def __init__(self) -> None:
+        self._states: dict[str, ReplayState] = {}
+
+    def get(self, entity_id: str) -> ReplayState | None:
+        return self._states.get(entity_id)
+
+    def is_state(self, entity_id: str, state: str) -> bool:
+        current = self._states.get(entity_id)
+        return current is not None and current.state == state
+
+    def set(self, entity_id: str, state: str) -> tuple[ReplayState | None, ReplayState] | None:
+        """Store the state. Returns (old, new), None if the state did not change."""
+        old = self._states.get(entity_id)
+        if old is not None and old.state == state:
+            return None
+        new = self._states[entity_id] = ReplayState(entity_id, state)
+        return old, new
+
+
+class ReplayServices:
+    """hass.services of the stand-in hass - every call is recorded as an actuation."""
+
+    def __init__(self, clock: VirtualClock) -> None:
+        self._clock = clock
+        self.actuations: list[Actuation] = []
+        self.listeners: list[Callable[[str, str, str], None]] = []  # (domain, service, entity_id) - akčné členy, ktoré príkaz vykonajú
+
+    async def async_call(self, domain: str, service: str, service_data: dict | None = None, *args, **kwargs) -> None:
+        entity_id = (service_data or {}).get("entity_id")
+        self.actuations.append(Actuation(self._clock.now, entity_id, f"{domain}.{service}", _SERVICE_STATES.get(service)))
+        for listener in self.listeners:
+            listener(domain, service, entity_id)
+
+
+class ReplayConfig:
+    """hass.config of the stand-in hass."""
+
+    def __init__(self, config_dir: str | None) -> None:
+        self.config_dir = config_dir
+
+    def path(self, *parts: str) -> str:
+        # bez konfiguračného adresára sa súbory (trace) zahodia
+        if self.config_dir is None:
+            return os.devnull
+        return os.path.join(self.config_dir, *parts)
+
+
+class ReplayHass:
+    """Stand-in for HomeAssistant with a virtual clock, used by the replay."""
+
+    def __init__(self, clock: VirtualClock, config_dir: str | None = None) -> None:
+        self.clock = clock
+        self.states = ReplayStates()
+        self.services = ReplayServices(clock)
+        self.config = ReplayConfig(config_dir)
+        self.data: dict = {}
+        self.tasks: set[asyncio.Task] = set()
+        self._listeners: dict[str, list[Callable]] = {}
+
+    def async_create_task(self, target, *args, **kwargs) -> asyncio.Task:
+        task = asyncio.get_running_loop().create_task(target)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def async_add_executor_job(self, target: Callable, *args):
+        # replay beží v jednom vlákne - úloha sa vykoná hneď
+        return target(*args)
+
+    def async_track_state_change(self, entity_ids: str | Iterable[str], action: Callable) -> Callable[[], None]:
+        """Subscribe action to state changes of entity_ids (async_track_state_change_event)."""
+        entity_ids = [entity_ids] if isinstance(entity_ids, str) else list(entity_ids)
+        for entity_id in entity_ids:
+            self._listeners.setdefault(entity_id, []).append(action)
+
+        def unsubscribe() -> None:
+            for entity_id in entity_ids:
+                self._listeners[entity_id].remove(action)
+
+        return unsubscribe
+
+    def async_set(self, entity_id: str, state: str) -> None:
+        """Set the state of an entity and fire state_changed to its subscribers."""
+        changed = self.states.set(entity_id, state)
+        if changed is None:
+            return
+        old_state, new_state = changed
+        event = ReplayEvent({"entity_id": entity_id, "old_state": old_state, "new_state": new_state})
+        for action in tuple(self._listeners.get(entity_id, ())):
+            action(event)
+
+
+@contextlib.contextmanager
+def replay_environment(clock: VirtualClock):
+    """
+    Nahradí napojenie modulov integrácie na HA a na čas náhradným hass objektom a jeho
+    virtuálnymi hodinami (časovače, odbery zmien stavov, signály, time.monotonic / time.time).
+    Platí pre celý proces - počas replay nesmie v tom istom procese bežať živá inštancia.
+    """
+    patches = [
+        (scheduler, "async_call_later", lambda hass, delay, action: hass.clock.call_later(delay, action)),
+        (state_router, "async_track_state_change_event", lambda hass, entity_ids, action: hass.async_track_state_change(entity_ids, action)),
+        # riadiace príkazy číta replay priamo zo sensor_states
+        (heating_controller, "async_dispatcher_send", lambda hass, signal, *args: None),
+    ]
+    for module in (actuators, coalescer, cycle_metrics, heating_controller, scheduler):
+        patches.append((module, "time", clock))
+    originals = [(module, name, getattr(module, name)) for module, name, _value in patches]
+    try:
+        for module, name, value in patches:
+            setattr(module, name, value)
+        yield
+    finally:
+        for module, name, value in originals:
+            setattr(module, name, value)
+
+
+# ******************************************************************************************
+# ********************** Načítanie zaznamenaných zmien *************************************
+# ******************************************************************************************
+
+def _parse_time(value) -> float:
+    """Epoch seconds from a number or an ISO 8601 timestamp (without a zone = UTC)."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return moment.timestamp()
+
+
+def _change_from_row(row: dict, entity_id: str | None = None) -> RecordedChange:
+    for key in _TIME_KEYS:
+        if row.get(key) not in (None, ""):
+            return RecordedChange(_parse_time(row[key]), row.get("entity_id") or entity_id, str(row["state"]))
+    raise ValueError(f"State change without time: {row}")
+
+
+def load_history(path: str) -> list[RecordedChange]:
+    """
+    Zmeny stavov z exportu histórie HA, zoradené podľa času:
+    - .csv - stĺpce entity_id, state, last_changed (export z okna História),
+    - .json - odpoveď /api/history/period (zoznam zoznamov stavov, aj minimal_response),
+    - ostatné - JSONL, jeden stav (entity_id, state, last_changed) na riadok.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    with open(path, newline="", encoding="utf-8") as file:
+        if extension == ".csv":
+            changes = [_change_from_row(row) for row in csv.DictReader(file)]
+        elif extension == ".json":
+            changes = []
+            for group in json.load(file):
+                # minimal_response - entity_id je len v prvom stave skupiny
+                entity_id = None
+                for row in group if isinstance(group, list) else [group]:
+                    change = _change_from_row(row, entity_id)
+                    entity_id = change.entity_id
+                    changes.append(change)
+        else:
+            changes = [_change_from_row(json.loads(line)) for line in file if line.strip()]
+    changes.sort(key=lambda change: change.time)
+    return changes
+
+
+def load_trace(path: str, instance: Heating_Controller_Instance) -> list[RecordedChange]:
+    """Zmeny stavov vstupných entít inštancie zo záznamov trace súboru (len skutočné zmeny)."""
+    table = build_input_table(instance)
+    changes = []
+    previous = {}
+    for record in read_trace_file(path):
+        for descriptor in table:
+            value = record[descriptor.field]
+            if descriptor.field in record["invalid"]:
+                state = STATE_UNAVAILABLE
+            elif descriptor.kind == INPUT_SWITCH:
+                state = STATE_ON if value else STATE_OFF
+            elif descriptor.kind == INPUT_FLOAT:
+                state = STATE_UNAVAILABLE if math.isnan(value) else str(value)
+            elif descriptor.kind == INPUT_INT:
+                state = str(value)
+            else:
+                state = value or STATE_UNAVAILABLE
+            if previous.get(descriptor.entity_id) != state:
+                previous[descriptor.entity_id] = state
+                changes.append(RecordedChange(record["time"], descriptor.entity_id, state))
+    return changes
+
+
+def is_trace_file(path: str) -> bool:
+    with open(path, "rb") as file:
+        return file.read(len(TRACE_MAGIC)) == TRACE_MAGIC
+
+
+class _Entry(NamedTuple):
+    """Config entry for config_schema.load_config."""
+
+    data: dict
+    options: dict
+
+
+# ******************************************************************************************
+# ********************** Prehrávanie *******************************************************
+# ******************************************************************************************
+
+class Replay:
+    """Replay recorded state changes into one Heating_Controller_Instance in virtual time."""
+
+    def __init__(
+        self,
+        options: dict | None = None,
+        namespace: str = DOMAIN,
+        *,
+        echo: bool = True,
+        echo_delay: float = 0.0,
+        config_dir: str | None = None,
+    ) -> None:
+        self.clock = VirtualClock(0.0)
+        self.hass = ReplayHass(self.clock, config_dir)
+        self.config = config_schema.load_config(_Entry({}, options or {}))
+        self.instance = Heating_Controller_Instance(namespace)
+        self.instance.hass = self.hass
+        self.instance.scheduler.hass = self.hass
+        config_schema.apply_config(self.instance.settings, self.config)
+        self.echo = echo  # odoslaný príkaz sa potvrdí zmenou stavu entity
+        self.echo_delay = echo_delay  # s - čas prestavenia akčného člena (ventil je medzitým opening / closing)
+        self.hass.services.listeners.append(self._command_sent)
+        self._commands = dict(self.instance.sensor_states)
+        self._fallback_cancel = None
+
+    def _command_sent(self, domain: str, service: str, entity_id: str) -> None:
+        """
+        Vykonanie príkazu. Interné prepínače sa prepnú hneď, ako v switch.py (TČ do ACC / TČ do TUV sa
+        navzájom vylučujú). Externý akčný člen (pri echo) poslúchne - po echo_delay prejde do cieľového stavu.
+        """
+        target = _SERVICE_STATES.get(service)
+        if entity_id is None or target is None:
+            return
+        instance = self.instance
+        if entity_id.startswith(f"switch.{instance.namespace}_"):
+            exclusive = {
+                instance.SWITCH_ENTITY_HP_ACC: instance.SWITCH_ENTITY_HP_DHW,
+                instance.SWITCH_ENTITY_HP_DHW: instance.SWITCH_ENTITY_HP_ACC,
+            }
+            self.clock.call_later(0, lambda _now: self.hass.async_set(entity_id, target))
+            if entity_id in exclusive:
+                other = STATE_OFF if target == STATE_ON else STATE_ON
+                self.clock.call_later(0, lambda _now: self.hass.async_set(exclusive[entity_id], other))
+            return
+        if not self.echo:
+            return
+        if self.echo_delay > 0 and service in _MOVING_STATES:
+            self.clock.call_later(0, lambda _now: self.hass.async_set(entity_id, _MOVING_STATES[service]))
+        self.clock.call_later(self.echo_delay, lambda _now: self.hass.async_set(entity_id, target))
+
+    async def async_run(
+        self,
+        changes: list[RecordedChange],
+        initial_states: dict[str, str] | None = None,
+        tail: float = 0.0,
+    ) -> ReplayResult:
+        """
+        Prehrá zmeny stavov (zoradené podľa času). Zmeny s časom prvej zmeny a initial_states
+        tvoria počiatočný stav, potom HA "naštartuje" (brána pripravenosti). Po poslednej zmene
+        beží virtuálny čas ešte tail sekúnd (dobehnutie debounce / oneskorení).
+        """
+        if not changes:
+            raise ValueError("Nothing to replay")
+        wall_started = time.perf_counter()
+        start = changes[0].time
+        self.clock.now = start
+        instance = self.instance
+
+        with replay_environment(self.clock):
+            # Počiatočný stav, pred prihlásením odberov
+            first = 0
+            while first < len(changes) and changes[first].time == start:
+                self.hass.async_set(changes[first].entity_id, changes[first].state)
+                first += 1
+            for entity_id, state in (initial_states or {}).items():
+                self.hass.async_set(entity_id, state)
+
+            instance.track_state_changes(instance.async_state_changed)
+            instance.set_on_ready(lambda: instance.create_task(instance.heating_control_system()))
+            instance.hass_started()
+            self._schedule_fallback()
+            await self._async_settle()
+
+            for change in itertools.islice(changes, first, None):
+                await self._async_advance(change.time)
+                self.hass.async_set(change.entity_id, change.state)
+                await self._async_settle()
+
+            end = changes[-1].time + tail
+            await self._async_advance(end)
+            if self._fallback_cancel is not None:
+                self._fallback_cancel()
+            await instance.async_shutdown()
+
+        return ReplayResult(
+            actuations=self.hass.services.actuations,
+            changes=len(changes),
+            start=start,
+            end=end,
+            wall_time=time.perf_counter() - wall_started,
+        )
+
+    def _schedule_fallback(self) -> None:
+        """Periodický záložný cyklus, ako v __init__ (fallback_check_interval)."""
+        interval = self.instance.settings.fallback_check_interval
+        if interval <= 0:
+            return
+
+        def fallback(_now) -> None:
+            self.instance.create_task(self.instance.heating_control_system())
+            self._fallback_cancel = self.clock.call_later(interval, fallback)
+
+        self._fallback_cancel = self.clock.call_later(interval, fallback)
+
+    async def _async_advance(self, until: float) -> None:
+        """Posunie virtuálny čas na until - postupne vykoná všetky splatné časovače."""
+        while (due := self.clock.next_due()) is not None and due <= until:
+            self.clock.run_next()
+            await self._async_settle()
+        self.clock.now = max(self.clock.now, until)
+
+    async def _async_settle(self) -> None:
+        """Počká na dokončenie všetkých úloh (kontrolných cyklov) a zaznamená zmeny riadiacich príkazov."""
+        while self.hass.tasks:
+            task = self.hass.tasks.pop()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+        for key, value in self.instance.sensor_states.items():
+            if self._commands[key] != value:
+                self._commands[key] = value
+                entity_id = f"sensor.{self.instance.namespace}_{key}"
+                self.hass.services.actuations.append(Actuation(self.clock.now, entity_id, None, value))
+                # stav senzora riadiaceho príkazu - číta ho zdroj kúrenia (simulator.py)
+                self.hass.async_set(entity_id, str(value))
+
+
+# ******************************************************************************************
+# ********************** Príkazový riadok **************************************************
+# ******************************************************************************************
+
+def _key_value(text: str) -> tuple[str, str]:
+    key, separator, value = text.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError(f"expected KEY=VALUE, got {text!r}")
+    return key.strip(), value.strip()
+
+
+def _load_options(path: str | None) -> tuple[dict, dict]:
+    """(data, options) z JSON súboru - buď priamo slovník parametrov, alebo config entry z .storage/core.config_entries."""
+    if path is None:
+        return {}, {}
+    with open(path, encoding="utf-8") as file:
+        content = json.load(file)
+    if "options" in content or "data" in content:
+        return content.get("data", {}), content.get("options", {})
+    return {}, content
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat(timespec="seconds")
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay recorded state changes into the Heating Controller and report every actuation.")
+    parser.add_argument("recording", help="trace file of the integration (*_trace.bin) or HA history export (.csv, .json, .jsonl)")
+    parser.add_argument("--options", help="JSON with the integration options, or a config entry from .storage/core.config_entries")
+    parser.add_argument("--option", type=_key_value, action="append", default=[], metavar="KEY=VALUE", help="override one option (repeatable)")
+    parser.add_argument("--state", type=_key_value, action="append", default=[], metavar="ENTITY=STATE", help="initial state of an entity missing in the recording (repeatable)")
+    parser.add_argument("--namespace", help="prefix of the internal entities (default: from the config entry, or heating_controller)")
+    parser.add_argument("--no-echo", action="store_true", help="do not confirm commands by changing the entity state")
+    parser.add_argument("--echo-delay", type=float, default=0.0, help="seconds until a commanded actuator reaches its state")
+    parser.add_argument("--tail", type=float, default=600.0, help="seconds of virtual time after the last change")
+    parser.add_argument("--config-dir", help="directory for the trace file of the replayed run")
+    parser.add_argument("--json", action="store_true", help="JSON lines output")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    data, options = _load_options(args.options)
+    options.update(args.option)
+    namespace = args.namespace or data.get(CONF_ENTITY_NAMESPACE, DOMAIN)
+    replay = Replay({**data, **options}, namespace, echo=not args.no_echo, echo_delay=args.echo_delay, config_dir=args.config_dir)
+
+    if is_trace_file(args.recording):
+        changes = load_trace(args.recording, replay.instance)
+    else:
+        changes = load_history(args.recording)
+    result = asyncio.run(replay.async_run(changes, dict(args.state), args.tail))
+
+    for actuation in result.actuations:
+        if args.json:
+            print(json.dumps(actuation._asdict()))
+        else:
+            print(f"{_format_time(actuation.time)}  {actuation.service or 'command':<20} {actuation.entity_id} -> {actuation.value}")
+    summary = {
+        "changes": result.changes,
+        "actuations": len(result.actuations),
+        "simulated_s": round(result.simulated_time, 3),
+        "wall_s": round(result.wall_time, 3),
+        "speed": round(result.speed, 1),
+    }
+    if args.json:
+        print(json.dumps({"summary": summary}))
+    else:
+        print(f"{summary['changes']} state changes over {summary['simulated_s']} s replayed in {summary['wall_s']} s "
+              f"({summary['speed']}x real time), {summary['actuations']} actuations", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" scheduler.py """
+
+"""Deadline scheduler for Heating Controller integration.
+
+Všetky časovače jednej inštancie (rerun cyklu, oneskorenia ventilov, booster
+čerpadla, debounce príkazu pre TČ, timeout prečerpávania ACC -> TUV) sú
+pomenované termíny v jednej min-heap. V Home Assistant je naraz naplánovaný
+len jeden časovač - na najskorší termín. Po jeho uplynutí sa vykonajú akcie
+všetkých splatných termínov a kontrolný cyklus sa zobudí najviac raz.
+"""
+
+import heapq
+import itertools
+import logging
+import time
+from typing import Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+
+LOGGER = logging.getLogger(__name__)
+
+# Názvy termínov, ktoré plánuje samotná inštancia (termíny rozhodovacej logiky sú v control_logic.py)
+TIMER_RERUN = "rerun"
+TIMER_HP_ON_OFF_DEBOUNCE = "hp_on_off_debounce"
+TIMER_HEAT_DHW_FROM_ACC_TIMEOUT = "heat_dhw_from_acc_timeout"
+TIMER_LAST_KNOWN_GOOD_EXPIRY = "last_known_good_expiry"
+TIMER_STARTUP_READY_TIMEOUT = "startup_ready_timeout"
+TIMER_TRACE_FLUSH = "trace_flush"
+TIMER_CYCLE_METRICS = "cycle_metrics"
+
+# Termín splatný do tejto rezervy sa vykoná hneď (časovač HA môže prísť o chlp skôr)
+_DUE_TOLERANCE = 0.005  # seconds
+
+
+class DeadlineScheduler:
+    """Named deadlines kept in a min-heap, backed by a single HA timer."""
+
+    def __init__(self, on_wake: Callable[[], None] | None = None) -> None:
+        self.hass: HomeAssistant | None = None
+        self._on_wake = on_wake  # zobudenie kontrolného cyklu
+        self._heap: list[tuple[float, int, str]] = []  # (deadline, poradie, názov) - zrušené položky sa odstraňujú lenivo
+        self._entries: dict[str, tuple[float, int, Callable[[], None] | None, bool]] = {}  # názov -> (deadline, poradie, akcia, wake)
+        self._sequence = itertools.count()
+        self._timer_cancel = None
+        self._timer_deadline = None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._entries
+
+    def schedule(
+        self,
+        name: str,
+        delay: float,
+        action: Callable[[], None] | None = None,
+        *,
+        wake: bool = True,
+        keep_earlier: bool = False,
+    ) -> None:
+        """Schedule (or reschedule) the named deadline delay seconds from now.
+
+        action is called when the deadline is reached; with wake=True the
+        control cycle is woken up afterwards. With keep_earlier=True an
+        already scheduled earlier deadline of the same name is kept, a later
+        one is moved forward.
+        """
+        deadline = time.monotonic() + max(0, delay)
+        existing = self._entries.get(name)
+        if keep_earlier and existing is not None and existing[0] <= deadline:
+            return
+        sequence = next(self._sequence)
+        self._entries[name] = (deadline, sequence, action, wake)
+        heapq.heappush(self._heap, (deadline, sequence, name))
+        self._arm()
+
+    def cancel(self, name: str) -> bool:
+        """Cancel the named deadline. Returns True if it was scheduled."""
+        if self._entries.pop(name, None) is None:
+            return False
+        self._arm()
+        return True
+
+    def remaining(self, name: str) -> float | None:
+        """Seconds left until the named deadline, None if it is not scheduled."""
+        entry = self._entries.get(name)
+        if entry is None:
+            return None
+        return max(0, entry[0] - time.monotonic())
+
+    def remaining_all(self) -> dict[str, float]:
+        """Seconds left for every scheduled deadline, earliest first."""
+        now = time.monotonic()
+        return {
+            name: max(0, deadline - now)
+            for name, (deadline, _sequence, _action, _wake) in sorted(self._entries.items(), key=lambda item: item[1][0])
+        }
+
+    def cancel_all(self) -> None:
+        """Cancel every deadline and the HA timer (used on unload)."""
+        self._entries.clear()
+        self._heap.clear()
+        self._disarm()
+
+    def _peek(self) -> tuple[float, int, str] | None:
+        """Earliest live heap item; stale items of cancelled / rescheduled deadlines are dropped."""
+        while self._heap:
+            deadline, sequence, name = self._heap[0]
+            entry = self._entries.get(name)
+            if entry is not None and entry[1] == sequence:
+                return self._heap[0]
+            heapq.heappop(self._heap)
+        return None
+
+    def _disarm(self) -> None:
+        if self._timer_cancel is not None:
+            self._timer_cancel()
+        self._timer_cancel = None
+        self._timer_deadline = None
+
+    def _arm(self) -> None:
+        """Keep exactly one HA timer armed for the earliest deadline."""
+        head = self._peek()
+        if head is None:
+            self._disarm()
+            return
+        deadline = head[0]
+        if self._timer_cancel is not None and self._timer_deadline == deadline:
+            return
+        self._disarm()
+        if self.hass is None:
+            LOGGER.warning(f"Deadline {head[2]} scheduled before hass is available")
+            return
+        self._timer_deadline = deadline
+        self._timer_cancel = async_call_later(self.hass, max(0, deadline - time.monotonic()), self._timer_fired)
+
+    @callback
+    def _timer_fired(self, _now=None) -> None:
+        """Run the actions of all due deadlines and wake the control cycle at most once."""
+        self._timer_cancel = None
+        self._timer_deadline = None
+        now = time.monotonic() + _DUE_TOLERANCE
+        wake = False
+        while (head := self._peek()) is not None and head[0] <= now:
+            heapq.heappop(self._heap)
+            _deadline, _sequence, action, entry_wake = self._entries.pop(head[2])
+            LOGGER.debug(f"Deadline {head[2]} reached")
+            if action is not None:
+                try:
+                    action()
+                except Exception as e:
+                    LOGGER.error(f"Error in deadline {head[2]}: {e}")
+            wake = wake or entry_wake
+        self._arm()
+        if wake and self._on_wake is not None:
+            self._on_wake()
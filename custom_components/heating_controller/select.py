@@ -8,13 +8,11 @@ from __future__ import annotations
 """Select platform for Heating Controller integration"""
 
 import logging
-from typing import Any
 
 from homeassistant.components.select import SelectEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import HomeAssistant
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.restore_state import RestoreEntity
 
 from .const import (
@@ -68,10 +66,10 @@ class HeatingControllerSelect(SelectEntity, RestoreEntity):
         """Initialize the select entity."""
         self._instance = instance
         self._entry_id = entry_id
-        self._attr_unique_id = f"{DOMAIN}_{entity_id}"
+        self._attr_unique_id = f"{instance.namespace}_{entity_id}"
         self._attr_has_entity_name = True
         self._attr_translation_key = entity_id
-        self.entity_id = f"select.{DOMAIN}_{entity_id}"
+        self.entity_id = f"select.{instance.namespace}_{entity_id}"
         self._attr_icon = icon
         self._entity_id = entity_id
         self._attr_options = options
@@ -95,20 +93,6 @@ class HeatingControllerSelect(SelectEntity, RestoreEntity):
             self._attr_current_option = self._default_value
             LOGGER.debug(f"No saved state for {self.entity_id}, using default: {self._default_value}")
 
-        # Subscribe to updates
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                f"{DOMAIN}_feedback_update_{self._entry_id}",
-                self._handle_feedback_update,
-            )
-        )
-
-    @callback
-    def _handle_feedback_update(self) -> None:
-        """Handle feedback update."""
-        self.async_write_ha_state()
-
     async def async_select_option(self, option: str) -> None:
         """Change the selected option."""
         if option in self._attr_options:
@@ -9,12 +9,12 @@ from __future__ import annotations
 
 import logging
 
-from homeassistant.components.sensor import SensorEntity
+from homeassistant.components.sensor import SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.helpers.entity import DeviceInfo, EntityCategory
 
 from .const import *
 
@@ -55,6 +55,8 @@ async def async_setup_entry(
             "TC - Temperature",
             "mdi:thermometer-water",
         ),
+        HeatingControllerStatisticsSensor(instance, entry.entry_id),
+        HeatingControllerCycleTimeSensor(instance, entry.entry_id),
     ]
 
     async_add_entities(entities)
@@ -73,10 +75,10 @@ class HeatingControllerSensor(SensorEntity):
         """Initialize the sensor."""
         self._instance = instance
         self._entry_id = entry_id
-        self._attr_unique_id = f"{DOMAIN}_{entity_id}"
+        self._attr_unique_id = f"{instance.namespace}_{entity_id}"
         self._attr_has_entity_name = True
         self._attr_translation_key = entity_id
-        self.entity_id = f"sensor.{DOMAIN}_{entity_id}"
+        self.entity_id = f"sensor.{instance.namespace}_{entity_id}"
         self._attr_icon = icon
         self._entity_id = entity_id
         self._attr_native_value = "off"
@@ -89,20 +91,110 @@ class HeatingControllerSensor(SensorEntity):
         self.async_on_remove(
             async_dispatcher_connect(
                 self.hass,
-                f"{DOMAIN}_feedback_update_{self._entry_id}",
+                SIGNAL_FEEDBACK_UPDATE.format(self._entry_id, self._entity_id),
                 self._handle_feedback_update,
             )
         )
 
     @callback
     def _handle_feedback_update(self) -> None:
-        """Handle feedback update."""
+        """Handle feedback update - sent only when the value of this sensor changed."""
         new_value = self._instance.sensor_states.get(self._entity_id)
-        if new_value is not None:
-            self._attr_native_value = new_value
+        if new_value is None or new_value == self._attr_native_value:
+            return
+        self._attr_native_value = new_value
         self.async_write_ha_state()
 
     @property
     def native_value(self) -> str:
         """Return the state of the sensor."""
-        return self._attr_native_value
\ No newline at end of file
+        return self._attr_native_value
+
+class HeatingControllerStatisticsSensor(SensorEntity):
+    """Diagnostic sensor - number of control cycles, the controller counters as attributes."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_state_class = SensorStateClass.TOTAL_INCREASING
+    _attr_icon = "mdi:counter"
+
+    def __init__(self, instance, entry_id: str) -> None:
+        """Initialize the sensor."""
+        self._instance = instance
+        self._entry_id = entry_id
+        self._attr_unique_id = f"{instance.namespace}_{ENTITY_CONTROL_STATISTICS}"
+        self._attr_has_entity_name = True
+        self._attr_translation_key = ENTITY_CONTROL_STATISTICS
+        self.entity_id = f"sensor.{instance.namespace}_{ENTITY_CONTROL_STATISTICS}"
+
+    async def async_added_to_hass(self) -> None:
+        """Run when entity about to be added to hass."""
+        await super().async_added_to_hass()
+
+        # Subscribe to updates
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_FEEDBACK_UPDATE.format(self._entry_id, ENTITY_CONTROL_STATISTICS),
+                self._handle_feedback_update,
+            )
+        )
+
+    @callback
+    def _handle_feedback_update(self) -> None:
+        """Handle feedback update - sent only when the instance refreshed its counters."""
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the number of completed control cycles."""
+        return self._instance.statistics.get("control_cycles")
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the controller counters."""
+        return self._instance.statistics
+
+class HeatingControllerCycleTimeSensor(SensorEntity):
+    """Diagnostic sensor - p95 control cycle time, the rest of the timing summary as attributes."""
+
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+    _attr_native_unit_of_measurement = "ms"
+    _attr_state_class = SensorStateClass.MEASUREMENT
+    _attr_icon = "mdi:timer-outline"
+
+    def __init__(self, instance, entry_id: str) -> None:
+        """Initialize the sensor."""
+        self._instance = instance
+        self._entry_id = entry_id
+        self._attr_unique_id = f"{instance.namespace}_{ENTITY_CONTROL_CYCLE_TIME}"
+        self._attr_has_entity_name = True
+        self._attr_translation_key = ENTITY_CONTROL_CYCLE_TIME
+        self.entity_id = f"sensor.{instance.namespace}_{ENTITY_CONTROL_CYCLE_TIME}"
+
+    async def async_added_to_hass(self) -> None:
+        """Run when entity about to be added to hass."""
+        await super().async_added_to_hass()
+
+        # Aktualizácia v pevnej perióde CYCLE_METRICS_PUBLISH_INTERVAL (Heating_Controller_Instance._publish_cycle_metrics)
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                SIGNAL_FEEDBACK_UPDATE.format(self._entry_id, ENTITY_CONTROL_CYCLE_TIME),
+                self._handle_feedback_update,
+            )
+        )
+
+    @callback
+    def _handle_feedback_update(self) -> None:
+        """Handle feedback update - a new timing summary was published."""
+        self.async_write_ha_state()
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the p95 cycle time in ms."""
+        return self._instance.cycle_metrics_summary.get("cycle_time_p95_ms")
+
+    @property
+    def extra_state_attributes(self) -> dict:
+        """Return the timing summary of the last hour."""
+        return self._instance.cycle_metrics_summary
@@ -0,0 +1,399 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" simulator.py """
+
+"""Deterministic thermal plant simulator for Heating Controller integration.
+
+Model kotolne, ktorú riadi Heating_Controller_Instance: dva vrstvené
+akumulačné zásobníky (ACC1, ACC2), zásobník TUV, tepelné čerpadlo s
+obmedzením MAX_TEMPERATURE_LIMIT_HP, sedem ventilov s časom prestavenia,
+obehové čerpadlá, profil odberu TUV a vykurovanie domu s termostatom.
+Simulácia beží v replay (replay.py) - na virtuálnych hodinách, bez HA a bez
+hardvéru. Zariadenia sú entity s tými istými entity ID, aké nastavuje
+config flow, inštancia ich teda číta a ovláda presne ako v živej inštalácii.
+
+Model je zámerne jednoduchý a úplne deterministický (žiadna náhoda, profily
+sú funkcie dennej doby) - rovnaké parametre dajú vždy rovnaký priebeh.
+
+Spustenie z koreňa repozitára (vyžaduje nainštalovaný Home Assistant):
+    python -m custom_components.heating_controller.simulator --days 7 --mode 6
+"""
+
+import argparse
+import asyncio
+import dataclasses
+import json
+import logging
+import math
+import sys
+
+from homeassistant.const import STATE_ON, STATE_OFF
+from .const import *
+from .replay import RecordedChange, Replay, ReplayResult
+
+LOGGER = logging.getLogger(__name__)
+
+WATER_HEAT_CAPACITY = 4.186  # kJ/(kg·K)
+SIMULATION_START = 1_767_225_600.0  # 2026-01-01 00:00 UTC - pevný začiatok, aby bol priebeh deterministický
+
+
+@dataclasses.dataclass
+class PlantParameters:
+    """Physical parameters and demand profiles of the simulated plant."""
+
+    step: float = 10.0  # s - krok simulácie
+    ambient_temperature: float = 15.0  # °C - teplota v kotolni
+    initial_temperature: float = 45.0  # °C - počiatočná teplota zásobníkov
+    # Akumulačné zásobníky
+    acc_volume: float = 1000.0  # l (kg) každý
+    acc_layers: int = 10
+    acc_sensor_layer: int = 2  # vrstva so snímačom teploty (0 = hore)
+    acc_loss: float = 0.003  # kW/K - tepelné straty
+    # Zásobník TUV
+    dhw_volume: float = 300.0  # l
+    dhw_loss: float = 0.002  # kW/K
+    dhw_coil: float = 1.5  # kW/K - výmenník TČ a výmenník ACC -> TUV
+    cold_water_temperature: float = 10.0  # °C
+    dhw_comfort_temperature: float = 40.0  # °C - odber TUV pod touto teplotou sa počíta ako nepohodlie
+    # Tepelné čerpadlo
+    hp_power: float = 9.0  # kW - tepelný výkon
+    hp_flow: float = 0.4  # kg/s
+    # Kúrenie
+    heating_flow: float = 0.3  # kg/s
+    emitter: float = 0.5  # kW/K - odovzdávací výkon radiátorov / podlahy
+    house_loss: float = 0.25  # kW/K - tepelná strata domu
+    house_capacity: float = 20000.0  # kJ/K - tepelná kapacita domu
+    room_setpoint_day: float = 21.0  # °C (6:00 - 22:00)
+    room_setpoint_night: float = 19.0  # °C
+    thermostat_hysteresis: float = 0.3  # K
+    outdoor_mean: float = 0.0  # °C - priemer dennej teploty
+    outdoor_swing: float = 5.0  # K - amplitúda dennej teploty (maximum o 15:00)
+    # Ventily
+    valve_travel_time: float = 10.0  # s - kratší ako valve_timeout integrácie, inak príkaz vyprší pred potvrdením
+    # Odber TUV - (hodina od, hodina do, l/h)
+    dhw_draws: tuple[tuple[float, float, float], ...] = ((6.5, 7.5, 80.0), (12.0, 12.5, 30.0), (19.0, 21.0, 70.0))
+
+
+class StratifiedTank:
+    """Water tank split into horizontal layers (0 = top), plug-flow charging / discharging."""
+
+    def __init__(self, volume: float, layers: int, temperature: float) -> None:
+        self.layer_mass = volume / layers
+        self.temperatures = [temperature] * layers
+
+    @property
+    def top(self) -> float:
+        return self.temperatures[0]
+
+    @property
+    def bottom(self) -> float:
+        return self.temperatures[-1]
+
+    @property
+    def mean(self) -> float:
+        return sum(self.temperatures) / len(self.temperatures)
+
+    def charge(self, supply_temperature: float, mass: float) -> None:
+        """Hot water enters at the top, the same mass leaves at the bottom."""
+        fraction = min(1.0, mass / self.layer_mass)
+        temperatures = self.temperatures
+        for index in range(len(temperatures) - 1, 0, -1):
+            temperatures[index] += fraction * (temperatures[index - 1] - temperatures[index])
+        temperatures[0] += fraction * (supply_temperature - temperatures[0])
+
+    def discharge(self, return_temperature: float, mass: float) -> None:
+        """Water is drawn from the top, the return enters at the bottom."""
+        fraction = min(1.0, mass / self.layer_mass)
+        temperatures = self.temperatures
+        for index in range(len(temperatures) - 1):
+            temperatures[index] += fraction * (temperatures[index + 1] - temperatures[index])
+        temperatures[-1] += fraction * (return_temperature - temperatures[-1])
+
+    def lose(self, loss: float, ambient: float, dt: float) -> None:
+        """Heat loss to the ambient (kW/K), spread over the layers."""
+        factor = loss * dt / (self.layer_mass * len(self.temperatures) * WATER_HEAT_CAPACITY)
+        self.temperatures = [temperature - factor * (temperature - ambient) for temperature in self.temperatures]
+        # teplejšia voda pod chladnejšou vystúpi - susedné vrstvy sa premiešajú
+        temperatures = self.temperatures
+        for index in range(len(temperatures) - 1, 0, -1):
+            if temperatures[index] > temperatures[index - 1]:
+                temperatures[index] = temperatures[index - 1] = (temperatures[index] + temperatures[index - 1]) / 2
+
+
+class ThermalPlant:
+    """
+    Simulated boiler room behind the entities of one Heating Controller config entry.
+
+    Vykonáva príkazy pre ventily a čerpadlá (služby cover / switch), číta riadiace príkazy
+    pre TČ (senzory controll_command_hp_*) a každý krok zapíše teploty a stavy termostatov.
+    """
+
+    def __init__(self, replay: Replay, parameters: PlantParameters | None = None) -> None:
+        self.replay = replay
+        self.hass = replay.hass
+        self.parameters = parameters = parameters or PlantParameters()
+        config = replay.config
+        namespace = replay.instance.namespace
+        self.entity_hp_on_off = f"sensor.{namespace}_{ENTITY_CONTROL_COMMAND_HP_ON_OFF}"
+        self.entity_hp_temperature = f"sensor.{namespace}_{ENTITY_CONTROL_COMMAND_HP_TEMPERATURE}"
+        self.valves = {key: config[key] for key in (
+            CONF_VALVE_FROM_TC_TO_ACC_OR_DHW, CONF_VALVE_OUTPUT_ACC1, CONF_VALVE_OUTPUT_ACC2, CONF_VALVE_INPUT_ACC1,
+            CONF_VALVE_INPUT_ACC2, CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW, CONF_VALVE_OUTPUT_HEATING,
+        )}
+        self.pumps = {key: config[key] for key in (
+            CONF_WATER_PUMP_ACC_OUTPUT, CONF_WATER_PUMP_DHW, CONF_WATER_PUMP_FLOOR_HEATING, CONF_WATER_PUMP_HEATING,
+        )}
+        self.sensors = {key: config[key] for key in (CONF_SENSOR_TEMP_ACC1, CONF_SENSOR_TEMP_ACC2, CONF_SENSOR_TEMP_DHW)}
+        self.thermostats = {key: config[key] for key in (CONF_THERMOSTAT_STATE, CONF_HEATING_STATE, CONF_FLOOR_HEATING_STATE)}
+
+        self.acc1 = StratifiedTank(parameters.acc_volume, parameters.acc_layers, parameters.initial_temperature)
+        self.acc2 = StratifiedTank(parameters.acc_volume, parameters.acc_layers, parameters.initial_temperature)
+        self.dhw = parameters.initial_temperature
+        self.room = parameters.room_setpoint_day
+        self.heating_demand = False
+        self._valve_moves = {}  # entity_id -> zrušenie prebiehajúceho prestavenia
+
+        # Bilancia (kWh) a štatistika
+        self.energy = dict.fromkeys(("hp_acc", "hp_dhw", "heating", "acc_to_dhw", "dhw_draw", "losses"), 0.0)
+        self.hp_full_load = 0.0  # s - čas behu TČ prepočítaný na plný výkon
+        self.dhw_uncomfortable = 0.0  # s - odber TUV pod dhw_comfort_temperature
+        self.room_min = self.room_max = self.room
+
+        self.hass.services.listeners.append(self._command)
+
+    # **** Počiatočný stav ****************************************************************
+
+    def initial_changes(self, start: float, mode: int = DEFAULT_HEATING_OPERATING_MODE) -> list[RecordedChange]:
+        """States of all entities at the start - devices of the plant and the internal entities of the integration."""
+        instance = self.replay.instance
+        states = {
+            instance.SWITCH_ENTITY_AUTOMATIC_MODE: STATE_ON,
+            instance.SWITCH_ENTITY_ACC1_ENABLE: STATE_ON,
+            instance.SWITCH_ENTITY_ACC2_ENABLE: STATE_ON,
+            instance.SWITCH_ENTITY_HEAT_DHW_FROM_ACC: STATE_OFF,
+            instance.SWITCH_ENTITY_HP_ACC: STATE_ON,
+            instance.SWITCH_ENTITY_HP_DHW: STATE_OFF,
+            instance.SWITCH_ENTITY_HEATING_SOURCE_ON_OFF: STATE_ON,
+            instance.NUMBER_ENTITY_DHW_TARGET_TEMPERATURE: str(float(DEFAULT_DHW_TARGET_TEMPERATURE)),
+            instance.NUMBER_ENTITY_ACC_TARGET_TEMPERATURE: str(float(DEFAULT_ACC_TARGET_TEMPERATURE)),
+            instance.SELECT_ENTITY_HEATING_OPERATING_MODE: str(mode),
+        }
+        states.update(dict.fromkeys(self.valves.values(), STATE_CLOSED))
+        states.update(dict.fromkeys(self.pumps.values(), STATE_OFF))
+        states.update(self._sensor_states(start))
+        return [RecordedChange(start, entity_id, state) for entity_id, state in states.items()]
+
+    def attach(self) -> None:
+        """Start stepping the plant on the virtual clock of the replay."""
+        self.replay.clock.call_later(self.parameters.step, self._tick)
+
+    # **** Príkazy ************************************************************************
+
+    def _command(self, domain: str, service: str, entity_id: str) -> None:
+        """Vykonanie príkazu - čerpadlo sa prepne hneď, ventil sa prestavuje valve_travel_time."""
+        clock = self.replay.clock
+        if entity_id in self.pumps.values() and service in (TURN_ON, TURN_OFF):
+            clock.call_later(0, lambda _now: self.hass.async_set(entity_id, STATE_ON if service == TURN_ON else STATE_OFF))
+        elif entity_id in self.valves.values() and service in (SWITCH_to_OPEN, SWITCH_to_CLOSE):
+            opening = service == SWITCH_to_OPEN
+            target = STATE_OPEN if opening else STATE_CLOSED
+            state = self.hass.states.get(entity_id)
+            if state is not None and state.state == target:
+                return
+            cancel = self._valve_moves.pop(entity_id, None)
+            if cancel is not None:
+                cancel()
+            clock.call_later(0, lambda _now: self.hass.async_set(entity_id, STATE_OPENING if opening else STATE_CLOSING))
+
+            def finished(_now) -> None:
+                self._valve_moves.pop(entity_id, None)
+                self.hass.async_set(entity_id, target)
+
+            self._valve_moves[entity_id] = clock.call_later(self.parameters.valve_travel_time, finished)
+
+    def _is(self, entity_id: str, state: str) -> bool:
+        return self.hass.states.is_state(entity_id, state)
+
+    # **** Fyzika *************************************************************************
+
+    def _tick(self, _now) -> None:
+        self.step(self.replay.clock.now, self.parameters.step)
+        for entity_id, state in self._sensor_states(self.replay.clock.now).items():
+            self.hass.async_set(entity_id, state)
+        self.replay.clock.call_later(self.parameters.step, self._tick)
+
+    def _sensor_states(self, now: float) -> dict[str, str]:
+        """Teploty (zaokrúhlené ako skutočné snímače) a stavy termostatov."""
+        layer = self.parameters.acc_sensor_layer
+        demand = STATE_ON if self.heating_demand else STATE_OFF
+        return {
+            self.sensors[CONF_SENSOR_TEMP_ACC1]: f"{self.acc1.temperatures[layer]:.1f}",
+            self.sensors[CONF_SENSOR_TEMP_ACC2]: f"{self.acc2.temperatures[layer]:.1f}",
+            self.sensors[CONF_SENSOR_TEMP_DHW]: f"{self.dhw:.1f}",
+            **dict.fromkeys(self.thermostats.values(), demand),
+        }
+
+    def outdoor_temperature(self, now: float) -> float:
+        hour = now % 86400 / 3600
+        return self.parameters.outdoor_mean + self.parameters.outdoor_swing * math.cos((hour - 15) / 24 * 2 * math.pi)
+
+    def room_setpoint(self, now: float) -> float:
+        hour = now % 86400 / 3600
+        return self.parameters.room_setpoint_day if 6 <= hour < 22 else self.parameters.room_setpoint_night
+
+    def dhw_draw(self, now: float) -> float:
+        """Odber TUV v kg/s."""
+        hour = now % 86400 / 3600
+        return sum(rate for start, end, rate in self.parameters.dhw_draws if start <= hour < end) / 3600
+
+    def step(self, now: float, dt: float) -> None:
+        """Advance the plant by dt seconds."""
+        p = self.parameters
+        c = WATER_HEAT_CAPACITY
+        tanks = ((self.acc1, CONF_VALVE_INPUT_ACC1, CONF_VALVE_OUTPUT_ACC1), (self.acc2, CONF_VALVE_INPUT_ACC2, CONF_VALVE_OUTPUT_ACC2))
+
+        # Tepelné čerpadlo - výstupná teplota najviac podľa príkazu a MAX_TEMPERATURE_LIMIT_HP
+        hp_on = self._is(self.entity_hp_on_off, STATE_ON)
+        try:
+            hp_target = min(float(self.hass.states.get(self.entity_hp_temperature).state), MAX_TEMPERATURE_LIMIT_HP)
+        except (AttributeError, TypeError, ValueError):
+            hp_target = MAX_TEMPERATURE_LIMIT_HP
+        if hp_on:
+            if self._is(self.valves[CONF_VALVE_FROM_TC_TO_ACC_OR_DHW], STATE_HP_DHW):
+                # TČ -> výmenník v TUV
+                power = min(p.hp_power, max(0.0, p.dhw_coil * (hp_target - self.dhw)))
+                self.dhw += power * dt / (p.dhw_volume * c)
+                self.energy["hp_dhw"] += power * dt / 3600
+                self.hp_full_load += dt * power / p.hp_power
+            elif self._is(self.valves[CONF_VALVE_FROM_TC_TO_ACC_OR_DHW], STATE_HP_ACC):
+                # TČ -> vstupy ACC (prietok sa delí medzi otvorené vstupy)
+                inputs = [tank for tank, valve_in, _valve_out in tanks if self._is(self.valves[valve_in], STATE_OPEN)]
+                if inputs:
+                    return_temperature = sum(tank.bottom for tank in inputs) / len(inputs)
+                    supply = min(hp_target, return_temperature + p.hp_power / (p.hp_flow * c))
+                    if supply > return_temperature:
+                        for tank in inputs:
+                            tank.charge(supply, p.hp_flow * dt / len(inputs))
+                        power = p.hp_flow * c * (supply - return_temperature)
+                        self.energy["hp_acc"] += power * dt / 3600
+                        self.hp_full_load += dt * power / p.hp_power
+
+        # Výstupy ACC - do kúrenia alebo do TUV (prečerpávanie)
+        outputs = [tank for tank, _valve_in, valve_out in tanks if self._is(self.valves[valve_out], STATE_OPEN)]
+        to_heating = self._is(self.valves[CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW], STATE_ACC_HEATING)
+        to_dhw = self._is(self.valves[CONF_VALVE_FROM_ACC_TO_HEAT_OR_DHW], STATE_ACC_DHW)
+        heating_pumps = (
+            self._is(self.pumps[CONF_WATER_PUMP_HEATING], STATE_ON) or self._is(self.pumps[CONF_WATER_PUMP_FLOOR_HEATING], STATE_ON)
+        )
+        heating_power = 0.0
+        if outputs and to_heating and heating_pumps and self._is(self.valves[CONF_VALVE_OUTPUT_HEATING], STATE_OPEN):
+            supply = sum(tank.top for tank in outputs) / len(outputs)
+            heating_power = min(p.heating_flow * c * max(0.0, supply - self.room), p.emitter * max(0.0, supply - self.room))
+            return_temperature = supply - heating_power / (p.heating_flow * c)
+            for tank in outputs:
+                tank.discharge(return_temperature, p.heating_flow * dt / len(outputs))
+            self.energy["heating"] += heating_power * dt / 3600
+        elif outputs and to_dhw and self._is(self.pumps[CONF_WATER_PUMP_ACC_OUTPUT], STATE_ON):
+            supply = sum(tank.top for tank in outputs) / len(outputs)
+            power = min(p.heating_flow * c * max(0.0, supply - self.dhw), p.dhw_coil * max(0.0, supply - self.dhw))
+            return_temperature = supply - power / (p.heating_flow * c)
+            for tank in outputs:
+                tank.discharge(return_temperature, p.heating_flow * dt / len(outputs))
+            self.dhw += power * dt / (p.dhw_volume * c)
+            self.energy["acc_to_dhw"] += power * dt / 3600
+
+        # Odber TUV - odobratá teplá voda sa nahradí studenou
+        draw = self.dhw_draw(now) * dt
+        if draw:
+            self.energy["dhw_draw"] += draw * c * (self.dhw - p.cold_water_temperature) / 3600
+            self.dhw += min(1.0, draw / p.dhw_volume) * (p.cold_water_temperature - self.dhw)
+            if self.dhw < p.dhw_comfort_temperature:
+                self.dhw_uncomfortable += dt
+
+        # Straty zásobníkov
+        losses = (self.acc1.mean - p.ambient_temperature + self.acc2.mean - p.ambient_temperature) * p.acc_loss
+        losses += (self.dhw - p.ambient_temperature) * p.dhw_loss
+        self.energy["losses"] += losses * dt / 3600
+        self.acc1.lose(p.acc_loss, p.ambient_temperature, dt)
+        self.acc2.lose(p.acc_loss, p.ambient_temperature, dt)
+        self.dhw -= p.dhw_loss * dt * (self.dhw - p.ambient_temperature) / (p.dhw_volume * c)
+
+        # Dom a termostat s hysterézou
+        self.room += (heating_power - p.house_loss * (self.room - self.outdoor_temperature(now))) * dt / p.house_capacity
+        setpoint = self.room_setpoint(now)
+        if self.room < setpoint - p.thermostat_hysteresis:
+            self.heating_demand = True
+        elif self.room > setpoint + p.thermostat_hysteresis:
+            self.heating_demand = False
+        self.room_min = min(self.room_min, self.room)
+        self.room_max = max(self.room_max, self.room)
+
+    def summary(self) -> dict:
+        """Energy balance (kWh) and comfort of the simulated period."""
+        return {
+            "energy_kwh": {key: round(value, 2) for key, value in self.energy.items()},
+            "hp_full_load_h": round(self.hp_full_load / 3600, 2),
+            "dhw_uncomfortable_min": round(self.dhw_uncomfortable / 60, 1),
+            "room_min": round(self.room_min, 2),
+            "room_max": round(self.room_max, 2),
+            "acc1_top": round(self.acc1.top, 1),
+            "acc2_top": round(self.acc2.top, 1),
+            "dhw": round(self.dhw, 1),
+        }
+
+
+async def async_simulate(
+    duration: float,
+    mode: int = DEFAULT_HEATING_OPERATING_MODE,
+    options: dict | None = None,
+    namespace: str = DOMAIN,
+    parameters: PlantParameters | None = None,
+    start: float = SIMULATION_START,
+) -> tuple[ReplayResult, ThermalPlant]:
+    """Run the controller against the simulated plant for duration seconds of virtual time."""
+    replay = Replay(options, namespace, echo=False)
+    replay.clock.now = start
+    plant = ThermalPlant(replay, parameters)
+    changes = plant.initial_changes(start, mode)
+    plant.attach()
+    result = await replay.async_run(changes, tail=duration)
+    return result, plant
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run the Heating Controller against a simulated thermal plant.")
+    parser.add_argument("--days", type=float, default=1.0, help="simulated days")
+    parser.add_argument("--mode", type=int, default=DEFAULT_HEATING_OPERATING_MODE, choices=HEATING_OPERATING_MODE_OPTIONS, help="heating operating mode")
+    parser.add_argument("--option", action="append", default=[], metavar="KEY=VALUE", help="integration option (repeatable)")
+    parser.add_argument("--parameter", action="append", default=[], metavar="NAME=VALUE", help="plant parameter of PlantParameters (repeatable)")
+    parser.add_argument("--actuations", action="store_true", help="print every actuation (JSON lines)")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    options = dict(option.split("=", 1) for option in args.option)
+    parameters = PlantParameters()
+    for item in args.parameter:
+        name, _separator, value = item.partition("=")
+        setattr(parameters, name, type(getattr(parameters, name))(value))
+
+    result, plant = asyncio.run(async_simulate(args.days * 86400, args.mode, options, parameters=parameters))
+    if args.actuations:
+        for actuation in result.actuations:
+            print(json.dumps(actuation._asdict()))
+    print(json.dumps({
+        "mode": args.mode,
+        "days": args.days,
+        "actuations": len(result.actuations),
+        "wall_s": round(result.wall_time, 3),
+        "speed": round(result.speed, 1),
+        **plant.summary(),
+    }))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
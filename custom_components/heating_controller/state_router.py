@@ -0,0 +1,89 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" state_router.py """
+
+"""Shared state-change dispatcher for all Heating Controller instances.
+
+Jeden odber zmien stavu na entitu pre celú doménu, bez ohľadu na počet inštancií
+(kotolní). Index entity -> inštancie smeruje každú udalosť state_changed len tým
+inštanciám, ktoré entitu čítajú. Odber entity vznikne s prvou inštanciou, ktorá
+ju potrebuje, a zanikne s poslednou.
+"""
+
+import logging
+from typing import Any, Callable
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_state_change_event
+
+LOGGER = logging.getLogger(__name__)
+
+
+class StateChangeRouter:
+    """Route state_changed events of tracked entities to the instances that track them."""
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self._index: dict[str, dict[Any, Callable]] = {}  # entity_id -> {vlastník: obsluha}
+        self._owned: dict[Any, frozenset[str]] = {}  # vlastník -> jeho entity
+        self._unsubs: dict[str, Callable[[], None]] = {}  # entity_id -> zrušenie odberu
+
+    def __len__(self) -> int:
+        """Number of entity subscriptions held for the whole domain."""
+        return len(self._unsubs)
+
+    def entities(self, owner) -> frozenset[str]:
+        """Entities tracked for owner."""
+        return self._owned.get(owner, frozenset())
+
+    @callback
+    def update(self, owner, entity_ids, action: Callable) -> tuple[frozenset[str], frozenset[str]]:
+        """
+        Set the entities tracked for owner. Returns (added, removed).
+        Nové entity sa prihlásia skôr, ako sa odhlásia odobrané - v jednom callbacku, bez medzery.
+        """
+        wanted = frozenset(entity_ids)
+        current = self._owned.get(owner, frozenset())
+        added = wanted - current
+        removed = current - wanted
+        for entity_id in wanted:
+            self._index.setdefault(entity_id, {})[owner] = action
+            if entity_id not in self._unsubs:
+                self._unsubs[entity_id] = async_track_state_change_event(self.hass, entity_id, self._async_route)
+        for entity_id in removed:
+            self._release(owner, entity_id)
+        if wanted:
+            self._owned[owner] = wanted
+        else:
+            self._owned.pop(owner, None)
+        return added, removed
+
+    @callback
+    def remove(self, owner) -> None:
+        """Stop tracking every entity of owner."""
+        for entity_id in self._owned.pop(owner, frozenset()):
+            self._release(owner, entity_id)
+
+    def _release(self, owner, entity_id: str) -> None:
+        owners = self._index.get(entity_id)
+        if owners is None:
+            return
+        owners.pop(owner, None)
+        if not owners:
+            del self._index[entity_id]
+            self._unsubs.pop(entity_id)()
+
+    @callback
+    def _async_route(self, event) -> None:
+        """One event, delivered to every instance tracking the entity."""
+        owners = self._index.get(event.data.get("entity_id"))
+        if not owners:
+            return
+        for action in tuple(owners.values()):
+            try:
+                action(event)
+            except Exception as e:
+                LOGGER.error(f"Error while handling state change of {event.data.get('entity_id')}: {e}")
@@ -9,18 +9,15 @@ from __future__ import annotations
 
 import logging
 from typing import Any
-from datetime import timedelta
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.event import async_call_later
 from homeassistant.helpers.restore_state import RestoreEntity
-from homeassistant.helpers.entity import DeviceInfo
 
 from .const import *
+from .scheduler import TIMER_HEAT_DHW_FROM_ACC_TIMEOUT
 
 LOGGER = logging.getLogger(__name__)
 
@@ -126,17 +123,16 @@ class HeatingControllerSwitch(SwitchEntity, RestoreEntity):
         """Initialize the switch."""
         self._instance = instance
         self._entry_id = entry_id
-        self._attr_unique_id = f"{DOMAIN}_{entity_id}"
+        self._attr_unique_id = f"{instance.namespace}_{entity_id}"
         self._attr_has_entity_name = True
         self._attr_translation_key = entity_id
-        self.entity_id = f"switch.{DOMAIN}_{entity_id}"  # Fixed entity_id
+        self.entity_id = f"switch.{instance.namespace}_{entity_id}"  # Fixed entity_id
         self._icon_on = icon
         self._icon_off = icon_off if icon_off else icon
         self._entity_id = entity_id
         self._initial_state = initial_state
         self._attr_is_on = initial_state
         self._hass = None
-        self._timer_cancel = None
         self._restore_state = restore_state
     
     @property
@@ -161,28 +157,13 @@ class HeatingControllerSwitch(SwitchEntity, RestoreEntity):
                 self._attr_is_on = self._initial_state
                 LOGGER.debug(f"No saved state for {self.entity_id}, using initial: {self._attr_is_on}")
         
-        # Subscribe to updates
-        self.async_on_remove(
-            async_dispatcher_connect(
-                self.hass,
-                f"{DOMAIN}_feedback_update_{self._entry_id}",
-                self._handle_feedback_update,
-            )
-        )
-
     async def async_will_remove_from_hass(self) -> None:
         """Run when entity will be removed from hass."""
         await super().async_will_remove_from_hass()
         
         # Zrušiť časovač ak existuje
-        if self._timer_cancel:
-            self._timer_cancel()
-            self._timer_cancel = None
-
-    @callback
-    def _handle_feedback_update(self) -> None:
-        """Handle feedback update."""
-        self.async_write_ha_state()
+        if self._entity_id == ENTITY_HEAT_DHW_FROM_ACC:
+            self._instance.scheduler.cancel(TIMER_HEAT_DHW_FROM_ACC_TIMEOUT)
 
     async def async_turn_on(self, **kwargs: Any) -> None:
         """Turn the switch on."""
@@ -196,19 +177,15 @@ class HeatingControllerSwitch(SwitchEntity, RestoreEntity):
         
         # Časovač pre heat_dhw_from_acc
         if self._entity_id == ENTITY_HEAT_DHW_FROM_ACC and self._hass:
-            # Zrušiť existujúci časovač ak existuje
-            if self._timer_cancel:
-                self._timer_cancel()
-                self._timer_cancel = None
-            
             # Získať timeout z konfigurácie
             timeout_minutes = self._hass.data[DOMAIN][self._entry_id].get(CONF_TIMEOUT_HEAT_DHW, DEFAULT_TIMEOUT_HEAT_DHW)
             
-            # Spustiť nový časovač
-            self._timer_cancel = async_call_later(
-                self._hass,
+            # Spustiť nový časovač (preplánovanie zruší existujúci)
+            self._instance.scheduler.schedule(
+                TIMER_HEAT_DHW_FROM_ACC_TIMEOUT,
                 timeout_minutes * 60,  # konverzia minút na sekundy
-                self._timer_finished
+                self._timer_finished,
+                wake=False,
             )
             LOGGER.info(f"Heat DHW from ACC timer started for {timeout_minutes} minutes")
         
@@ -243,9 +220,7 @@ class HeatingControllerSwitch(SwitchEntity, RestoreEntity):
             await self._toggle_exclusive_switch(ENTITY_HP_ACC, True)
         
         # Zrušiť časovač pre heat_dhw_from_acc
-        if self._entity_id == ENTITY_HEAT_DHW_FROM_ACC and self._timer_cancel:
-            self._timer_cancel()
-            self._timer_cancel = None
+        if self._entity_id == ENTITY_HEAT_DHW_FROM_ACC and self._instance.scheduler.cancel(TIMER_HEAT_DHW_FROM_ACC_TIMEOUT):
             LOGGER.info("Heat DHW from ACC timer cancelled")
         
         self._attr_is_on = False
@@ -294,9 +269,8 @@ class HeatingControllerSwitch(SwitchEntity, RestoreEntity):
             return False
     
     @callback
-    def _timer_finished(self, _now=None) -> None:
+    def _timer_finished(self) -> None:
         """Called when heat_dhw_from_acc timer finishes."""
-        LOGGER.info(f"Heat DHW from ACC timer finished - turning OFF")
-        self._timer_cancel = None
+        LOGGER.info("Heat DHW from ACC timer finished - turning OFF")
         self._attr_is_on = False
         self.async_write_ha_state()
\ No newline at end of file
@@ -0,0 +1,234 @@
+from __future__ import annotations
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" trace.py """
+
+"""Binary trace of control cycles for Heating Controller integration.
+
+Každý kontrolný cyklus sa zapíše ako jeden záznam pevnej dĺžky (struct):
+vstupy (snímok), režim, odvodené hodnoty z plánu (preferované ACC, teploty,
+setpointy), riadiace príkazy, požadované stavy ventilov / čerpadiel a počet
+odoslaných príkazov. Záznamy sú v predalokovanom kruhovom bufferi v pamäti
+a do súboru sa zapisujú hromadne, v executore. Pri ~54 B na cyklus sa týždne
+histórie zmestia do niekoľkých MB, bez drahého DEBUG logovania.
+
+Súbor: hlavička _HEADER (magic, verzia, dĺžka záznamu), potom záznamy _RECORD.
+Dekódovanie: read_trace_file(path) -> zoznam slovníkov (decode_record).
+"""
+
+import dataclasses
+import logging
+import math
+import os
+import struct
+
+from .const import *
+from .control_logic import PUMP_KEYS, VALVE_KEYS, ControlPlan, InputSnapshot
+from .inputs import SNAPSHOT_FIELDS
+
+LOGGER = logging.getLogger(__name__)
+
+TRACE_MAGIC = b"HCTR"
+TRACE_VERSION = 1
+
+# Záznam jedného cyklu (little-endian, bez zarovnania):
+#   d  čas (epoch s)                    B  heating_operating_mode        H  príznaky (_FLAG_*)
+#   Q  stavy ventilov / čerpadiel / termostatov, 3 bity na vstup (_STATE_CODES)
+#   I  bitová mapa neplatných vstupov (poradie SNAPSHOT_FIELDS)
+#   5e teploty ACC1, ACC2, TUV, žiadaná TUV, žiadaná ACC (NaN = neplatná)
+#   2B preferred_output_ACC, preferred_input_ACC
+#   4e higher / lower_temperature_acc_value, temperature_setpoint, temperature_setpoint_hp
+#   2B controll_command_on_off, controll_command_hp_on_off
+#   2e control_command_temperature, control_command_hp_temperature
+#   I  požadované stavy, 2 bity na akčný člen (_DESIRED_KEYS, 0 = bez požiadavky, 1 = vyp / zatvor, 2 = zap / otvor)
+#   B  počet odoslaných príkazov
+_RECORD = struct.Struct("<dBHQI5eBB4eBB2eIB")
+_HEADER = struct.Struct("<4sBH")
+RECORD_SIZE = _RECORD.size
+
+# Príznaky
+_BOOL_FIELDS = tuple(field.name for field in dataclasses.fields(InputSnapshot) if field.type in (bool, "bool"))
+_FLAG_MIN_ACC_TEMPERATURE_BROKEN = 1 << len(_BOOL_FIELDS)
+_FLAG_PLAN = _FLAG_MIN_ACC_TEMPERATURE_BROKEN << 1  # cyklus rozhodoval (automatický režim), inak len vstupy
+
+# Stavové vstupy (ventily, čerpadlá, termostaty) - kód stavu na 3 bity
+_STATE_FIELDS = tuple(field.name for field in dataclasses.fields(InputSnapshot) if field.type in (str, "str"))
+_STATE_CODES = {STATE_OFF: 1, STATE_ON: 2, STATE_CLOSED: 3, STATE_OPEN: 4, STATE_CLOSING: 5, STATE_OPENING: 6}
+_STATE_NAMES = {code: state for state, code in _STATE_CODES.items()}
+
+# Akčné členy v poradí bitov požadovaných stavov
+_DESIRED_KEYS = VALVE_KEYS + PUMP_KEYS + ("hp_dhw", "heat_dhw_from_acc")
+_DESIRED_CODES = {None: 0, False: 1, STATE_CLOSED: 1, True: 2, STATE_OPEN: 2}
+
+
+def _half(value) -> float:
+    """Hodnota pre pole 'e' - neplatná / mimo rozsahu ako NaN."""
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return math.nan
+    return value if -65504.0 <= value <= 65504.0 else math.nan
+
+
+def encode_record(timestamp: float, snapshot: InputSnapshot, plan: ControlPlan | None = None, commands_sent: int = 0) -> tuple:
+    """Values of one trace record in the order of _RECORD."""
+    flags = 0
+    for bit, field in enumerate(_BOOL_FIELDS):
+        if getattr(snapshot, field):
+            flags |= 1 << bit
+    states = 0
+    for index, field in enumerate(_STATE_FIELDS):
+        states |= _STATE_CODES.get(getattr(snapshot, field), 0) << (3 * index)
+    invalid = 0
+    for field in snapshot.invalid:
+        invalid |= 1 << SNAPSHOT_FIELDS.index(field)
+    temperatures = (
+        _half(snapshot.temperature_acc1),
+        _half(snapshot.temperature_acc2),
+        _half(snapshot.temperature_dhw),
+        _half(snapshot.dhw_target_temperature),
+        _half(snapshot.acc_target_temperature),
+    )
+
+    if plan is None:
+        return (timestamp, snapshot.heating_operating_mode or 0, flags, states, invalid, *temperatures,
+                0, 0, math.nan, math.nan, math.nan, math.nan, 0, 0, math.nan, math.nan, 0, commands_sent)
+
+    flags |= _FLAG_PLAN
+    if plan.min_acc_temperature_for_heating_limit_broken:
+        flags |= _FLAG_MIN_ACC_TEMPERATURE_BROKEN
+    desired = 0
+    requests = [plan.valves.get(key) for key in VALVE_KEYS] + [plan.pumps.get(key) for key in PUMP_KEYS]
+    requests += [plan.hp_dhw, plan.heat_dhw_from_acc]
+    for index, request in enumerate(requests):
+        desired |= _DESIRED_CODES.get(request, 0) << (2 * index)
+    return (
+        timestamp, snapshot.heating_operating_mode or 0, flags, states, invalid, *temperatures,
+        plan.preferred_output_ACC, plan.preferred_input_ACC,
+        _half(plan.higher_temperature_acc_value), _half(plan.lower_temperature_acc_value),
+        _half(plan.temperature_setpoint), _half(plan.temperature_setpoint_hp),
+        int(plan.controll_command_on_off), int(plan.controll_command_hp_on_off),
+        _half(plan.control_command_temperature), _half(plan.control_command_hp_temperature),
+        desired, min(commands_sent, 255),
+    )
+
+
+def decode_record(values: tuple) -> dict:
+    """Readable form of one unpacked trace record."""
+    (timestamp, mode, flags, states, invalid, acc1, acc2, dhw, dhw_target, acc_target,
+     preferred_output, preferred_input, higher, lower, setpoint, setpoint_hp,
+     command_on_off, command_hp_on_off, command_temperature, command_hp_temperature,
+     desired, commands_sent) = values
+    record = {
+        "time": timestamp,
+        "heating_operating_mode": mode,
+        **{field: bool(flags >> bit & 1) for bit, field in enumerate(_BOOL_FIELDS)},
+        "temperature_acc1": acc1,
+        "temperature_acc2": acc2,
+        "temperature_dhw": dhw,
+        "dhw_target_temperature": dhw_target,
+        "acc_target_temperature": acc_target,
+        **{field: _STATE_NAMES.get(states >> (3 * index) & 7) for index, field in enumerate(_STATE_FIELDS)},
+        "invalid": tuple(field for index, field in enumerate(SNAPSHOT_FIELDS) if invalid >> index & 1),
+        "commands_sent": commands_sent,
+    }
+    if not flags & _FLAG_PLAN:
+        return record
+    codes = {0: None, 1: False, 2: True}
+    record.update(
+        min_acc_temperature_for_heating_limit_broken=bool(flags & _FLAG_MIN_ACC_TEMPERATURE_BROKEN),
+        preferred_output_ACC=preferred_output,
+        preferred_input_ACC=preferred_input,
+        higher_temperature_acc_value=higher,
+        lower_temperature_acc_value=lower,
+        temperature_setpoint=setpoint,
+        temperature_setpoint_hp=setpoint_hp,
+        controll_command_on_off=command_on_off,
+        controll_command_hp_on_off=command_hp_on_off,
+        control_command_temperature=command_temperature,
+        control_command_hp_temperature=command_hp_temperature,
+        desired={key: codes.get(desired >> (2 * index) & 3) for index, key in enumerate(_DESIRED_KEYS)},
+    )
+    return record
+
+
+class TraceRecorder:
+    """Preallocated ring buffer of packed cycle records."""
+
+    def __init__(self, capacity: int = TRACE_CAPACITY) -> None:
+        self._capacity = capacity
+        self._buffer = bytearray(capacity * RECORD_SIZE)
+        self._written = 0  # počet všetkých zapísaných záznamov
+        self._flushed = 0  # počet záznamov odovzdaných na zápis do súboru (alebo prepísaných)
+        self.dropped = 0  # záznamy prepísané skôr, ako sa stihli zapísať do súboru
+
+    def __len__(self) -> int:
+        return min(self._written, self._capacity)
+
+    @property
+    def pending(self) -> int:
+        """Records not handed over to the file yet."""
+        return self._written - self._flushed
+
+    def record(self, timestamp: float, snapshot: InputSnapshot, plan: ControlPlan | None = None, commands_sent: int = 0) -> None:
+        """Pack one cycle into the next slot of the ring buffer."""
+        _RECORD.pack_into(
+            self._buffer, (self._written % self._capacity) * RECORD_SIZE,
+            *encode_record(timestamp, snapshot, plan, commands_sent),
+        )
+        self._written += 1
+        if self.pending > self._capacity:
+            self.dropped += self.pending - self._capacity
+            self._flushed = self._written - self._capacity
+
+    def take_pending(self) -> bytes:
+        """Packed records since the last call, oldest first."""
+        count = self.pending
+        if not count:
+            return b""
+        start = (self._flushed % self._capacity) * RECORD_SIZE
+        end = start + count * RECORD_SIZE
+        if end <= len(self._buffer):
+            data = bytes(self._buffer[start:end])
+        else:
+            data = bytes(self._buffer[start:]) + bytes(self._buffer[:end - len(self._buffer)])
+        self._flushed = self._written
+        return data
+
+    def records(self) -> list[dict]:
+        """Decoded records held in memory, oldest first."""
+        first = self._written - len(self)
+        return [
+            decode_record(_RECORD.unpack_from(self._buffer, (index % self._capacity) * RECORD_SIZE))
+            for index in range(first, self._written)
+        ]
+
+
+def append_trace_file(path: str, data: bytes, max_bytes: int = TRACE_FILE_MAX_BYTES) -> None:
+    """Append packed records to the trace file (executor job). A full file is rotated to path + '.1'."""
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        size = 0
+    if size and size + len(data) > max_bytes:
+        os.replace(path, path + ".1")
+        size = 0
+    with open(path, "ab") as file:
+        if not size:
+            file.write(_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, RECORD_SIZE))
+        file.write(data)
+
+
+def read_trace_file(path: str) -> list[dict]:
+    """Decode a trace file written by append_trace_file."""
+    with open(path, "rb") as file:
+        data = file.read()
+    magic, version, record_size = _HEADER.unpack_from(data)
+    if magic != TRACE_MAGIC or version != TRACE_VERSION or record_size != RECORD_SIZE:
+        raise ValueError(f"{path} is not a Heating Controller trace of version {TRACE_VERSION}")
+    body = data[_HEADER.size:]
+    # neúplný posledný záznam (prerušený zápis) sa vynechá
+    body = body[:len(body) - len(body) % RECORD_SIZE]
+    return [decode_record(values) for values in _RECORD.iter_unpack(body)]
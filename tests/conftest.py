@@ -0,0 +1,74 @@
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" conftest.py """
+
+"""Spoločné fixtures pre testy čistých častí integrácie (bez bežiaceho Home Assistant).
+
+Spustenie z koreňa repozitára (vyžaduje nainštalovaný Home Assistant):
+    python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), os.pardir))
+
+from custom_components.heating_controller import coalescer, scheduler
+
+
+class FakeClock:
+    """Monotónne hodiny posúvané testom - náhrada modulu time."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+class FakeTimers:
+    """Náhrada async_call_later - časovače sa spúšťajú ručne cez advance()."""
+
+    def __init__(self, clock: FakeClock) -> None:
+        self._clock = clock
+        self.pending = []  # [deadline, action, active]
+
+    def call_later(self, _hass, delay, action):
+        entry = [self._clock.now + delay, action, True]
+        self.pending.append(entry)
+
+        def cancel() -> None:
+            entry[2] = False
+
+        return cancel
+
+    def advance(self, seconds: float) -> None:
+        """Posunie čas a spustí splatné časovače."""
+        self._clock.now += seconds
+        while True:
+            due = [entry for entry in self.pending if entry[2] and entry[0] <= self._clock.now]
+            if not due:
+                break
+            for entry in due:
+                entry[2] = False
+                entry[1](None)
+        self.pending = [entry for entry in self.pending if entry[2]]
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    for module in (coalescer, scheduler):
+        monkeypatch.setattr(module, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def timers(monkeypatch, clock) -> FakeTimers:
+    timers = FakeTimers(clock)
+    monkeypatch.setattr(scheduler, "async_call_later", timers.call_later)
+    return timers
@@ -0,0 +1,145 @@
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" test_actuators.py """
+
+"""Tests of the desired-state diff, in-flight suppression and staged dispatch."""
+
+import asyncio
+
+from homeassistant.const import STATE_ON, STATE_OFF
+
+from custom_components.heating_controller.actuators import (
+    ACTUATOR_INTERNAL,
+    ACTUATOR_PUMP,
+    ACTUATOR_VALVE,
+    STAGE_PREPARE,
+    STAGE_PUMPS_ON,
+    STAGE_VALVES,
+    ActuatorCommand,
+    DesiredState,
+    InFlightRegistry,
+    async_dispatch_commands,
+    diff_desired_states,
+)
+from custom_components.heating_controller.const import *
+
+VALVE = "cover.valve"
+PUMP = "switch.pump"
+
+
+class State:
+    __slots__ = ("state",)
+
+    def __init__(self, state: str) -> None:
+        self.state = state
+
+
+class States(dict):
+    """Minimálna náhrada hass.states."""
+
+    def get(self, entity_id):
+        value = dict.get(self, entity_id)
+        return None if value is None else State(value)
+
+
+def test_no_command_when_observed_matches_target():
+    table = [DesiredState(ACTUATOR_VALVE, "valve", VALVE, STATE_OPEN, STATE_OPEN)]
+    assert diff_desired_states(table, {}) == []
+
+
+def test_command_for_real_difference():
+    table = [
+        DesiredState(ACTUATOR_VALVE, "valve", VALVE, STATE_OPEN, STATE_CLOSED),
+        DesiredState(ACTUATOR_PUMP, "pump", PUMP, STATE_ON, STATE_OFF),
+    ]
+    commands = diff_desired_states(table, {})
+    assert [(command.entity_id, command.service, command.stage) for command in commands] == [
+        (VALVE, SWITCH_to_OPEN, STAGE_VALVES),
+        (PUMP, TURN_ON, STAGE_PUMPS_ON),
+    ]
+
+
+def test_pump_off_goes_before_valves():
+    table = [DesiredState(ACTUATOR_PUMP, "pump", PUMP, STATE_OFF, STATE_ON)]
+    assert diff_desired_states(table, {})[0].stage == STAGE_PREPARE
+
+
+def test_in_flight_command_suppresses_resend():
+    table = [DesiredState(ACTUATOR_INTERNAL, "hp_dhw", "switch.hp_dhw", STATE_ON, STATE_OFF)]
+    assert diff_desired_states(table, {"switch.hp_dhw": STATE_ON}) == []
+    # čakajúci príkaz s iným cieľom neblokuje nový príkaz
+    assert len(diff_desired_states(table, {"switch.hp_dhw": STATE_OFF})) == 1
+
+
+def test_moving_valve_gets_no_command():
+    table = [DesiredState(ACTUATOR_VALVE, "valve", VALVE, STATE_CLOSED, STATE_OPENING)]
+    assert diff_desired_states(table, {}) == []
+
+
+def test_in_flight_confirmation_and_timeout():
+    registry = InFlightRegistry()
+    registry.register(VALVE, STATE_OPEN, 15, now=0.0)
+    registry.register(PUMP, STATE_ON, 10, now=0.0)
+    registry.observe(VALVE, STATE_OPENING)
+    assert registry.targets() == {VALVE: STATE_OPEN, PUMP: STATE_ON}
+    registry.observe(VALVE, STATE_OPEN)
+    assert registry.confirmations == 1
+    assert registry.remaining(PUMP, now=4.0) == 6.0
+    registry.expire(now=10.0)
+    assert registry.timeouts == 1
+    assert len(registry) == 0
+
+
+def test_observe_states_confirms_entities_outside_the_table():
+    # plán medzi cyklami preklopil hp_dhw -> hp_acc, hp_dhw už v tabuľke nie je
+    registry = InFlightRegistry()
+    registry.register("switch.hp_dhw", STATE_ON, 10, now=0.0)
+    registry.observe_states(States({"switch.hp_dhw": STATE_ON}))
+    registry.expire(now=20.0)
+    assert registry.confirmations == 1
+    assert registry.timeouts == 0
+
+
+def test_dispatch_runs_stages_in_order_and_bounds_each_command():
+    sent = []
+
+    async def send(command: ActuatorCommand) -> bool:
+        if command.entity_id == "cover.stuck":
+            await asyncio.sleep(10)
+        sent.append(command.entity_id)
+        return True
+
+    commands = [
+        ActuatorCommand(STAGE_PUMPS_ON, "switch", TURN_ON, PUMP, "pump", STATE_ON),
+        ActuatorCommand(STAGE_VALVES, "cover", SWITCH_to_OPEN, "cover.stuck", "valve1", STATE_OPEN),
+        ActuatorCommand(STAGE_VALVES, "cover", SWITCH_to_OPEN, VALVE, "valve2", STATE_OPEN),
+    ]
+    results = asyncio.run(async_dispatch_commands(commands, send, 0.05))
+    assert sent == [VALVE, PUMP]
+    assert {command.entity_id: ok for command, ok in results} == {"cover.stuck": False, VALVE: True, PUMP: True}
+
+
+def test_dispatch_sends_one_stage_concurrently():
+    running = []
+    peak = []
+
+    async def send(command: ActuatorCommand) -> bool:
+        running.append(command.entity_id)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.remove(command.entity_id)
+        return True
+
+    commands = [ActuatorCommand(STAGE_PREPARE, "switch", TURN_OFF, f"switch.pump{index}", "pump", STATE_OFF) for index in range(4)]
+    asyncio.run(async_dispatch_commands(commands, send, 1))
+    assert max(peak) == 4
+
+
+def test_failed_command_is_reported_as_not_sent():
+    async def send(command: ActuatorCommand) -> bool:
+        raise RuntimeError("service not found")
+
+    command = ActuatorCommand(STAGE_PREPARE, "switch", TURN_OFF, PUMP, "pump", STATE_OFF)
+    assert asyncio.run(async_dispatch_commands([command], send, 1)) == [(command, False)]
@@ -0,0 +1,81 @@
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" test_coalescer.py """
+
+"""Tests of the adaptive coalescing window and its latency bounds."""
+
+import pytest
+
+from custom_components.heating_controller.coalescer import (
+    INPUT_PRIORITY,
+    INPUT_SAFETY,
+    TIMER_COALESCE,
+    EventCoalescer,
+)
+from custom_components.heating_controller.const import COALESCE_MAX_LATENCY, COALESCE_WINDOW_MAX, COALESCE_WINDOW_MIN
+from custom_components.heating_controller.scheduler import DeadlineScheduler
+
+
+@pytest.fixture
+def cycles() -> list:
+    return []
+
+
+@pytest.fixture
+def coalescer(timers, cycles) -> EventCoalescer:
+    scheduler = DeadlineScheduler(on_wake=lambda: cycles.append("wake"))
+    scheduler.hass = object()
+    return EventCoalescer(scheduler, lambda: cycles.append("bypass"))
+
+
+def test_single_event_waits_minimal_window(coalescer, timers, cycles):
+    coalescer.notify()
+    assert coalescer._scheduler.remaining(TIMER_COALESCE) == pytest.approx(COALESCE_WINDOW_MIN)
+    timers.advance(COALESCE_WINDOW_MIN)
+    assert cycles == ["wake"]
+    assert coalescer.stats()["cycles"] == 1
+
+
+def test_burst_widens_window_up_to_maximum(coalescer, timers):
+    for _ in range(20):
+        coalescer.notify()
+        timers.advance(0.05)
+    assert COALESCE_WINDOW_MIN < coalescer.window <= COALESCE_WINDOW_MAX
+    assert coalescer.stats()["merged_events"] == 19
+
+
+def test_continuous_burst_never_exceeds_max_latency(coalescer, timers, clock, cycles):
+    first = clock.now
+    while not cycles:
+        coalescer.notify()
+        timers.advance(0.1)
+    assert clock.now - first <= COALESCE_MAX_LATENCY + 0.1
+
+
+def test_priority_input_closes_window_early(coalescer, timers, cycles):
+    for _ in range(10):
+        coalescer.notify()
+        timers.advance(0.05)
+    coalescer.notify(INPUT_PRIORITY)
+    assert coalescer._scheduler.remaining(TIMER_COALESCE) <= COALESCE_WINDOW_MIN + 1e-9
+
+
+def test_safety_input_bypasses_window(coalescer, cycles):
+    coalescer.notify()
+    coalescer.notify(INPUT_SAFETY)
+    assert cycles == ["bypass"]
+    assert not coalescer.pending
+    assert coalescer.stats()["bypassed_events"] == 1
+
+
+def test_quiet_period_shrinks_window(coalescer, timers):
+    for _ in range(10):
+        coalescer.notify()
+        timers.advance(0.05)
+    widened = coalescer.window
+    timers.advance(COALESCE_MAX_LATENCY + COALESCE_WINDOW_MAX)
+    coalescer.notify()
+    assert coalescer.window < widened
+    assert coalescer.window >= COALESCE_WINDOW_MIN
@@ -0,0 +1,141 @@
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" test_control_logic.py """
+
+"""Tests of the pure decision core (control_logic.decide) per heating operating mode."""
+
+import pytest
+
+from custom_components.heating_controller.const import *
+from custom_components.heating_controller.control_logic import (
+    ControllerState,
+    InputSnapshot,
+    decide,
+    temperature_change_relevant,
+    temperature_margins,
+)
+from custom_components.heating_controller.heating_controller import Heating_Controller_Instance
+
+AUTOMATIC_MODES = [mode for mode in HEATING_OPERATING_MODE_OPTIONS if mode != HEATING_OPERATING_MODE_MANUAL]
+PDHW_MODES = (HEATING_OPERATING_MODE_PDHW_DHW, HEATING_OPERATING_MODE_PDHW_ACC, HEATING_OPERATING_MODE_PDHW_DHW_ACC)
+
+# Teploty (ACC1, ACC2, TUV) pri žiadanej teplote 50 °C pre ACC aj TUV
+COLD = (30.0, 30.0, 30.0)
+WARM = (70.0, 70.0, 70.0)
+DHW_COLD = (70.0, 70.0, 30.0)
+ACC_COLD = (30.0, 30.0, 60.0)
+
+
+def snapshot(mode: int, temperatures: tuple[float, float, float], **changes) -> InputSnapshot:
+    """Snímok vstupov - všetky ventily zatvorené, čerpadlá a termostaty vypnuté."""
+    acc1, acc2, dhw = temperatures
+    values = dict(
+        automatic_mode=True, acc1_enable=True, acc2_enable=True, heat_dhw_from_acc=False,
+        hp_acc=True, hp_dhw=False, heating_source_input_on_off=True,
+        dhw_target_temperature=50.0, acc_target_temperature=50.0, heating_operating_mode=mode,
+        temperature_acc1=acc1, temperature_acc2=acc2, temperature_dhw=dhw,
+        valve_from_hp_to_acc_or_dhw=STATE_CLOSED, valve_output_acc1=STATE_CLOSED, valve_output_acc2=STATE_CLOSED,
+        valve_input_acc1=STATE_CLOSED, valve_input_acc2=STATE_CLOSED, valve_from_acc_to_heat_or_dhw=STATE_CLOSED,
+        valve_output_heating=STATE_CLOSED,
+        water_pump_acc_output=STATE_OFF, water_pump_dhw=STATE_OFF, water_pump_floor_heating=STATE_OFF,
+        water_pump_heating=STATE_OFF,
+        thermostat_state=STATE_OFF, heating_state=STATE_OFF, floor_heating_state=STATE_OFF,
+    )
+    values.update(changes)
+    return InputSnapshot(**values)
+
+
+@pytest.fixture
+def settings():
+    return Heating_Controller_Instance.Settings()
+
+
+@pytest.mark.parametrize("mode", HEATING_OPERATING_MODE_OPTIONS)
+def test_decide_is_pure(settings, mode):
+    inputs = snapshot(mode, COLD)
+    state = ControllerState()
+    first = decide(inputs, settings, state)
+    second = decide(inputs, settings, state)
+    assert first == second
+    assert state == ControllerState()
+
+
+@pytest.mark.parametrize("mode", AUTOMATIC_MODES)
+def test_warm_tanks_stop_heating_source(settings, mode):
+    plan = decide(snapshot(mode, WARM), settings, ControllerState())
+    assert plan.controll_command_hp_on_off == 0
+    assert plan.controll_command_on_off == 0
+
+
+@pytest.mark.parametrize("mode", AUTOMATIC_MODES)
+def test_cold_tanks_start_heating_source(settings, mode):
+    plan = decide(snapshot(mode, COLD), settings, ControllerState())
+    assert plan.controll_command_hp_on_off == 1
+    assert plan.hp_on_off == STATE_ON
+
+
+@pytest.mark.parametrize("mode", (HEATING_OPERATING_MODE_DHW, HEATING_OPERATING_MODE_DHW_ACC))
+def test_cold_dhw_routes_heat_pump_to_dhw(settings, mode):
+    plan = decide(snapshot(mode, DHW_COLD), settings, ControllerState())
+    assert plan.hp_dhw is True
+    assert plan.controll_command_hp_on_off == 1
+    assert plan.valves[CONF_VALVE_FROM_TC_TO_ACC_OR_DHW] == STATE_CLOSED
+
+
+@pytest.mark.parametrize("mode", (HEATING_OPERATING_MODE_ACC, HEATING_OPERATING_MODE_PDHW_ACC))
+def test_acc_modes_ignore_cold_dhw(settings, mode):
+    plan = decide(snapshot(mode, DHW_COLD), settings, ControllerState())
+    assert plan.hp_dhw is False
+    assert plan.controll_command_hp_on_off == 0
+
+
+@pytest.mark.parametrize("mode", (HEATING_OPERATING_MODE_ACC, HEATING_OPERATING_MODE_PDHW_ACC, HEATING_OPERATING_MODE_DHW_ACC, HEATING_OPERATING_MODE_PDHW_DHW_ACC))
+def test_cold_acc_routes_heat_pump_to_acc(settings, mode):
+    plan = decide(snapshot(mode, ACC_COLD), settings, ControllerState())
+    assert plan.hp_dhw is False
+    assert plan.controll_command_hp_on_off == 1
+    assert plan.valves[CONF_VALVE_FROM_TC_TO_ACC_OR_DHW] == STATE_OPEN
+
+
+@pytest.mark.parametrize("mode", PDHW_MODES)
+def test_warm_acc_preheats_cold_dhw(settings, mode):
+    plan = decide(snapshot(mode, DHW_COLD), settings, ControllerState())
+    assert plan.heat_dhw_from_acc is True
+    assert plan.controll_command_hp_on_off == 0
+
+
+@pytest.mark.parametrize("mode", (HEATING_OPERATING_MODE_DHW, HEATING_OPERATING_MODE_ACC, HEATING_OPERATING_MODE_DHW_ACC))
+def test_modes_without_preheating_never_transfer_acc_to_dhw(settings, mode):
+    plan = decide(snapshot(mode, DHW_COLD), settings, ControllerState())
+    assert plan.heat_dhw_from_acc is not True
+
+
+def test_manual_mode_leaves_heat_pump_routing_alone(settings):
+    plan = decide(snapshot(HEATING_OPERATING_MODE_MANUAL, COLD), settings, ControllerState())
+    assert plan.hp_dhw is None
+
+
+def test_missing_input_suspends_only_its_subcontroller(settings):
+    inputs = snapshot(HEATING_OPERATING_MODE_DHW_ACC, COLD, valve_output_acc1=None, invalid=("valve_output_acc1",))
+    plan = decide(inputs, settings, ControllerState())
+    complete = decide(snapshot(HEATING_OPERATING_MODE_DHW_ACC, COLD), settings, ControllerState())
+    assert plan.valves[CONF_VALVE_OUTPUT_ACC1] is None
+    assert plan.controll_command_hp_on_off == complete.controll_command_hp_on_off
+
+
+def test_state_carries_mode_to_next_cycle(settings):
+    plan = decide(snapshot(HEATING_OPERATING_MODE_DHW, COLD), settings, ControllerState())
+    assert plan.state.heating_operating_mode_previous == HEATING_OPERATING_MODE_DHW
+
+
+def test_sensor_jitter_far_from_thresholds_is_not_relevant(settings):
+    margins = lambda dhw: temperature_margins(42.0, 38.0, dhw, True, True, 50.0, 50.0, settings)
+    assert not temperature_change_relevant(margins(33.0), margins(33.1), settings.temperature_deadband)
+
+
+def test_crossing_hysteresis_band_is_relevant(settings):
+    margins = lambda dhw: temperature_margins(42.0, 38.0, dhw, True, True, 50.0, 50.0, settings)
+    lower_band = 50.0 - settings.heating_source_temp_hysteresis / 2
+    assert temperature_change_relevant(margins(lower_band - 0.1), margins(lower_band + 0.1), settings.temperature_deadband)
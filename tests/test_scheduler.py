@@ -0,0 +1,74 @@
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" test_scheduler.py """
+
+"""Tests of the deadline scheduler - one HA timer, the cycle woken at most once."""
+
+from custom_components.heating_controller.scheduler import DeadlineScheduler
+
+
+def make_scheduler(wakes: list) -> DeadlineScheduler:
+    scheduler = DeadlineScheduler(on_wake=lambda: wakes.append(True))
+    scheduler.hass = object()
+    return scheduler
+
+
+def test_due_deadlines_wake_cycle_once(timers):
+    wakes, actions = [], []
+    scheduler = make_scheduler(wakes)
+    scheduler.schedule("a", 5, lambda: actions.append("a"))
+    scheduler.schedule("b", 5, lambda: actions.append("b"))
+    scheduler.schedule("c", 5)
+    assert len([entry for entry in timers.pending if entry[2]]) == 1
+    timers.advance(5)
+    assert sorted(actions) == ["a", "b"]
+    assert wakes == [True]
+
+
+def test_deadline_without_wake_runs_action_only(timers):
+    wakes, actions = [], []
+    scheduler = make_scheduler(wakes)
+    scheduler.schedule("flush", 1, lambda: actions.append("flush"), wake=False)
+    timers.advance(1)
+    assert actions == ["flush"]
+    assert wakes == []
+
+
+def test_earliest_deadline_drives_the_timer(timers):
+    wakes = []
+    scheduler = make_scheduler(wakes)
+    scheduler.schedule("late", 30)
+    scheduler.schedule("early", 2)
+    timers.advance(2)
+    assert wakes == [True]
+    assert "late" in scheduler and "early" not in scheduler
+    assert scheduler.remaining("late") == 28
+
+
+def test_keep_earlier_moves_later_deadline_forward(timers):
+    scheduler = make_scheduler([])
+    scheduler.schedule("rerun", 15, keep_earlier=True)
+    scheduler.schedule("rerun", 3, keep_earlier=True)
+    assert scheduler.remaining("rerun") == 3
+    scheduler.schedule("rerun", 10, keep_earlier=True)
+    assert scheduler.remaining("rerun") == 3
+
+
+def test_cancelled_deadline_never_fires(timers):
+    wakes, actions = [], []
+    scheduler = make_scheduler(wakes)
+    scheduler.schedule("a", 1, lambda: actions.append("a"))
+    assert scheduler.cancel("a")
+    timers.advance(5)
+    assert actions == [] and wakes == []
+
+
+def test_cancel_all_disarms_timer(timers):
+    scheduler = make_scheduler([])
+    scheduler.schedule("a", 1)
+    scheduler.schedule("b", 2)
+    scheduler.cancel_all()
+    assert not [entry for entry in timers.pending if entry[2]]
+    assert scheduler.remaining_all() == {}
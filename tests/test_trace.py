@@ -0,0 +1,50 @@
+"""The Heating Controller integration"""
+"""Author: Jozef Moravcik"""
+"""email: jozef.moravcik@moravcik.eu"""
+
+""" test_trace.py """
+
+"""Tests of the packed cycle trace - encode / decode round trip and the ring buffer."""
+
+from custom_components.heating_controller.const import *
+from custom_components.heating_controller.control_logic import ControllerState, decide
+from custom_components.heating_controller.heating_controller import Heating_Controller_Instance
+from custom_components.heating_controller.trace import TraceRecorder, append_trace_file, read_trace_file
+
+from test_control_logic import COLD, snapshot
+
+
+def test_record_round_trip():
+    inputs = snapshot(HEATING_OPERATING_MODE_DHW_ACC, COLD)
+    plan = decide(inputs, Heating_Controller_Instance.Settings(), ControllerState())
+    recorder = TraceRecorder(capacity=4)
+    recorder.record(1000.0, inputs, plan, 3)
+    (record,) = recorder.records()
+    assert record["time"] == 1000.0
+    assert record["heating_operating_mode"] == HEATING_OPERATING_MODE_DHW_ACC
+    assert record["temperature_dhw"] == 30.0
+    assert record["valve_output_acc1"] == STATE_CLOSED
+    assert record["controll_command_hp_on_off"] == plan.controll_command_hp_on_off
+    assert record["commands_sent"] == 3
+
+
+def test_ring_buffer_counts_dropped_records():
+    inputs = snapshot(HEATING_OPERATING_MODE_MANUAL, COLD)
+    recorder = TraceRecorder(capacity=4)
+    for index in range(6):
+        recorder.record(float(index), inputs)
+    assert len(recorder) == 4
+    assert recorder.dropped == 2
+    assert [record["time"] for record in recorder.records()] == [2.0, 3.0, 4.0, 5.0]
+
+
+def test_file_round_trip(tmp_path):
+    inputs = snapshot(HEATING_OPERATING_MODE_ACC, COLD)
+    recorder = TraceRecorder(capacity=8)
+    for index in range(3):
+        recorder.record(float(index), inputs)
+    path = str(tmp_path / "trace.bin")
+    append_trace_file(path, recorder.take_pending())
+    recorder.record(3.0, inputs)
+    append_trace_file(path, recorder.take_pending())
+    assert [record["time"] for record in read_trace_file(path)] == [0.0, 1.0, 2.0, 3.0]